@@ -25,8 +25,6 @@ import os
 import stat
 import tempfile
 import logging
-from anima.config import Config
-from stalker import SimpleEntity, Project
 
 __version__ = "0.8.0"
 
@@ -67,10 +65,6 @@ def set_generic_text_attr(self, attr, value):
     self.generic_text = json.dumps(data)
 
 
-SimpleEntity.get_generic_text_attr = get_generic_text_attr
-SimpleEntity.set_generic_text_attr = set_generic_text_attr
-
-
 # Patch Stalker.Project
 @property
 def is_managed(self):
@@ -101,8 +95,51 @@ def cache_format(self):
         return ALEMBIC
 
 
-Project.is_managed = is_managed
-Project.cache_format = cache_format
+def patch_stalker():
+    """Patch the Stalker classes to add new functionality."""
+    from stalker import SimpleEntity, Project
+
+    SimpleEntity.get_generic_text_attr = get_generic_text_attr
+    SimpleEntity.set_generic_text_attr = set_generic_text_attr
+
+    Project.is_managed = is_managed
+    Project.cache_format = cache_format
+
+
+class StalkerPatcher(object):
+    """Patch Stalker right after it is imported.
+
+    Importing Stalker imports SQLAlchemy and all the Stalker models, which takes a
+    considerable amount of time. So instead of importing Stalker to patch it, this
+    import hook patches it when it is imported by any other module.
+    """
+
+    def find_spec(self, fullname, path, target=None):
+        """Wrap the loader of the stalker package to patch it after it is loaded."""
+        if fullname != "stalker":
+            return None
+
+        sys.meta_path.remove(self)
+        import importlib.util
+
+        spec = importlib.util.find_spec(fullname)
+        if spec is None or spec.loader is None:
+            return spec
+
+        exec_module = spec.loader.exec_module
+
+        def exec_and_patch_module(module):
+            exec_module(module)
+            patch_stalker()
+
+        spec.loader.exec_module = exec_and_patch_module
+        return spec
+
+
+if "stalker" in sys.modules:
+    patch_stalker()
+else:
+    sys.meta_path.insert(0, StalkerPatcher())
 
 
 # create logger
@@ -139,4 +176,13 @@ os.chmod(
 
 TIMING_RESOLUTION = 10  # in minutes
 
-defaults = Config()
+
+def __getattr__(name):
+    """Create the defaults on first use, as it imports Stalker."""
+    if name == "defaults":
+        global defaults
+        from anima.config import Config
+
+        defaults = Config()
+        return defaults
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
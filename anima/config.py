@@ -17,6 +17,7 @@ class Config(ConfigBase):
         stalker_dummy_user_pass="anima",
         local_cache_folder="~/.cache/anima/",
         recent_file_name="recent_files",
+        reference_index_file_name="reference_index.db",
         avid_media_file_path_storage="avid_media_file_path",
         enable_ldap_authentication=False,
         enable_ldap_authorization=False,
@@ -48,6 +49,15 @@ class Config(ConfigBase):
         _user_names_lut={},  # a table for fast user name look up,
         cut_in=1001,
         cut_out=1100,
+        # database connection pool, see anima.utils.session_manager
+        database_pool_class="QueuePool",  # use "NullPool" to disable pooling
+        database_pool_size=5,
+        database_max_overflow=10,
+        database_pool_timeout=30,
+        database_pool_recycle=3600,
+        database_pool_pre_ping=True,
+        database_statement_timeout=0,  # in milliseconds, 0 is no timeout
+        database_read_only_url="",  # the url of a read-only replica
     )
 
     def __init__(self):
@@ -16,11 +16,10 @@ class Avid2Resolve(object):
     def read_avid_edl(self, avid_eld_path, fps="24"):
         """ """
         self.fps = fps
-        from edl import Parser
+        from anima.edit import parse_edl
 
-        p = Parser(fps)
         with open(avid_eld_path) as f:
-            self.events = p.parse(f)
+            self.events = parse_edl(f, fps)
 
     def get_shot_name(self, s):
         """returns the shot code from the given string"""
@@ -108,7 +107,12 @@ class Avid2Resolve(object):
     def convert_paths(self):
         """converts event paths with proper ones"""
         from stalker import Shot
-        import timecode
+        from anima.edit import frame_to_timecode, timecode_to_frame
+
+        # stupid AVID places the source clips to either 8th or 1st hour
+        first_hour = timecode_to_frame("01:00:00:00", self.fps)
+        eigth_hour = timecode_to_frame("07:59:00:00", self.fps)
+        twelfth_hour = timecode_to_frame("11:59:00:00", self.fps)
 
         # do a db connection
         for e in self.events:
@@ -127,19 +131,14 @@ class Avid2Resolve(object):
                     e.source_file = ""
 
             # set the in and out points correctly
-            # stupid AVID places the source clips to either 8th or 1st hour
-            first_hour = timecode.Timecode(self.fps, start_timecode="01:00:00:00")
-            eigth_hour = timecode.Timecode(self.fps, start_timecode="07:59:00:00")
-            twelfth_hour = timecode.Timecode(self.fps, start_timecode="11:59:00:00")
-            if e.src_start_tc.frames >= twelfth_hour.frames:
-                e.src_start_tc -= twelfth_hour - 1
-                e.src_end_tc -= twelfth_hour - 1
-            elif e.src_start_tc.frames >= eigth_hour.frames:
-                e.src_start_tc -= eigth_hour - 1
-                e.src_end_tc -= eigth_hour - 1
-            elif e.src_start_tc.frames >= first_hour.frames:
-                e.src_start_tc -= first_hour - 1
-                e.src_end_tc -= first_hour - 1
+            src_start = timecode_to_frame(e.src_start_tc, self.fps)
+            for hour in [twelfth_hour, eigth_hour, first_hour]:
+                if src_start >= hour:
+                    e.src_start_tc = frame_to_timecode(src_start - hour, self.fps)
+                    e.src_end_tc = frame_to_timecode(
+                        timecode_to_frame(e.src_end_tc, self.fps) - hour, self.fps
+                    )
+                    break
 
     def to_xml(self):
         """return an eml version of this edl"""
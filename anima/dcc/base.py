@@ -7,6 +7,112 @@ from anima.recent import RecentFileManager
 from anima.utils.progress import ProgressManagerFactory
 
 
+class RecentFilesProvider(object):
+    """Resolves the recent files of the DCCs to Versions.
+
+    The history files of the DCCs are parsed only once and are parsed again only
+    if they are changed, and all the recent file paths are resolved to Versions
+    with a single query.
+    """
+
+    _history_cache = {}
+
+    @classmethod
+    def read_history(cls, path, parser):
+        """Return the parsed content of the given history file.
+
+        The result is cached until the modification time or the size of the file
+        changes.
+
+        :param str path: The history file path.
+        :param parser: A callable that accepts the lines of the file and returns
+          the parsed data.
+        :return: The output of the parser or None if the file can not be read.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            cls._history_cache.pop(path, None)
+            return None
+
+        signature = (parser, stat.st_mtime, stat.st_size)
+        cached = cls._history_cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        try:
+            with open(path) as history_file:
+                data = parser(history_file.readlines())
+        except IOError:
+            return None
+        cls._history_cache[path] = (signature, data)
+        return data
+
+    @classmethod
+    def get_versions_from_full_paths(cls, full_paths):
+        """Find the Versions of the given paths with a single query.
+
+        :param list full_paths: A list of file paths.
+        :return dict: A dictionary of the given paths to their Versions. The paths
+          that are not matching any Version are skipped.
+        """
+        from stalker import Repository, Version
+
+        repos = Repository.query.all()
+
+        def to_os_independent_path(path):
+            """the Repository.to_os_independent_path without the repo query"""
+            expanded_path = os.path.expandvars(path)
+            for repo in repos:
+                if (
+                    expanded_path.startswith(repo.path)
+                    or expanded_path.lower().startswith(repo.windows_path.lower())
+                    or expanded_path.startswith(repo.linux_path)
+                    or expanded_path.startswith(repo.osx_path)
+                ):
+                    return "$%s/%s" % (repo.env_var, repo.make_relative(path))
+            return path
+
+        os_independent_paths = {}
+        for full_path in full_paths:
+            if not full_path:
+                continue
+            normalized_path = os.path.normpath(os.path.expandvars(full_path)).replace(
+                "\\", "/"
+            )
+            os_independent_paths[full_path] = to_os_independent_path(normalized_path)
+
+        versions_by_path = {}
+        unique_paths = list(set(os_independent_paths.values()))
+        for i in range(0, len(unique_paths), 500):
+            for version in Version.query.filter(
+                Version.full_path.in_(unique_paths[i : i + 500])
+            ):
+                versions_by_path[version.full_path] = version
+
+        return dict(
+            (full_path, versions_by_path[os_independent_path])
+            for full_path, os_independent_path in os_independent_paths.items()
+            if os_independent_path in versions_by_path
+        )
+
+    @classmethod
+    def get_first_version(cls, full_paths):
+        """Return the Version of the first path that is matching a Version.
+
+        :param list full_paths: A list of file paths, generally the recent files
+          list of a DCC.
+        :return: :class:`~stalker.models.version.Version` or None
+        """
+        full_paths = list(full_paths)
+        versions = cls.get_versions_from_full_paths(full_paths)
+        for full_path in full_paths:
+            version = versions.get(full_path)
+            if version is not None:
+                return version
+        return None
+
+
 class DCCBase(object):
     """Connects the DCC to Anima Pipeline.
 
@@ -252,36 +358,35 @@ class DCCBase(object):
         rfm = RecentFileManager()
         rfm.add(self.name, path)
 
-    def get_version_from_recent_files(self):
-        """This will try to create a :class:`.Version` instance by looking at
-        the recent files list.
+    def get_recent_file_list(self):
+        """Returns the recent files list of this DCC.
 
-        It will return None if it can not find one.
+        The default implementation returns the files that are recorded by
+        :meth:`.append_to_recent_files`. DCCs that keep their own recent file
+        history can override this method.
 
-        :return: :class:`.Version`
+        :return: list of str
         """
-        version = None
-
-        logger.debug("trying to get the version from recent file list")
-        # read the fileName from recent files list
-        # try to get the a valid asset file from starting the last recent file
-
         rfm = RecentFileManager()
-
         try:
-            recent_files = rfm[self.name]
+            return rfm[self.name]
         except KeyError:
             logger.debug("no recent files")
-            recent_files = None
+            return []
 
-        if recent_files is not None:
-            for recent_file in recent_files:
-                version = self.get_version_from_full_path(recent_file)
-                if version is not None:
-                    break
+    def get_version_from_recent_files(self):
+        """This will try to create a :class:`.Version` instance by looking at
+        the recent files list.
 
-            logger.debug("version from recent files is: %s" % version)
+        It will return None if it can not find one.
 
+        :return: :class:`.Version`
+        """
+        logger.debug("trying to get the version from recent file list")
+        # all the recent files are resolved with a single query and the
+        # first one that is a Version is returned
+        version = RecentFilesProvider.get_first_version(self.get_recent_file_list())
+        logger.debug("version from recent files is: %s" % version)
         return version
 
     def get_last_version(self):
@@ -2,7 +2,7 @@
 import os
 import bpy
 
-from stalker import Project, Task, Version, Sequence, Shot
+from stalker import Project, Task, Sequence, Shot
 from anima import logger
 
 bl_info = {
@@ -28,6 +28,8 @@ output_types = {
     "movie": [".mov", ".avi", ".webm", ".mpeg", ".mpg"],
 }
 
+shot_task_names = ["Previs", "Animation", "Lighting", "Comp"]
+
 
 class StripGenerator(object):
     """Generates strips out of tasks given to it."""
@@ -35,39 +37,65 @@ class StripGenerator(object):
     def __init__(self):
         pass
 
-    def add_from_task(self, task):
+    def add_from_task(self, task, channel=1):
         """adds the latest output of the given task"""
         if not task:
             # inform the user
             return
 
-        # get the repo
-        repo = task.project.repository
+        from anima.utils.review import resolve_latest_outputs
 
-        # do it in dirty way
-        versions = (
-            Version.query.filter(Version.task == task)
-            .order_by(Version.version_number.desc())
-            .all()
-        )
+        outputs = resolve_latest_outputs([task.parent_id], [task.name])
+        for output_full_path in outputs.get((task.parent_id, task.name), [])[:1]:
+            self.add_output(os.path.expandvars(output_full_path), channel=channel)
 
-        found_output = False
-        for v in versions:
-            if len(v.outputs):
-                # get all outputs of this version
-                for output in v.outputs:
-                    output_absolute_full_path = os.path.expandvars(output.full_path)
-                    self.add_output(output_absolute_full_path)
-                    found_output = True
-                    break
-
-            if found_output:
-                break
+    def add_from_child_task(self, task, task_name, channel=1):
+        """adds the latest output of the child task with the given name
+
+        :param task: A :class:`stalker.models.task.Task` class instance.
+        :param str task_name: The name of the child task.
+        :param int channel: The channel to add the strip to.
+        """
+        from anima.utils.review import resolve_latest_outputs
+
+        outputs = resolve_latest_outputs([task], [task_name])
+        for output_full_path in outputs.get((task.id, task_name), [])[:1]:
+            self.add_output(os.path.expandvars(output_full_path), channel=channel)
+
+    def add_shots(self, shots, task_names, start_frame=1, start_channel=1):
+        """adds the latest outputs of the given tasks of all the given shots
+
+        The outputs are resolved with a single query and the shots are placed
+        one after the other, with one channel per task name.
 
-    def add_output(self, full_path, name=None, channel=1):
+        :param shots: A list of :class:`stalker.models.shot.Shot` instances in
+          edit order.
+        :param task_names: A list of task names, e.g. ["Previs", "Animation"].
+        :param int start_frame: The start frame of the first shot.
+        :param int start_channel: The channel of the first task name.
+        """
+        from anima.utils.review import plan_strip_layout
+
+        for strip in plan_strip_layout(
+            shots, task_names, start_frame=start_frame, start_channel=start_channel
+        ):
+            self.add_output(
+                os.path.expandvars(strip.full_path),
+                channel=strip.channel,
+                frame_start=strip.frame_start,
+                frame_end=strip.frame_end,
+            )
+
+    def add_output(
+        self, full_path, name=None, channel=1, frame_start=1, frame_end=None
+    ):
         """adds the media in the given path to the time line
 
         :param str full_path: The path of the file
+        :param int channel: The channel of the strip
+        :param int frame_start: The start frame of the strip
+        :param int frame_end: The end frame of the image strips, defaults to 25
+          frames after the ``frame_start``.
         """
         logger.debug("adding output from: %s" % full_path)
         extension = os.path.splitext(full_path)[-1].lower()
@@ -91,8 +119,8 @@ class StripGenerator(object):
                     }
                 ],
                 relative_path=True,
-                frame_start=1,
-                frame_end=26,
+                frame_start=frame_start,
+                frame_end=frame_end if frame_end is not None else frame_start + 25,
                 channel=channel,
             )
         elif output_type == "movie":
@@ -107,7 +135,7 @@ class StripGenerator(object):
                     }
                 ],
                 relative_path=True,
-                frame_start=1,
+                frame_start=frame_start,
                 channel=channel,
             )
         else:
@@ -119,14 +147,7 @@ class StripGenerator(object):
 
         :param task: A :class:`stalker.models.task.Task` class instance.
         """
-        # get the storyboard task
-        storyboard = (
-            Task.query.filter(Task.parent == task)
-            .filter(Task.name == "Storyboard")
-            .first()
-        )
-
-        self.add_from_task(storyboard)
+        self.add_from_child_task(task, "Storyboard")
 
     def previs(self, task):
         """when a Shot task is given it will create a strip from the output of
@@ -134,12 +155,7 @@ class StripGenerator(object):
 
         :param task: A :class:`stalker.models.task.Task` class instance.
         """
-        # get the previs task
-        previs = (
-            Task.query.filter(Task.parent == task).filter(Task.name == "Previs").first()
-        )
-
-        self.add_from_task(previs)
+        self.add_from_child_task(task, "Previs")
 
     def animation(self, task):
         """when a Shot task is given it will create a strip from the output of
@@ -147,14 +163,7 @@ class StripGenerator(object):
 
         :param task: A :class:`stalker.models.task.Task` class instance.
         """
-        # get the storyboard task
-        animation = (
-            Task.query.filter(Task.parent == task)
-            .filter(Task.name == "Animation")
-            .first()
-        )
-
-        self.add_from_task(animation)
+        self.add_from_child_task(task, "Animation")
 
     def lighting(self, task):
         """when a Shot task is given it will create a strip from the output of
@@ -162,14 +171,7 @@ class StripGenerator(object):
 
         :param task: A :class:`stalker.models.task.Task` class instance.
         """
-        # get the storyboard task
-        animation = (
-            Task.query.filter(Task.parent == task)
-            .filter(Task.name == "Animation")
-            .first()
-        )
-
-        self.add_from_task(animation)
+        self.add_from_child_task(task, "Lighting")
 
     def comp(self, task):
         """when a Shot task is given it will create a strip from the output of
@@ -177,7 +179,7 @@ class StripGenerator(object):
 
         :param task: A :class:`stalker.models.task.Task` class instance.
         """
-        pass
+        self.add_from_child_task(task, "Comp")
 
 
 class StalkerMenu(bpy.types.Menu):
@@ -430,14 +432,9 @@ class StalkerSceneAddEverythingOperator(bpy.types.Operator):
         strip_gen.comp(scene)
 
         # go to each Shot and add latest outputs of everything under it
-        for task in scene.walk_hierarchy():
-            if isinstance(task, Shot):
-                # find the animation task under it
-                animation_task = (
-                    Task.query.filter(Task.parent_id == task.id)
-                    .filter(Task.name == "Animation")
-                    .first()
-                )
+        from anima.utils.review import get_scene_shots
+
+        strip_gen.add_shots(get_scene_shots(scene), shot_task_names, start_channel=2)
 
         return set(["FINISHED"])
 
@@ -507,16 +504,11 @@ class StalkerSceneAddAllShotOutputsOperator(bpy.types.Operator):
 
         logger.debug("scene: %s" % scene)
 
-        # find the "Shots" Task and get all the shots under it
-        # for each shot add the animation, lighting and comp
+        # find the "Shots" Task and add the outputs of all the shots under it
+        from anima.utils.review import get_scene_shots
 
-        # for shot in scene.children
-        # # generate storyboard
-        # strip_gen = StripGenerator()
-        # strip_gen.previs(scene)
-        # strip_gen.animation(scene)
-        # strip_gen.lighting(scene)
-        # strip_gen.comp(scene)
+        strip_gen = StripGenerator()
+        strip_gen.add_shots(get_scene_shots(scene), shot_task_names)
 
         return set(["FINISHED"])
 
@@ -538,16 +530,11 @@ class StalkerSceneAddAllShotPrevisOutputsOperator(bpy.types.Operator):
 
         logger.debug("scene: %s" % scene)
 
-        # find the "Shots" Task and get all the shots under it
-        # for each shot add the animation, lighting and comp
+        # find the "Shots" Task and add the outputs of all the shots under it
+        from anima.utils.review import get_scene_shots
 
-        # for shot in scene.children
-        # # generate storyboard
-        # strip_gen = StripGenerator()
-        # strip_gen.previs(scene)
-        # strip_gen.animation(scene)
-        # strip_gen.lighting(scene)
-        # strip_gen.comp(scene)
+        strip_gen = StripGenerator()
+        strip_gen.add_shots(get_scene_shots(scene), ["Previs"])
 
         return set(["FINISHED"])
 
@@ -569,16 +556,11 @@ class StalkerSceneAddAllShotAnimationOutputsOperator(bpy.types.Operator):
 
         logger.debug("scene: %s" % scene)
 
-        # find the "Shots" Task and get all the shots under it
-        # for each shot add the animation, lighting and comp
+        # find the "Shots" Task and add the outputs of all the shots under it
+        from anima.utils.review import get_scene_shots
 
-        # for shot in scene.children
-        # # generate storyboard
-        # strip_gen = StripGenerator()
-        # strip_gen.previs(scene)
-        # strip_gen.animation(scene)
-        # strip_gen.lighting(scene)
-        # strip_gen.comp(scene)
+        strip_gen = StripGenerator()
+        strip_gen.add_shots(get_scene_shots(scene), ["Animation"])
 
         return set(["FINISHED"])
 
@@ -600,16 +582,11 @@ class StalkerSceneAddAllShotLightingOutputsOperator(bpy.types.Operator):
 
         logger.debug("scene: %s" % scene)
 
-        # find the "Shots" Task and get all the shots under it
-        # for each shot add the animation, lighting and comp
+        # find the "Shots" Task and add the outputs of all the shots under it
+        from anima.utils.review import get_scene_shots
 
-        # for shot in scene.children
-        # # generate storyboard
-        # strip_gen = StripGenerator()
-        # strip_gen.previs(scene)
-        # strip_gen.animation(scene)
-        # strip_gen.lighting(scene)
-        # strip_gen.comp(scene)
+        strip_gen = StripGenerator()
+        strip_gen.add_shots(get_scene_shots(scene), ["Lighting"])
 
         return set(["FINISHED"])
 
@@ -631,16 +608,11 @@ class StalkerSceneAddAllShotCompOutputsOperator(bpy.types.Operator):
 
         logger.debug("scene: %s" % scene)
 
-        # find the "Shots" Task and get all the shots under it
-        # for each shot add the animation, lighting and comp
+        # find the "Shots" Task and add the outputs of all the shots under it
+        from anima.utils.review import get_scene_shots
 
-        # for shot in scene.children
-        # # generate storyboard
-        # strip_gen = StripGenerator()
-        # strip_gen.previs(scene)
-        # strip_gen.animation(scene)
-        # strip_gen.lighting(scene)
-        # strip_gen.comp(scene)
+        strip_gen = StripGenerator()
+        strip_gen.add_shots(get_scene_shots(scene), ["Comp"])
 
         return set(["FINISHED"])
 
@@ -662,14 +634,8 @@ class StalkerShotAddAllTaskOutputsOperator(bpy.types.Operator):
 
         logger.debug("shot: %s" % shot)
 
-        # find Previs, Animation, Lighting and Comp tasks
-
-        # # generate storyboard
-        # strip_gen = StripGenerator()
-        # strip_gen.previs(scene)
-        # strip_gen.animation(scene)
-        # strip_gen.lighting(scene)
-        # strip_gen.comp(scene)
+        strip_gen = StripGenerator()
+        strip_gen.add_shots([shot], shot_task_names)
 
         return set(["FINISHED"])
 
@@ -691,11 +657,8 @@ class StalkerShotAddPrevisOutputOperator(bpy.types.Operator):
 
         logger.debug("shot: %s" % shot)
 
-        # find Previs, Animation, Lighting and Comp tasks
-
-        # # generate storyboard
-        # strip_gen = StripGenerator()
-        # strip_gen.previs(shot)
+        strip_gen = StripGenerator()
+        strip_gen.add_shots([shot], ["Previs"])
 
         return set(["FINISHED"])
 
@@ -717,11 +680,8 @@ class StalkerShotAddAnimationOutputOperator(bpy.types.Operator):
 
         logger.debug("shot: %s" % shot)
 
-        # find Previs, Animation, Lighting and Comp tasks
-
-        # # generate storyboard
-        # strip_gen = StripGenerator()
-        # strip_gen.animation(shot)
+        strip_gen = StripGenerator()
+        strip_gen.add_shots([shot], ["Animation"])
 
         return set(["FINISHED"])
 
@@ -743,11 +703,8 @@ class StalkerShotAddLightingOutputOperator(bpy.types.Operator):
 
         logger.debug("shot: %s" % shot)
 
-        # find Previs, Animation, Lighting and Comp tasks
-
-        # # generate storyboard
-        # strip_gen = StripGenerator()
-        # strip_gen.lighting(shot)
+        strip_gen = StripGenerator()
+        strip_gen.add_shots([shot], ["Lighting"])
 
         return set(["FINISHED"])
 
@@ -769,11 +726,8 @@ class StalkerShotAddCompOutputOperator(bpy.types.Operator):
 
         logger.debug("shot: %s" % shot)
 
-        # find Previs, Animation, Lighting and Comp tasks
-
-        # # generate storyboard
-        # strip_gen = StripGenerator()
-        # strip_gen.comp(shot)
+        strip_gen = StripGenerator()
+        strip_gen.add_shots([shot], ["Comp"])
 
         return set(["FINISHED"])
 
@@ -18,7 +18,6 @@ except exceptions:
     bmf = bmd.get_bmd()
 
 
-from anima import logger
 from anima.dcc import empty_reference_resolution
 from anima.dcc.base import DCCBase
 from anima.dcc.fusion.utils import NodeUtils
@@ -252,37 +251,6 @@ class Fusion(DCCBase):
         )
         return self.get_version_from_full_path(full_path)
 
-    def get_version_from_recent_files(self):
-        """It will try to create a
-        :class:`~stalker.models.version.Version` instance by looking
-        at the recent files list.
-
-        It will return None if it can not find one.
-
-        :return: :class:`~stalker.models.version.Version`
-        """
-        # full_path = self.fusion_prefs["LastCompFile"]
-        # return self.get_version_from_full_path(full_path)
-
-        version = None
-        rfm = RecentFileManager()
-
-        try:
-            recent_files = rfm[self.name]
-        except KeyError:
-            logger.debug("no recent files")
-            recent_files = None
-
-        if recent_files is not None:
-            for i in range(len(recent_files)):
-                version = self.get_version_from_full_path(recent_files[i])
-                if version is not None:
-                    break
-
-            logger.debug("version from recent files is: %s" % version)
-
-        return version
-
     def get_version_from_project_dir(self):
         """Tries to find a Version from the current project directory
 
@@ -2,7 +2,7 @@
 
 import os
 
-from anima.dcc.base import DCCBase
+from anima.dcc.base import DCCBase, RecentFilesProvider
 from anima import logger
 
 import hou
@@ -582,7 +582,10 @@ class FileHistory(object):
     """A Houdini recent file history parser
 
     Holds the data in a dictionary, where the keys are the file types and the
-    values are string list of recent file paths of that type
+    values are string list of recent file paths of that type.
+
+    The history file is parsed only once and is parsed again only if it is
+    changed.
     """
 
     def __init__(self):
@@ -600,60 +603,47 @@ class FileHistory(object):
             self._history_file_path, self._history_file_name
         )
 
-        self._buffer = []
-
-        self._history = dict()
-
-        self._read()
-        self._parse()
-
-    def _read(self):
-        """reads the history file to a buffer"""
-        try:
-            history_file = open(self._history_file_full_path)
-        except IOError:
-            self._buffer = []
-            return
+        self._history = (
+            RecentFilesProvider.read_history(self._history_file_full_path, self.parse)
+            or dict()
+        )
 
-        self._buffer = history_file.readlines()
+    @classmethod
+    def parse(cls, lines):
+        """parses the lines of a file.history file
 
-        # strip all the lines
-        self._buffer = [line.strip() for line in self._buffer]
+        The file contains blocks of paths enclosed in curly braces, which are
+        preceded by their file type::
 
-        history_file.close()
+          HIP
+          {
+          /path/to/file.hip
+          }
 
-    def _parse(self):
-        """parses the data in self._buffer"""
-        self._history = dict()
-        buffer_list = self._buffer
+        :param list lines: The lines of the history file.
+        :return dict: The file types to path lists.
+        """
+        history = dict()
         key_name = ""
-        path_list = []
-        len_buffer = len(buffer_list)
-
-        for i in range(len_buffer):
-            # try to find a '{'
-            if buffer_list[i] == "{":
+        path_list = None
+        previous_line = ""
+        for line in lines:
+            line = line.strip()
+            if line == "{":
                 # create a key with the previous line
-                key_name = buffer_list[i - 1]
+                key_name = previous_line
                 path_list = []
-
-                # starting from the next line
-                for j in range(i + 1, len_buffer):
-
-                    # add all the lines to the path_list until you find a '}'
-                    current_element = buffer_list[j]
-                    if current_element != "}":
-                        path_list.append(current_element)
-                    else:
-                        # set i to j+1 and let it continue
-                        i = j + 1
-                        break
-                    # append the key and data to the dictionary
-                self._history[key_name] = path_list
+                history[key_name] = path_list
+            elif line == "}":
+                path_list = None
+            elif path_list is not None:
+                path_list.append(line)
+            previous_line = line
+        return history
 
     def get_recent_files(self, type_name=""):
         """returns the file list of the given file type"""
         if type_name == "" or type_name is None:
             return []
         else:
-            return self._history.get(type_name, [])
+            return list(self._history.get(type_name, []))
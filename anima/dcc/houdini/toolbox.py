@@ -114,6 +114,30 @@ class ToolboxLayout(QtWidgets.QVBoxLayout):
             export_rsproxy_data_as_json_callback,
         )
 
+        def export_rsproxy_data_callback():
+            """ """
+            import hou
+
+            try:
+                GeneralTools.export_rsproxy_data()
+            except (BaseException, hou.OperationFailed) as e:
+                QtWidgets.QMessageBox.critical(
+                    main_tab_widget, "Export", "Error!<br><br>{}".format(
+                        traceback.format_exc()
+                    )
+                )
+            else:
+                QtWidgets.QMessageBox.information(
+                    main_tab_widget, "Export", "Data has been exported correctly!"
+                )
+
+        # Export RSProxy Data (binary)
+        create_button(
+            "Export RSProxy Data",
+            general_tab_vertical_layout,
+            export_rsproxy_data_callback,
+        )
+
         # Batch Rename
         batch_rename_layout = QtWidgets.QHBoxLayout()
         general_tab_vertical_layout.addLayout(batch_rename_layout)
@@ -312,6 +336,43 @@ class GeneralTools(object):
         with open(path, "w") as f:
             f.write(json.dumps(json_data))
 
+    @classmethod
+    def export_rsproxy_data(cls, geo=None, path="", compress=True):
+        """exports RSProxy Data on points in the binary format of
+        :mod:`anima.render.rsproxy_data`
+
+        :param geo: The ``hou.Geometry``, the geometry of the selected node is
+          used if skipped.
+        :param str path: The output path, defaults to rsproxy_info.arsp in the temp
+          folder.
+        :param bool compress: Compress the data.
+        """
+        import hou
+        from anima.render.rsproxy_data import RSProxyDataWriter
+
+        if geo is None:
+            node = hou.selectedNodes()[0]
+            geo = node.geometry()
+
+        import os
+        import tempfile
+
+        if path == "":
+            path = os.path.normpath(
+                os.path.join(tempfile.gettempdir(), "rsproxy_info.arsp")
+            )
+
+        # get the float attributes as raw float32 data, no per point tuples
+        with RSProxyDataWriter(path, compress=compress) as writer:
+            writer.write(
+                geo.pointFloatAttribValuesAsString("P"),
+                geo.pointFloatAttribValuesAsString("rot"),
+                geo.pointFloatAttribValuesAsString("pscale"),
+                geo.pointStringAttribValues("instancefile"),
+                geo.pointStringAttribValues("node_name"),
+                geo.pointStringAttribValues("parent_name"),
+            )
+
     @classmethod
     def rename_selected_nodes(
         cls, search_str, replace_str, replace_in_child_nodes=False
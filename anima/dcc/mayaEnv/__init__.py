@@ -62,6 +62,8 @@ def get_maya_main_window():
 class MayaMainProgressBarWrapper(ProgressDialogBase):
     """Wrap main progress bar dialog to be ProgressManager compliant."""
 
+    thread_safe = False
+
     def __init__(self):
         super(MayaMainProgressBarWrapper, self).__init__()
         self.progress_bar = pm.windows.getMainProgressBar()
@@ -6,7 +6,7 @@ import re
 import shutil
 
 from anima import logger
-from anima.utils.archive import ArchiverBase
+from anima.utils.archive import ArchiverBase, rewrite_references, scan_references
 
 from stalker import Project, Task, Version
 
@@ -120,26 +120,8 @@ sourceimages/3dPaintTextures"""
 
         :return:
         """
-        path_regex = r"\$REPO[\w\d\/_\.@\<\>]+"
-        # so we have all the data
-        # extract references
-        ref_paths = list(set(re.findall(path_regex, data)))
-
-        # also check for any paths that is starting with any of the $REPO
-        # variable value
-        for k in os.environ.keys():
-            if k.startswith("REPO"):
-                # consider this as a repository path and find all of the paths
-                # starting with this value
-                repo_path = os.environ[k]
-                path_regex = r"{}[\w\d\/_\.@\<\>]+".format(repo_path)
-                temp_ref_paths = list(set(re.findall(path_regex, data)))
-                ref_paths += temp_ref_paths
-
-        return list(
-            filter(
-                lambda x: os.path.splitext(x)[-1] not in self.exclude_mask, ref_paths
-            )
+        return scan_references(
+            data.splitlines(True), exclude_mask=self.exclude_mask
         )
 
     def _move_file_and_fix_references(
@@ -193,29 +175,22 @@ sourceimages/3dPaintTextures"""
             ".wav": "sound",
         }
 
+        def archived_path(ref_path):
+            return "{}/{}".format(
+                scenes_folder_lut.get(os.path.splitext(ref_path)[-1], refs_folder),
+                os.path.basename(ref_path),
+            )
+
         ref_paths = []
         # only get new ref paths for '.ma' files
         if path.endswith(".ma"):
-            # read the data of the original file
-            with open(path) as f:
-                data = f.read()
-
-            ref_paths = self._extract_references(data)
-            # fix all reference paths
-            for ref_path in ref_paths:
-                ref_ext = os.path.splitext(ref_path)[-1]
-                data = data.replace(
-                    ref_path,
-                    "{}/{}".format(
-                        scenes_folder_lut.get(ref_ext, refs_folder),
-                        os.path.basename(ref_path),
-                    )
-                )
-
-            # now write all the data back to a new temp scene
+            # stream the original file in to the new scene and fix all the
+            # reference paths on the fly
             logger.debug("new_file_path: {}".format(new_file_path))
-            with open(new_file_path, "w+") as f:
-                f.write(data)
+            with open(path, "rb") as f, open(new_file_path, "wb") as output:
+                ref_paths = rewrite_references(
+                    f, output, archived_path, exclude_mask=self.exclude_mask
+                )
         else:
             # fix for UDIM texture paths
             # if the path contains <udim> find the other textures
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-import shutil
+import functools
 
 from anima import logger
 from anima.dcc import mayaEnv
@@ -12,6 +12,14 @@ import pymel.core as pm
 from anima.publish import run_publishers, POST_PUBLISHER_TYPE
 from anima.ui.dialogs import progress_dialog
 from anima.utils import get_task_hierarchy_name
+from anima.utils.migrate import (
+    FileCopier,
+    MigrationJournal,
+    get_version_input_ids,
+    order_by_dependencies,
+    resolve_tasks,
+    resolve_versions,
+)
 from anima.utils.progress import ProgressManagerFactory
 
 
@@ -115,66 +123,69 @@ class AssetMigrationTool(object):
         """
         raise NotImplementedError("Not implemented yet!")
 
-    def migrate(self):
-        """Do the migration."""
-        # create an unordered list of versions to move
-        inordered_list_of_versions_to_move = []
-        ordered_list_of_versions_to_move = []
-        version_centric_migration_recipe = {}
+    def migrate(self, journal_path=None, max_workers=4):
+        """Do the migration.
 
+        Args:
+            journal_path (str): The path of a journal file to record the migrated
+                tasks and versions. If the journal of an interrupted migration is
+                given, the already migrated tasks and versions are skipped.
+            max_workers (int): The maximum number of concurrent file copies for the
+                versions that are not created with Maya.
+        """
         progress_count = 0
+        version_keys = []
         for task_id in self.migration_recipe:
             progress_count += 1
             takes = self.migration_recipe[task_id].get("takes", {})
             for take_name in takes:
-                versions = takes[take_name].get("versions", [])
-                for i, version_number in enumerate(versions):
+                for version_number in takes[take_name].get("versions", []):
                     progress_count += 1
+                    version_keys.append((task_id, take_name, version_number))
 
         progress_manager = ProgressManagerFactory.get_progress_manager()
         progress_manager._dialog = None
         progress_manager.dialog_class = progress_dialog.ProgressDialog
         progress_caller = progress_manager.register(progress_count, "Migrate Versions")
 
+        # resolve all the versions and tasks in bulk
+        progress_caller.step(message="Resolve versions")
+        versions_lut = resolve_versions(version_keys)
         for task_id in self.migration_recipe:
             takes = self.migration_recipe[task_id].get("takes", {})
             for take_name in takes:
                 versions = takes[take_name].get("versions", [])
-                for i, version_number in enumerate(versions):
-                    progress_caller.step(
-                        message="Sort versions: {task_id}-{take_name}-"
-                        "v{version_number:03d}".format(
-                            task_id=task_id,
-                            take_name=take_name,
-                            version_number=version_number,
-                        )
-                    )
-                    v = (
-                        Version.query.filter(Version.task_id == task_id)
-                        .filter(Version.take_name == take_name)
-                        .filter(Version.version_number == version_number)
-                        .first()
-                    )
-                    if not v:
-                        continue
-                    # store the version in the migration_recipe for later use
-                    takes[take_name]["versions"][i] = v
-                    inordered_list_of_versions_to_move.append(v)
+                # store the versions in the migration_recipe for later use
+                takes[take_name]["versions"] = [
+                    versions_lut[(task_id, take_name, version_number)]
+                    for version_number in versions
+                    if (task_id, take_name, version_number) in versions_lut
+                ]
+                progress_caller.step(step_size=len(versions))
+
+        tasks_lut = resolve_tasks(
+            list(self.migration_recipe.keys())
+            + [
+                data["new_parent_id"]
+                for data in self.migration_recipe.values()
+                if data.get("new_parent_id") is not None
+            ]
+        )
 
         # fill new_parent_id, new_name and new_code for all items
-        for task_id in self.migration_recipe:
-            task = Task.query.filter(Task.id == task_id).first()
+        for task_id in list(self.migration_recipe.keys()):
+            task = tasks_lut.get(task_id)
+            if not task:
+                progress_caller.step()
+                self.migration_recipe.pop(task_id)
+                continue
             progress_caller.step(
                 message="Generate args for {task_name}".format(task_name=task.name)
             )
-            if not task:
-                continue
             if "new_parent_id" not in self.migration_recipe[task_id]:
                 # use the current task.parent_id as the new_parent,
                 # hopping the parents are also getting carried over.
-                self.migration_recipe[task_id]["new_parent_id"] = (
-                    task.parent.id if task.parent else None
-                )
+                self.migration_recipe[task_id]["new_parent_id"] = task.parent_id
             if "new_name" not in self.migration_recipe[task_id]:
                 self.migration_recipe[task_id]["new_name"] = task.name
 
@@ -185,99 +196,102 @@ class AssetMigrationTool(object):
                 # also fill the code attr
                 self.migration_recipe[task_id]["new_code"] = task.code
 
-        # We need to get a proper list with a proper order,
-        # so that when the tasks are processed in that order,
-        entity_ids_to_carry_over = list(self.migration_recipe.keys())
-        new_tasks_lut = {}
+        # order the tasks so that the parents that are also getting carried over
+        # are created first
+        entity_ids_to_carry_over = order_by_dependencies(
+            list(self.migration_recipe.keys()),
+            dict(
+                (task_id, [data["new_parent_id"]])
+                for task_id, data in self.migration_recipe.items()
+            ),
+        )
+        progress_caller.end_progress()
+
+        # skip the tasks and versions that are migrated in a previous run
+        journal = MigrationJournal(journal_path)
+        journaled_tasks = resolve_tasks(journal.tasks.values())
 
         progress_caller2 = progress_manager.register(
             max_iteration=len(entity_ids_to_carry_over),
             title="Generate Ordered Versions",
         )
-        progress_caller.end_progress()
-
-        while entity_ids_to_carry_over:
-            source_entity_id = entity_ids_to_carry_over.pop(0)
-            # check if the new_parent_id is one of the tasks
-            # that is getting carried over
-            new_parent_id = self.migration_recipe[source_entity_id]["new_parent_id"]
-            if new_parent_id in self.migration_recipe:
-                # yes, this task is also getting carried
-                # check if we have already created a corresponding new task for this
-                # parent task
-                if new_parent_id in new_tasks_lut:
-                    # greate, we have already carried this task over and have created
-                    # a new task, use this new task as the new_parent and continue work
-                    new_parent_id = new_tasks_lut[new_parent_id]
-                else:
-                    # this task has not been carried yet
-                    # put this task back in to the end of the list
-                    entity_ids_to_carry_over.append(source_entity_id)
-                    # and get in to other tasks in the list
-                    logger.debug("skipping: {}".format(source_entity_id))
-                    continue
-            else:
-                # no, this task is not in the migration list,
-                # then don't do anything and keep working on carrying this task
-                pass
 
-            new_parent = Task.query.filter(Task.id == new_parent_id).first()
-            source_entity = Task.query.filter(Task.id == source_entity_id).first()
+        new_entity_class_lut = {
+            "Task": Task,
+            "Asset": Asset,
+            "Shot": Shot,
+            "Sequence": Sequence,
+        }
+        versions_to_move = []
+        version_centric_migration_recipe = {}
+        new_tasks = {}
+        for source_entity_id in entity_ids_to_carry_over:
+            source_entity = tasks_lut[source_entity_id]
             progress_caller2.step(message="Sort Versions {}".format(source_entity.name))
-            new_entity_class_lut = {
-                "Task": Task,
-                "Asset": Asset,
-                "Shot": Shot,
-                "Sequence": Sequence,
-            }
-            kwargs = {
-                "name": self.migration_recipe[source_entity_id]["new_name"],
-                "parent": new_parent,
-                "type": source_entity.type,
-                "description": "Migrated from {} under {}".format(
-                    source_entity.name, source_entity.project.name
-                ),
-            }
-            if source_entity.entity_type in ["Asset", "Shot", "Sequence"]:
-                kwargs["code"] = self.migration_recipe[source_entity_id]["new_code"]
 
-            new_task = new_entity_class_lut[source_entity.entity_type](**kwargs)
-            DBSession.add(new_task)
-            DBSession.commit()
-            new_tasks_lut[source_entity_id] = new_task.id
+            # already created in a previous run, unless it is deleted since then
+            new_task = journaled_tasks.get(journal.tasks.get(source_entity_id))
+            if new_task is None:
+                new_parent_id = self.migration_recipe[source_entity_id][
+                    "new_parent_id"
+                ]
+                if new_parent_id in self.migration_recipe:
+                    # this task is also getting carried, and it is already created
+                    new_parent = new_tasks[new_parent_id]
+                else:
+                    new_parent = tasks_lut.get(new_parent_id)
+
+                kwargs = {
+                    "name": self.migration_recipe[source_entity_id]["new_name"],
+                    "parent": new_parent,
+                    "type": source_entity.type,
+                    "description": "Migrated from {} under {}".format(
+                        source_entity.name, source_entity.project.name
+                    ),
+                }
+                if source_entity.entity_type in ["Asset", "Shot", "Sequence"]:
+                    kwargs["code"] = self.migration_recipe[source_entity_id]["new_code"]
+
+                new_task = new_entity_class_lut[source_entity.entity_type](**kwargs)
+                DBSession.add(new_task)
+                DBSession.commit()
+                journal.record_task(source_entity_id, new_task.id)
+            new_tasks[source_entity_id] = new_task
 
-            # We kind of need a versions list that is in
-            # reverse-breadth-first order in their dependencies to each other
             takes = self.migration_recipe[source_entity_id].get("takes", {})
             for take_name in takes:
-                versions = takes[take_name].get("versions", [])
-                for v in versions:  # at this point we should have normal versions
-                    # check if something referencing this v has already moved this v
-                    # to the ordered list.
-                    order_index = 0
-                    for other_v in v.inputs:
-                        # check if we need to move the other_v first
-                        if other_v in inordered_list_of_versions_to_move:
-                            # na-na-na-naaa
-                            # we need to move other_v before v
-                            # insert the v accordingly
-                            if other_v in ordered_list_of_versions_to_move:
-                                order_index = max(
-                                    order_index,
-                                    ordered_list_of_versions_to_move.index(other_v) + 1,
-                                )
-                            else:
-                                # other_v is not in the ordered list
-                                # so append the v preferably to the start of the list
-                                order_index = max(order_index, 0)
-                    # insert the v to the ordered list to the order_index position
-                    ordered_list_of_versions_to_move.insert(order_index, v)
+                for v in takes[take_name].get("versions", []):
+                    versions_to_move.append(v)
                     # add the version to the version centric migration recipe
                     version_centric_migration_recipe[v] = {
                         "new_task": new_task,
                         "take_name": takes[take_name].get("new_name", take_name),
                     }
 
+        # We need a versions list in which the inputs are moved before the
+        # versions that are referencing them
+        version_inputs = get_version_input_ids([v.id for v in versions_to_move])
+        versions_by_id = dict((v.id, v) for v in versions_to_move)
+        ordered_list_of_versions_to_move = order_by_dependencies(
+            versions_to_move,
+            dict(
+                (v, [versions_by_id.get(i) for i in version_inputs[v.id]])
+                for v in versions_to_move
+            ),
+        )
+
+        journaled_versions = {}
+        if journal.versions:
+            journaled_versions = dict(
+                (new_version.id, new_version)
+                for new_version in Version.query.filter(
+                    Version.id.in_(list(journal.versions.values()))
+                )
+            )
+        for v in ordered_list_of_versions_to_move:
+            if v.id in journal.completed_version_ids:
+                self.version_lut[v] = journaled_versions[journal.versions[v.id]]
+
         progress_caller3 = progress_manager.register(
             max_iteration=len(ordered_list_of_versions_to_move)
         )
@@ -288,59 +302,85 @@ class AssetMigrationTool(object):
         # go over the list and create new versions,
         dcc_env = mayaEnv.Maya()
         publish_errors = []
-        for v in ordered_list_of_versions_to_move:
-            recipe = version_centric_migration_recipe[v]
-            new_version = Version(
-                task=recipe["new_task"],
-                take_name=recipe["take_name"],
-                description=v.description,
-            )
-            if "maya" in v.created_with.lower():
-                dcc_env.open(version=v, force=True, skip_update_check=True, prompt=False)
-                # replace all top level references with the versions from version_lut
-                for ref in pm.listReferences():
-                    # all refs must be base version
-                    if not ref.is_base():
-                        ref.to_base()
-                    ref_version = ref.version
-                    if ref_version in self.version_lut:
-                        ref.replaceWith(
-                            Repository.to_os_independent_path(
-                                self.version_lut[ref_version].absolute_full_path
+        with journal, FileCopier(max_workers=max_workers) as file_copier:
+            for v in ordered_list_of_versions_to_move:
+                if v.id in journal.completed_version_ids:
+                    progress_caller3.step()
+                    continue
+
+                recipe = version_centric_migration_recipe[v]
+                new_version = journaled_versions.get(journal.versions.get(v.id))
+                if new_version is None:
+                    new_version = Version(
+                        task=recipe["new_task"],
+                        take_name=recipe["take_name"],
+                        description=v.description,
+                    )
+                is_maya_version = "maya" in v.created_with.lower()
+                if is_maya_version:
+                    # the referenced files may still be getting copied
+                    file_copier.wait()
+                    dcc_env.open(
+                        version=v, force=True, skip_update_check=True, prompt=False
+                    )
+                    # replace all top level references with the versions from
+                    # version_lut
+                    for ref in pm.listReferences():
+                        # all refs must be base version
+                        if not ref.is_base():
+                            ref.to_base()
+                        ref_version = ref.version
+                        if ref_version in self.version_lut:
+                            ref.replaceWith(
+                                Repository.to_os_independent_path(
+                                    self.version_lut[ref_version].absolute_full_path
+                                )
                             )
-                        )
-                # TODO: Before saving check external files like textures, audio etc.
-                dcc_env.save_as(version=new_version)
-            else:
-                # this file is not created with Maya,
-                # copy it over to the new place directly
-                new_version.extension = v.extension
-                new_version.created_with = v.created_with
-                shutil.copy2(v.absolute_full_path, new_version.absolute_full_path)
-
-            # because publish scripts may fail, set the "publish" status after
-            # saving the file
-            new_version.is_published = v.is_published
-            DBSession.add(new_version)
-            DBSession.commit()
-            self.version_lut[v] = new_version
-
-            if new_version.is_published and "maya" in v.created_with.lower():
-                try:
-                    # run the post publishers here
-                    type_name = ""
-                    if new_version.task.type:
-                        type_name = new_version.task.type.name
-                    run_publishers(type_name, publisher_type=POST_PUBLISHER_TYPE)
-                except Exception as e:
-                    # prevent any exception to cut the process in the middle
-                    publish_errors.append((new_version, e))
-            progress_caller3.step(
-                message="Moved {}_v{:03d}".format(
-                    get_task_hierarchy_name(new_version.task),
-                    new_version.version_number,
+                    # TODO: Before saving check external files like textures, audio
+                    #       etc.
+                    dcc_env.save_as(version=new_version)
+                else:
+                    # this file is not created with Maya,
+                    # copy it over to the new place directly
+                    new_version.extension = v.extension
+                    new_version.created_with = v.created_with
+
+                # because publish scripts may fail, set the "publish" status after
+                # saving the file
+                new_version.is_published = v.is_published
+                DBSession.add(new_version)
+                DBSession.commit()
+                self.version_lut[v] = new_version
+
+                if is_maya_version:
+                    journal.record_version(v.id, new_version.id)
+                else:
+                    journal.record_version(v.id, new_version.id, completed=False)
+                    file_copier.copy(
+                        v.absolute_full_path,
+                        new_version.absolute_full_path,
+                        callback=functools.partial(
+                            journal.record_version, v.id, new_version.id
+                        ),
+                    )
+
+                if new_version.is_published and is_maya_version:
+                    try:
+                        # run the post publishers here
+                        type_name = ""
+                        if new_version.task.type:
+                            type_name = new_version.task.type.name
+                        run_publishers(type_name, publisher_type=POST_PUBLISHER_TYPE)
+                    except Exception as e:
+                        # prevent any exception to cut the process in the middle
+                        publish_errors.append((new_version, e))
+                progress_caller3.step(
+                    message="Moved {}_v{:03d}".format(
+                        get_task_hierarchy_name(new_version.task),
+                        new_version.version_number,
+                    )
                 )
-            )
+            file_copier.wait()
 
         progress_caller3.end_progress()
         progress_manager.end_progress()
@@ -93,14 +93,16 @@ class FileReferenceExtension(object):
         return None
 
     @extends(FileReference)
-    def to_repr(self, repr_name):
+    def to_repr(self, repr_name, index=None):
         """Replaces the current reference with the representation with the
         given repr_name.
 
         :param str repr_name: The desired repr name
+        :param index: An optional :class:`.RepresentationIndex` to look up the
+          representation from.
         :return:
         """
-        rep_v = self.find_repr(repr_name)
+        rep_v = self.find_repr(repr_name, index=index)
         from stalker import Repository
 
         if rep_v is not None and rep_v != self.version:
@@ -109,10 +111,12 @@ class FileReferenceExtension(object):
             )
 
     @extends(FileReference)
-    def find_repr(self, repr_name):
+    def find_repr(self, repr_name, index=None):
         """Finds the representation with the given repr_name.
 
         :param str repr_name: The desired repr name
+        :param index: An optional :class:`.RepresentationIndex` to look up the
+          representation from.
         :return: :class:`.Version`
         """
         from anima.dcc.mayaEnv import Maya
@@ -123,16 +127,18 @@ class FileReferenceExtension(object):
         if v is None:
             return
 
-        rep = Representation(version=v)
+        rep = Representation(version=v, index=index)
         rep_v = rep.find(repr_name)
 
         return rep_v
 
     @extends(FileReference)
-    def list_all_repr(self):
+    def list_all_repr(self, index=None):
         """Returns a list of strings representing all the representation names
         of this FileReference
 
+        :param index: An optional :class:`.RepresentationIndex` to look up the
+          representations from.
         :return: list of str
         """
         from anima.dcc.mayaEnv import Maya
@@ -143,7 +149,7 @@ class FileReferenceExtension(object):
         if v is None:
             return []
 
-        rep = Representation(version=v)
+        rep = Representation(version=v, index=index)
         return rep.list_all()
 
     @extends(FileReference)
@@ -168,10 +174,12 @@ class FileReferenceExtension(object):
         return rep.is_base()
 
     @extends(FileReference)
-    def has_repr(self, repr_name):
+    def has_repr(self, repr_name, index=None):
         """checks if the reference has the given representation
 
         :param str repr_name: The name of the desired representation
+        :param index: An optional :class:`.RepresentationIndex` to look up the
+          representation from.
         :return:
         """
         from anima.dcc.mayaEnv import Maya
@@ -182,7 +190,7 @@ class FileReferenceExtension(object):
         if v is None:
             return False
 
-        rep = Representation(version=v)
+        rep = Representation(version=v, index=index)
         return rep.has_repr(repr_name)
 
     @extends(FileReference)
@@ -481,19 +489,12 @@ class SequenceManagerExtension(object):
                 % (self.__class__.__name__, path.__class__.__name__)
             )
 
-        from xml.etree import ElementTree
-
+        seq = Sequence()
         try:
-            tree = ElementTree.parse(path)
+            seq.read_xml(path)
         except IOError:
             raise IOError("Please supply a valid path to an XML file!")
 
-        root = tree.getroot()
-        seq = Sequence()
-        xml_seq = root.getchildren()[0]
-
-        seq.from_xml(xml_seq)
-
         self.from_seq(seq)
 
     @extends(pm.nodetypes.SequenceManager)
@@ -515,11 +516,10 @@ class SequenceManagerExtension(object):
         m = Maya()
         fps = m.get_fps()
 
-        import edl
+        from anima.edit import parse_edl
 
-        p = edl.Parser(str(fps))
         with open(path) as f:
-            l = p.parse(f)
+            l = parse_edl(f, str(fps))
 
         seq = Sequence()
         seq.from_edl(l)
@@ -456,6 +456,8 @@ class General(object):
     def rsproxy_data_importer(cls, path=""):
         """Imports RsProxy data from Houdini
 
+        The data can be in JSON or the binary RSProxy data format.
+
         Required point attributes
             pos
             rot
@@ -467,7 +469,16 @@ class General(object):
             import os
             import tempfile
 
-            path = os.path.join(tempfile.gettempdir(), "rsproxy_info.json")
+            # use the most recently exported one of the binary and JSON files
+            candidates = [
+                os.path.join(tempfile.gettempdir(), file_name)
+                for file_name in ["rsproxy_info.arsp", "rsproxy_info.json"]
+            ]
+            existing_candidates = [p for p in candidates if os.path.exists(p)]
+            if existing_candidates:
+                path = max(existing_candidates, key=os.path.getmtime)
+            else:
+                path = candidates[-1]
 
         data_man = redshift.RSProxyDataManager()
         data_man.load(path)
@@ -8,6 +8,34 @@ class RSProxyDataManager(object):
         self.data = []
 
     def load(self, path):
+        """loads the data from the given path
+
+        :param str path: Either a JSON file or a binary file written with
+          :mod:`anima.render.rsproxy_data`.
+        """
+        from anima.render import rsproxy_data
+
+        if rsproxy_data.is_rsproxy_data_file(path):
+            with rsproxy_data.RSProxyDataReader(path) as reader:
+                for (
+                    pos,
+                    rot,
+                    sca,
+                    instance_file,
+                    node_name,
+                    parent_name,
+                ) in reader.points():
+                    data_obj = RSProxyDataObject()
+                    self.data.append(data_obj)
+
+                    data_obj.pos = pos
+                    data_obj.rot = rot
+                    data_obj.sca = sca
+                    data_obj.parent_name = parent_name
+                    data_obj.instance_file = instance_file
+                    data_obj.node_name = node_name
+            return
+
         import json
 
         with open(path, "r") as f:
@@ -11,7 +11,7 @@ import uuid
 
 from anima import logger
 from anima.dcc.mayaEnv import auxiliary
-from anima.representation import Representation
+from anima.representation import Representation, RepresentationIndex
 
 import pymel.core as pm
 
@@ -530,8 +530,10 @@ class RepresentationGenerator(object):
 
         # check if all references have an BBOX repr first
         refs_with_no_bbox_repr = []
-        for ref in pm.listReferences():
-            if ref.version and not ref.has_repr("BBOX"):
+        refs = [(ref, ref.version) for ref in pm.listReferences()]
+        index = RepresentationIndex([v.task_id for ref, v in refs if v])
+        for ref, v in refs:
+            if v and not index.has_repr(v, "BBOX"):
                 refs_with_no_bbox_repr.append(ref)
 
         if len(refs_with_no_bbox_repr):
@@ -633,8 +635,10 @@ class RepresentationGenerator(object):
 
         # check if all references have an GPU repr first
         refs_with_no_gpu_repr = []
-        for ref in pm.listReferences():
-            if ref.version and not ref.has_repr("GPU"):
+        refs = [(ref, ref.version) for ref in pm.listReferences()]
+        index = RepresentationIndex([v.task_id for ref, v in refs if v])
+        for ref, v in refs:
+            if v and not index.has_repr(v, "GPU"):
                 refs_with_no_gpu_repr.append(ref)
 
         if len(refs_with_no_gpu_repr):
@@ -1154,8 +1158,10 @@ class RepresentationGenerator(object):
 
         # check if all references have an ASS repr first
         refs_with_no_ass_repr = []
-        for ref in pm.listReferences():
-            if ref.version and not ref.has_repr("ASS"):
+        refs = [(ref, ref.version) for ref in pm.listReferences()]
+        index = RepresentationIndex([v.task_id for ref, v in refs if v])
+        for ref, v in refs:
+            if v and not index.has_repr(v, "ASS"):
                 refs_with_no_ass_repr.append(ref)
 
         if len(refs_with_no_ass_repr):
@@ -1576,8 +1582,10 @@ class RepresentationGenerator(object):
 
         # check if all references have an ASS repr first
         refs_with_no_ass_repr = []
-        for ref in pm.listReferences():
-            if ref.version and not ref.has_repr("RS"):
+        refs = [(ref, ref.version) for ref in pm.listReferences()]
+        index = RepresentationIndex([v.task_id for ref, v in refs if v])
+        for ref, v in refs:
+            if v and not index.has_repr(v, "RS"):
                 refs_with_no_ass_repr.append(ref)
 
         if len(refs_with_no_ass_repr):
@@ -156,29 +156,21 @@ class Nuke(DCCBase):
         full_path = self._root.knob("name").value()
         return self.get_version_from_full_path(full_path)
 
-    def get_version_from_recent_files(self):
-        """It will try to create a
-        :class:`~stalker.models.version.Version` instance by looking at
-        the recent files list.
+    def get_recent_file_list(self):
+        """returns the recent files list of nuke
 
-        It will return None if it can not find one.
-
-        :return: :class:`~stalker.models.version.Version`
+        :return: list of str
         """
-        # use the last file from the recent file list
+        recent_files = []
         i = 1
         while True:
             try:
-                full_path = nuke.recentFile(i)
+                recent_files.append(nuke.recentFile(i))
             except RuntimeError:
-                # no recent file anymore just return None
-                return None
+                # no recent file anymore
+                return recent_files
             i += 1
 
-            version = self.get_version_from_full_path(full_path)
-            if version is not None:
-                return version
-
     def get_version_from_project_dir(self):
         """Tries to find a Version from the current project directory
 
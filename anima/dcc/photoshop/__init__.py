@@ -159,36 +159,3 @@ class Photoshop(DCCBase):
             logger.debug("version from current file: %s" % version)
 
         return version
-
-    def get_version_from_recent_files(self):
-        """It will try to create a
-        :class:`~stalker.models.version.Version` instance by looking at
-        the recent files list.
-
-        It will return None if it can not find one.
-
-        :return: :class:`~stalker.models.version.Version`
-        """
-        version = None
-
-        logger.debug("trying to get the version from recent file list")
-        # read the fileName from recent files list
-        # try to get the a valid asset file from starting the last recent file
-
-        rfm = RecentFileManager()
-
-        try:
-            recent_files = rfm[self.name]
-        except KeyError:
-            logger.debug("no recent files")
-            recent_files = None
-
-        if recent_files is not None:
-            for i in range(len(recent_files)):
-                version = self.get_version_from_full_path(recent_files[i])
-                if version is not None:
-                    break
-
-            logger.debug("version from recent files is: %s" % version)
-
-        return version
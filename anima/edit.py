@@ -1,6 +1,258 @@
 # -*- coding: utf-8 -*-
 
+import io
 import os
+import re
+from xml.sax.saxutils import escape
+
+from anima import string_types
+
+
+def _escape_attr(value):
+    """escapes the given value to be used in a double quoted XML attribute"""
+    return escape("%s" % value, {'"': "&quot;"})
+
+
+def _escape_text(value):
+    """escapes the given value to be used as XML text"""
+    return escape("%s" % value)
+
+
+class _TimecodeRate(object):
+    """the precomputed values of a frame rate to convert frame numbers to
+    timecodes without creating timecode.Timecode instances
+
+    The values are calculated in the same way with the timecode library, so
+    the results are identical to timecode.Timecode. The timecode strings are
+    built from two lookup tables, one for the "hh:mm:" part and one for the
+    "ss:ff" part of every frame in a minute, and parsed with the reverse of
+    these tables.
+
+    :param fps: The frame rate, a str like "24", "25" or "29.97" or a number
+    """
+
+    def __init__(self, fps):
+        self.fps = fps
+        self.float_fps = float(fps)
+        self.int_fps = round(self.float_fps * 1001 / 1000)
+        self.drop_frames = 0
+        if abs(self.float_fps - self.int_fps * 1000 / 1001) < 0.005:
+            # NTSC rates, only the multiples of 29.97 are drop frame
+            if self.int_fps % 30 == 0:
+                self.drop_frames = round(self.float_fps * 0.066666)
+        else:
+            self.int_fps = int(self.float_fps)
+
+        rate_fps = self.float_fps if self.drop_frames else float(self.int_fps)
+        self.frames_per_minute = self.int_fps * 60 - self.drop_frames
+        self.frames_per_10_minutes = round(rate_fps * 60 * 10)
+        self.frames_per_24_hours = round(rate_fps * 60 * 60 * 24)
+
+        delimiter = ";" if self.drop_frames else ":"
+        self.hours_minutes = [
+            "%02i:%02i:" % divmod(minutes, 60) for minutes in range(24 * 60)
+        ]
+        self.seconds_frames = [
+            "%02i%s%02i" % (frame // self.int_fps, delimiter, frame % self.int_fps)
+            for frame in range(self.int_fps * 60)
+        ]
+
+        # and the reverse lookup tables to convert timecodes to frames
+        self.minute_frames = dict(
+            (
+                hours_minutes,
+                self.int_fps * 60 * minutes
+                - self.drop_frames * (minutes - minutes // 10),
+            )
+            for minutes, hours_minutes in enumerate(self.hours_minutes)
+        )
+        self.second_frames = dict(
+            (seconds_frames, frame)
+            for frame, seconds_frames in enumerate(self.seconds_frames)
+        )
+
+
+# frame rate -> _TimecodeRate
+timecode_rates = {}
+
+
+def _get_timecode_rate(fps):
+    """returns the _TimecodeRate of the given frame rate from the
+    timecode_rates table, the rates are calculated on first use
+
+    :param fps: The frame rate, a str like "24", "25" or "29.97" or a number
+    """
+    try:
+        return timecode_rates[fps]
+    except KeyError:
+        rate = _TimecodeRate(fps)
+        timecode_rates[fps] = rate
+        return rate
+
+
+def timecode_to_frame(timecode, fps):
+    """converts the given timecode string to a 0-based frame number, this is
+    equal to ``timecode.Timecode(fps, timecode).frame_number`` without
+    creating a Timecode instance
+
+    :param str timecode: A timecode string like "00:00:01:10" or "00:01:00;02"
+      for drop frame rates.
+    :param fps: The frame rate.
+    :return: int
+    """
+    rate = _get_timecode_rate(fps)
+    try:
+        # "hh:mm:ss:ff" with valid seconds and frames
+        return rate.minute_frames[timecode[:6]] + rate.second_frames[timecode[6:]]
+    except KeyError:
+        pass
+
+    parts = timecode.replace(";", ":").replace(".", ":").split(":")
+    hours = int(parts[0])
+    minutes = int(parts[1])
+    frames = int(parts[3])
+
+    if "." in timecode:
+        fraction = timecode.split(".")
+        if len(fraction) == 2:
+            frames = round(float("." + fraction[1]) * rate.float_fps)
+
+    total_minutes = 60 * hours + minutes
+    frame = rate.int_fps * (60 * total_minutes + int(parts[2])) + frames
+    if rate.drop_frames:
+        frame -= rate.drop_frames * (total_minutes - total_minutes // 10)
+    return frame
+
+
+def frame_to_timecode(frame, fps):
+    """converts the given 0-based frame number to a timecode string, this is
+    equal to ``str(timecode.Timecode(fps, frames=frame + 1))`` without
+    creating a Timecode instance
+
+    :param int frame: The 0-based frame number.
+    :param fps: The frame rate.
+    :return: str
+    """
+    return _frame_to_timecode(frame, _get_timecode_rate(fps))
+
+
+def _frame_to_timecode(frame, rate):
+    """converts the given 0-based frame number to a timecode string with the
+    given _TimecodeRate, see :func:`.frame_to_timecode`
+    """
+    if frame < 0:
+        raise ValueError("frame should be a positive integer or zero, not %s" % frame)
+
+    frame %= rate.frames_per_24_hours
+    if rate.drop_frames:
+        drop_frames = rate.drop_frames
+        d, m = divmod(frame, rate.frames_per_10_minutes)
+        frame += drop_frames * 9 * d
+        if m > drop_frames:
+            frame += drop_frames * ((m - drop_frames) // rate.frames_per_minute)
+
+    minutes, frame = divmod(frame, rate.int_fps * 60)
+    return rate.hours_minutes[minutes] + rate.seconds_frames[frame]
+
+
+_edl_timecode_pattern = r"(\d{1,2}:\d{1,2}:\d{1,2}[:;]\d{1,3})"
+_edl_event_regex = re.compile(
+    r"(\d+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S*)\s+"
+    + r"\s+".join([_edl_timecode_pattern] * 4)
+)
+_edl_event_keys = [
+    "num",
+    "reel",
+    "track",
+    "tr_code",
+    "aux",
+    "src_start_tc",
+    "src_end_tc",
+    "rec_start_tc",
+    "rec_end_tc",
+]
+_edl_title_regex = re.compile(r"TITLE: (.+)")
+_edl_effect_regex = re.compile(r"EFFECTS NAME IS(\s+)(.+)")
+_edl_name_regex = re.compile(r"\*\s*FROM CLIP NAME:(\s+)(.+)")
+_edl_source_regex = re.compile(r"\*\s*SOURCE FILE:(\s+)(.+)")
+_edl_comment_regex = re.compile(r"\*\s*(.+)")
+_edl_comment_name_regex = re.compile(r"\*\s+FROM\s+CLIP\s+NAME:\s+(.+)")
+_edl_wipe_regex = re.compile(r"W\d+")
+
+
+def parse_edl(input_, fps):
+    """parses the given EDL and returns an edl.List instance.
+
+    This is a faster replacement of ``edl.Parser.parse()`` with the same
+    result, but the event timecodes are kept as strings instead of
+    timecode.Timecode instances. Use :func:`.timecode_to_frame` to convert
+    them to frame numbers, :meth:`.Sequence.from_edl` accepts both.
+
+    :param input_: The EDL content as a str or an iterable of lines (like an
+      open file).
+    :param fps: The frame rate of the EDL.
+    :return: edl.List
+    """
+    import edl
+
+    timewarp_matcher = edl.TimewarpMatcher(fps)
+
+    if isinstance(input_, str):
+        input_ = input_.splitlines(True)
+
+    stack = edl.List(fps)
+    events = stack.events
+    for line in input_:
+        # the same matchers with edl.Parser in the same order, the regular
+        # expressions only run on the lines that can match them
+        if "TITLE: " in line:
+            m = _edl_title_regex.search(line)
+            stack.title = m.group(1).strip()
+
+        # the event lines have at least 4 timecodes with 3 separators each
+        m = line.count(":") >= 8 and _edl_event_regex.search(line)
+        if m:
+            e = edl.Event(dict(zip(_edl_event_keys, m.groups())))
+            tr_code = e.tr_code
+            if tr_code == "C":
+                if events:
+                    events[-1].next_event = e
+                e.transition = edl.Cut()
+            elif tr_code == "D":
+                e.transition = edl.Dissolve()
+            elif _edl_wipe_regex.match(tr_code):
+                e.transition = edl.Wipe()
+            elif tr_code == "K":
+                e.transition = edl.Key()
+            events.append(e)
+
+        if "EFFECTS NAME IS" in line:
+            m = _edl_effect_regex.search(line)
+            if m:
+                events[-1].transition.effect = m.group(2).strip()
+
+        if "*" in line:
+            if "FROM CLIP NAME:" in line:
+                m = _edl_name_regex.search(line)
+                if m and events:
+                    events[-1].clip_name = m.group(2).strip()
+
+            if "SOURCE FILE:" in line:
+                m = _edl_source_regex.search(line)
+                if m and events:
+                    events[-1].source_file = m.group(2).strip()
+
+        if "M2" in line:
+            timewarp_matcher.apply(stack, line)
+
+        if "*" in line:
+            m = _edl_comment_regex.search(line)
+            if m and events:
+                events[-1].comments.append("* " + m.group(1))
+                m = "NAME:" in line and _edl_comment_name_regex.search(line)
+                if m:
+                    events[-1].clip_name = m.group(1).strip()
+    return stack
 
 
 class EditBase(object):
@@ -15,6 +267,18 @@ class EditBase(object):
 
     def to_xml(self, indentation=2, pre_indent=0):
         """returns an xml version of this PrevisBase object"""
+        output = io.StringIO()
+        self.write_xml(output, indentation=indentation, pre_indent=pre_indent)
+        return output.getvalue()
+
+    def write_xml(self, fileobj, indentation=2, pre_indent=0):
+        """writes the xml version of this PrevisBase object to the given file
+        like object element by element
+
+        :param fileobj: A file like object opened in text mode.
+        :param int indentation: The number of spaces per indentation level.
+        :param int pre_indent: The number of spaces to indent this element.
+        """
         raise NotImplementedError
 
     def from_edl(self, edl_list):
@@ -38,8 +302,6 @@ class NameMixin(object):
     @classmethod
     def _validate_name(cls, name):
         """validates the given name value"""
-        from anima import string_types
-
         if not isinstance(name, string_types):
             raise TypeError(
                 "%(class)s.name should be a string, not %(name_class)s"
@@ -134,6 +396,19 @@ class Sequence(EditBase, NameMixin, DurationMixin):
     def from_xml(self, xml_node):
         """Fills attributes with the given XML node
 
+        :param xml_node: an xml.etree.ElementTree.Element instance
+        """
+        self._attributes_from_xml(xml_node)
+
+        xml_media = xml_node.find("media")
+        media = Media()
+        media.from_xml(xml_media, files={})
+
+        self.media = media
+
+    def _attributes_from_xml(self, xml_node):
+        """Fills the attributes other than the media with the given XML node
+
         :param xml_node: an xml.etree.ElementTree.Element instance
         """
         self.duration = int(xml_node.find("duration").text)
@@ -146,47 +421,112 @@ class Sequence(EditBase, NameMixin, DurationMixin):
 
         self.timecode = xml_node.find("timecode").find("string").text
 
-        xml_media = xml_node.find("media")
-        media = Media()
-        media.from_xml(xml_media)
+    def read_xml(self, source):
+        """Fills attributes by incrementally parsing the given xmeml file.
 
-        self.media = media
+        Unlike :meth:`.from_xml` the whole document is not kept in memory, the
+        clipitems and tracks are dropped as soon as they are converted to
+        :class:`.Clip` and :class:`.Track` instances. The clips referencing a
+        file by its id (``<file id="..."/>``) share the :class:`.File`
+        instance of the clip that defines it.
 
-    def to_xml(self, indentation=2, pre_indent=0):
-        """returns an xml version of this Sequence object"""
-        template = """<?xml version="1.0" encoding="UTF-8"?>
+        :param source: The path of the XML file or a file like object.
+        """
+        from xml.etree.ElementTree import iterparse
+
+        files = {}
+        elements = []
+        for event, element in iterparse(source, events=("start", "end")):
+            if event == "start":
+                parent_tag = elements[-1].tag if elements else None
+                if element.tag == "media" and parent_tag == "sequence":
+                    self.media = Media()
+                elif element.tag == "video" and parent_tag == "media":
+                    self.media.video = Video()
+                elif element.tag == "track" and parent_tag == "video":
+                    self.media.video.tracks.append(Track())
+                elements.append(element)
+                continue
+
+            elements.pop()
+            parent = elements[-1] if elements else None
+            parent_tag = parent.tag if parent is not None else None
+            if element.tag == "clipitem" and parent_tag == "track":
+                clip = Clip()
+                clip.from_xml(element, files=files)
+                self.media.video.tracks[-1].clips.append(clip)
+            elif element.tag == "track" and parent_tag == "video":
+                # the clipitems are already removed
+                self.media.video.tracks[-1].from_xml(element, files=files)
+            elif element.tag == "video" and parent_tag == "media":
+                # the tracks are already removed
+                self.media.video.from_xml(element, files=files)
+            elif element.tag == "sequence":
+                self._attributes_from_xml(element)
+            else:
+                continue
+
+            # free the consumed elements
+            element.clear()
+            if parent is not None:
+                parent.remove(element)
+
+    def write_xml(self, fileobj, indentation=2, pre_indent=0):
+        """writes an xml version of this Sequence object to the given file like
+        object without building the whole document in memory
+
+        :param fileobj: A file like object opened in text mode.
+        :param int indentation: The number of spaces per indentation level.
+        :param int pre_indent: The number of spaces to indent this element.
+        """
+        pre_indent_str = " " * pre_indent
+        indentation_str = " " * indentation
+        fileobj.write(
+            """<?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE xmeml>
 <xmeml version="5">
 %(pre_indent)s<sequence>
 %(pre_indent)s%(indentation)s<duration>%(duration)s</duration>
 %(pre_indent)s%(indentation)s<name>%(name)s</name>
-%(rate)s
+"""
+            % {
+                "duration": self.duration,
+                "name": _escape_text(self.name),
+                "indentation": indentation_str,
+                "pre_indent": pre_indent_str,
+            }
+        )
+        self.rate.write_xml(
+            fileobj, indentation=indentation, pre_indent=indentation + pre_indent
+        )
+        fileobj.write(
+            """
 %(pre_indent)s%(indentation)s<timecode>
 %(pre_indent)s%(indentation)s%(indentation)s<string>%(timecode)s</string>
 %(pre_indent)s%(indentation)s</timecode>
-%(media)s
+"""
+            % {
+                "timecode": _escape_text(self.timecode),
+                "indentation": indentation_str,
+                "pre_indent": pre_indent_str,
+            }
+        )
+        self.media.write_xml(
+            fileobj, indentation=indentation, pre_indent=indentation + pre_indent
+        )
+        fileobj.write(
+            """
 %(pre_indent)s</sequence>
 </xmeml>"""
-
-        return template % {
-            "duration": self.duration,
-            "name": self.name,
-            "ntsc": str(self.ntsc).upper(),
-            "rate": self.rate.to_xml(
-                indentation=indentation, pre_indent=indentation + pre_indent
-            ),
-            "timecode": self.timecode,
-            "media": self.media.to_xml(
-                indentation=indentation, pre_indent=indentation + pre_indent
-            ),
-            "indentation": " " * indentation,
-            "pre_indent": " " * pre_indent,
-        }
+            % {"pre_indent": pre_indent_str}
+        )
 
     def from_edl(self, edl_list):
         """Fills attributes with the given edl.List instance
 
-        :param edl_list: an edl.List instance
+        :param edl_list: an edl.List instance, the event timecodes can be
+          timecode.Timecode instances (edl.Parser) or strings
+          (:func:`.parse_edl`)
         """
         import edl
 
@@ -204,41 +544,59 @@ class Sequence(EditBase, NameMixin, DurationMixin):
         v.tracks.append(video_track)
         # no audio tracks fow now
 
+        fps = edl_list.fps
+        rate = _get_timecode_rate(fps)
+        minute_frames = rate.minute_frames
+        second_frames = rate.second_frames
+
+        def to_frame(tc):
+            try:
+                # the lookup of timecode_to_frame without the function call
+                return minute_frames[tc[:6]] + second_frames[tc[6:]]
+            except (KeyError, TypeError):
+                pass
+            if isinstance(tc, str):
+                return timecode_to_frame(tc, fps)
+            return tc.frame_number
+
+        # get the last timecode like 23:59:59:xx to fix negative timecodes
+        tc_24_hours = timecode_to_frame("23:59:59:{}".format(fps), fps)
+
         # read Events in to Clips
         sequence_start = 1e20
         sequence_end = -1
+        clips = video_track.clips
         for e in edl_list.events:
             assert isinstance(e, edl.Event)
-            clip = Clip()
-
-            clip.name = e.reel
-            clip.id = e.clip_name
-            clip.type = "Video" if e.track == "V" else "Audio"
-
-            clip.in_ = e.src_start_tc.frame_number
-            clip.out = e.src_end_tc.frame_number
-
-            clip.duration = clip.out - clip.in_
-
-            clip.start = e.rec_start_tc.frame_number
-            clip.end = e.rec_end_tc.frame_number
+            in_ = to_frame(e.src_start_tc)
+            out = to_frame(e.src_end_tc)
+            start = to_frame(e.rec_start_tc)
+            end = to_frame(e.rec_end_tc)
 
             # check in and out points relative to each other
-            if clip.start > clip.end:
+            if start > end:
                 # a possible negative number
-                from timecode import Timecode
-
-                # get the last timecode like 23:59:59:xx
-                tc_24_hours = Timecode(edl_list.fps, "23:59:59:{}".format(edl_list.fps))
-                clip.start -= tc_24_hours.frame_number  # + 1
-
-            if clip.start < sequence_start:
-                sequence_start = clip.start
-            if clip.end > sequence_end:
-                sequence_end = clip.end
-
-            f = File()
-            f.name = clip.name
+                start -= tc_24_hours  # + 1
+
+            if start < sequence_start:
+                sequence_start = start
+            if end > sequence_end:
+                sequence_end = end
+
+            if e.track != "V":
+                # no audio tracks for now
+                continue
+
+            clip = Clip(
+                id=e.clip_name,
+                name=e.reel,
+                start=start,
+                end=end,
+                duration=out - in_,
+                in_=in_,
+                out=out,
+                type_="Video",
+            )
 
             # include the handle at start,
             # but we can not have any idea about the
@@ -246,14 +604,12 @@ class Sequence(EditBase, NameMixin, DurationMixin):
             #
             # a possible solution is to look to the original media
             # but we may not be able to reach the media itself
-            f.duration = e.src_end_tc.frame_number
-
-            f.pathurl = "file://{}".format(e.source_file)
-
-            clip.file = f
-
-            if clip.type == "Video":
-                video_track.clips.append(clip)
+            clip.file = File(
+                duration=out,
+                name=clip.name,
+                pathurl="file://{}".format(e.source_file),
+            )
+            clips.append(clip)
 
         self.duration = sequence_end - sequence_start
         # TODO: fix this later, timecode always 00:00:00:00 for now
@@ -263,9 +619,9 @@ class Sequence(EditBase, NameMixin, DurationMixin):
     def to_edl(self):
         """Returns an edl.List instance equivalent of this Sequence instance"""
         from edl import List, Event
-        from timecode import Timecode
 
-        l = List(self.rate.timebase)
+        fps = self.rate.timebase
+        l = List(fps)
         l.title = self.name
 
         # convert clips to events
@@ -278,46 +634,38 @@ class Sequence(EditBase, NameMixin, DurationMixin):
 
         video = self.media.video
         if video is not None:
+            rate = _get_timecode_rate(fps)
             i = 0
             for track in video.tracks:
                 for clip in track.clips:
                     i += 1
-                    e = Event({})
-                    e.num = "%06i" % i
-                    e.clip_name = clip.id
-                    e.reel = clip.name
-                    e.track = "V" if clip.type == "Video" else "A"
-                    e.tr_code = "C"  # TODO: for now use C (Cut) later on
-                    # expand it to add other transition codes
-
-                    src_start_tc = Timecode(self.rate.timebase, frames=clip.in_ + 1)
-                    # 1 frame after last frame shown
-                    src_end_tc = Timecode(self.rate.timebase, frames=clip.out + 1)
-
-                    e.src_start_tc = str(src_start_tc)
-                    e.src_end_tc = str(src_end_tc)
-
-                    rec_start_tc = Timecode(self.rate.timebase, frames=clip.start + 1)
-                    # 1 frame after last frame shown
-                    rec_end_tc = Timecode(self.rate.timebase, frames=clip.end + 1)
-
-                    e.rec_start_tc = str(rec_start_tc)
-                    e.rec_end_tc = str(rec_end_tc)
-
                     source_file = clip.file.pathurl.replace("file://localhost", "")
                     if ":" in source_file and source_file.startswith("/"):
                         # remove the leading '/'
                         source_file = source_file[1:]
 
-                    e.source_file = source_file
-
-                    e.comments.extend(
-                        [
-                            "* FROM CLIP NAME: {}".format(clip.name),
-                            "* SOURCE FILE: {}".format(source_file),
-                        ]
+                    e = Event(
+                        {
+                            "num": "%06i" % i,
+                            "clip_name": clip.id,
+                            "reel": clip.name,
+                            "track": "V" if clip.type == "Video" else "A",
+                            # TODO: for now use C (Cut) later on expand it to
+                            # add other transition codes
+                            "tr_code": "C",
+                            "src_start_tc": _frame_to_timecode(clip.in_, rate),
+                            # 1 frame after last frame shown
+                            "src_end_tc": _frame_to_timecode(clip.out, rate),
+                            "rec_start_tc": _frame_to_timecode(clip.start, rate),
+                            # 1 frame after last frame shown
+                            "rec_end_tc": _frame_to_timecode(clip.end, rate),
+                            "source_file": source_file,
+                            "comments": [
+                                "* FROM CLIP NAME: {}".format(clip.name),
+                                "* SOURCE FILE: {}".format(source_file),
+                            ],
+                        }
                     )
-
                     l.append(e)
         return l
 
@@ -414,31 +762,29 @@ class Media(EditBase):
         self.video = None
         self.audio = None
 
-    def from_xml(self, xml_node):
+    def from_xml(self, xml_node, files=None):
         """Fills attributes with the given XML node
 
         :param xml_node: an xml.etree.ElementTree.Element instance
+        :param dict files: A dictionary of file ids to :class:`.File`
+          instances, to share the same instance between the clips referencing
+          the same file.
         """
         xml_video_tag = xml_node.find("video")
         video = Video()
-        video.from_xml(xml_video_tag)
+        video.from_xml(xml_video_tag, files=files)
         self.video = video
 
-    def to_xml(self, indentation=2, pre_indent=0):
-        """returns an xml version of this Media object"""
-        template = """%(pre_indent)s<media>
-%(video)s
-%(pre_indent)s</media>"""
-
-        video_data = self.video.to_xml(
-            indentation=indentation, pre_indent=indentation + pre_indent
+    def write_xml(self, fileobj, indentation=2, pre_indent=0):
+        """writes an xml version of this Media object to the given file like
+        object
+        """
+        pre_indent_str = " " * pre_indent
+        fileobj.write("%s<media>\n" % pre_indent_str)
+        self.video.write_xml(
+            fileobj, indentation=indentation, pre_indent=indentation + pre_indent
         )
-
-        return template % {
-            "video": video_data,
-            "pre_indent": " " * pre_indent,
-            "indentation": " " * indentation,
-        }
+        fileobj.write("\n%s</media>" % pre_indent_str)
 
 
 class Video(EditBase):
@@ -449,10 +795,13 @@ class Video(EditBase):
         self.height = 0
         self.tracks = []
 
-    def from_xml(self, xml_node):
+    def from_xml(self, xml_node, files=None):
         """Fills attributes with the given XML node
 
         :param xml_node: an xml.etree.ElementTree.Element instance
+        :param dict files: A dictionary of file ids to :class:`.File`
+          instances, to share the same instance between the clips referencing
+          the same file.
         """
         format_node = xml_node.find("format")
         self.width = int(format_node.find("samplecharacteristics").find("width").text)
@@ -461,38 +810,38 @@ class Video(EditBase):
         # create tracks
         for track_tag in xml_node.findall("track"):
             track = Track()
-            track.from_xml(track_tag)
+            track.from_xml(track_tag, files=files)
 
             self.tracks.append(track)
 
-    def to_xml(self, indentation=2, pre_indent=0):
-        """returns an xml version of this Video object"""
-        template = """%(pre_indent)s<video>
+    def write_xml(self, fileobj, indentation=2, pre_indent=0):
+        """writes an xml version of this Video object to the given file like
+        object track by track
+        """
+        pre_indent_str = " " * pre_indent
+        fileobj.write(
+            """%(pre_indent)s<video>
 %(pre_indent)s%(indentation)s<format>
 %(pre_indent)s%(indentation)s%(indentation)s<samplecharacteristics>
 %(pre_indent)s%(indentation)s%(indentation)s%(indentation)s<width>%(width)s</width>
 %(pre_indent)s%(indentation)s%(indentation)s%(indentation)s<height>%(height)s</height>
 %(pre_indent)s%(indentation)s%(indentation)s</samplecharacteristics>
 %(pre_indent)s%(indentation)s</format>
-%(tracks)s
-%(pre_indent)s</video>"""
-
-        track_data = []
-        for track in self.tracks:
-            track_data.append(
-                track.to_xml(
-                    indentation=indentation, pre_indent=indentation + pre_indent
-                )
+"""
+            % {
+                "width": self.width,
+                "height": self.height,
+                "pre_indent": pre_indent_str,
+                "indentation": " " * indentation,
+            }
+        )
+        for i, track in enumerate(self.tracks):
+            if i:
+                fileobj.write("\n")
+            track.write_xml(
+                fileobj, indentation=indentation, pre_indent=indentation + pre_indent
             )
-        track_data_as_str = "\n".join(track_data)
-
-        return template % {
-            "width": self.width,
-            "height": self.height,
-            "tracks": track_data_as_str,
-            "pre_indent": " " * pre_indent,
-            "indentation": " " * indentation,
-        }
+        fileobj.write("\n%s</video>" % pre_indent_str)
 
 
 class Track(EditBase):
@@ -505,36 +854,48 @@ class Track(EditBase):
 
     def optimize_clips(self):
         """optimizes files across all clips to use the same file node if two or
-        more clips are using the same files
+        more clips are using the same files, and makes the clip ids unique by
+        adding a number suffix to the repeated ones (e.g. "shot2", "shot2 2",
+        "shot2 3")
         """
-        # check all clip files and set to the same file node if the path is
-        # the same
-        for i in range(len(self.clips)):
-            clip = self.clips[i]
-            # go over the rest of the clips
-            for j in range(i + 1, len(self.clips)):
-                compare_clip = self.clips[j]
-                if clip.file.pathurl == compare_clip.file.pathurl:
-                    compare_clip.file = clip.file
-
-                # also check the ids
-                if clip.id == compare_clip.id:
-                    # get the id randomized part
-                    random_part = clip.id.split(" ")[-1]
-                    if random_part != clip.id:
-                        random_id = int(random_part) + 1
-                        compare_clip.id = "{} {}".format(
-                            clip.id.split(" ")[0],
-                            random_id
-                        )
-                    else:
-                        random_id = 2
-                        compare_clip.id = "{} {}".format(clip.id, random_id)
+        files_by_pathurl = {}
+        taken_ids = set(clip.id for clip in self.clips)
+        used_ids = set()
+        next_suffixes = {}
+        for clip in self.clips:
+            # use the first file node with the same path
+            if clip.file is not None:
+                clip.file = files_by_pathurl.setdefault(clip.file.pathurl, clip.file)
+
+            if clip.id not in used_ids:
+                used_ids.add(clip.id)
+                continue
+
+            # continue from the number suffix of the id if there is one
+            base_id, _, suffix = clip.id.rpartition(" ")
+            if base_id and suffix.isdigit():
+                suffix = int(suffix) + 1
+            else:
+                base_id = clip.id
+                suffix = 2
 
-    def from_xml(self, xml_node):
+            suffix = max(suffix, next_suffixes.get(base_id, suffix))
+            new_id = "{} {}".format(base_id, suffix)
+            while new_id in taken_ids or new_id in used_ids:
+                suffix += 1
+                new_id = "{} {}".format(base_id, suffix)
+            next_suffixes[base_id] = suffix + 1
+
+            clip.id = new_id
+            used_ids.add(new_id)
+
+    def from_xml(self, xml_node, files=None):
         """Fills attributes with the given XML node
 
         :param xml_node: an xml.etree.ElementTree.Element instance
+        :param dict files: A dictionary of file ids to :class:`.File`
+          instances, to share the same instance between the clips referencing
+          the same file.
         """
         self.locked = xml_node.find("locked").text.title() == "True"
         self.enabled = xml_node.find("enabled").text.title() == "True"
@@ -542,33 +903,33 @@ class Track(EditBase):
         # find clips
         for clip_tag in xml_node.findall("clipitem"):
             clip = Clip()
-            clip.from_xml(clip_tag)
+            clip.from_xml(clip_tag, files=files)
             self.clips.append(clip)
 
-    def to_xml(self, indentation=2, pre_indent=0):
-        """returns an xml version of this Track object"""
-        template = """%(pre_indent)s<track>
+    def write_xml(self, fileobj, indentation=2, pre_indent=0):
+        """writes an xml version of this Track object to the given file like
+        object clip by clip
+        """
+        pre_indent_str = " " * pre_indent
+        fileobj.write(
+            """%(pre_indent)s<track>
 %(pre_indent)s%(indentation)s<locked>%(locked)s</locked>
 %(pre_indent)s%(indentation)s<enabled>%(enabled)s</enabled>
-%(clips)s
-%(pre_indent)s</track>"""
-
-        clip_data = []
-        for clip in self.clips:
-            clip_data.append(
-                clip.to_xml(
-                    indentation=indentation, pre_indent=indentation + pre_indent
-                )
+"""
+            % {
+                "locked": str(self.locked).upper(),
+                "enabled": str(self.enabled).upper(),
+                "pre_indent": pre_indent_str,
+                "indentation": " " * indentation,
+            }
+        )
+        for i, clip in enumerate(self.clips):
+            if i:
+                fileobj.write("\n")
+            clip.write_xml(
+                fileobj, indentation=indentation, pre_indent=indentation + pre_indent
             )
-        clip_data_as_str = "\n".join(clip_data)
-
-        return template % {
-            "locked": str(self.locked).upper(),
-            "enabled": str(self.enabled).upper(),
-            "clips": clip_data_as_str,
-            "pre_indent": " " * pre_indent,
-            "indentation": " " * indentation,
-        }
+        fileobj.write("\n%s</track>" % pre_indent_str)
 
 
 class Clip(EditBase, NameMixin, DurationMixin):
@@ -621,8 +982,6 @@ class Clip(EditBase, NameMixin, DurationMixin):
         if id_ is None:
             id_ = ""
 
-        from anima import string_types
-
         if not isinstance(id_, string_types):
             raise TypeError(
                 "%(class)s.id should be a string or unicode, not %(id_class)s"
@@ -641,10 +1000,13 @@ class Clip(EditBase, NameMixin, DurationMixin):
         """setter for the _id attribute"""
         self._id = self._validate_id(id_)
 
-    def from_xml(self, xml_node):
+    def from_xml(self, xml_node, files=None):
         """Fills attributes with the given XML node
 
         :param xml_node: an xml.etree.ElementTree.Element instance
+        :param dict files: A dictionary of file ids to :class:`.File`
+          instances, to share the same instance between the clips referencing
+          the same file.
         """
         self.id = xml_node.attrib["id"]
         self.start = int(xml_node.find("start").text)
@@ -656,47 +1018,65 @@ class Clip(EditBase, NameMixin, DurationMixin):
         self.out = int(xml_node.find("out").text)
 
         file_tag = xml_node.find("file")
-        if file_tag:
+        if file_tag is None:
+            return
+
+        file_id = file_tag.attrib.get("id")
+        if len(file_tag) == 0 and files is not None and file_id in files:
+            # a reference to a file defined by a previous clip
+            self.file = files[file_id]
+            return
+
+        if len(file_tag):
             f = File()
             f.from_xml(file_tag)
-
             self.file = f
+            if files is not None and file_id is not None:
+                files.setdefault(file_id, f)
 
-    def to_xml(self, indentation=2, pre_indent=0):
-        """returns an xml version of this Clip object"""
-        template = """%(pre_indent)s<clipitem id="%(id)s">
+    def write_xml(self, fileobj, indentation=2, pre_indent=0):
+        """writes an xml version of this Clip object to the given file like
+        object
+        """
+        pre_indent_str = " " * pre_indent
+        indentation_str = " " * indentation
+        fileobj.write(
+            """%(pre_indent)s<clipitem id="%(id)s">
 %(pre_indent)s%(indentation)s<end>%(end)i</end>
 %(pre_indent)s%(indentation)s<name>%(name)s</name>
 %(pre_indent)s%(indentation)s<enabled>%(enabled)s</enabled>
 %(pre_indent)s%(indentation)s<start>%(start)i</start>
 %(pre_indent)s%(indentation)s<in>%(in)i</in>
-%(pre_indent)s%(indentation)s<duration>%(duration)i</duration>%(rate)s
-%(pre_indent)s%(indentation)s<out>%(out)i</out>
-%(file)s
-%(pre_indent)s</clipitem>"""
-
-        rate_xml = ""
+%(pre_indent)s%(indentation)s<duration>%(duration)i</duration>"""
+            % {
+                "id": _escape_attr(self.id),
+                "start": self.start,
+                "end": self.end,
+                "name": _escape_text(self.name),
+                "enabled": self.enabled,
+                "duration": self.duration,
+                "in": self.in_,
+                "pre_indent": pre_indent_str,
+                "indentation": indentation_str,
+            }
+        )
         if self.rate:
-            rate_xml = "\n{}".format(self.rate.to_xml(
-                indentation=indentation, pre_indent=pre_indent + indentation
-            ))
-
-        return template % {
-            "id": self.id,
-            "start": self.start,
-            "end": self.end,
-            "name": self.name,
-            "enabled": self.enabled,
-            "duration": self.duration,
-            "in": self.in_,
-            "out": self.out,
-            "file": self.file.to_xml(
-                indentation=indentation, pre_indent=pre_indent + indentation
-            ),
-            "pre_indent": " " * pre_indent,
-            "indentation": " " * indentation,
-            "rate": rate_xml,
-        }
+            fileobj.write("\n")
+            self.rate.write_xml(
+                fileobj, indentation=indentation, pre_indent=pre_indent + indentation
+            )
+        fileobj.write(
+            "\n%(pre_indent)s%(indentation)s<out>%(out)i</out>\n"
+            % {
+                "out": self.out,
+                "pre_indent": pre_indent_str,
+                "indentation": indentation_str,
+            }
+        )
+        self.file.write_xml(
+            fileobj, indentation=indentation, pre_indent=pre_indent + indentation
+        )
+        fileobj.write("\n%s</clipitem>" % pre_indent_str)
 
 
 class File(EditBase, NameMixin, DurationMixin):
@@ -728,8 +1108,6 @@ class File(EditBase, NameMixin, DurationMixin):
     @classmethod
     def _validate_pathurl(cls, pathurl):
         """validates the given pathurl value"""
-        from anima import string_types
-
         if not isinstance(pathurl, string_types):
             raise TypeError(
                 "%(class)s.pathurl should be a string, not "
@@ -785,8 +1163,11 @@ class File(EditBase, NameMixin, DurationMixin):
         if pathurl_node is not None:
             self.pathurl = pathurl_node.text
 
-    def to_xml(self, indentation=2, pre_indent=0):
-        """returns an xml version of this File object"""
+    def write_xml(self, fileobj, indentation=2, pre_indent=0):
+        """writes an xml version of this File object to the given file like
+        object, the File is written as a reference to its id after the first
+        time
+        """
         if self.exported_once:
             template = """%(pre_indent)s<file id="%(id)s"/>"""
         else:
@@ -797,14 +1178,17 @@ class File(EditBase, NameMixin, DurationMixin):
 %(pre_indent)s</file>"""
             self.exported_once = True
 
-        return template % {
-            "id": self.id,
-            "duration": self.duration,
-            "name": self.name,
-            "pathurl": self.pathurl,
-            "pre_indent": " " * pre_indent,
-            "indentation": " " * indentation,
-        }
+        fileobj.write(
+            template
+            % {
+                "id": _escape_attr(self.id),
+                "duration": self.duration,
+                "name": _escape_text(self.name),
+                "pathurl": _escape_text(self.pathurl),
+                "pre_indent": " " * pre_indent,
+                "indentation": " " * indentation,
+            }
+        )
 
 
 class Rate(EditBase):
@@ -833,8 +1217,6 @@ class Rate(EditBase):
         if timebase is None:
             timebase = cls.__timebase_default_value
 
-        from anima import string_types
-
         if not isinstance(timebase, string_types):
             raise TypeError(
                 "%(class)s.timebase should be a str, not "
@@ -887,15 +1269,20 @@ class Rate(EditBase):
             self.timebase = rate_tag.find("timebase").text
             self.ntsc = rate_tag.find("ntsc").text.title() == "True"
 
-    def to_xml(self, indentation=2, pre_indent=0):
-        """returns an xml version of this Media object"""
+    def write_xml(self, fileobj, indentation=2, pre_indent=0):
+        """writes an xml version of this Rate object to the given file like
+        object
+        """
         template = """%(pre_indent)s<rate>
 %(pre_indent)s%(indentation)s<timebase>%(timebase)s</timebase>
 %(pre_indent)s%(indentation)s<ntsc>%(ntsc)s</ntsc>
 %(pre_indent)s</rate>"""
-        return template % {
-            "timebase": self.timebase,
-            "ntsc": "TRUE" if self.ntsc else "FALSE",
-            "pre_indent": " " * pre_indent,
-            "indentation": " " * indentation,
-        }
+        fileobj.write(
+            template
+            % {
+                "timebase": _escape_text(self.timebase),
+                "ntsc": "TRUE" if self.ntsc else "FALSE",
+                "pre_indent": " " * pre_indent,
+                "indentation": " " * indentation,
+            }
+        )
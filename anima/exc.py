@@ -7,3 +7,18 @@ class PublishError(RuntimeError):
     """Raised when the published version is not matching the quality"""
 
     pass
+
+
+class VersionCopyError(RuntimeError):
+    """Raised when the files of some of the copied versions couldn't be copied
+
+    :param str message: The error message.
+    :param list versions: The versions that are copied successfully.
+    :param list failures: A list of (source_version, destination_path, error)
+      tuples of the failed copies.
+    """
+
+    def __init__(self, message, versions=None, failures=None):
+        super(VersionCopyError, self).__init__(message)
+        self.versions = versions or []
+        self.failures = failures or []
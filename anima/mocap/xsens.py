@@ -1,5 +1,36 @@
 # -*- coding: utf-8 -*-
-
+"""XSens MVN network stream (MXTP) tools.
+
+:class:`.XSensListener` receives the MXTP datagrams in to a preallocated buffer
+and decodes them in to :class:`.Frame` instances which are kept in a
+:class:`.XSensRingBuffer`. The segment values of a packet are decoded with one
+``struct`` call and are kept as a flat tuple, use :attr:`.Frame.segments` to
+get them as :class:`.Euler` or :class:`.Quaternion` instances::
+
+  listener = XSensListener()
+  for frame in listener.listen(port=9763):
+      print(frame.header.sample_counter, frame.segments)
+
+or capture in a background thread and read the frames when needed::
+
+  listener = XSensListener()
+  listener.start(port=9763)
+  frames, index, dropped = listener.ring_buffer.read(0, timeout=1)
+  listener.stop()
+
+:class:`.XSensStore` records the frames in to a binary file and
+:class:`.XSensRecording` reads them back::
+
+  XSensStore("/tmp/take1.xsens").store(listener.listen(port=9763))
+  recording = XSensRecording("/tmp/take1.xsens")
+  frame = recording[1000]
+"""
+
+import os
+import queue
+import socket
+import struct
+import threading
 from collections import namedtuple
 
 # Data containers
@@ -28,148 +59,881 @@ header_data_format = "!IBBIc7s"
 euler_data_format = "!i6f"
 quaternion_data_format = "!i7f"
 
+# the other packet types that are not decoded yet:
+# 03: Pose data - MVN Optical marker set 1
+# 04: Pose data - Motion Grid Tag data (Deprecated)
+# 05: Pose data - Unity3D
+# 10: Pose data - Scale Information (Deprecated)
+# 11: Pose data - Prop Information (Deprecated)
+# 12: Character Information -> meta data
+# 13: Character Information -> Scaling Information
+# 20: Joint Angle data
+# 21: Linear Segment Kinematics
+# 22: Angular Segment Kinematics
+# 23: Motion Tracker Kinematics
+# 24: Center Of Mass
+MXTP_ID = b"MXTP"
+EULER_PACKET = "01"
+QUATERNION_PACKET = "02"
+TIMECODE_PACKET = "25"
+
+header_struct = struct.Struct(header_data_format)
+header_offset = len(MXTP_ID) + 2  # the ID string is "MXTP" + packet type
+payload_offset = header_offset + header_struct.size
+timecode_size = 12  # "HH:MM:SS.mmm"
+
+# packet type -> (segment format, segment size, number of values, container)
+segment_formats = {
+    EULER_PACKET: ("i6f", struct.calcsize(euler_data_format), 7, Euler),
+    QUATERNION_PACKET: ("i7f", struct.calcsize(quaternion_data_format), 8, Quaternion),
+}
+
+_segment_block_structs = {}
+
+
+def _get_segment_block_struct(packet_type, count):
+    """returns a struct.Struct decoding the given number of segments at once
+
+    :param str packet_type: The packet type, "01" or "02".
+    :param int count: The number of segments.
+    """
+    key = (packet_type, count)
+    try:
+        return _segment_block_structs[key]
+    except KeyError:
+        block_struct = struct.Struct("!" + segment_formats[packet_type][0] * count)
+        _segment_block_structs[key] = block_struct
+        return block_struct
+
+
+class Frame(namedtuple("Frame", ["packet_type", "header", "data"])):
+    """A decoded MXTP packet.
+
+    ``data`` is the flat tuple of the segment values (segment_ID, tx, ty, tz,
+    and rx, ry, rz or q1, q2, q3, q4 of every segment) or a one item tuple
+    holding the timecode string of timecode packets.
+    """
+
+    __slots__ = ()
+
+    @property
+    def segments(self):
+        """returns the segments as Euler, Quaternion or TimeCode instances"""
+        if self.packet_type == TIMECODE_PACKET:
+            return [TimeCode._make(self.data)]
+
+        if self.packet_type not in segment_formats:
+            return []
+
+        count, container = segment_formats[self.packet_type][2:]
+        data = self.data
+        return [
+            container._make(data[i : i + count]) for i in range(0, len(data), count)
+        ]
+
+
+def encode_packet(packet_type, header, data=()):
+    """Encodes the given packet in to MXTP bytes.
+
+    :param str packet_type: The packet type, "01", "02" or "25".
+    :param header: A :class:`.Header` instance or a tuple with the same items.
+    :param data: The flat tuple of segment values or a one item tuple holding
+      the timecode string for the timecode packets.
+    :return: bytes
+    """
+    payload = b""
+    if packet_type in segment_formats:
+        count = len(data) // segment_formats[packet_type][2]
+        payload = _get_segment_block_struct(packet_type, count).pack(*data)
+    elif packet_type == TIMECODE_PACKET:
+        payload = data[0].encode("ascii")
+
+    return MXTP_ID + packet_type.encode("ascii") + header_struct.pack(*header) + payload
+
+
+def decode_datagram(buffer, size=None):
+    """Decodes the MXTP packets in the given buffer.
+
+    The buffer is not copied, the header and the segment values are decoded
+    directly from it.
+
+    :param buffer: A bytes or bytearray instance.
+    :param int size: The number of bytes to decode, all of the buffer by
+      default.
+    :return: A list of :class:`.Frame` instances.
+    """
+    if size is None:
+        size = len(buffer)
+
+    frames = []
+    pos = buffer.find(MXTP_ID, 0, size)
+    while pos != -1 and pos + payload_offset <= size:
+        packet_type = buffer[pos + 4 : pos + header_offset].decode("ascii")
+        header = Header._make(header_struct.unpack_from(buffer, pos + header_offset))
+        start = pos + payload_offset
+        end = start
+
+        if packet_type in segment_formats:
+            segment_size = segment_formats[packet_type][1]
+            count = min(header.num_items, (size - start) // segment_size)
+            end = start + count * segment_size
+            data = _get_segment_block_struct(packet_type, count).unpack_from(
+                buffer, start
+            )
+        elif packet_type == TIMECODE_PACKET:
+            end = min(start + timecode_size, size)
+            data = (buffer[start:end].decode("ascii"),)
+        else:
+            # packets that are not decoded yet
+            data = ()
+
+        frames.append(Frame(packet_type, header, data))
+        pos = buffer.find(MXTP_ID, end, size)
+    return frames
+
+
+class XSensRingBuffer(object):
+    """A fixed size ring buffer of decoded frames.
+
+    The frames are indexed with the total number of frames written so far, so
+    readers can continue from where they left and know how many frames they
+    missed if the writer was faster.
+
+    :param int capacity: The number of frames to keep.
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self._frames = [None] * capacity
+        self._count = 0
+        self._condition = threading.Condition()
+
+    @property
+    def count(self):
+        """the total number of frames written"""
+        return self._count
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def extend(self, frames):
+        """Appends the given frames overwriting the oldest ones.
+
+        :param frames: A list of :class:`.Frame` instances.
+        """
+        if not frames:
+            return
+        with self._condition:
+            capacity = self.capacity
+            for frame in frames:
+                self._frames[self._count % capacity] = frame
+                self._count += 1
+            self._condition.notify_all()
+
+    def read(self, start, timeout=None):
+        """Returns the frames written after the given index.
+
+        :param int start: The index of the first frame to return, use the
+          returned index to continue reading.
+        :param float timeout: Wait this many seconds for new frames if there
+          are none. ``None`` does not wait.
+        :return: A tuple of the list of frames, the index to continue reading
+          from and the number of frames that are overwritten before they are
+          read.
+        """
+        with self._condition:
+            if timeout and start >= self._count:
+                self._condition.wait(timeout)
+
+            count = self._count
+            first = max(start, count - self.capacity)
+            capacity = self.capacity
+            frames = [self._frames[i % capacity] for i in range(first, count)]
+            return frames, count, first - start if first > start else 0
+
+    def latest(self):
+        """returns the last written frame or None"""
+        with self._condition:
+            if not self._count:
+                return None
+            return self._frames[(self._count - 1) % self.capacity]
+
 
 class XSensListener(object):
-    """Network listener and parser for XSens data"""
+    """Network listener and parser for XSens data.
 
-    def listen(self, host="localhost", port=9763, timeout=2):
-        """listens and prints XSens stream"""
-        import struct
-        import socket
+    The datagrams are received with ``recv_into`` in to a preallocated buffer
+    and the decoded frames are kept in :attr:`.ring_buffer`.
 
+    :param int buffer_size: The size of the receive buffer, should be bigger
+      than the biggest datagram.
+    :param int ring_buffer_size: The number of frames to keep.
+    :param int socket_buffer_size: The size of the socket receive buffer, so
+      the bursts are not dropped by the OS.
+    """
+
+    def __init__(
+        self, buffer_size=65536, ring_buffer_size=4096, socket_buffer_size=4194304
+    ):
+        self.buffer = bytearray(buffer_size)
+        self.buffer_view = memoryview(self.buffer)
+        self.ring_buffer = XSensRingBuffer(ring_buffer_size)
+        self.socket_buffer_size = socket_buffer_size
+        self.socket = None
+        self.datagram_count = 0
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def address(self):
+        """the (host, port) that the listener is bound to"""
+        return self.socket.getsockname() if self.socket else None
+
+    def open(self, host="localhost", port=9763, timeout=2):
+        """Opens the UDP socket.
+
+        :param str host: The host to bind to.
+        :param int port: The port to bind to, 0 binds to a free port.
+        :param float timeout: The socket timeout in seconds.
+        """
+        self.close()
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.socket_buffer_size)
+        except OSError:
+            pass
         s.settimeout(timeout)
         s.bind((host, port))
+        self.socket = s
 
-        while True:
-            data = s.recv(2048)
-            packages = data.split("MXTP")
-            for package in packages:
-                packet_type_id = package[:2]
-
-                raw_data = package[2:]
-
-                header = raw_data[:18]  # excluding the MXTP01 ID String
-
-                if len(header) < 18:
-                    continue
-
-                header_data = Header._make(struct.unpack(header_data_format, header))
-
-                # parse the rest of the data by package type
-                raw_pose_data = raw_data[18:]
-                pose_data = []
-                if packet_type_id == "01":
-                    # euler data
-                    chunks = list(map("".join, zip(*[iter(raw_pose_data)] * 28)))
-                    for chunk in chunks:
-                        unpacked_data = struct.unpack(euler_data_format, chunk)
-                        euler_data = Euler._make(unpacked_data)
-                        pose_data.append(euler_data)
-
-                elif packet_type_id == "02":
-                    # quaternion data
-                    # euler data
-                    chunks = list(map("".join, zip(*[iter(raw_pose_data)] * 32)))
-                    for chunk in chunks:
-                        unpacked_data = struct.unpack(quaternion_data_format, chunk)
-                        quaternion_data = Quaternion._make(unpacked_data)
-                        pose_data.append(quaternion_data)
-
-                elif packet_type_id == "25":
-                    # TimeCode
-                    pose_data.append(TimeCode._make(raw_pose_data))
-
-                yield ([header_data, pose_data])
-
-                # elif packet_type_id == '03':
-                #     print('Pose data - MVN Optical marker set 1')
-                #     print(raw_pose_data)
-                #
-                # elif packet_type_id == '04':
-                #     print('Pose data - Motion Grid Tag data (Deprecated)')
-                #     print(raw_pose_data)
-                #
-                # elif packet_type_id == '05':
-                #     print('Pose data - Unity3D')
-                #     print(raw_pose_data)
-                #
-                # elif packet_type_id == '10':
-                #     print('Pose data - Scale Information (Deprecated)')
-                #     print(raw_pose_data)
-                #
-                # elif packet_type_id == '1!':
-                #     print('Pose data - Prop Information (Deprecated)')
-                #     print(raw_pose_data)
-                #
-                # elif packet_type_id == '12':
-                #     print('Character Information -> meta data')
-                #     print(raw_pose_data)
-                #
-                # elif packet_type_id == '13':
-                #     print('Character Information -> Scaling Information')
-                #     print(raw_pose_data)
-                #
-                # elif packet_type_id == '20':
-                #     print('Joint Angle data')
-                #     print(raw_pose_data)
-                #
-                # elif packet_type_id == '21':
-                #     print('Linear Segment Kinematics')
-                #     print(raw_pose_data)
-                #
-                # elif packet_type_id == '22':
-                #     print('Angular Segment Kinematics')
-                #     print(raw_pose_data)
-                #
-                # elif packet_type_id == '23':
-                #     print('Motion Tracker Kinematics')
-                #     print(raw_pose_data)
-                #
-                # elif packet_type_id == '24':
-                #     print('Center Of Mass')
-                #     print(raw_pose_data)
+    def close(self):
+        """Closes the UDP socket."""
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+    def receive(self):
+        """Receives and decodes one datagram.
+
+        :return: The list of decoded :class:`.Frame` instances.
+        """
+        size = self.socket.recv_into(self.buffer)
+        self.datagram_count += 1
+        frames = decode_datagram(self.buffer, size)
+        self.ring_buffer.extend(frames)
+        return frames
+
+    def listen(self, host="localhost", port=9763, timeout=2):
+        """Listens and yields the decoded frames until no data is received for
+        ``timeout`` seconds.
+
+        :param str host: The host to bind to.
+        :param int port: The port to bind to.
+        :param float timeout: The socket timeout in seconds.
+        """
+        self.open(host, port, timeout)
+        try:
+            while True:
+                try:
+                    frames = self.receive()
+                except socket.timeout:
+                    return
+                for frame in frames:
+                    yield frame
+        finally:
+            self.close()
+
+    def start(self, host="localhost", port=9763, timeout=0.5):
+        """Starts receiving in a background thread.
+
+        The frames can be read from :attr:`.ring_buffer`.
+
+        :param str host: The host to bind to.
+        :param int port: The port to bind to, 0 binds to a free port.
+        :param float timeout: The socket timeout in seconds, the thread checks
+          if it should stop at least this often.
+        """
+        self.stop()
+        self.open(host, port, timeout)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._receive_loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _receive_loop(self):
+        """receives until stopped"""
+        while not self._stop_event.is_set():
+            try:
+                self.receive()
+            except socket.timeout:
+                continue
+            except OSError:
+                # the socket is closed
+                break
+
+    def stop(self):
+        """Stops the background thread and closes the socket."""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+        self.close()
+
+
+# Recording file format, all little endian:
+#
+#   file header: magic, version, reserved, fps, chunk size
+#   chunks:      chunk header: magic, frame count, value count
+#                frame index:  one entry per frame
+#                data:         float32 values of all the frames
+#
+# All the chunks except the last one have "chunk size" frames, so the chunk of
+# any frame is known without reading the file.
+RECORDING_ID = b"AXSN"
+RECORDING_VERSION = 1
+CHUNK_ID = b"CHNK"
+
+recording_header_struct = struct.Struct("<4sHHdI12x")
+chunk_header_struct = struct.Struct("<4sII")
+# value offset, value count, sample counter, timecode, packet type,
+# datagram counter, num items, charID, extra data
+frame_index_struct = struct.Struct("<IIII2sBBc7s")
 
 
 class XSensStore(object):
-    """Stores XSens data in a file"""
+    """Stores XSens data in a file
+
+    The frames are collected in to chunks, which are written to the end of the
+    file by a background thread, so capturing never waits for the disk. The
+    chunks are passed to the writer through a bounded queue, if the disk can
+    not keep up and the queue is full the chunk is dropped and counted in
+    :attr:`.dropped_frames`.
+
+    :attr:`.frame_count` is the number of frames written to the file. If
+    writing fails (i.e. the disk is full) the writer stores the error in
+    :attr:`.error` and drops the rest of the chunks, and :meth:`.close`
+    raises the error.
+
+    Only the segment packets (euler and quaternion) are stored, use
+    :class:`.XSensRecording` to read the file back::
 
-    def __init__(self, output_file_fullpath=""):
+      listener = XSensListener()
+      XSensStore("/tmp/take1.xsens").store(listener.listen())
+
+    :param str output_file_fullpath: The path of the file.
+    :param float fps: The frame rate to store in the file header.
+    :param int chunk_size: The number of frames in a chunk.
+    :param int queue_size: The number of chunks waiting to be written.
+    """
+
+    def __init__(
+        self, output_file_fullpath="", fps=240, chunk_size=240, queue_size=256
+    ):
         self.output_file_fullpath = output_file_fullpath
+        self.fps = fps
+        self.chunk_size = chunk_size
+        self.queue_size = queue_size
+        self.frame_count = 0
+        self.dropped_frames = 0
+        self.error = None
+        self._chunk = []
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Creates the file and starts the writer thread."""
+        with open(self.output_file_fullpath, "wb") as f:
+            f.write(
+                recording_header_struct.pack(
+                    RECORDING_ID, RECORDING_VERSION, 0, self.fps, self.chunk_size
+                )
+            )
+        self.frame_count = 0
+        self.dropped_frames = 0
+        self.error = None
+        self._chunk = []
+        self._queue = queue.Queue(self.queue_size)
+        self._thread = threading.Thread(target=self._write_loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def write(self, frames):
+        """Adds the given frames to the file.
+
+        :param frames: A :class:`.Frame` instance or a list of them.
+        """
+        if isinstance(frames, Frame):
+            frames = [frames]
+
+        for frame in frames:
+            if frame.packet_type not in segment_formats:
+                continue
+            self._chunk.append(frame)
+            if len(self._chunk) == self.chunk_size:
+                self._put_chunk()
+
+    def _put_chunk(self, block=False):
+        """passes the current chunk to the writer thread
+
+        :param bool block: Wait for the writer if the queue is full instead of
+          dropping the chunk.
+        """
+        chunk = self._chunk
+        self._chunk = []
+        if block:
+            if self._put_while_writing(chunk):
+                return
+        else:
+            try:
+                self._queue.put(chunk, False)
+                return
+            except queue.Full:
+                from anima import logger
+
+                logger.warning(
+                    "XSensStore can not keep up, dropped {} frames".format(len(chunk))
+                )
+        # the whole chunk is dropped, so the chunks are still full and the
+        # frames can be found without reading the file
+        self._add_dropped_frames(len(chunk))
+
+    def _put_while_writing(self, item):
+        """puts the given item to the queue, waits for the writer thread as
+        long as it is alive
+
+        :return: True if the item is put in to the queue, False if the writer
+          thread is dead.
+        """
+        while self._thread.is_alive():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _add_dropped_frames(self, count):
+        """counts the dropped frames, from any thread"""
+        with self._lock:
+            self.dropped_frames += count
+
+    def close(self):
+        """Writes the remaining frames and waits for the writer thread.
+
+        :raises: The error of the writer thread, if writing the file failed.
+        """
+        if self._thread is None:
+            return
+        if self._chunk:
+            self._put_chunk(block=True)
+        self._put_while_writing(None)
+        self._thread.join()
+        self._thread = None
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     def store(self, stream):
         """Stores the data until the stream ends
 
-        :param stream:
-        :return:
+        :param stream: An iterable of :class:`.Frame` instances or lists of
+          them, like :meth:`.XSensListener.listen`.
+        :return: The number of stored frames.
         """
-        with open(self.output_file_fullpath, "wb"):
-            while stream:
-                pass
+        with self:
+            for frames in stream:
+                self.write(frames)
+        return self.frame_count
+
+    def _write_loop(self):
+        """writes the chunks in the queue to the end of the file
+
+        The queue is drained until the end even if writing fails, so the
+        capturing thread is never blocked by a dead writer.
+        """
+        f = None
+        try:
+            f = open(self.output_file_fullpath, "ab")
+        except Exception as e:
+            self._set_error(e)
+
+        try:
+            while True:
+                chunk = self._queue.get()
+                if chunk is None:
+                    break
+                if self.error is None:
+                    try:
+                        f.write(encode_chunk(chunk))
+                        f.flush()
+                    except Exception as e:
+                        self._set_error(e)
+                    else:
+                        self.frame_count += len(chunk)
+                        continue
+                self._add_dropped_frames(len(chunk))
+        finally:
+            if f is not None:
+                f.close()
+
+    def _set_error(self, error):
+        """stores the error of the writer thread"""
+        from anima import logger
+
+        logger.error("XSensStore can not write the file: {}".format(error))
+        self.error = error
+
+
+def encode_chunk(frames):
+    """Encodes the given frames in to a recording chunk.
+
+    :param frames: A list of :class:`.Frame` instances with segment data.
+    :return: bytes
+    """
+    import array
+    import itertools
+    import sys
+
+    index = []
+    value_offset = 0
+    for frame in frames:
+        header = frame.header
+        value_count = len(frame.data)
+        index.append(
+            frame_index_struct.pack(
+                value_offset,
+                value_count,
+                header.sample_counter,
+                header.timecode,
+                frame.packet_type.encode("ascii"),
+                header.datagram_counter,
+                header.num_items,
+                header.charID,
+                header.extra_data,
+            )
+        )
+        value_offset += value_count
+
+    values = array.array("f", itertools.chain.from_iterable(f.data for f in frames))
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    return b"".join(
+        [chunk_header_struct.pack(CHUNK_ID, len(frames), value_offset)]
+        + index
+        + [values.tobytes()]
+    )
+
+
+class XSensRecording(object):
+    """Reads the files written by :class:`.XSensStore`.
+
+    The file is memory mapped, any frame can be read without reading the
+    frames before it::
+
+      recording = XSensRecording("/tmp/take1.xsens")
+      print(len(recording), recording.fps)
+      frame = recording[1000]
+      data = recording.to_numpy(1000, 2000)  # requires NumPy
+
+    An incomplete chunk at the end of the file (of a crashed recording) is
+    ignored.
+
+    :param str path: The path of the recording.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._mmap = None
+        try:
+            self._open()
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self):
+        """opens the file and reads the header and the chunk offsets"""
+        import mmap
+
+        path = self.path
+        self._file = open(path, "rb")
+        # the empty files can not be mapped
+        size = os.fstat(self._file.fileno()).st_size
+        if size < recording_header_struct.size:
+            raise ValueError("{} is not an XSens recording".format(path))
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic,
+            version,
+            _,
+            self.fps,
+            self.chunk_size,
+        ) = recording_header_struct.unpack_from(self._mmap, 0)
+        if magic != RECORDING_ID:
+            raise ValueError("{} is not an XSens recording".format(path))
+        if version > RECORDING_VERSION:
+            raise ValueError(
+                "{} is written with a newer version ({}) of XSensStore".format(
+                    path, version
+                )
+            )
+
+        # (index offset, data offset, frame count) of every chunk
+        self._chunks = []
+        self._frame_count = 0
+        offset = recording_header_struct.size
+        size = len(self._mmap)
+        while offset + chunk_header_struct.size <= size:
+            magic, frame_count, value_count = chunk_header_struct.unpack_from(
+                self._mmap, offset
+            )
+            index_offset = offset + chunk_header_struct.size
+            data_offset = index_offset + frame_count * frame_index_struct.size
+            end = data_offset + 4 * value_count
+            if magic != CHUNK_ID or end > size:
+                break
+            self._chunks.append((index_offset, data_offset, frame_count))
+            self._frame_count += frame_count
+            offset = end
+
+    def close(self):
+        """Closes the file."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self._frame_count
+
+    def _locate(self, index):
+        """returns the index entry and the data offset of the given frame"""
+        if index < 0:
+            index += self._frame_count
+        if not 0 <= index < self._frame_count:
+            raise IndexError("frame index out of range")
+
+        chunk_index, frame_index = divmod(index, self.chunk_size)
+        index_offset, data_offset, _ = self._chunks[chunk_index]
+        entry = frame_index_struct.unpack_from(
+            self._mmap, index_offset + frame_index * frame_index_struct.size
+        )
+        return entry, data_offset + 4 * entry[0]
+
+    def get_values(self, index):
+        """Returns the float32 values of the given frame without copying them.
+
+        :param int index: The frame index.
+        :return: A memoryview of the little endian float32 values.
+        """
+        entry, offset = self._locate(index)
+        return memoryview(self._mmap)[offset : offset + 4 * entry[1]]
+
+    def __getitem__(self, index):
+        """Returns the frame with the given index.
+
+        :param int index: The frame index.
+        :return: :class:`.Frame`
+        """
+        (
+            _,
+            value_count,
+            sample_counter,
+            timecode,
+            packet_type,
+            datagram_counter,
+            num_items,
+            char_id,
+            extra_data,
+        ), offset = self._locate(index)
+        packet_type = packet_type.decode("ascii")
+
+        data = list(struct.unpack_from("<%if" % value_count, self._mmap, offset))
+        # the segment IDs are integers
+        segment_value_count = segment_formats[packet_type][2]
+        data[::segment_value_count] = map(int, data[::segment_value_count])
+
+        header = Header(
+            sample_counter, datagram_counter, num_items, timecode, char_id, extra_data
+        )
+        return Frame(packet_type, header, tuple(data))
+
+    def __iter__(self):
+        for i in range(self._frame_count):
+            yield self[i]
+
+    def frames(self, start=0, stop=None):
+        """Yields the frames in the given range.
+
+        :param int start: The index of the first frame.
+        :param int stop: The index after the last frame, all the frames until
+          the end by default.
+        """
+        for i in range(*slice(start, stop).indices(self._frame_count)):
+            yield self[i]
+
+    def to_numpy(self, start=0, stop=None, packet_type=None, character_id=None):
+        """Returns the values of the frames in the given range as a NumPy array.
+
+        Every row holds the values of one frame, so the frames should have the
+        same number of values, use ``packet_type`` and ``character_id`` to
+        filter the frames.
+
+        :param int start: The index of the first frame.
+        :param int stop: The index after the last frame, all the frames until
+          the end by default.
+        :param str packet_type: Only export the frames of the given packet
+          type.
+        :param int character_id: Only export the frames of the given character.
+        :return: numpy.ndarray
+        """
+        import numpy as np
+
+        rows = []
+        for i in range(*slice(start, stop).indices(self._frame_count)):
+            entry, offset = self._locate(i)
+            if packet_type is not None and entry[4].decode("ascii") != packet_type:
+                continue
+            if character_id is not None and ord(entry[7]) != character_id:
+                continue
+            rows.append(
+                np.frombuffer(self._mmap, dtype="<f4", count=entry[1], offset=offset)
+            )
+
+        if not rows:
+            return np.empty((0, 0), dtype="<f4")
+        if len(set(len(row) for row in rows)) != 1:
+            raise ValueError(
+                "The frames have different number of values, please filter them "
+                "with packet_type and character_id"
+            )
+        return np.stack(rows)
 
 
 class XSensGenerator(object):
     """Generates XSens compatible data
 
     :param source: A generator, if None, a random sequence will be generated.
+      Every item is the list of :class:`.Frame` instances of one frame.
+    :param int fps: The frame rate of the generated data.
+    :param bool generate_euler: Generate euler packets.
+    :param bool generate_quaternion: Generate quaternion packets.
+    :param int character_count: The number of characters in the random
+      sequence.
+    :param int segment_count: The number of segments of every character in
+      the random sequence.
+    :param int frame_count: The number of frames in the random sequence, None
+      generates frames forever.
+    :param int seed: The seed of the random sequence.
     """
 
     def __init__(
-        self, source=None, fps=240, generate_euler=True, generate_quaternion=True
+        self,
+        source=None,
+        fps=240,
+        generate_euler=True,
+        generate_quaternion=True,
+        character_count=1,
+        segment_count=23,
+        frame_count=None,
+        seed=None,
     ):
         self.source = source
         self.fps = fps
         self.generate_euler = generate_euler
         self.generate_quaternion = generate_quaternion
+        self.character_count = character_count
+        self.segment_count = segment_count
+        self.frame_count = frame_count
+        self.seed = seed
 
     def generate(self):
-        """generate data"""
+        """generate data in real time"""
         import time
 
-        for data in self.source:
-            time.sleep(1.0 / self.fps)
+        source = self.source
+        if source is None:
+            source = self._random_sequence_generator()
+
+        frame_duration = 1.0 / self.fps
+        next_time = time.time()
+        for data in source:
+            # keep the frame rate without accumulating the sleep errors
+            next_time += frame_duration
+            delay = next_time - time.time()
+            if delay > 0:
+                time.sleep(delay)
             yield data
 
+    def send(self, host="localhost", port=9763):
+        """Sends the generated data as MXTP datagrams in real time.
+
+        :param str host: The host to send the data to.
+        :param int port: The port to send the data to.
+        """
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for frames in self.generate():
+                for frame in frames:
+                    s.sendto(encode_packet(*frame), (host, port))
+        finally:
+            s.close()
+
     def _random_sequence_generator(self):
-        """generates random data"""
-        pass
+        """generates random data, the values are multiples of 1/256 so they
+        are exactly represented in the float32 MXTP segments
+        """
+        import itertools
+        import random
+
+        rng = random.Random(self.seed)
+        packet_types = []
+        if self.generate_euler:
+            packet_types.append(EULER_PACKET)
+        if self.generate_quaternion:
+            packet_types.append(QUATERNION_PACKET)
+
+        frame_numbers = itertools.count()
+        if self.frame_count is not None:
+            frame_numbers = range(self.frame_count)
+
+        for frame_number in frame_numbers:
+            timecode = int(frame_number * 1000 / self.fps)
+            frames = []
+            for character_id in range(self.character_count):
+                for packet_type in packet_types:
+                    header = Header(
+                        frame_number % 4294967296,
+                        0x80,  # the last datagram of this sample
+                        self.segment_count,
+                        timecode % 4294967296,
+                        struct.pack("B", character_id),
+                        b"\x00" * 7,
+                    )
+                    data = []
+                    value_count = segment_formats[packet_type][2] - 1
+                    for segment_id in range(1, self.segment_count + 1):
+                        data.append(segment_id)
+                        data.extend(
+                            rng.randint(-65536, 65536) / 256.0
+                            for _ in range(value_count)
+                        )
+                    frames.append(Frame(packet_type, header, tuple(data)))
+            yield frames
@@ -1,6 +1,12 @@
 # -*- coding: utf-8 -*-
 
+import collections
+import functools
+import json
+import re
+import threading
 import time
+import weakref
 
 indentation = 0
 tab_stop = 3
@@ -95,3 +101,279 @@ class TimeReporter(object):
     def report(self):
         self.measure()
         print(self.report_text % self.duration)
+
+
+_query_scope_stack = threading.local()
+_query_listeners_installed = False
+_query_listeners_lock = threading.Lock()
+
+# the callbacks of add_statement_callback per engine
+_statement_callbacks = weakref.WeakKeyDictionary()
+
+# the merged statistics of the finished QueryScopes per scope name
+query_scopes = {}
+_query_scopes_lock = threading.Lock()
+
+
+def fingerprint_statement(statement):
+    """Returns the given SQL statement with the literals and the expanded IN
+    lists collapsed, so the statements that are only different in their
+    parameters have the same fingerprint.
+
+    :param str statement: The SQL statement.
+    :return str: The fingerprint.
+    """
+    statement = re.sub(r"'(?:[^']|'')*'", "?", statement)
+    statement = re.sub(r"\b\d+(?:\.\d+)?\b", "?", statement)
+    statement = re.sub(r"%\(\w+\)s|:\w+|\$\d+|%s", "?", statement)
+    statement = re.sub(r"\(\s*\?(?:\s*,\s*\?)*\s*\)", "(?)", statement)
+    return re.sub(r"\s+", " ", statement).strip()
+
+
+def _install_query_listeners():
+    """Installs the SQLAlchemy engine listeners that time the statements for
+    the active QueryScopes and the statement callbacks. The statements are not
+    timed if there is no active scope in the current thread and no callback for
+    the engine.
+    """
+    global _query_listeners_installed
+    with _query_listeners_lock:
+        if _query_listeners_installed:
+            return
+
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        @event.listens_for(Engine, "before_cursor_execute")
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            if (
+                getattr(_query_scope_stack, "scopes", None)
+                or conn.engine in _statement_callbacks
+            ):
+                conn.info.setdefault("query_scope_start", []).append(time.time())
+
+        @event.listens_for(Engine, "after_cursor_execute")
+        def after_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ):
+            starts = conn.info.get("query_scope_start")
+            if not starts:
+                return
+            duration = time.time() - starts.pop()
+            for callback in _statement_callbacks.get(conn.engine, []):
+                callback(statement, duration)
+            scopes = getattr(_query_scope_stack, "scopes", None)
+            if not scopes:
+                return
+            fingerprint = fingerprint_statement(statement)
+            for scope in scopes:
+                scope.record(fingerprint, duration)
+
+        @event.listens_for(Engine, "handle_error")
+        def handle_error(exception_context):
+            # there is no after_cursor_execute event for the failed statements
+            conn = exception_context.connection
+            if conn is None:
+                return
+            starts = conn.info.get("query_scope_start")
+            if starts:
+                starts.pop()
+
+        _query_listeners_installed = True
+
+
+def add_statement_callback(engine, callback):
+    """Calls the given callback for every statement executed by the given
+    engine in any thread.
+
+    The statements are timed by the same listeners with :class:`.QueryScope`.
+
+    :param engine: A ``sqlalchemy.engine.Engine`` instance.
+    :param callback: A callable accepting the statement and its execution time
+      in seconds.
+    """
+    _install_query_listeners()
+    with _query_listeners_lock:
+        callbacks = list(_statement_callbacks.get(engine, []))
+        callbacks.append(callback)
+        _statement_callbacks[engine] = callbacks
+
+
+class QueryScope(object):
+    """Records the SQL statements executed in a named scope.
+
+    The statements executed through any SQLAlchemy engine in the current thread
+    are counted while the scope is active. The scopes can be nested, the
+    statements are recorded by all the active scopes. It can be used as a
+    context manager or as a decorator::
+
+        with QueryScope("load tasks", max_statements=3) as scope:
+            tasks = user_task_query(user, project)
+        print(scope.statement_count, scope.db_time)
+        print(scope.n_plus_one())
+
+        @QueryScope("update view")
+        def update_view():
+            ...
+
+    The statements that are repeated at least ``n_plus_one_threshold`` times
+    in a scope are reported as likely N+1 queries by :meth:`.n_plus_one`. When
+    the scope exits, its statistics are merged to the ``query_scopes``
+    dictionary under its name, which can be saved with
+    :func:`dump_query_report`.
+
+    :param str name: The name of the scope. The name of the function is used if
+      it is used as a decorator without a name.
+    :param int max_statements: If given, an AssertionError is raised when the
+      scope exits with more statements, useful to set a query budget in tests.
+    :param int n_plus_one_threshold: The number of times a statement should be
+      repeated to be reported as an N+1 query.
+    """
+
+    def __init__(self, name=None, max_statements=None, n_plus_one_threshold=5):
+        self.name = name
+        self.max_statements = max_statements
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.statement_count = 0
+        self.db_time = 0.0
+        self.fingerprints = collections.Counter()
+        self.fingerprint_times = collections.defaultdict(float)
+
+    def record(self, fingerprint, duration):
+        """Records one statement execution.
+
+        :param str fingerprint: The fingerprint of the statement.
+        :param float duration: The execution time in seconds.
+        """
+        self.statement_count += 1
+        self.db_time += duration
+        self.fingerprints[fingerprint] += 1
+        self.fingerprint_times[fingerprint] += duration
+
+    def n_plus_one(self):
+        """Returns the statements that are likely to be N+1 queries.
+
+        :return list: A list of (fingerprint, count) tuples, the most repeated
+          first.
+        """
+        return [
+            (fingerprint, count)
+            for fingerprint, count in self.fingerprints.most_common()
+            if count >= self.n_plus_one_threshold
+            and fingerprint.upper().startswith("SELECT")
+        ]
+
+    def merge(self, other):
+        """Adds the statistics of the other scope to this one.
+
+        :param other: Another :class:`.QueryScope` instance.
+        """
+        self.statement_count += other.statement_count
+        self.db_time += other.db_time
+        self.fingerprints.update(other.fingerprints)
+        for fingerprint, duration in other.fingerprint_times.items():
+            self.fingerprint_times[fingerprint] += duration
+
+    def to_dict(self):
+        """Returns the statistics as a JSON serializable dictionary."""
+        return {
+            "name": self.name,
+            "statement_count": self.statement_count,
+            "db_time": self.db_time,
+            "statements": [
+                {
+                    "fingerprint": fingerprint,
+                    "count": count,
+                    "db_time": self.fingerprint_times[fingerprint],
+                }
+                for fingerprint, count in self.fingerprints.most_common()
+            ],
+            "n_plus_one": [
+                {"fingerprint": fingerprint, "count": count}
+                for fingerprint, count in self.n_plus_one()
+            ],
+        }
+
+    def report(self):
+        """Prints the statistics."""
+        print(
+            "{}: {} statements, {:0.3f} sec".format(
+                self.name, self.statement_count, self.db_time
+            )
+        )
+        for fingerprint, count in self.n_plus_one():
+            print("   possible N+1 ({} times): {}".format(count, fingerprint))
+
+    def __enter__(self):
+        _install_query_listeners()
+        if not hasattr(_query_scope_stack, "scopes"):
+            _query_scope_stack.scopes = []
+        _query_scope_stack.scopes.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _query_scope_stack.scopes.remove(self)
+
+        with _query_scopes_lock:
+            merged_scope = query_scopes.get(self.name)
+            if merged_scope is None:
+                merged_scope = QueryScope(
+                    self.name, n_plus_one_threshold=self.n_plus_one_threshold
+                )
+                query_scopes[self.name] = merged_scope
+            merged_scope.merge(self)
+
+        if (
+            exc_type is None
+            and self.max_statements is not None
+            and self.statement_count > self.max_statements
+        ):
+            raise AssertionError(
+                "{} executed {} statements, the budget is {}:\n{}".format(
+                    self.name,
+                    self.statement_count,
+                    self.max_statements,
+                    "\n".join(
+                        "{:5d} x {}".format(count, fingerprint)
+                        for fingerprint, count in self.fingerprints.most_common()
+                    ),
+                )
+            )
+
+    def __call__(self, f):
+        """Uses a new scope with the same settings for every call of the
+        decorated function.
+        """
+        name = self.name if self.name is not None else f.__name__
+
+        @functools.wraps(f)
+        def wrapped_f(*args, **kwargs):
+            with QueryScope(
+                name,
+                max_statements=self.max_statements,
+                n_plus_one_threshold=self.n_plus_one_threshold,
+            ):
+                return f(*args, **kwargs)
+
+        return wrapped_f
+
+
+def dump_query_report(path=None):
+    """Returns the statistics of all the finished QueryScopes as JSON and
+    saves them to the given path.
+
+    :param str path: The path of the JSON file. If skipped the report is only
+      returned.
+    :return str: The report as JSON.
+    """
+    with _query_scopes_lock:
+        scopes = [
+            query_scopes[name].to_dict() for name in sorted(query_scopes, key=str)
+        ]
+    report = json.dumps(scopes, indent=4)
+    if path is not None:
+        with open(path, "w") as f:
+            f.write(report)
+    return report
@@ -1,7 +1,51 @@
 # -*- coding: utf-8 -*-
 
+import atexit
+import contextlib
 import json
 import os
+import re
+import tempfile
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # not Windows
+    msvcrt = None
+
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """Lock the given lock file exclusively across processes.
+
+    :param str path: The lock file path, it is created if it doesn't exist.
+    """
+    try:
+        os.makedirs(os.path.dirname(path))
+    except OSError:
+        # dir exists
+        pass
+
+    with open(path, "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
 
 
 class RecentFileManager(object):
@@ -21,13 +65,36 @@ class RecentFileManager(object):
     The data is held as a dictionary and the resultant RecentFileManager
     instance is stored in %HOME/.cache/anima/ folder.
 
-    The RecentFileManager instance is restored from the cache folder when a new
-    one is created. So it is kind of a Singleton.
+    There is only one RecentFileManager instance per cache file in a process,
+    creating a new one returns the existing instance, which only re-reads the
+    changes made by the other processes.
+
+    The changes are appended to a log file per DCC next to the cache file, and
+    the logs are compacted in to the cache file with an atomic rename when the
+    manager is idle for :attr:`.flush_delay` seconds, when there are
+    :attr:`.compact_threshold` pending changes, on :meth:`.save` or when the
+    process exits. All the disk access is done while holding a lock file, so
+    multiple DCC sessions running at the same time don't overwrite each others
+    changes.
     """
 
+    flush_delay = 2.0
+    compact_threshold = 100
+    generation_key = "__generation__"
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
     def __new__(cls):
-        """restore from locally saved one"""
-        return super(RecentFileManager, cls).__new__(cls)
+        """return the existing instance for the current cache file"""
+        cache_file_full_path = cls.cache_file_full_path()
+        with cls._instances_lock:
+            instance = cls._instances.get(cache_file_full_path)
+            if instance is None:
+                instance = super(RecentFileManager, cls).__new__(cls)
+                instance._initialized = False
+                cls._instances[cache_file_full_path] = instance
+        return instance
 
     @classmethod
     def cache_file_full_path(cls):
@@ -43,23 +110,97 @@ class RecentFileManager(object):
         )
 
     def __init__(self):
+        if self._initialized:
+            self.refresh()
+            return
+
+        self._initialized = True
+        self._lock = threading.RLock()
+        self._path = self.cache_file_full_path()
+        self._generation = None
+        self._snapshot_signature = None
+        self._log_offsets = {}
+        self._pending_changes = 0
+        self._flush_timer = None
         self.recent_files = dict()
         self.restore()
+        atexit.register(self.flush)
+
+    def _get_snapshot_signature(self):
+        """:return: a tuple that changes when the cache file is replaced"""
+        try:
+            stat = os.stat(self._path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime, stat.st_size
+
+    def _log_path(self, dcc_name):
+        """:return str: the path of the append log of the given DCC"""
+        return "{}.{}.log".format(self._path, re.sub(r"[^\w\-]", "_", dcc_name))
+
+    def _log_paths(self):
+        """:return list: the paths of the append logs of all the DCCs"""
+        folder, name = os.path.split(self._path)
+        try:
+            file_names = os.listdir(folder)
+        except OSError:
+            return []
+        return sorted(
+            os.path.join(folder, file_name)
+            for file_name in file_names
+            if file_name.startswith(name + ".") and file_name.endswith(".log")
+        )
+
+    def _lock_file(self):
+        """:return: a context manager that locks the cache file for all processes"""
+        return _file_lock("{}.lock".format(self._path))
 
     def save(self):
         """save itself to local cache"""
-        dumped_data = json.dumps(
-            self.recent_files, sort_keys=True, indent=4, separators=(",", ": ")
-        )
+        with self._lock:
+            with self._lock_file():
+                self.refresh()
+                self._write_snapshot()
+
+    def flush(self):
+        """save the pending changes if there are any"""
+        with self._lock:
+            if self._pending_changes:
+                self.save()
+
+    def _write_snapshot(self):
+        """Write the current data to the cache file and remove the append logs.
+
+        Both the thread and file locks should be held.
+        """
+        self._cancel_flush()
+        generation = uuid.uuid4().hex
+        data = dict(self.recent_files)
+        data[self.generation_key] = generation
+        dumped_data = json.dumps(data, sort_keys=True, indent=4, separators=(",", ": "))
         self._write_data(dumped_data)
 
+        for log_path in self._log_paths():
+            try:
+                os.remove(log_path)
+            except OSError:
+                pass
+
+        self._generation = generation
+        self._snapshot_signature = self._get_snapshot_signature()
+        self._log_offsets = {}
+        self._pending_changes = 0
+
     def _write_data(self, data):
         """Writes the given data to the cache file
 
+        The data is written to a temp file which then replaces the cache file,
+        so the cache file is never left half written.
+
         :param data: the data to be written (generally serialized
           RecentFilesManager class itself).
         """
-        file_full_path = self.cache_file_full_path()
+        file_full_path = self._path
 
         # create the path first
         file_path = os.path.dirname(file_full_path)
@@ -68,58 +209,179 @@ class RecentFileManager(object):
         except OSError:
             # dir exists
             pass
-        finally:
-            with open(file_full_path, "w+") as data_file:
+
+        fd, temp_path = tempfile.mkstemp(
+            prefix="{}.".format(os.path.basename(file_full_path)),
+            suffix=".tmp",
+            dir=file_path,
+        )
+        try:
+            with os.fdopen(fd, "w") as data_file:
                 data_file.writelines(data)
+                data_file.flush()
+                os.fsync(data_file.fileno())
+            os.replace(temp_path, file_full_path)
+        except Exception:
+            os.remove(temp_path)
+            raise
 
     def restore(self):
         """restore from local cache folder"""
-        try:
-            with open(RecentFileManager.cache_file_full_path(), "r") as s:
-                self.recent_files = json.loads(s.read())
-        except (IOError, ValueError):
-            pass
+        with self._lock:
+            self._snapshot_signature = self._get_snapshot_signature()
+            self._generation = None
+            self._log_offsets = {}
+            self.recent_files = dict()
+            try:
+                with open(self._path, "r") as s:
+                    data = json.loads(s.read())
+            except (IOError, ValueError):
+                data = {}
+            if not isinstance(data, dict):
+                data = {}
 
-        # limit maximum recent files
-        from anima import defaults
+            # the logs are only valid for the cache file they are written for
+            self._generation = data.pop(self.generation_key, None)
+            self.recent_files = data
+            self._replay_logs()
 
-        for dcc in self.recent_files:
-            self.recent_files[dcc] = self.recent_files[dcc][: defaults.max_recent_files]
+            # limit maximum recent files
+            from anima import defaults
 
-    def add(self, dcc_name, file_path):
-        """Saves the given file_path under the given DCC name
+            for dcc in self.recent_files:
+                self.recent_files[dcc] = self.recent_files[dcc][
+                    : defaults.max_recent_files
+                ]
 
-        :param dcc_name: The name of the DCC
-        :param file_path: The file_path
-        :return: None
+    def refresh(self):
+        """read the changes made by the other processes"""
+        with self._lock:
+            if self._get_snapshot_signature() != self._snapshot_signature:
+                self.restore()
+            elif not self._replay_logs():
+                self.restore()
+
+    def _replay_logs(self):
+        """Apply the new entries in the append logs.
+
+        :return bool: False if a log is truncated and the data needs to be
+          restored from the start.
         """
-        if dcc_name not in self.recent_files:
-            self.recent_files[dcc_name] = []
+        if self._generation is None:
+            return True
 
-        if file_path in self.recent_files[dcc_name]:
-            self.recent_files[dcc_name].remove(file_path)
+        for log_path in self._log_paths():
+            offset = self._log_offsets.get(log_path, 0)
+            try:
+                with open(log_path, "rb") as log_file:
+                    log_file.seek(0, os.SEEK_END)
+                    if log_file.tell() < offset:
+                        return False
+                    log_file.seek(offset)
+                    data = log_file.read()
+            except (IOError, OSError):
+                continue
 
-        self.recent_files[dcc_name].insert(0, file_path)
+            # skip the partially written last line
+            data = data[: data.rfind(b"\n") + 1]
+            self._log_offsets[log_path] = offset + len(data)
+            for line in data.splitlines():
+                try:
+                    entry = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    continue
+                if entry.get("generation") == self._generation:
+                    self._apply(entry)
+        return True
 
-        # clamp max files stored
+    def _apply(self, entry):
+        """Apply the given log entry to the in memory data.
+
+        :param dict entry: The log entry.
+        """
         from anima import defaults
 
-        self.recent_files[dcc_name] = self.recent_files[dcc_name][
-            : defaults.max_recent_files
-        ]
+        dcc_name = entry["dcc"]
+        if entry["op"] == "set":
+            self.recent_files[dcc_name] = list(entry["paths"])
+        elif entry["op"] == "add":
+            files = self.recent_files.setdefault(dcc_name, [])
+            if entry["path"] in files:
+                files.remove(entry["path"])
+            files.insert(0, entry["path"])
+        elif entry["op"] == "remove":
+            files = self.recent_files.get(dcc_name, [])
+            if entry["path"] in files:
+                files.remove(entry["path"])
+
+        # clamp max files stored
+        if dcc_name in self.recent_files:
+            self.recent_files[dcc_name] = self.recent_files[dcc_name][
+                : defaults.max_recent_files
+            ]
+
+    def _append(self, entry):
+        """Apply the given entry and append it to the log of its DCC.
+
+        :param dict entry: The log entry.
+        """
+        with self._lock:
+            with self._lock_file():
+                self.refresh()
+                self._apply(entry)
+                if self._generation is None:
+                    # there is no cache file to append to yet
+                    self._write_snapshot()
+                    return
+
+                entry["generation"] = self._generation
+                log_path = self._log_path(entry["dcc"])
+                with open(log_path, "ab") as log_file:
+                    log_file.write(
+                        json.dumps(entry, sort_keys=True).encode("utf-8") + b"\n"
+                    )
+                self._log_offsets[log_path] = os.path.getsize(log_path)
+
+                self._pending_changes += 1
+                if self._pending_changes >= self.compact_threshold:
+                    self._write_snapshot()
+                else:
+                    self._schedule_flush()
+
+    def _schedule_flush(self):
+        """(re)start the timer that flushes the pending changes"""
+        self._cancel_flush()
+        self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def _cancel_flush(self):
+        """cancel the flush timer"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
 
-        self.save()
+    def add(self, dcc_name, file_path):
+        """Saves the given file_path under the given DCC name
+
+        :param dcc_name: The name of the DCC
+        :param file_path: The file_path
+        :return: None
+        """
+        self._append({"op": "add", "dcc": dcc_name, "path": file_path})
 
     def remove(self, dcc_name, file_path):
         """Removes the given path from the recent files list"""
-        self[dcc_name].remove(file_path)
+        if file_path not in self[dcc_name]:
+            raise ValueError("{} is not in the recent files".format(file_path))
+        self._append({"op": "remove", "dcc": dcc_name, "path": file_path})
 
     def __getitem__(self, item):
         """
         :param str item: The name of the DCC
-        :return:
+        :return: a copy of the recent files list of the given DCC
         """
-        return self.recent_files[item]
+        return list(self.recent_files[item])
 
     def __setitem__(self, key, value):
         """
@@ -128,4 +390,4 @@ class RecentFileManager(object):
         :param list value: the value
         :return:
         """
-        self.recent_files[key] = value
+        self._append({"op": "set", "dcc": key, "paths": list(value)})
@@ -0,0 +1,528 @@
+# -*- coding: utf-8 -*-
+"""Compact binary storage for RSProxy instance point data.
+
+This module is used to transfer Redshift Proxy instance points from Houdini to Maya.
+It doesn't depend on any DCC, so the data can be written and read in any Python
+interpreter.
+
+The file layout (all values are little endian) is::
+
+  header            : see ``HEADER_FORMAT``
+  chunk 0 .. n-1    : per chunk point data (optionally zlib compressed)
+  string tables     : instance_file, node_name and parent_name tables
+  chunk index       : see ``CHUNK_INDEX_FORMAT``, one entry per chunk
+
+Each chunk stores the data of ``point_count`` points as consecutive typed arrays::
+
+  pos           : float32 * 3 * point_count
+  rot           : float32 * 3 * point_count
+  sca           : float32 * point_count
+  instance_file : uint32 * point_count (index to the instance_file table)
+  node_name     : uint32 * point_count (index to the node_name table)
+  parent_name   : uint32 * point_count (index to the parent_name table)
+
+Uncompressed files can be memory mapped, in which case the chunk arrays are
+zero-copy ``memoryview`` instances on the mapped file.
+
+Usage::
+
+  from anima.render import rsproxy_data
+
+  with rsproxy_data.RSProxyDataWriter(path, compress=True) as writer:
+      writer.write(pos, rot, sca, instance_file, node_name, parent_name)
+
+  with rsproxy_data.RSProxyDataReader(path) as reader:
+      for pos, rot, sca, instance_file, node_name, parent_name in reader.points():
+          ...
+"""
+
+import array
+import mmap
+import struct
+import sys
+import zlib
+
+MAGIC = b"ARSP"
+FORMAT_VERSION = 1
+
+FLAG_COMPRESSED = 1
+
+HEADER_FORMAT = "<4sHHQIIQQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+CHUNK_INDEX_FORMAT = "<QQQI4x"
+CHUNK_INDEX_SIZE = struct.calcsize(CHUNK_INDEX_FORMAT)
+
+DEFAULT_CHUNK_SIZE = 65536
+
+STRING_ATTRIBUTES = ["instance_file", "node_name", "parent_name"]
+
+_NEEDS_BYTESWAP = sys.byteorder != "little"
+
+
+def _to_float_array(values):
+    """Convert the given values to a little endian float32 array.
+
+    Args:
+        values (Union[bytes, array.array, list, tuple]): Flat float values or the
+            raw bytes of a little endian float32 array (as returned by Houdini's
+            ``pointFloatAttribValuesAsString``).
+
+    Returns:
+        array.array: The float32 array.
+    """
+    data = array.array("f")
+    if isinstance(values, (bytes, bytearray, memoryview)):
+        data.frombytes(values)
+        if _NEEDS_BYTESWAP:
+            data.byteswap()
+    else:
+        data.extend(values)
+    return data
+
+
+def _flatten(values, width):
+    """Flatten a list of vectors to a flat list if it is not flat already.
+
+    Args:
+        values (Union[bytes, list, tuple, array.array]): The values.
+        width (int): The vector width.
+
+    Returns:
+        Union[bytes, list, tuple, array.array]: Flat values.
+    """
+    if width == 1 or isinstance(values, (bytes, bytearray, memoryview, array.array)):
+        return values
+    if values and isinstance(values[0], (list, tuple)):
+        return [component for vector in values for component in vector]
+    return values
+
+
+class RSProxyDataWriter(object):
+    """Writes RSProxy instance point data in chunks.
+
+    Args:
+        path (str): The output file path.
+        compress (bool): Compress the chunks with zlib. Compressed files can not be
+            memory mapped but are considerably smaller.
+        chunk_size (int): Maximum number of points per chunk.
+    """
+
+    def __init__(self, path, compress=False, chunk_size=DEFAULT_CHUNK_SIZE):
+        if chunk_size < 1:
+            raise ValueError("chunk_size should be a positive integer")
+        self.path = path
+        self.compress = compress
+        self.chunk_size = chunk_size
+        self.point_count = 0
+
+        self._file = None
+        self._chunk_index = []
+        self._string_tables = dict((name, []) for name in STRING_ATTRIBUTES)
+        self._string_lut = dict((name, {}) for name in STRING_ATTRIBUTES)
+        self._pending = None
+        self._reset_pending()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _reset_pending(self):
+        """Reset the pending (not yet written) chunk data."""
+        self._pending = {
+            "pos": array.array("f"),
+            "rot": array.array("f"),
+            "sca": array.array("f"),
+            "instance_file": array.array("I"),
+            "node_name": array.array("I"),
+            "parent_name": array.array("I"),
+        }
+
+    def open(self):
+        """Open the file and reserve space for the header."""
+        if self._file is not None:
+            return
+        self._file = open(self.path, "wb")
+        self._file.write(b"\x00" * HEADER_SIZE)
+
+    def _string_indices(self, attr_name, values):
+        """Return the string table indices of the given values.
+
+        Args:
+            attr_name (str): One of ``STRING_ATTRIBUTES``.
+            values (Iterable[str]): The string values.
+
+        Returns:
+            array.array: The uint32 indices.
+        """
+        lut = self._string_lut[attr_name]
+        table = self._string_tables[attr_name]
+        indices = array.array("I")
+        for value in values:
+            index = lut.get(value)
+            if index is None:
+                index = len(table)
+                lut[value] = index
+                table.append(value)
+            indices.append(index)
+        return indices
+
+    def write(self, pos, rot, sca, instance_file, node_name, parent_name):
+        """Append points to the file.
+
+        The float attributes can be given as flat sequences, sequences of tuples or
+        raw little endian float32 bytes.
+
+        Args:
+            pos (Union[bytes, list]): Point positions.
+            rot (Union[bytes, list]): Point rotations.
+            sca (Union[bytes, list]): Point scales.
+            instance_file (list): The instance file path per point.
+            node_name (list): The node name per point.
+            parent_name (list): The parent node name per point.
+        """
+        if self._file is None:
+            self.open()
+
+        pos = _to_float_array(_flatten(pos, 3))
+        rot = _to_float_array(_flatten(rot, 3))
+        sca = _to_float_array(sca)
+        point_count = len(sca)
+        if (
+            len(pos) != point_count * 3
+            or len(rot) != point_count * 3
+            or len(instance_file) != point_count
+            or len(node_name) != point_count
+            or len(parent_name) != point_count
+        ):
+            raise ValueError("All attributes should have the same number of points")
+
+        strings = {
+            "instance_file": instance_file,
+            "node_name": node_name,
+            "parent_name": parent_name,
+        }
+        start = 0
+        while start < point_count:
+            free = self.chunk_size - len(self._pending["sca"])
+            end = min(point_count, start + free)
+            self._pending["pos"].extend(pos[start * 3 : end * 3])
+            self._pending["rot"].extend(rot[start * 3 : end * 3])
+            self._pending["sca"].extend(sca[start:end])
+            for attr_name in STRING_ATTRIBUTES:
+                self._pending[attr_name].extend(
+                    self._string_indices(attr_name, strings[attr_name][start:end])
+                )
+            if len(self._pending["sca"]) >= self.chunk_size:
+                self._flush_chunk()
+            start = end
+
+        self.point_count += point_count
+
+    def _flush_chunk(self):
+        """Write the pending chunk to the file."""
+        point_count = len(self._pending["sca"])
+        if not point_count:
+            return
+
+        arrays = [self._pending["pos"], self._pending["rot"], self._pending["sca"]]
+        arrays.extend(self._pending[attr_name] for attr_name in STRING_ATTRIBUTES)
+        if _NEEDS_BYTESWAP:
+            for data in arrays:
+                data.byteswap()
+        raw_data = b"".join(data.tobytes() for data in arrays)
+
+        stored_data = raw_data
+        if self.compress:
+            stored_data = zlib.compress(raw_data)
+
+        offset = self._file.tell()
+        self._file.write(stored_data)
+        self._write_padding()
+        self._chunk_index.append((offset, len(stored_data), len(raw_data), point_count))
+        self._reset_pending()
+
+    def _write_padding(self):
+        """Align the file position to 8 bytes."""
+        padding = -self._file.tell() % 8
+        if padding:
+            self._file.write(b"\x00" * padding)
+
+    def close(self):
+        """Flush the pending points, write the tables and the header."""
+        if self._file is None:
+            return
+
+        self._flush_chunk()
+
+        string_table_offset = self._file.tell()
+        for attr_name in STRING_ATTRIBUTES:
+            table = self._string_tables[attr_name]
+            self._file.write(struct.pack("<I", len(table)))
+            for value in table:
+                encoded_value = value.encode("utf-8")
+                self._file.write(struct.pack("<I", len(encoded_value)))
+                self._file.write(encoded_value)
+        self._write_padding()
+
+        chunk_index_offset = self._file.tell()
+        for entry in self._chunk_index:
+            self._file.write(struct.pack(CHUNK_INDEX_FORMAT, *entry))
+
+        self._file.seek(0)
+        self._file.write(
+            struct.pack(
+                HEADER_FORMAT,
+                MAGIC,
+                FORMAT_VERSION,
+                FLAG_COMPRESSED if self.compress else 0,
+                self.point_count,
+                len(self._chunk_index),
+                self.chunk_size,
+                string_table_offset,
+                chunk_index_offset,
+            )
+        )
+        self._file.close()
+        self._file = None
+
+
+class RSProxyDataChunk(object):
+    """A chunk of RSProxy instance point data.
+
+    The float attributes are flat float32 sequences (``pos`` and ``rot`` have three
+    components per point) and the string attributes are uint32 indices to the
+    string tables of the reader.
+    """
+
+    def __init__(self, point_count, data):
+        self.point_count = point_count
+        offset = 0
+        for attr_name, width, type_code in [
+            ("pos", 3, "f"),
+            ("rot", 3, "f"),
+            ("sca", 1, "f"),
+            ("instance_file", 1, "I"),
+            ("node_name", 1, "I"),
+            ("parent_name", 1, "I"),
+        ]:
+            size = 4 * width * point_count
+            setattr(self, attr_name, _cast(data[offset : offset + size], type_code))
+            offset += size
+
+
+def _cast(data, type_code):
+    """Cast the given little endian data to a typed sequence.
+
+    Returns a zero-copy memoryview where possible.
+
+    Args:
+        data (memoryview): The raw data.
+        type_code (str): The ``array`` type code.
+
+    Returns:
+        Union[memoryview, array.array]: The typed sequence.
+    """
+    if _NEEDS_BYTESWAP:
+        typed_data = array.array(type_code)
+        typed_data.frombytes(data)
+        typed_data.byteswap()
+        return typed_data
+    return data.cast(type_code)
+
+
+class RSProxyDataReader(object):
+    """Reads RSProxy instance point data written by :class:`.RSProxyDataWriter`.
+
+    Args:
+        path (str): The file path.
+        use_mmap (bool): Memory map the file instead of reading the chunks. Only used
+            for uncompressed files.
+    """
+
+    def __init__(self, path, use_mmap=True):
+        self.path = path
+        self.use_mmap = use_mmap
+        self.point_count = 0
+        self.chunk_size = 0
+        self.compressed = False
+        self.instance_files = []
+        self.node_names = []
+        self.parent_names = []
+
+        self._file = None
+        self._mmap = None
+        self._chunk_index = []
+        self.open()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self.point_count
+
+    @property
+    def chunk_count(self):
+        """Return the number of chunks.
+
+        Returns:
+            int: The number of chunks.
+        """
+        return len(self._chunk_index)
+
+    def open(self):
+        """Open the file and read the header, the string tables and the index."""
+        self._file = open(self.path, "rb")
+        header = self._file.read(HEADER_SIZE)
+        if len(header) != HEADER_SIZE or header[:4] != MAGIC:
+            self.close()
+            raise ValueError("Not an RSProxy data file: {}".format(self.path))
+
+        (
+            _,
+            version,
+            flags,
+            self.point_count,
+            chunk_count,
+            self.chunk_size,
+            string_table_offset,
+            chunk_index_offset,
+        ) = struct.unpack(HEADER_FORMAT, header)
+        if version > FORMAT_VERSION:
+            self.close()
+            raise ValueError(
+                "Unsupported RSProxy data version {}: {}".format(version, self.path)
+            )
+        self.compressed = bool(flags & FLAG_COMPRESSED)
+
+        self._file.seek(string_table_offset)
+        tables = []
+        for _ in STRING_ATTRIBUTES:
+            (count,) = struct.unpack("<I", self._file.read(4))
+            table = []
+            for _ in range(count):
+                (length,) = struct.unpack("<I", self._file.read(4))
+                table.append(self._file.read(length).decode("utf-8"))
+            tables.append(table)
+        self.instance_files, self.node_names, self.parent_names = tables
+
+        self._file.seek(chunk_index_offset)
+        index_data = self._file.read(CHUNK_INDEX_SIZE * chunk_count)
+        self._chunk_index = [
+            struct.unpack_from(CHUNK_INDEX_FORMAT, index_data, i * CHUNK_INDEX_SIZE)
+            for i in range(chunk_count)
+        ]
+
+        if self.use_mmap and not self.compressed and self.point_count:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """Close the file."""
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # there are still chunks referencing the mapped memory, let the
+                # garbage collector release it
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def read_chunk(self, index):
+        """Read the chunk with the given index.
+
+        Args:
+            index (int): The chunk index.
+
+        Returns:
+            RSProxyDataChunk: The chunk.
+        """
+        offset, stored_size, raw_size, point_count = self._chunk_index[index]
+        if self._mmap is not None:
+            data = memoryview(self._mmap)[offset : offset + stored_size]
+        else:
+            self._file.seek(offset)
+            data = self._file.read(stored_size)
+            if self.compressed:
+                data = zlib.decompress(data)
+            data = memoryview(data)
+        if len(data) != raw_size:
+            raise ValueError("Corrupted RSProxy data chunk: {}".format(index))
+        return RSProxyDataChunk(point_count, data)
+
+    def chunks(self):
+        """Iterate over all chunks.
+
+        Yields:
+            RSProxyDataChunk: The chunks in order.
+        """
+        for i in range(self.chunk_count):
+            yield self.read_chunk(i)
+
+    def points(self):
+        """Iterate over all points.
+
+        Yields:
+            tuple: (pos, rot, sca, instance_file, node_name, parent_name) per point,
+                pos and rot being 3 element tuples.
+        """
+        instance_files = self.instance_files
+        node_names = self.node_names
+        parent_names = self.parent_names
+        for chunk in self.chunks():
+            pos = chunk.pos.tolist()
+            rot = chunk.rot.tolist()
+            sca = chunk.sca.tolist()
+            instance_file = chunk.instance_file.tolist()
+            node_name = chunk.node_name.tolist()
+            parent_name = chunk.parent_name.tolist()
+            for i in range(chunk.point_count):
+                yield (
+                    (pos[i * 3], pos[i * 3 + 1], pos[i * 3 + 2]),
+                    (rot[i * 3], rot[i * 3 + 1], rot[i * 3 + 2]),
+                    sca[i],
+                    instance_files[instance_file[i]],
+                    node_names[node_name[i]],
+                    parent_names[parent_name[i]],
+                )
+
+    def to_dict(self):
+        """Return the data in the legacy JSON layout.
+
+        Returns:
+            dict: A dictionary with "pos", "rot", "sca", "instance_file",
+                "node_name" and "parent_name" keys.
+        """
+        data = dict((key, []) for key in ["pos", "rot", "sca"] + STRING_ATTRIBUTES)
+        for pos, rot, sca, instance_file, node_name, parent_name in self.points():
+            data["pos"].append(pos)
+            data["rot"].append(rot)
+            data["sca"].append(sca)
+            data["instance_file"].append(instance_file)
+            data["node_name"].append(node_name)
+            data["parent_name"].append(parent_name)
+        return data
+
+
+def is_rsproxy_data_file(path):
+    """Check if the given file is a binary RSProxy data file.
+
+    Args:
+        path (str): The file path.
+
+    Returns:
+        bool: True if the file starts with the RSProxy data magic.
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except (IOError, OSError):
+        return False
@@ -12,6 +12,127 @@ class RepresentationManager(object):
     pass
 
 
+class RepresentationIndex(object):
+    """Holds the representations of a group of tasks in memory.
+
+    The take names and the latest published Version of every take of the given
+    tasks are loaded with a single query, so checking the representations of a
+    lot of versions (i.e. all the references in a scene) doesn't need a query
+    per version::
+
+      index = RepresentationIndex([v.task_id for v in versions])
+      for v in versions:
+          rep = Representation(version=v, index=index)
+          if rep.has_repr("GPU"):
+              gpu_version = rep.find("GPU")
+
+    The tasks that are not in the index are loaded on first use.
+
+    :param task_ids: A list of :class:`.Task` ids or instances.
+    """
+
+    def __init__(self, task_ids=None):
+        self._take_names = {}
+        self._latest_published = {}
+        if task_ids:
+            self.load(task_ids)
+
+    def load(self, task_ids):
+        """Loads the take names and the latest published versions of the given
+        tasks, the tasks that are already loaded are skipped.
+
+        :param task_ids: A list of :class:`.Task` ids or instances.
+        """
+        task_ids = set(getattr(task_id, "id", task_id) for task_id in task_ids)
+        task_ids.difference_update(self._take_names)
+        if not task_ids:
+            return
+
+        from sqlalchemy import and_, case, func
+        from stalker import Version
+        from stalker.db.session import DBSession
+
+        # use the table of the Versions, so the grouping is not joined with the
+        # SimpleEntities table
+        versions = Version.__table__
+        takes = (
+            DBSession.query(
+                versions.c.task_id.label("task_id"),
+                versions.c.take_name.label("take_name"),
+                func.max(
+                    case((versions.c.is_published.is_(True), versions.c.version_number))
+                ).label("version_number"),
+            )
+            .filter(versions.c.task_id.in_(task_ids))
+            .group_by(versions.c.task_id, versions.c.take_name)
+            .subquery()
+        )
+        query = (
+            DBSession.query(takes.c.task_id, takes.c.take_name, Version)
+            .select_from(takes)
+            .outerjoin(
+                Version,
+                and_(
+                    Version.task_id == takes.c.task_id,
+                    Version.take_name == takes.c.take_name,
+                    Version.version_number == takes.c.version_number,
+                    Version.is_published.is_(True),
+                ),
+            )
+        )
+
+        for task_id in task_ids:
+            self._take_names[task_id] = []
+        for task_id, take_name, version in query.all():
+            self._take_names[task_id].append(take_name)
+            if version is not None:
+                self._latest_published[(task_id, take_name)] = version
+
+    def get_take_names(self, task_id):
+        """Returns the sorted unique take names of the given task, including
+        the representations.
+
+        :param int task_id: The :class:`.Task` id.
+        :return: list of str
+        """
+        self.load([task_id])
+        return sorted(self._take_names[task_id])
+
+    def get_latest_published(self, task_id, take_name):
+        """Returns the latest published version of the given take.
+
+        :param int task_id: The :class:`.Task` id.
+        :param str take_name: The take name.
+        :return: :class:`.Version`
+        """
+        self.load([task_id])
+        return self._latest_published.get((task_id, take_name))
+
+    def find(self, version, repr_name=""):
+        """Returns the latest published Version of the given representation of
+        the given version, see :meth:`.Representation.find`.
+        """
+        return Representation(version=version, index=self).find(repr_name)
+
+    def list_all(self, version):
+        """Lists the representations of the given version, see
+        :meth:`.Representation.list_all`.
+        """
+        return Representation(version=version, index=self).list_all()
+
+    def has_repr(self, version, repr_name):
+        """Returns True if the given version has a published representation with
+        the given name, see :meth:`.Representation.has_repr`.
+        """
+        return Representation(version=version, index=self).has_repr(repr_name)
+
+    def is_repr(self, version, repr_name=""):
+        """Returns True if the given version is the given representation, see
+        :meth:`.Representation.is_repr`.
+        """
+        return Representation(version=version, index=self).is_repr(repr_name)
+
+
 class Representation(object):
     """A single representation of a Version.
 
@@ -28,14 +149,18 @@ class Representation(object):
     This is done in that way to allow easy creations of different
     representations, that is without using any special script or attribute and
     it is flexible enough.
+
+    Pass a :class:`.RepresentationIndex` to answer :meth:`.find` and
+    :meth:`.list_all` from memory instead of querying the database per call.
     """
 
     base_repr_name = "Base"
     repr_separator = "@"
 
-    def __init__(self, version=None):
+    def __init__(self, version=None, index=None):
         self._version = None
         self.version = version
+        self.index = index
 
     def _validate_version(self, version):
         """Validates the given version value
@@ -149,9 +274,12 @@ class Representation(object):
 
         # find any version that starts with the base_repr_name
         # under the same task
-        from anima.utils import get_unique_take_names
+        if self.index is not None:
+            take_names = self.index.get_take_names(self.version.task_id)
+        else:
+            from anima.utils import get_unique_take_names
 
-        take_names = get_unique_take_names(self.version.task.id, include_reprs=True)
+            take_names = get_unique_take_names(self.version.task.id, include_reprs=True)
         take_names.sort()
 
         repr_names = []
@@ -177,6 +305,9 @@ class Representation(object):
         else:
             take_name = "{}{}{}".format(base_take_name, self.repr_separator, repr_name)
 
+        if self.index is not None:
+            return self.index.get_latest_published(self.version.task_id, take_name)
+
         from stalker import Version
 
         return (
@@ -185,11 +185,10 @@ class MainDialog(QtWidgets.QDialog, AnimaDialogBase):
         :param media_path: The AVID media files path
         """
         # get the source clips from edl
-        import edl
+        from anima.edit import parse_edl
 
-        parser = edl.Parser("24")  # just use some random frame rate
         with open(edl_path) as f:
-            l = parser.parse(f)
+            l = parse_edl(f, "24")  # just use some random frame rate
 
         total_item_count = len(l) + 1
 
@@ -7,6 +7,8 @@ from anima.utils.progress import ProgressDialogBase
 class ProgressDialog(ProgressDialogBase, QtWidgets.QProgressDialog):
     """A ProgressDialog variant that uses QProgressDialog to show the progress."""
 
+    thread_safe = False
+
     def __init__(self, *args, **kwargs):
         ProgressDialogBase.__init__(self)
         QtWidgets.QProgressDialog.__init__(self, *args, **kwargs)
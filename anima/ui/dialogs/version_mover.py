@@ -1,8 +1,6 @@
 # -*- coding: utf-8 -*-
 
-import os
-import shutil
-from stalker import Project, Version
+from stalker import Project
 
 from anima.ui.lib import QtCore, QtGui, QtWidgets
 from anima.ui.base import AnimaDialogBase, ui_caller
@@ -207,8 +205,6 @@ class VersionMover(QtWidgets.QDialog, AnimaDialogBase):
 
         # get take names and related versions
         # get distinct take names
-        from stalker.db.session import DBSession
-
         from_take_names = get_unique_take_names(from_task.id)
 
         # create versions for each take
@@ -224,45 +220,31 @@ class VersionMover(QtWidgets.QDialog, AnimaDialogBase):
         )
 
         if answer == QtWidgets.QMessageBox.Yes:
-            for take_name in from_take_names:
-                latest_version = (
-                    Version.query.filter_by(task=from_task)
-                    .filter_by(take_name=take_name)
-                    .order_by(Version.version_number.desc())
-                    .first()
-                )
-
-                # create a new version
-                new_version = Version(task=to_task, take_name=take_name)
-                new_version.created_by = logged_in_user
-                new_version.extension = latest_version.extension
-                new_version.description = (
-                    "Moved from another task (id=%s) with Version Mover"
-                    % latest_version.task.id
-                )
-                new_version.created_with = latest_version.created_with
-                DBSession.add(new_version)
-                DBSession.commit()
-
-                # update path
-                new_version.update_paths()
-                DBSession.add(new_version)
-                DBSession.commit()
-
-                # now copy the last_version file to the new_version path
-                try:
-                    os.makedirs(new_version.absolute_path)
-                except OSError:  # path exists
-                    pass
-
-                # move the file there
-                shutil.copyfile(
-                    latest_version.absolute_full_path, new_version.absolute_full_path
+            from anima.ui.dialogs.progress_dialog import ProgressDialog
+            from anima.utils.progress import ProgressManagerFactory
+            from anima.exc import VersionCopyError
+            from anima.utils.version_mover import move_versions
+
+            progress_manager = ProgressManagerFactory.get_progress_manager()
+            progress_manager.dialog_class = ProgressDialog
+            progress_caller = progress_manager.register(
+                len(from_take_names), title="Copying Versions"
+            )
+            try:
+                new_versions = move_versions(
+                    [(from_task, to_task)],
+                    created_by=logged_in_user,
+                    progress_caller=progress_caller,
                 )
+            except VersionCopyError as e:
+                QtWidgets.QMessageBox.critical(self, "Error", str(e))
+                return
+            finally:
+                progress_caller.end_progress()
 
             # inform the user
             QtWidgets.QMessageBox.information(
                 self,
                 "Success",
-                "Successfully copied %s versions" % len(from_take_names),
+                "Successfully copied %s versions" % len(new_versions),
             )
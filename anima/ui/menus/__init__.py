@@ -659,7 +659,7 @@ class TaskDataContextMenuHandler(ContextMenuHandlerBase):
                 elif selected_action is export_to_json_action:
                     # show a file browser
                     dialog = QtWidgets.QFileDialog(self.parent, "Choose file")
-                    dialog.setNameFilter("JSON Files (*.json)")
+                    dialog.setNameFilter("JSON Files (*.json *.jsonl)")
                     dialog.setFileMode(QtWidgets.QFileDialog.AnyFile)
                     if not dialog.exec_():
                         return
@@ -674,15 +674,19 @@ class TaskDataContextMenuHandler(ContextMenuHandlerBase):
                     if not parts[1]:
                         file_path = "{}{}".format(parts[0], ".json")
 
-                    data = json.dumps(
-                        entity,
-                        cls=task_hierarchy_io.StalkerEntityEncoder,
-                        check_circular=False,
-                        indent=4,
-                    )
                     try:
                         with open(file_path, "w") as f:
-                            f.write(data)
+                            if file_path.endswith(".jsonl"):
+                                # stream large hierarchies as JSON lines
+                                task_hierarchy_io.dump_jsonl(entity, f)
+                            else:
+                                json.dump(
+                                    entity,
+                                    f,
+                                    cls=task_hierarchy_io.StalkerEntityEncoder,
+                                    check_circular=False,
+                                    indent=4,
+                                )
                     except Exception:
                         pass
                     finally:
@@ -695,7 +699,7 @@ class TaskDataContextMenuHandler(ContextMenuHandlerBase):
                 elif selected_action is import_from_json_action:
                     # show a file browser
                     dialog = QtWidgets.QFileDialog(self.parent, "Choose file or files")
-                    dialog.setNameFilter("JSON Files (*.json)")
+                    dialog.setNameFilter("JSON Files (*.json *.jsonl)")
                     dialog.setFileMode(QtWidgets.QFileDialog.ExistingFiles)
                     if not dialog.exec_():
                         return
@@ -729,13 +733,18 @@ class TaskDataContextMenuHandler(ContextMenuHandlerBase):
                     )
                     for file_path in selected_files:
                         imported_json_file_name = os.path.basename(file_path)
-                        with open(file_path) as f:
-                            data = json.load(f)
-                        loaded_entity = decoder.loads(data, parent=parent)
-
                         try:
-                            DBSession.add(loaded_entity)
-                            DBSession.commit()
+                            with open(file_path) as f:
+                                if file_path.endswith(".jsonl"):
+                                    task_hierarchy_io.load_jsonl(
+                                        f, project=project, parent=parent
+                                    )
+                                else:
+                                    loaded_entity = decoder.loads(
+                                        json.load(f), parent=parent
+                                    )
+                                    DBSession.add(loaded_entity)
+                                    DBSession.commit()
                         except Exception as e:
                             DBSession.rollback()
                             QtWidgets.QMessageBox.critical(
@@ -21,33 +21,93 @@ if False:
 class TaskNameCompleter(QtWidgets.QCompleter):
     """Task name completer.
 
-    Currently this is not used anywhere. Needs more work.
+    The tasks of the project are loaded once, on the first completion, and
+    searched with an in-memory :class:`anima.utils.task_search.TaskNameIndex`.
+    The completion is updated when the user stops typing for
+    ``debounce_interval`` milliseconds::
+
+      completer = TaskNameCompleter(line_edit, project=project)
+      completer.setWidget(line_edit)
+      line_edit.textChanged.connect(completer.update)
 
     Args:
         parent: The parent QWidget.
+        project (stalker.Project): The project of the tasks.
+        limit (int): The maximum number of tasks listed.
+        debounce_interval (int): The delay in milliseconds before updating the
+            completion.
     """
 
-    def __init__(self, parent):
+    def __init__(self, parent, project=None, limit=50, debounce_interval=200):
         QtWidgets.QCompleter.__init__(self, [], parent)
+        self._project = None
+        self.index = None
+        self.limit = limit
+        self.results = []
+        self.completion_text = ""
+        self.project = project
+
+        # QStringListModel is in QtGui under PyQt4 and PySide
+        string_list_model_class = (
+            getattr(QtCore, "QStringListModel", None) or QtGui.QStringListModel
+        )
+        self.string_list_model = string_list_model_class(self)
+        self.setModel(self.string_list_model)
+        # the results are already filtered and sorted
+        self.setCompletionMode(QtWidgets.QCompleter.UnfilteredPopupCompletion)
+
+        self.debounce_timer = QtCore.QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(debounce_interval)
+        self.debounce_timer.timeout.connect(self.update_completion)
+
+    @property
+    def project(self):
+        """Return the project of the tasks.
+
+        Returns:
+            stalker.Project: The project.
+        """
+        return self._project
+
+    @project.setter
+    def project(self, project):
+        """Set the project of the tasks, the tasks are loaded on the next update.
+
+        Args:
+            project (stalker.Project): The project.
+        """
+        self._project = project
+        self.index = None
 
     def update(self, completion_prefix):
-        """Update the completion.
+        """Update the completion after the user stops typing.
 
         Args:
             completion_prefix (str): The completion prefix.
         """
-        tasks = Task.query.filter(
-            Task.name.ilike("%{}%".format(completion_prefix))
-        ).all()
-        logger.debug("completer tasks : {}".format(tasks))
-        task_names = [task.name for task in tasks]
-        model = QtGui.QStringListModel(task_names)
-        self.setModel(model)
-        # self.setCompletionPrefix(completion_prefix)
-        self.setCompletionPrefix("")
+        self.completion_text = completion_prefix
+        self.debounce_timer.start()
+
+    def update_completion(self):
+        """Update the completion with the tasks matching the last completion
+        prefix.
+        """
+        if self.project is None:
+            return
+
+        if self.index is None:
+            from anima.utils.task_search import TaskNameIndex
 
-        # if completion_prefix.strip() != '':
-        self.complete()
+            self.index = TaskNameIndex.from_project(self.project)
+
+        self.results = self.index.search(self.completion_text, limit=self.limit)
+        logger.debug("completer tasks : {}".format(len(self.results)))
+        self.string_list_model.setStringList([row.name for row in self.results])
+        if self.results:
+            self.complete()
+        else:
+            self.popup().hide()
 
 
 # class TaskItemDelegate(QtWidgets.QStyledItemDelegate):
@@ -700,7 +760,12 @@ D
 
 
 class TaskTableModel(QtGui.QStandardItemModel):
-    """Task model suitable for data tables."""
+    """Task model suitable for data tables.
+
+    The rows can be added all at once with :meth:`.populate_table` or
+    incrementally with :meth:`.set_tasks`, in which case the view fetches the
+    next batch of rows when it is scrolled to the end.
+    """
 
     def __init__(self, *args, **kwargs):
         super(TaskTableModel, self).__init__(*args, **kwargs)
@@ -708,6 +773,8 @@ class TaskTableModel(QtGui.QStandardItemModel):
         self.setHorizontalHeaderLabels(
             ["", "Thumbnail", "Start", "End", "Name", "Bid", "Sched."]
         )
+        self.batch_size = 100
+        self._pending_tasks = []
 
     def populate_table(self, tasks):
         """Populate table with data.
@@ -717,49 +784,106 @@ class TaskTableModel(QtGui.QStandardItemModel):
                 anima.utils.part_task_query() method.
         """
         for task in tasks:
-            # CheckBox item
-            check_box_item = QtGui.QStandardItem()
-            check_box_item.setCheckable(True)
-            check_box_item.setCheckState(QtCore.Qt.CheckState.Unchecked)
+            self.appendRow(self.create_row(task))
 
-            # Thumbnail
-            thumbnail_item = QtGui.QStandardItem()
+    def set_tasks(self, tasks, batch_size=100):
+        """Set the tasks to be added incrementally.
 
-            # Start Date
-            start_date_item = QtGui.QStandardItem(
-                "{}-{}-{}".format(task.start.year, task.start.month, task.start.day)
-            )
+        The first batch is added immediately, the rest is added by
+        :meth:`.fetchMore`.
 
-            # End Date
-            end_date_item = QtGui.QStandardItem(
-                "{}-{}-{}".format(task.end.year, task.end.month, task.end.day)
-            )
+        Args:
+            tasks (list): A list of tasks or the rows returned by the
+                anima.utils.user_task_query() function.
+            batch_size (int): The number of rows to add at once.
+        """
+        self.removeRows(0, self.rowCount())
+        self.batch_size = batch_size
+        self._pending_tasks = list(tasks)
+        self.fetchMore(QtCore.QModelIndex())
 
-            # Name
-            name_item = TaskItem(task=task, display_full_path=True)
+    def canFetchMore(self, parent):
+        """Check if there are more tasks to add.
 
-            # Bid
-            bid_timing_item = QtGui.QStandardItem(
-                "{} {}".format(int(task.bid_timing), task.bid_unit)
-            )
+        Args:
+            parent (QtCore.QModelIndex): The parent index.
 
-            # Schedule Timing
-            schedule_timing_item = QtGui.QStandardItem(
-                "{} {}".format(int(task.schedule_timing), task.schedule_unit)
-            )
+        Returns:
+            bool: True if there are more tasks to add.
+        """
+        if parent.isValid():
+            return False
+        return bool(self._pending_tasks)
+
+    def fetchMore(self, parent):
+        """Add the next batch of tasks.
+
+        Args:
+            parent (QtCore.QModelIndex): The parent index.
+        """
+        if parent.isValid():
+            return
+        tasks = self._pending_tasks[: self.batch_size]
+        self._pending_tasks = self._pending_tasks[self.batch_size :]
+        self.populate_table(tasks)
+
+    @classmethod
+    def create_row(cls, task):
+        """Create the items of a row.
+
+        Args:
+            task: A stalker.Task instance or an anima.utils.UserTaskRow instance.
+
+        Returns:
+            list: A list of QtGui.QStandardItem instances.
+        """
+        # CheckBox item
+        check_box_item = QtGui.QStandardItem()
+        check_box_item.setCheckable(True)
+        check_box_item.setCheckState(QtCore.Qt.CheckState.Unchecked)
 
-            self.appendRow(
-                [
-                    check_box_item,
-                    thumbnail_item,
-                    start_date_item,
-                    end_date_item,
-                    name_item,
-                    bid_timing_item,
-                    schedule_timing_item,
-                ]
+        # Thumbnail
+        thumbnail_item = QtGui.QStandardItem()
+
+        # Start Date
+        start_date_item = QtGui.QStandardItem(
+            "{}-{}-{}".format(task.start.year, task.start.month, task.start.day)
+        )
+
+        # End Date
+        end_date_item = QtGui.QStandardItem(
+            "{}-{}-{}".format(task.end.year, task.end.month, task.end.day)
+        )
+
+        # Name
+        if isinstance(task, Task):
+            name_item = TaskItem(task=task, display_full_path=True)
+        else:
+            name_item = TaskItem(task=task)
+            name_item.setData(
+                "{} ({})".format(task.name, task.path), QtCore.Qt.DisplayRole
             )
 
+        # Bid
+        bid_timing_item = QtGui.QStandardItem(
+            "{} {}".format(int(task.bid_timing), task.bid_unit)
+        )
+
+        # Schedule Timing
+        schedule_timing_item = QtGui.QStandardItem(
+            "{} {}".format(int(task.schedule_timing), task.schedule_unit)
+        )
+
+        return [
+            check_box_item,
+            thumbnail_item,
+            start_date_item,
+            end_date_item,
+            name_item,
+            bid_timing_item,
+            schedule_timing_item,
+        ]
+
 
 # class TaskTableSortFilterProxyModel(QtCore.QSortFilterProxyModel):
 #     """
@@ -6,7 +6,73 @@ import os
 from anima import logger
 from anima.ui.lib import QtCore, QtGui, QtWidgets
 
-import qtawesome
+# The qtawesome names of the icons used in the UIs
+ICON_NAMES = {
+    "asset": "fa5s.puzzle-piece",
+    "authlog": "fa.calendar-check-o",
+    "browse_folder": "fa5.folder-open",
+    "budget": "fa.credit-card-alt",
+    "cmpl": "ei.check",
+    "copy": "fa5.copy",
+    "create_project": "fa5s.sitemap",
+    "cross": "ph.x-bold",
+    "daily": "ei.eye-open",
+    "dashboard": "fa.dashboard",
+    "default": "ei.ban-circle",
+    "delete": "fa5.trash-alt",
+    "department": "fa.group",
+    "dependent_of": "mdi6.tray-arrow-up",
+    "depends_to": "mdi6.tray-arrow-down",
+    "drev": "fa5s.step-backward",
+    "edit_entity": "fa.pencil-square-o",
+    "export": "fa5s.file-export",
+    "group": "fa5s.key",
+    "hrev": "fa.mail-reply-all",
+    "image": "fa5.image",
+    "import": "fa5s.file-import",
+    "new_entity": "fa5s.plus",
+    "oh": "ei.pause",
+    "open_external_link": "fa.external-link-square",
+    "permission": "fa5s.key",
+    "prev": "fa.pencil",
+    "previs": "fa.coffee",
+    "project": "ei.folder-close",
+    "reference": "ei.book",
+    "reload": "ei.refresh",
+    "report": "fa.bar-chart",
+    "resource": "fa.user",
+    "result": "msc.graph-line",
+    "review": "fa.comments-o",
+    "rts": "ei.check-empty",
+    "sequence": "fa.film",
+    "shot": "fa.camera",
+    "stop": "ei.stop",
+    "task": "fa.tasks",
+    "ticket": "fa.ticket",
+    "timelog": "fa.calendar",
+    "update_project": "fa.pencil-square-o",
+    "user": "fa.user",
+    "users": "fa.users",
+    "vacation": "fa.sun-o",
+    "version": "fa.sitemap",
+    "version_output": "fa.picture-o",
+    "wfd": "fa.circle-o",
+    "wip": "fa5s.play",
+}
+
+# The options of the icons
+ICON_OPTIONS = {
+    "dependent_of": {"rotated": 90},
+    "depends_to": {"rotated": -90},
+}
+
+# The replacements of the icons that are not available in qtawesome 0.x
+LEGACY_ICON_NAMES = {
+    "cross": "fa.close",
+    "dependent_of": "ei.arrow-left",
+    "depends_to": "ei.arrow-right",
+    "result": "ei.graph",
+}
 
 ICONS_LUT = {}
 
@@ -14,83 +80,30 @@ ICONS_LUT = {}
 def get_cached_icon(icon_name, *args, **kwargs):
     """qtAwesome needs a Qt application to work.
 
+    The icons are created on first use and cached.
+
     Args:
-        icon_name (str): The icon name.
+        icon_name (str): The icon name, either one of the ``ICON_NAMES`` keys or a
+            qtawesome icon name.
     """
-    # To make it all consistent use an icon lut
-    qtawesome_version_info = qtawesome._version.version_info
-
-    global ICONS_LUT
-    if not ICONS_LUT:
-        ICONS_LUT.update(
-            {
-                "prev": qtawesome.icon("fa.pencil"),
-                "hrev": qtawesome.icon("fa.mail-reply-all"),
-                "rts": qtawesome.icon("ei.check-empty"),
-                "cmpl": qtawesome.icon("ei.check"),
-                "wip": qtawesome.icon("fa5s.play"),
-                "wfd": qtawesome.icon("fa.circle-o"),
-                "drev": qtawesome.icon("fa5s.step-backward"),
-                "oh": qtawesome.icon("ei.pause"),
-                "stop": qtawesome.icon("ei.stop"),
-                "asset": qtawesome.icon("fa5s.puzzle-piece"),
-                "authlog": qtawesome.icon("fa.calendar-check-o"),
-                "browse_folder": qtawesome.icon("fa5.folder-open"),
-                "budget": qtawesome.icon("fa.credit-card-alt"),
-                "create_project": qtawesome.icon("fa5s.sitemap"),
-                "cross": qtawesome.icon("ph.x-bold")
-                if qtawesome_version_info[0]
-                else qtawesome.icon("fa.close"),
-                "copy": qtawesome.icon("fa5.copy"),
-                "daily": qtawesome.icon("ei.eye-open"),
-                "dashboard": qtawesome.icon("fa.dashboard"),
-                "default": qtawesome.icon("ei.ban-circle"),
-                "delete": qtawesome.icon("fa5.trash-alt"),
-                "dependent_of": qtawesome.icon("mdi6.tray-arrow-up", rotated=90)
-                if qtawesome_version_info[0]
-                else qtawesome.icon("ei.arrow-left"),
-                "depends_to": qtawesome.icon("mdi6.tray-arrow-down", rotated=-90)
-                if qtawesome_version_info[0]
-                else qtawesome.icon("ei.arrow-right"),
-                "department": qtawesome.icon("fa.group"),
-                "edit_entity": qtawesome.icon("fa.pencil-square-o"),
-                "export": qtawesome.icon("fa5s.file-export"),
-                "group": qtawesome.icon("fa5s.key"),
-                "image": qtawesome.icon("fa5.image"),
-                "import": qtawesome.icon("fa5s.file-import"),
-                "new_entity": qtawesome.icon("fa5s.plus"),
-                "open_external_link": qtawesome.icon("fa.external-link-square"),
-                "permission": qtawesome.icon("fa5s.key"),
-                "previs": qtawesome.icon("fa.coffee"),
-                "project": qtawesome.icon("ei.folder-close"),
-                "reference": qtawesome.icon("ei.book"),
-                "reload": qtawesome.icon("ei.refresh"),
-                "report": qtawesome.icon("fa.bar-chart"),
-                "resource": qtawesome.icon("fa.user"),
-                "result": qtawesome.icon("msc.graph-line")
-                if qtawesome_version_info[0]
-                else qtawesome.icon("ei.graph"),
-                "review": qtawesome.icon("fa.comments-o"),
-                "sequence": qtawesome.icon("fa.film"),
-                "shot": qtawesome.icon("fa.camera"),
-                "task": qtawesome.icon("fa.tasks"),
-                "ticket": qtawesome.icon("fa.ticket"),
-                "timelog": qtawesome.icon("fa.calendar"),
-                "update_project": qtawesome.icon("fa.pencil-square-o"),
-                "user": qtawesome.icon("fa.user"),
-                "users": qtawesome.icon("fa.users"),
-                "vacation": qtawesome.icon("fa.sun-o"),
-                "version": qtawesome.icon("fa.sitemap"),
-                "version_output": qtawesome.icon("fa.picture-o"),
-            }
-        )
-
     if icon_name in ICONS_LUT:
         return ICONS_LUT[icon_name]
+
+    # qtawesome takes a considerable amount of time to import
+    import qtawesome
+
+    if icon_name in ICON_NAMES:
+        # To make it all consistent use an icon lut
+        if qtawesome._version.version_info[0] or icon_name not in LEGACY_ICON_NAMES:
+            icon = qtawesome.icon(
+                ICON_NAMES[icon_name], **ICON_OPTIONS.get(icon_name, {})
+            )
+        else:
+            icon = qtawesome.icon(LEGACY_ICON_NAMES[icon_name])
     else:
         icon = qtawesome.icon(icon_name, *args, **kwargs)
-        ICONS_LUT[icon_name] = icon
-        return icon
+    ICONS_LUT[icon_name] = icon
+    return icon
     # return ICONS_LUT.get(icon_name.lower(), ICONS_LUT["default"])
 
 
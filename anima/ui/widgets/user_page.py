@@ -14,11 +14,9 @@ from anima.ui.widgets.button import DashboardButton
 from anima.ui.widgets.note import NoteWidget
 from anima.ui.widgets.page import PageTitleWidget
 from anima.ui.widgets.project import ProjectComboBox
+from anima.utils import user_task_query
 
-from sqlalchemy import distinct
-from sqlalchemy.sql.functions import count
-
-from stalker import Project, Status, Task, User, Note
+from stalker import Project, Task, User, Note
 from stalker.db.session import DBSession
 
 
@@ -554,6 +552,7 @@ class UserTasksByStatusWidget(
 
         # the tabWidget
         self.main_tab_widget = QtWidgets.QTabWidget(self)
+        self.main_tab_widget.currentChanged.connect(self.populate_tab)
         self.main_layout.addWidget(self.main_tab_widget)
 
     def project_combo_box_changed(self, index):
@@ -586,66 +585,74 @@ class UserTasksByStatusWidget(
         self.update()
 
     def update(self):
-        """Update the data in the tabs."""
+        """Update the data in the tabs.
+
+        All the tasks of the user are queried at once as lightweight rows, and the
+        task tables are filled when their tabs are activated for the first time.
+        """
         # clear all the tabs
         self.main_tab_widget.clear()
+        self.tabs = []
 
         if not self.user or not self.project:
             return
 
-        # get all the distinct Statuses for the user for the specific project
-        status_codes_and_counts = (
-            DBSession.query(distinct(Status.code), count(Status.code))
-            .join(Task.status)
-            .filter(Task.resources.contains(self.user))
-            .filter(Task.project == self.project)
-            .group_by(Status.code)
-            .all()
-        )
-        # convert it to a dictionary,
-        # where the status code is the key and count is the value
-        status_codes_and_counts = dict(status_codes_and_counts)
+        # group the tasks by their statuses
+        tasks_by_status_code = {}
+        for task_row in user_task_query(self.user, self.project):
+            tasks_by_status_code.setdefault(task_row.status_code, []).append(task_row)
 
         # Orchestrate the order of the statuses
         for status_code in self.status_order:
-            if status_code in status_codes_and_counts:
-                # create one tab for each status
-                status = Status.query.filter(Status.code == status_code).first()
-                status_tab = QtWidgets.QWidget(self)
-                status_tab.setAutoFillBackground(True)
-                palette = status_tab.palette()
-                palette.setColor(
-                    status_tab.backgroundRole(),
-                    self.status_colors[status_code]["bg"]
-                )
-                palette.setColor(
-                    status_tab.foregroundRole(),
-                    self.status_colors[status_code]["fg"]
-                )
-                status_tab.setPalette(palette)
+            if status_code not in tasks_by_status_code:
+                continue
+            tasks = tasks_by_status_code[status_code]
+
+            # create one tab for each status
+            status_tab = QtWidgets.QWidget(self)
+            status_tab.setAutoFillBackground(True)
+            palette = status_tab.palette()
+            palette.setColor(
+                status_tab.backgroundRole(), self.status_colors[status_code]["bg"]
+            )
+            palette.setColor(
+                status_tab.foregroundRole(), self.status_colors[status_code]["fg"]
+            )
+            status_tab.setPalette(palette)
+
+            # add a layout to this widget
+            status_tab_layout = QtWidgets.QVBoxLayout()
+            status_tab_layout.setMargin(0)
+            status_tab.setLayout(status_tab_layout)
+
+            self.tabs.append({"widget": status_tab, "tasks": tasks, "table": None})
+            self.main_tab_widget.addTab(
+                status_tab,
+                get_cached_icon(status_code),
+                "{} ({})".format(status_code, len(tasks)),
+            )
 
-                self.main_tab_widget.addTab(
-                    status_tab,
-                    get_cached_icon(status_code),
-                    "{} ({})".format(status_code, status_codes_and_counts[status_code]),
-                )
-                # add a layout to this widget
-                status_tab_layout = QtWidgets.QVBoxLayout()
-                status_tab_layout.setMargin(0)
-                status_tab.setLayout(status_tab_layout)
-
-                # add a TaskTableView to this status_tab
-                task_table = TaskTableView(self)
-                task_table_model = TaskTableModel(self)
-                task_table.setModel(task_table_model)
-                status_tab_layout.addWidget(task_table)
-
-                tasks = (
-                    Task.query
-                    .filter(Task.project==self.project)
-                    .filter(Task.resources.contains(self.user))
-                    .filter(Task.status == status)
-                    .all()
-                )
-                task_table_model.populate_table(tasks)
-                task_table.resizeColumnsToContents()
+        self.populate_tab(self.main_tab_widget.currentIndex())
+
+    def populate_tab(self, index):
+        """Create the task table of the tab at the given index if it is not created.
+
+        Args:
+            index (int): The tab index.
+        """
+        if index < 0 or index >= len(self.tabs):
+            return
+
+        tab = self.tabs[index]
+        if tab["table"] is not None:
+            return
+
+        # add a TaskTableView to this status_tab
+        task_table = TaskTableView(self)
+        task_table_model = TaskTableModel(self)
+        task_table.setModel(task_table_model)
+        tab["widget"].layout().addWidget(task_table)
+        tab["table"] = task_table
+
+        task_table_model.set_tasks(tab["tasks"])
+        task_table.resizeColumnsToContents()
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import calendar
+import collections
 import copy
 import datetime
 import fractions
@@ -25,7 +26,6 @@ import pytz
 from sqlalchemy import and_, exists, or_
 from sqlalchemy.exc import UnboundExecutionError
 from sqlalchemy.orm import aliased
-from sqlalchemy.pool import NullPool
 from sqlalchemy.sql.functions import array_agg
 
 from stalker import (
@@ -40,7 +40,6 @@ from stalker import (
     TimeLog,
     User,
     Version,
-    db,
 )
 from stalker.db.session import DBSession
 from stalker.models.auth import AuthenticationLog, LOGIN, LocalSession
@@ -248,14 +247,11 @@ def do_db_setup():
         DBSession.connection()
         logger.debug("already connected, not creating any new connections")
     except UnboundExecutionError:
-        # DBSession.remove()
-        # DBSession.close()
         # no connection do setup
-        logger.debug("doing a new connection with NullPool")
+        logger.debug("doing a new connection")
+        from anima.utils.session_manager import get_session_manager
 
-        settings = defaults.database_engine_settings
-        settings["sqlalchemy.poolclass"] = NullPool
-        db.setup(settings)
+        get_session_manager().setup()
 
 
 def utc_to_local(utc_dt):
@@ -2754,6 +2750,111 @@ def partial_project_query():
     return query.all()
 
 
+UserTaskRow = collections.namedtuple(
+    "UserTaskRow",
+    [
+        "id",
+        "name",
+        "entity_type",
+        "status_id",
+        "status_code",
+        "has_children",
+        "start",
+        "end",
+        "bid_timing",
+        "bid_unit",
+        "schedule_timing",
+        "schedule_unit",
+        "path",
+    ],
+)
+
+
+def get_task_paths(task_rows, project_code):
+    """Return the parent names path of the given partial tasks.
+
+    The parents are queried level by level, so the number of queries is bound to
+    the depth of the task hierarchy and not to the number of tasks.
+
+    Args:
+        task_rows (list): A list of objects with ``id``, ``name`` and ``parent_id``
+            attributes.
+        project_code (str): The code of the project of the tasks.
+
+    Returns:
+        dict: A dictionary of task ids to "{project_code} | parent | parent" like
+            strings.
+    """
+    parents = {}  # task id to (name, parent_id)
+    parent_ids = set(row.parent_id for row in task_rows if row.parent_id)
+    while parent_ids:
+        parent_ids = list(parent_ids)
+        next_parent_ids = set()
+        for i in range(0, len(parent_ids), 500):
+            for task_id, name, parent_id in DBSession.query(
+                Task.id, Task.name, Task.parent_id
+            ).filter(Task.id.in_(parent_ids[i : i + 500])):
+                parents[task_id] = (name, parent_id)
+                if parent_id and parent_id not in parents:
+                    next_parent_ids.add(parent_id)
+        parent_ids = next_parent_ids
+
+    paths = {}
+    for row in task_rows:
+        names = []
+        parent_id = row.parent_id
+        while parent_id in parents:
+            name, parent_id = parents[parent_id]
+            names.append(name)
+        paths[row.id] = " | ".join([project_code] + names[::-1])
+    return paths
+
+
+def user_task_query(user, project):
+    """Return lightweight rows of the tasks of the given user in the given project.
+
+    All the data needed to display the tasks in a table is returned with a single
+    query, plus one query per hierarchy level for the task paths.
+
+    Args:
+        user (stalker.User): A stalker.User instance.
+        project (stalker.Project): A stalker.Project instance.
+
+    Returns:
+        list[UserTaskRow]: The tasks ordered by their names.
+    """
+    inner_tasks = aliased(Task.__table__)
+    has_children = (
+        exists().where(inner_tasks.c.parent_id == Task.id).label("has_children")
+    )
+    statuses = Status.__table__
+    query = (
+        DBSession.query(
+            Task.id,
+            Task.name,
+            Task.entity_type,
+            Task.status_id,
+            statuses.c.code,
+            has_children,
+            Task.start,
+            Task.end,
+            Task.bid_timing,
+            Task.bid_unit,
+            Task.schedule_timing,
+            Task.schedule_unit,
+            Task.parent_id,
+        )
+        .join(statuses, Task.status_id == statuses.c.id)
+        .join(Task_Resources, Task.__table__.c.id == Task_Resources.c.task_id)
+        .filter(Task_Resources.c.resource_id == user.id)
+        .filter(Task.project_id == project.id)
+        .order_by(Task.name, Task.id)
+    )
+    rows = query.all()
+    paths = get_task_paths(rows, project.code)
+    return [UserTaskRow(*(tuple(row[:-1]) + (paths[row.id],))) for row in rows]
+
+
 def get_task_hierarchy_name(task):
     """Generate the task hierarchy name that includes the full path.
 
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """Archiver utilities."""
 import os
+import re
 import shutil
 import tempfile
 import zipfile
@@ -13,6 +14,126 @@ from stalker import Repository
 
 from anima.utils.progress import ProgressManagerFactory
 
+# the characters that can follow the repository part of a reference path
+REFERENCE_PATH_CHARS = r"[\w\d\/_\.@\<\>]+"
+
+
+def get_reference_path_regex(environ=None):
+    """Return a compiled regex that matches all the repository paths in a scene.
+
+    The paths can either start with ``$REPO`` (including ``$REPO{id}`` style
+    variables) or with the value of any of the ``REPO*`` environment variables.
+    All the alternatives are combined in to a single pattern, so a scene can be
+    scanned with one pass.
+
+    Args:
+        environ (dict): The environment variables, defaults to ``os.environ``.
+
+    Returns:
+        re.Pattern: The compiled pattern.
+    """
+    if environ is None:
+        environ = os.environ
+
+    # try the longer repository paths first
+    repo_paths = sorted(
+        set(
+            value for key, value in environ.items() if key.startswith("REPO") and value
+        ),
+        key=len,
+        reverse=True,
+    )
+    prefixes = [re.escape("$REPO")] + [re.escape(path) for path in repo_paths]
+    return re.compile("(?:{}){}".format("|".join(prefixes), REFERENCE_PATH_CHARS))
+
+
+def _decode_line(line):
+    """Decode the given line of a scene without losing any non utf-8 bytes."""
+    if isinstance(line, bytes):
+        return line.decode("utf-8", "surrogateescape")
+    return line
+
+
+def scan_references(lines, exclude_mask=None, regex=None):
+    """Return the unique repository paths in the given lines of a scene file.
+
+    Args:
+        lines (Iterable[bytes]): The lines of the scene, i.e. a file opened in
+            binary mode. Text lines are also accepted.
+        exclude_mask (List[str]): A list of file extensions to skip.
+        regex (re.Pattern): The pattern to use, defaults to
+            :func:`.get_reference_path_regex`.
+
+    Returns:
+        List[str]: The reference paths in the order they are first found.
+    """
+    if regex is None:
+        regex = get_reference_path_regex()
+    exclude_mask = exclude_mask or []
+
+    ref_paths = []
+    seen = set()
+    for line in lines:
+        for ref_path in regex.findall(_decode_line(line)):
+            if ref_path in seen:
+                continue
+            seen.add(ref_path)
+            if os.path.splitext(ref_path)[-1] not in exclude_mask:
+                ref_paths.append(ref_path)
+    return ref_paths
+
+
+def rewrite_references(lines, output, replace, exclude_mask=None, regex=None):
+    """Write the given lines to the output by replacing the reference paths.
+
+    The lines are processed one by one, so the memory usage doesn't depend on
+    the size of the scene.
+
+    Args:
+        lines (Iterable[bytes]): The lines of the scene, i.e. a file opened in
+            binary mode.
+        output (file): A file like object opened in binary mode.
+        replace (Callable[[str], str]): Returns the new path of the given
+            reference path, the path is left as is if it returns None.
+        exclude_mask (List[str]): A list of file extensions to leave as is.
+        regex (re.Pattern): The pattern to use, defaults to
+            :func:`.get_reference_path_regex`.
+
+    Returns:
+        List[str]: The reference paths in the order they are first found.
+    """
+    if regex is None:
+        regex = get_reference_path_regex()
+    exclude_mask = exclude_mask or []
+
+    ref_paths = []
+    replacements = {}
+
+    def replace_match(match):
+        ref_path = match.group(0)
+        try:
+            return replacements[ref_path]
+        except KeyError:
+            pass
+
+        new_path = ref_path
+        if os.path.splitext(ref_path)[-1] not in exclude_mask:
+            ref_paths.append(ref_path)
+            replaced_path = replace(ref_path)
+            if replaced_path is not None:
+                new_path = replaced_path
+        replacements[ref_path] = new_path
+        return new_path
+
+    for line in lines:
+        output.write(
+            regex.sub(replace_match, _decode_line(line)).encode(
+                "utf-8", "surrogateescape"
+            )
+        )
+
+    return ref_paths
+
 
 class ArchiverBase(object):
     """The base class for Archivers."""
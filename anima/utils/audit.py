@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""Database only project audits.
+
+These audits don't need any DCC and can be run from the command line::
+
+  python -m anima.utils.audit orphan_rigs PROJECT_CODE
+
+Each audit issues a fixed number of queries regardless of the project size.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import sys
+
+from sqlalchemy import func
+
+from stalker import Project, Task, Type, Version
+from stalker.db.session import DBSession
+
+
+def latest_published_versions_query(task_ids_query, include_reprs=False):
+    """Return a query of the latest published version per task and take.
+
+    Uses a window function to number the published versions of each task and take
+    pair by their version number in descending order.
+
+    Args:
+        task_ids_query (sqlalchemy.orm.Query): A query that returns the ids of the
+            tasks to consider.
+        include_reprs (bool): Include representation takes (takes with "@" in their
+            name). By default this is False.
+
+    Returns:
+        sqlalchemy.orm.Query: A query returning (task_id, take_name, version_id,
+            version_number) rows.
+    """
+    row_number = (
+        func.row_number()
+        .over(
+            partition_by=(Version.task_id, Version.take_name),
+            order_by=Version.version_number.desc(),
+        )
+        .label("row_number")
+    )
+    query = (
+        DBSession.query(
+            Version.task_id.label("task_id"),
+            Version.take_name.label("take_name"),
+            Version.id.label("version_id"),
+            Version.version_number.label("version_number"),
+            row_number,
+        )
+        .filter(Version.task_id.in_(task_ids_query))
+        .filter(Version.is_published == True)  # noqa: E712
+    )
+    if not include_reprs:
+        from anima.representation import Representation
+
+        query = query.filter(~Version.take_name.contains(Representation.repr_separator))
+
+    subquery = query.subquery()
+    return DBSession.query(
+        subquery.c.task_id,
+        subquery.c.take_name,
+        subquery.c.version_id,
+        subquery.c.version_number,
+    ).filter(subquery.c.row_number == 1)
+
+
+def find_orphan_rigs(
+    project, rig_type_name="Rig", look_dev_type_name="Look Development"
+):
+    """Find published rig takes that don't have a corresponding LookDev take.
+
+    A rig take is an orphan if there is no LookDev task next to the rig task, or the
+    LookDev task doesn't have a published version with the same take name. Rig takes
+    without any published versions are skipped.
+
+    Args:
+        project (Union[stalker.Project, int]): A Stalker Project instance or id.
+        rig_type_name (str): The name of the rig task type.
+        look_dev_type_name (str): The name of the LookDev task type.
+
+    Returns:
+        dict: A dictionary with the rig task id as string keys and dictionaries of
+            take names to orphan info as values.
+    """
+    project_id = project if isinstance(project, int) else project.id
+
+    type_ids = dict(
+        DBSession.query(Type.name, Type.id)
+        .filter(Type.name.in_([rig_type_name, look_dev_type_name]))
+        .all()
+    )
+    rig_type_id = type_ids.get(rig_type_name)
+    look_dev_type_id = type_ids.get(look_dev_type_name)
+    if rig_type_id is None:
+        return {}
+
+    type_ids_to_check = [rig_type_id]
+    if look_dev_type_id is not None:
+        type_ids_to_check.append(look_dev_type_id)
+
+    task_ids_query = (
+        DBSession.query(Task.id)
+        .filter(Task.project_id == project_id)
+        .filter(Task.type_id.in_(type_ids_to_check))
+    )
+    latest_versions = latest_published_versions_query(task_ids_query).subquery()
+
+    # (task_id, parent_id, type_id, take_name) of all latest published versions
+    rows = (
+        DBSession.query(
+            Task.id, Task.parent_id, Task.type_id, latest_versions.c.take_name
+        )
+        .join(latest_versions, latest_versions.c.task_id == Task.id)
+        .all()
+    )
+
+    # the first LookDev task under each parent
+    look_dev_task_ids = {}
+    if look_dev_type_id is not None:
+        look_dev_task_ids = dict(
+            DBSession.query(Task.parent_id, func.min(Task.id))
+            .filter(Task.project_id == project_id)
+            .filter(Task.type_id == look_dev_type_id)
+            .group_by(Task.parent_id)
+            .all()
+        )
+
+    published_look_dev_takes = set()
+    rig_takes = []
+    for task_id, parent_id, type_id, take_name in rows:
+        if type_id == rig_type_id:
+            rig_takes.append((task_id, parent_id, take_name))
+        else:
+            published_look_dev_takes.add((task_id, take_name))
+
+    orphan_rigs = {}
+    for rig_task_id, parent_id, take_name in sorted(rig_takes):
+        look_dev_task_id = look_dev_task_ids.get(parent_id)
+        if look_dev_task_id is None:
+            reason = "no look dev task"
+        elif (look_dev_task_id, take_name) not in published_look_dev_takes:
+            reason = "no look dev published with same take"
+        else:
+            continue
+
+        orphan_rigs.setdefault(str(rig_task_id), {})[take_name] = {
+            None: reason,
+            "look_dev_task_id": None,
+            "look_dev_take_name": "Main",
+            "no_render": [],
+        }
+
+    return orphan_rigs
+
+
+def main(argv=None):
+    """Run the audits from the command line.
+
+    Args:
+        argv (list): The command line arguments, defaults to ``sys.argv[1:]``.
+
+    Returns:
+        int: The exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m anima.utils.audit", description="Anima project audits."
+    )
+    parser.add_argument("audit", choices=["orphan_rigs"], help="The audit to run.")
+    parser.add_argument("project", help="The project code or id.")
+    args = parser.parse_args(argv)
+
+    from anima.utils import do_db_setup
+
+    do_db_setup()
+
+    query = Project.query
+    if args.project.isdigit():
+        query = query.filter(Project.id == int(args.project))
+    else:
+        query = query.filter(Project.code == args.project)
+    project_id = query.with_entities(Project.id).scalar()
+    if project_id is None:
+        print("No such project: {}".format(args.project), file=sys.stderr)
+        return 1
+
+    orphan_rigs = find_orphan_rigs(project_id)
+    # the reason is stored under the None key which is not valid JSON
+    report = dict(
+        (
+            rig_task_id,
+            dict((take_name, info[None]) for take_name, info in takes.items()),
+        )
+        for rig_task_id, takes in orphan_rigs.items()
+    )
+    print(json.dumps(report, indent=4, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
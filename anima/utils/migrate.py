@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 """Migration related utility classes and functions."""
 
+import os
+
 
 class MigrateDataBase(object):
     """Base class for all the other migrate data classes."""
@@ -164,3 +166,350 @@ class VersionMigrateData(MigrateDataBase):
                 False.
         """
         raise NotImplementedError
+
+
+def resolve_versions(version_keys, batch_size=500):
+    """Resolve the given (task_id, take_name, version_number) keys in bulk.
+
+    Args:
+        version_keys (Iterable[tuple]): (task_id, take_name, version_number)
+            tuples.
+        batch_size (int): The number of keys to query at once.
+
+    Returns:
+        dict: A dictionary of keys to stalker.Version instances. The keys that
+            doesn't have a corresponding Version are skipped.
+    """
+    from sqlalchemy import tuple_
+    from stalker import Version
+
+    version_keys = list(set(version_keys))
+    versions = {}
+    for i in range(0, len(version_keys), batch_size):
+        query = Version.query.filter(
+            tuple_(Version.task_id, Version.take_name, Version.version_number).in_(
+                version_keys[i : i + batch_size]
+            )
+        )
+        for version in query:
+            versions[(version.task_id, version.take_name, version.version_number)] = (
+                version
+            )
+    return versions
+
+
+def resolve_tasks(task_ids, batch_size=500):
+    """Resolve the given task ids in bulk.
+
+    Args:
+        task_ids (Iterable[int]): The task ids.
+        batch_size (int): The number of ids to query at once.
+
+    Returns:
+        dict: A dictionary of ids to stalker.Task (or derived class) instances.
+    """
+    from sqlalchemy.orm import with_polymorphic
+    from stalker import Task
+    from stalker.db.session import DBSession
+
+    task_class = with_polymorphic(Task, "*")
+    task_ids = list(set(task_ids))
+    tasks = {}
+    for i in range(0, len(task_ids), batch_size):
+        query = DBSession.query(task_class).filter(
+            task_class.id.in_(task_ids[i : i + batch_size])
+        )
+        for task in query:
+            tasks[task.id] = task
+    return tasks
+
+
+def get_version_input_ids(version_ids, batch_size=500):
+    """Return the input ids of the given versions with a single query per batch.
+
+    Args:
+        version_ids (Iterable[int]): The version ids.
+        batch_size (int): The number of ids to query at once.
+
+    Returns:
+        dict: A dictionary of version ids to sets of input link ids.
+    """
+    from stalker.db.session import DBSession
+    from stalker.models.version import Version_Inputs
+
+    version_ids = list(set(version_ids))
+    inputs = dict((version_id, set()) for version_id in version_ids)
+    for i in range(0, len(version_ids), batch_size):
+        query = DBSession.query(
+            Version_Inputs.c.version_id, Version_Inputs.c.link_id
+        ).filter(Version_Inputs.c.version_id.in_(version_ids[i : i + batch_size]))
+        for version_id, link_id in query:
+            inputs[version_id].add(link_id)
+    return inputs
+
+
+def order_by_dependencies(items, dependencies):
+    """Order the given items so that every item comes after its dependencies.
+
+    The original order is kept as much as possible. Dependencies that are not in
+    the given items are ignored.
+
+    Args:
+        items (list): The items to order, they should be hashable.
+        dependencies (dict): A dictionary of items to the items they depend on.
+
+    Raises:
+        ValueError: If there is a circular dependency.
+
+    Returns:
+        list: The ordered items.
+    """
+    import heapq
+
+    order = dict((item, i) for i, item in enumerate(items))
+    dependents = dict((item, []) for item in items)
+    dependency_count = dict((item, 0) for item in items)
+    for item in items:
+        for dependency in set(dependencies.get(item, [])):
+            if dependency in order and dependency != item:
+                dependents[dependency].append(item)
+                dependency_count[item] += 1
+
+    ready = [order[item] for item in items if not dependency_count[item]]
+    heapq.heapify(ready)
+    ordered_items = []
+    while ready:
+        item = items[heapq.heappop(ready)]
+        ordered_items.append(item)
+        for dependent in dependents[item]:
+            dependency_count[dependent] -= 1
+            if not dependency_count[dependent]:
+                heapq.heappush(ready, order[dependent])
+
+    if len(ordered_items) != len(items):
+        raise ValueError(
+            "Circular dependency between: {}".format(
+                [item for item in items if dependency_count[item]]
+            )
+        )
+    return ordered_items
+
+
+def file_checksum(path, algorithm="sha1", chunk_size=1024 * 1024):
+    """Return the checksum of the given file.
+
+    Args:
+        path (str): The file path.
+        algorithm (str): A ``hashlib`` algorithm name.
+        chunk_size (int): The number of bytes to read at once.
+
+    Returns:
+        str: The hex digest of the file.
+    """
+    import hashlib
+
+    checksum = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def copy_file(source, destination, verify=True):
+    """Copy the given file and verify the copy with its checksum.
+
+    Args:
+        source (str): The source file path.
+        destination (str): The destination file path, the parent folders are
+            created if they don't exist.
+        verify (bool): Compare the checksums of the source and the copy.
+
+    Raises:
+        IOError: If the checksums doesn't match.
+
+    Returns:
+        str: The destination path.
+    """
+    import shutil
+
+    dir_path = os.path.dirname(destination)
+    if dir_path and not os.path.exists(dir_path):
+        try:
+            os.makedirs(dir_path)
+        except OSError:
+            # created by another thread
+            pass
+
+    shutil.copy2(source, destination)
+    if verify and file_checksum(source) != file_checksum(destination):
+        raise IOError(
+            "Checksum mismatch after copying {} to {}".format(source, destination)
+        )
+    return destination
+
+
+class FileCopier(object):
+    """Copies files concurrently with a bounded thread pool.
+
+    Args:
+        max_workers (int): The maximum number of concurrent copies.
+        verify (bool): Verify the copies with their checksums.
+    """
+
+    def __init__(self, max_workers=4, verify=True):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.verify = verify
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def copy(self, source, destination, callback=None):
+        """Schedule a copy.
+
+        Args:
+            source (str): The source file path.
+            destination (str): The destination file path.
+            callback (callable): Called with no arguments in the calling thread by
+                :meth:`.wait` when the copy is verified.
+        """
+        future = self._executor.submit(copy_file, source, destination, self.verify)
+        self._futures.append((future, callback))
+
+    def wait(self):
+        """Wait all the scheduled copies to finish.
+
+        The callbacks of the successful copies are called in the order the
+        copies are scheduled, even if one of the copies fails.
+
+        Raises:
+            Exception: The first error of the failed copies.
+        """
+        futures = self._futures
+        self._futures = []
+        errors = []
+        for future, callback in futures:
+            error = future.exception()
+            if error is not None:
+                errors.append(error)
+            elif callback is not None:
+                callback()
+        if errors:
+            raise errors[0]
+
+    def shutdown(self):
+        """Wait the scheduled copies and stop the worker threads."""
+        self._executor.shutdown(wait=True)
+
+
+class MigrationJournal(object):
+    """An append only journal to resume interrupted migrations.
+
+    Every created task and version is recorded as a JSON line, and the file is
+    flushed to the disk after every entry. Loading the journal of an interrupted
+    migration returns the already migrated items, so they can be skipped.
+
+    Args:
+        path (str): The journal file path. The migration can't be resumed if it
+            is None.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        # source id to new id
+        self.tasks = {}
+        self.versions = {}
+        self.completed_version_ids = set()
+        self._file = None
+
+        if path is not None:
+            self._load()
+            self._file = open(path, "a")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _load(self):
+        """Load the entries of the existing journal.
+
+        The partial last line of an interrupted migration is removed from the
+        file and a complete last entry without the line break is terminated, so
+        the next entry starts on a new line.
+        """
+        import json
+
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb+") as f:
+            size = 0
+            for line in f:
+                try:
+                    entry = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    entry = None
+                if not line.endswith(b"\n"):
+                    if entry is None:
+                        f.truncate(size)
+                    else:
+                        f.write(b"\n")
+                size += len(line)
+                if entry is None:
+                    continue
+                if entry["type"] == "task":
+                    self.tasks[entry["source_id"]] = entry["new_id"]
+                elif entry["type"] == "version":
+                    self.versions[entry["source_id"]] = entry["new_id"]
+                    if entry.get("completed"):
+                        self.completed_version_ids.add(entry["source_id"])
+
+    def _write(self, **entry):
+        """Append the given entry to the journal file."""
+        import json
+
+        if self._file is None:
+            return
+        self._file.write(json.dumps(entry, sort_keys=True))
+        self._file.write("\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def record_task(self, source_id, new_id):
+        """Record a migrated task.
+
+        Args:
+            source_id (int): The source task id.
+            new_id (int): The id of the created task.
+        """
+        self.tasks[source_id] = new_id
+        self._write(type="task", source_id=source_id, new_id=new_id)
+
+    def record_version(self, source_id, new_id, completed=True):
+        """Record a migrated version.
+
+        Args:
+            source_id (int): The source version id.
+            new_id (int): The id of the created version.
+            completed (bool): False if the version is created but its file is
+                not copied yet.
+        """
+        self.versions[source_id] = new_id
+        if completed:
+            self.completed_version_ids.add(source_id)
+        self._write(
+            type="version", source_id=source_id, new_id=new_id, completed=completed
+        )
+
+    def close(self):
+        """Close the journal file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,9 +1,19 @@
 # -*- coding: utf-8 -*-
 from __future__ import print_function
 
+import threading
+import time
+
 
 class ProgressDialogBase(object):
-    """Base class for all the other ProgressDialog variants."""
+    """Base class for all the other ProgressDialog variants.
+
+    Set ``thread_safe`` to False in the derived classes that can only be used from
+    the main thread (i.e. GUI dialogs), so the :class:`.ProgressManager` doesn't
+    update them from the worker threads.
+    """
+
+    thread_safe = True
 
     def __init__(self):
         self.title = ""
@@ -182,19 +192,42 @@ class ProgressManager(object):
     So calling ``register`` will register a new caller for the progress window. The
     ProgressManager will store the caller and will kill the ProgressDialog when all the
     callers are completed.
+
+    Redrawing the dialog for every step takes a considerable amount of time in loops
+    with a lot of steps. So the dialog is only redrawn if ``redraw_interval`` seconds
+    passed or the progress advanced by ``redraw_percent`` percent since the last
+    redraw. The last step of every caller is always drawn.
+
+    ``register``, ``step`` and ``end_progress`` can be called from worker threads.
+    Dialogs that are not ``thread_safe`` (i.e. Qt dialogs) are only created, updated
+    and closed in the main thread, so the main thread should call
+    :meth:`.update_dialog` periodically while the workers are running.
+
+    Args:
+        dialog_class (type): A :class:`.ProgressDialogBase` derivative.
+        redraw_interval (float): The minimum time between two redraws in seconds.
+        redraw_percent (float): The minimum change in the progress, in percent of
+            the max steps, to redraw the dialog before ``redraw_interval`` passes.
     """
 
-    def __init__(self, dialog_class=None):
+    def __init__(self, dialog_class=None, redraw_interval=0.1, redraw_percent=1.0):
+        self._lock = threading.RLock()
         self.in_progress = False
         self._dialog = None
         if dialog_class is None:
             dialog_class = ProgressDialogBase
         self.dialog_class = dialog_class
+        self.redraw_interval = redraw_interval
+        self.redraw_percent = redraw_percent
         self.callers = []
         self.title = ""
         self._max_steps = 0
         self.max_steps = 0
         self.current_step = 0
+        self._range_changed = True
+        self._last_step = None
+        self._last_redraw_time = 0
+        self._next_redraw_step = 0
 
     @property
     def max_steps(self):
@@ -208,28 +241,42 @@ class ProgressManager(object):
     @max_steps.setter
     def max_steps(self, max_steps):
         """Set the max steps value."""
-        self._max_steps = max_steps
-        # update the dialog range
-        if self._dialog:
-            self._dialog.set_range(0, self._max_steps)
+        with self._lock:
+            self._max_steps = max_steps
+            # update the dialog range on the next redraw
+            self._range_changed = True
 
     @property
     def dialog(self):
-        if not self._dialog:
+        if not self._dialog and self._can_update_dialog():
             self.create_dialog()
         return self._dialog
 
+    def _can_update_dialog(self):
+        """Check if the dialog can be created and updated from the current thread.
+
+        Returns:
+            bool: True if the dialog class is thread safe or this is the main
+                thread.
+        """
+        return (
+            self.dialog_class.thread_safe
+            or threading.current_thread() is threading.main_thread()
+        )
+
     def create_dialog(self):
         """Create the progress dialog."""
-        if self._dialog is None:
-            self._dialog = self.dialog_class()
+        with self._lock:
+            if self._dialog is None:
+                self._dialog = self.dialog_class()
 
-        self._dialog.set_range(0, self.max_steps)
-        self._dialog.set_title(self.title)
-        self._dialog.show()
+            self._dialog.set_range(0, self.max_steps)
+            self._range_changed = False
+            self._dialog.set_title(self.title)
+            self._dialog.show()
 
-        # also set the Manager to in progress
-        self.in_progress = True
+            # also set the Manager to in progress
+            self.in_progress = True
 
     def was_cancelled(self):
         """Check if cancelled.
@@ -253,17 +300,14 @@ class ProgressManager(object):
         """
         caller = ProgressCaller(max_steps=max_iteration, title=title)
         caller.manager = self
-        self.max_steps += max_iteration
-
-        # update the maximum
-        if not self.dialog:
-            self.create_dialog()
-
-        self.dialog.set_range(0, self.max_steps)
-        self.dialog.set_current_step(self.current_step)
-
-        # also store this
-        self.callers.append(caller)
+        with self._lock:
+            self.max_steps += max_iteration
+            # also store this
+            self.callers.append(caller)
+            self.in_progress = True
+
+            # update the maximum
+            self.update_dialog(force=True)
         return caller
 
     def step(self, caller, step=1, message=""):
@@ -275,15 +319,68 @@ class ProgressManager(object):
             step (int): The step size to increment, the default value is 1.
             message (str): The progress message as string.
         """
-        caller.current_step += step
-        self.current_step += step
-        if self.dialog:
-            self.dialog.set_current_step(self.current_step)
-            self.dialog.set_title("{} : {}".format(caller.title, message))
+        with self._lock:
+            caller.current_step += step
+            self.current_step += step
+            self._last_step = (caller, message)
+            finished = caller.current_step >= caller.max_steps
+            if (
+                finished
+                or self.current_step >= self._next_redraw_step
+                or time.time() - self._last_redraw_time >= self.redraw_interval
+            ):
+                self.update_dialog(force=True)
+
+            if finished:
+                # kill the caller
+                self.end_progress(caller)
+
+    def update_dialog(self, force=False):
+        """Redraw the dialog with the current progress.
+
+        Call this from the main thread to display the progress of the worker threads
+        if the dialog is not thread safe.
 
-        if caller.current_step >= caller.max_steps:
-            # kill the caller
-            self.end_progress(caller)
+        Args:
+            force (bool): Redraw the dialog even if it is redrawn recently.
+        """
+        with self._lock:
+            if not self._can_update_dialog():
+                return
+
+            if not self.callers:
+                # the last caller is ended in another thread
+                self._close_dialog()
+                return
+
+            if (
+                not force
+                and time.time() - self._last_redraw_time < self.redraw_interval
+            ):
+                return
+
+            dialog = self.dialog
+            if self._range_changed:
+                dialog.set_range(0, self.max_steps)
+                self._range_changed = False
+            dialog.set_current_step(self.current_step)
+            if self._last_step:
+                caller, message = self._last_step
+                self.title = "{} : {}".format(caller.title, message)
+                self._last_step = None
+            dialog.set_title(self.title)
+
+            self._last_redraw_time = time.time()
+            self._next_redraw_step = (
+                self.current_step + self.max_steps * self.redraw_percent / 100.0
+            )
+
+    def _close_dialog(self):
+        """Close the dialog."""
+        self.in_progress = False
+        if self._dialog:
+            self._dialog.close()
+            self._dialog = None
 
     def end_progress(self, caller=None):
         """End the progress for the given caller.
@@ -291,18 +388,19 @@ class ProgressManager(object):
         Args:
             caller (ProgressCaller, None): A :class:`.ProgressCaller` instance.
         """
-        # remove the caller from the callers list
-        if caller in self.callers:
-            self.callers.remove(caller)
-            # also reduce the max_steps counter
-            # in case of an early kill
-            steps_left = caller.max_steps - caller.current_step
-            if steps_left > 0:
-                self.max_steps -= steps_left
-
-        if not self.callers:
-            self.max_steps = 0
-            self.current_step = 0
-            if self._dialog:
-                self._dialog.close()
-                self._dialog = None
+        with self._lock:
+            # remove the caller from the callers list
+            if caller in self.callers:
+                self.callers.remove(caller)
+                # also reduce the max_steps counter
+                # in case of an early kill
+                steps_left = caller.max_steps - caller.current_step
+                if steps_left > 0:
+                    self.max_steps -= steps_left
+
+            if not self.callers:
+                self.max_steps = 0
+                self.current_step = 0
+                self._next_redraw_step = 0
+                if self._can_update_dialog():
+                    self._close_dialog()
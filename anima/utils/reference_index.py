@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+"""Offline repository wide reference index.
+
+Scans the scene files in a repository and stores which file references which
+in a local SQLite database, so "who uses this file" can be answered without
+opening any scene or relying on ``Version.inputs``::
+
+  python -m anima.utils.reference_index update /mnt/repo/PROJECT
+  python -m anima.utils.reference_index dependents /mnt/repo/PROJECT/file.ma
+
+The scene files are scanned with a process pool. Only the files that are new
+or whose modification time or size has changed since the last scan are
+scanned again.
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sqlite3
+import sys
+
+from anima.utils.archive import get_reference_path_regex, scan_references
+
+SCENE_EXTENSIONS = [".ma", ".nk", ".comp", ".hip", ".hipnc"]
+
+
+def normalize_path(path):
+    """Return the canonical form of the given path for the index.
+
+    Environment variables like ``$REPO{id}`` are expanded and backslashes are
+    converted to forward slashes.
+
+    Args:
+        path (str): A file path.
+
+    Returns:
+        str: The normalized path.
+    """
+    return os.path.normpath(os.path.expandvars(path)).replace("\\", "/")
+
+
+def scan_file(path):
+    """Return the normalized reference paths of the given scene file.
+
+    This is the function run by the worker processes.
+
+    Args:
+        path (str): The path of the scene file.
+
+    Returns:
+        tuple: (path, references) tuple, references is None if the file can not
+            be read.
+    """
+    try:
+        with open(path, "rb") as f:
+            ref_paths = scan_references(f, regex=get_reference_path_regex())
+    except (IOError, OSError):
+        return path, None
+
+    references = []
+    seen = set()
+    for ref_path in ref_paths:
+        ref_path = normalize_path(ref_path)
+        if ref_path not in seen:
+            seen.add(ref_path)
+            references.append(ref_path)
+    return path, references
+
+
+def iter_scene_files(root_paths, extensions=None):
+    """Generate the scene files under the given root paths.
+
+    Args:
+        root_paths (List[str]): The directories to crawl.
+        extensions (List[str]): The file extensions to consider, defaults to
+            :data:`.SCENE_EXTENSIONS`.
+
+    Returns:
+        generator: A generator of (normalized path, mtime, size) tuples.
+    """
+    if extensions is None:
+        extensions = SCENE_EXTENSIONS
+    extensions = tuple(ext.lower() for ext in extensions)
+
+    dir_paths = list(root_paths)
+    while dir_paths:
+        dir_path = dir_paths.pop()
+        try:
+            entries = list(os.scandir(dir_path))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    dir_paths.append(entry.path)
+                elif entry.name.lower().endswith(extensions):
+                    stat = entry.stat()
+                    yield normalize_path(entry.path), stat.st_mtime, stat.st_size
+            except OSError:
+                continue
+
+
+class ReferenceIndex(object):
+    """A forward and reverse reference index stored in an SQLite database.
+
+    Args:
+        path (str): The path of the database file, defaults to the
+            ``reference_index_file_name`` under the ``local_cache_folder``. Use
+            ``":memory:"`` for a temporary index.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            from anima import defaults
+
+            path = os.path.expanduser(
+                os.path.join(
+                    defaults.local_cache_folder, defaults.reference_index_file_name
+                )
+            )
+        if path != ":memory:":
+            dir_path = os.path.dirname(path)
+            if dir_path and not os.path.exists(dir_path):
+                os.makedirs(dir_path)
+
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self._create_tables()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
+
+    def _create_tables(self):
+        """Create the tables if they don't exist."""
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    mtime REAL NOT NULL,
+                    size INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS refs (
+                    source TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    PRIMARY KEY (source, target)
+                );
+                CREATE INDEX IF NOT EXISTS refs_target ON refs (target);
+                """)
+
+    def update(self, root_paths, extensions=None, processes=None, chunksize=16):
+        """Scan the new and changed scene files under the given root paths.
+
+        The files under the root paths that doesn't exist anymore are removed
+        from the index.
+
+        Args:
+            root_paths (List[str]): The directories to crawl.
+            extensions (List[str]): The file extensions to consider, defaults to
+                :data:`.SCENE_EXTENSIONS`.
+            processes (int): The number of worker processes, defaults to the
+                number of CPUs. Use 0 to scan the files in the current process.
+            chunksize (int): The number of files to send to a worker at once.
+
+        Returns:
+            dict: The number of ``scanned``, ``unchanged`` and ``removed`` files.
+        """
+        root_paths = [normalize_path(root_path) for root_path in root_paths]
+
+        known_files = {}
+        for root_path in root_paths:
+            pattern = root_path.rstrip("/").replace("%", r"\%").replace("_", r"\_")
+            known_files.update(
+                (path, (mtime, size))
+                for path, mtime, size in self.connection.execute(
+                    "SELECT path, mtime, size FROM files "
+                    "WHERE path LIKE ? ESCAPE '\\'",
+                    (pattern + "/%",),
+                )
+            )
+
+        stats = {}
+        paths_to_scan = []
+        for path, mtime, size in iter_scene_files(root_paths, extensions):
+            if known_files.pop(path, None) != (mtime, size):
+                paths_to_scan.append(path)
+            stats[path] = (mtime, size)
+
+        if processes == 0 or len(paths_to_scan) < 2:
+            results = map(scan_file, paths_to_scan)
+            self._store(results, stats, known_files)
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                results = executor.map(scan_file, paths_to_scan, chunksize=chunksize)
+                self._store(results, stats, known_files)
+
+        return {
+            "scanned": len(paths_to_scan),
+            "unchanged": len(stats) - len(paths_to_scan),
+            "removed": len(known_files),
+        }
+
+    def _store(self, results, stats, removed_paths):
+        """Store the scan results in a single transaction.
+
+        Args:
+            results (Iterable[tuple]): (path, references) tuples.
+            stats (dict): The (mtime, size) of the scanned files by path.
+            removed_paths (Iterable[str]): The paths to remove from the index.
+        """
+        with self.connection:
+            cursor = self.connection.cursor()
+            for path in removed_paths:
+                cursor.execute("DELETE FROM refs WHERE source = ?", (path,))
+                cursor.execute("DELETE FROM files WHERE path = ?", (path,))
+
+            for path, references in results:
+                cursor.execute("DELETE FROM refs WHERE source = ?", (path,))
+                if references is None:
+                    # couldn't read it, scan it again the next time
+                    cursor.execute("DELETE FROM files WHERE path = ?", (path,))
+                    continue
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO refs (source, target) VALUES (?, ?)",
+                    ((path, target) for target in references),
+                )
+                mtime, size = stats[path]
+                cursor.execute(
+                    "INSERT OR REPLACE INTO files (path, mtime, size) VALUES (?, ?, ?)",
+                    (path, mtime, size),
+                )
+
+    def get_references(self, path):
+        """Return the files referenced by the given file.
+
+        Args:
+            path (str): The path of the scene file.
+
+        Returns:
+            List[str]: The normalized reference paths.
+        """
+        return [
+            target
+            for (target,) in self.connection.execute(
+                "SELECT target FROM refs WHERE source = ? ORDER BY target",
+                (normalize_path(path),),
+            )
+        ]
+
+    def get_dependents(self, path, recursive=False):
+        """Return the files that are referencing the given file.
+
+        Args:
+            path (str): The path of the referenced file.
+            recursive (bool): Also return the files that are referencing the
+                dependents, all the way up.
+
+        Returns:
+            List[str]: The normalized paths of the dependent scene files.
+        """
+        path = normalize_path(path)
+        dependents = []
+        visited = set([path])
+        paths = [path]
+        while paths:
+            current_paths = paths
+            paths = []
+            # stay under the SQLite variable limit
+            for i in range(0, len(current_paths), 500):
+                chunk = current_paths[i : i + 500]
+                for (source,) in self.connection.execute(
+                    "SELECT DISTINCT source FROM refs WHERE target IN ({}) "
+                    "ORDER BY source".format(", ".join("?" * len(chunk))),
+                    chunk,
+                ):
+                    if source not in visited:
+                        visited.add(source)
+                        dependents.append(source)
+                        paths.append(source)
+            if not recursive:
+                break
+        return dependents
+
+    def is_up_to_date(self, path):
+        """Return True if the given file is indexed and not changed since then.
+
+        Args:
+            path (str): The path of the scene file.
+
+        Returns:
+            bool: True if the index has the latest references of the file.
+        """
+        path = normalize_path(path)
+        row = self.connection.execute(
+            "SELECT mtime, size FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return tuple(row) == (stat.st_mtime, stat.st_size)
+
+    def get_dependent_versions(self, version, recursive=False):
+        """Return the Versions that are referencing the given Version.
+
+        Args:
+            version (stalker.Version): A Stalker Version instance.
+            recursive (bool): See :meth:`.get_dependents`.
+
+        Returns:
+            List[stalker.Version]: The dependent Versions.
+        """
+        from stalker import Repository, Version
+
+        full_paths = [
+            Repository.to_os_independent_path(path)
+            for path in self.get_dependents(
+                version.absolute_full_path, recursive=recursive
+            )
+        ]
+        if not full_paths:
+            return []
+        return Version.query.filter(Version.full_path.in_(full_paths)).all()
+
+
+def main(argv=None):
+    """Update or query the reference index from the command line.
+
+    Args:
+        argv (list): The command line arguments, defaults to ``sys.argv[1:]``.
+
+    Returns:
+        int: The exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m anima.utils.reference_index",
+        description="Repository wide reference index.",
+    )
+    parser.add_argument("--db", default=None, help="The index database path.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    update_parser = subparsers.add_parser("update", help="Scan the given paths.")
+    update_parser.add_argument("paths", nargs="+", help="The directories to scan.")
+    update_parser.add_argument(
+        "--processes", type=int, default=None, help="The number of processes."
+    )
+
+    dependents_parser = subparsers.add_parser(
+        "dependents", help="List the files referencing the given file."
+    )
+    dependents_parser.add_argument("path", help="The referenced file path.")
+    dependents_parser.add_argument(
+        "-r", "--recursive", action="store_true", help="List all the way up."
+    )
+
+    references_parser = subparsers.add_parser(
+        "references", help="List the files referenced by the given file."
+    )
+    references_parser.add_argument("path", help="The scene file path.")
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 1
+
+    with ReferenceIndex(args.db) as index:
+        if args.command == "update":
+            stats = index.update(args.paths, processes=args.processes)
+            print(
+                "scanned: {scanned}, unchanged: {unchanged}, "
+                "removed: {removed}".format(**stats)
+            )
+        elif args.command == "dependents":
+            for path in index.get_dependents(args.path, recursive=args.recursive):
+                print(path)
+        else:
+            for path in index.get_references(args.path):
+                print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,7 @@
 __version__ = "1.1.0"
 
 import os
+from collections import namedtuple
 
 
 class NetflixReporter(object):
@@ -63,591 +64,34 @@ class NetflixReporter(object):
 
         from stalker.db.session import DBSession
 
-        with DBSession.no_autoflush:
-            wfd = shot.status_list["WFD"]
-            rts = shot.status_list["RTS"]
-            wip = shot.status_list["WIP"]
-            cmpl = shot.status_list["CMPL"]
-
-        parent_statuses_lut = [wfd, rts, wip, cmpl]
-
-        #   +--------- WFD
-        #   |+-------- RTS
-        #   ||+------- WIP
-        #   |||+------ PREV
-        #   ||||+----- HREV
-        #   |||||+---- DREV
-        #   ||||||+--- OH
-        #   |||||||+-- STOP
-        #   ||||||||+- CMPL
-        #   |||||||||
-        # 0b000000000
-
-        binary_status_codes = {
-            "WFD": 256,
-            "RTS": 128,
-            "WIP": 64,
-            "PREV": 32,
-            "HREV": 16,
-            "DREV": 8,
-            "OH": 4,
-            "STOP": 2,
-            "CMPL": 1,
-        }
-
-        # use Python
-        # logger.debug('using pure Python to query children statuses')
-        binary_status = 0
-        children_statuses = []
-        for child in shot.children:
+        child_status_codes = [
+            child.status.code
+            for child in shot.children
             # skip Plate task
-            if child.type and child.type.name == "Plate":
-                continue
-
-            # consider every status only once
-            if child.status not in children_statuses:
-                children_statuses.append(child.status)
-                binary_status += binary_status_codes[child.status.code]
-
-        #
-        # I know that the following list seems cryptic but the it shows the
-        # final status index in parent_statuses_lut[] list.
-        #
-        # So by using the cumulative statuses of children we got an index from
-        # the following table, and use the found element (integer) as the index
-        # for the parent_statuses_lut[] list, and we find the desired status
-        #
-        # We are doing it in this way for a couple of reasons:
-        #
-        #   1. We shouldn't hold the statuses in the following list,
-        #   2. Using a dictionary is another alternative, where the keys are
-        #      the cumulative binary status codes, but at the end the result of
-        #      this cumulative thing is a number between 0-511 so no need to
-        #      use a dictionary with integer keys
-        #
-        children_to_parent_statuses_lut = [
-            0,
-            3,
-            3,
-            3,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            1,
-            2,
-            1,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            0,
-            2,
-            0,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            1,
-            2,
-            1,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
-            2,
+            if not (child.type and child.type.name == "Plate")
         ]
+        status_code = cls.get_shot_status_code(child_status_codes)
 
-        status_index = children_to_parent_statuses_lut[binary_status]
-        status = parent_statuses_lut[status_index]
+        with DBSession.no_autoflush:
+            status = shot.status_list[status_code]
 
-        # logger.debug("binary statuses value : {}".format(binary_status))
         # logger.debug("setting status to : {}".format(status.code))
 
         return status
 
+    @classmethod
+    def get_shot_status_code(cls, child_status_codes):
+        """calculates the shot status code from the status codes of the child
+        tasks
+
+        :param child_status_codes: A list of status codes of the child tasks,
+          excluding the Plate task.
+        :return: One of "WFD", "RTS", "WIP" or "CMPL".
+        """
+        from anima.utils.status import get_parent_status_code
+
+        return get_parent_status_code(child_status_codes)
+
     @classmethod
     def generate_shot_methodologies(cls, shot):
         """Generates Netflix complaint shot methodologies field value by looking at the task related information
@@ -655,12 +99,46 @@ class NetflixReporter(object):
         :param shot: A Stalker Shot instance.
         :return: Returns a list of string containing the shot methodologies
         """
+        child_tasks = []
+        for child_task in shot.children:
+            depends = [
+                DependencyData(
+                    id=dep.id,
+                    type_name=dep.type.name if dep.type else None,
+                    parent_type_name=(
+                        dep.parent.type.name if dep.parent and dep.parent.type else None
+                    ),
+                )
+                for dep in child_task.depends
+            ]
+            child_tasks.append(
+                ChildTaskData(
+                    id=child_task.id,
+                    name=child_task.name,
+                    type_name=child_task.type.name if child_task.type else None,
+                    status_code=child_task.status.code,
+                    schedule_model=child_task.schedule_model,
+                    bid_timing=child_task.bid_timing,
+                    bid_unit=child_task.bid_unit,
+                    depends=depends,
+                )
+            )
+        return cls.generate_shot_methodologies_from_data(child_tasks)
+
+    @classmethod
+    def generate_shot_methodologies_from_data(cls, child_tasks):
+        """Generates Netflix complaint shot methodologies field value from the
+        given child task data
+
+        :param child_tasks: A list of :class:`.ChildTaskData` instances of a shot.
+        :return: Returns a list of string containing the shot methodologies
+        """
         shot_methodologies = []
-        child_tasks = shot.children
-        child_task_type_names = []
-        for child_task in child_tasks:
-            if child_task.type:
-                child_task_type_names.append(child_task.type.name.lower())
+        child_task_type_names = [
+            child_task.type_name.lower()
+            for child_task in child_tasks
+            if child_task.type_name
+        ]
 
         # Comp -> "2D Comp"
         if "comp" in child_task_type_names:
@@ -672,20 +150,13 @@ class NetflixReporter(object):
 
         # Lighting.dependency to Layout -> "3D Set Extension"
         if "lighting" in child_task_type_names:
-            from stalker import Task
-
             # get the lighting task first
             lighting_tasks = filter(lambda x: x.name == "Lighting", child_tasks)
             for lighting_task in lighting_tasks:
-                assert isinstance(lighting_task, Task)
-                deps = lighting_task.depends
-                for dep in deps:
-                    assert isinstance(dep, Task)
-                    if dep.type:
-                        dep_type_name = dep.type.name
-                        if dep_type_name == "Layout":
-                            shot_methodologies.append("3D Set Extension")
-                            break
+                for dep in lighting_task.depends:
+                    if dep.type_name == "Layout":
+                        shot_methodologies.append("3D Set Extension")
+                        break
 
         # Animation -> "3D Animated Object"
         # Animation.dependency -> Character.Rig -> "3D Character"
@@ -693,16 +164,16 @@ class NetflixReporter(object):
             shot_methodologies.append("3D Animated Object")
             # also check if there are any dependencies to a character rig
             animation_tasks = filter(
-                lambda x: x.type and x.type.name.lower().startswith("anim"), child_tasks
+                lambda x: x.type_name and x.type_name.lower().startswith("anim"),
+                child_tasks,
             )
             for animation_task in animation_tasks:
                 for dep in animation_task.depends:
-                    if dep.type and dep.type.name.lower() == "rig":
+                    if dep.type_name and dep.type_name.lower() == "rig":
                         # check if this is a rig for a character
-                        parent_asset = dep.parent
                         if (
-                            parent_asset.type
-                            and parent_asset.type.name.lower().starts_widht("char")
+                            dep.parent_type_name
+                            and dep.parent_type_name.lower().startswith("char")
                         ):
                             shot_methodologies.append("3D Character")
                             break
@@ -729,6 +200,9 @@ class NetflixReporter(object):
     ):
         """Generates the report
 
+        All the data is loaded upfront with :class:`.NetflixReportData` and the rows
+        are written to the output file as they are rendered.
+
         :param seq: The Sequence to generate the report of
         :param csv_output_path: The output path of the resultant CSV file
         :param vfx_turnover_to_vendor_date: The date that the picture lock has been received.
@@ -739,119 +213,318 @@ class NetflixReporter(object):
         """
         import datetime
         import pytz
-        from stalker import Task, Shot, Version, Type
-        from stalker.db.session import DBSession
         from anima.utils import do_db_setup
 
         do_db_setup()
 
         utc_now = datetime.datetime.now(pytz.utc)
-        ep = seq
+        report_data = NetflixReportData.load(seq)
 
-        data = [self.csv_header]
-
-        scene_type = Type.query.filter(Type.name == "Scene").first()
-        scenes = (
-            Task.query.filter(Task.type == scene_type)
-            .filter(Task.parent == ep)
-            .order_by(Task.name)
-            .all()
-        )
+        # make dirs
+        os.makedirs(os.path.dirname(csv_output_path), exist_ok=True)
 
-        for scene in scenes:
-            shots_task = (
-                Task.query.filter(Task.name == "Shots")
-                .filter(Task.parent == scene)
-                .first()
-            )
-            for shot in (
-                Shot.query.filter(Shot.parent == shots_task).order_by(Shot.code).all()
+        with open(csv_output_path, "w") as f:
+            f.write(self.csv_header)
+            for rendered_data in self.render_rows(
+                report_data,
+                vfx_turnover_to_vendor_date,
+                vfx_next_studio_review_date,
+                vendors,
+                hourly_cost,
+                currency,
+                utc_now,
             ):
+                f.write("\n")
+                f.write(rendered_data)
+
+    def render_rows(
+        self,
+        report_data,
+        vfx_turnover_to_vendor_date,
+        vfx_next_studio_review_date,
+        vendors,
+        hourly_cost,
+        currency,
+        report_date,
+    ):
+        """Renders the CSV rows from the given report data
 
-                comp_or_cleanup_task = (
-                    Task.query.filter(Task.parent == shot)
-                    .filter(Task.name == "Comp")
-                    .first()
+        :param report_data: A :class:`.NetflixReportData` instance.
+        :param vfx_turnover_to_vendor_date: The date that the picture lock has been received.
+        :param vfx_next_studio_review_date: The date that Netflix can review the CMPL shots
+        :param list vendors: A list of vendor names
+        :param hourly_cost: The hourly cost for the budget field.
+        :param currency: The currency of the hourly cost.
+        :param report_date: The report date.
+        :return: A generator of rendered CSV rows.
+        """
+        from stalker import Task
+        from anima.utils.status import rollup_status_codes
+
+        ep = report_data.episode
+
+        # roll up all the shot statuses in one pass, skipping the Plate tasks
+        shot_status_codes = rollup_status_codes(
+            dict(
+                (
+                    shot_id,
+                    [
+                        child.status_code
+                        for child in child_tasks
+                        if child.type_name != "Plate"
+                    ],
                 )
-                if not comp_or_cleanup_task:
-                    comp_or_cleanup_task = (
-                        Task.query.filter(Task.parent == shot)
-                        .filter(Task.name == "Cleanup")
-                        .first()
-                    )
+                for shot_id, child_tasks in report_data.child_tasks_by_shot_id.items()
+            )
+        )
+
+        for scene in report_data.scenes:
+            for shot in report_data.shots_by_scene_id.get(scene.id, []):
+                child_tasks = report_data.child_tasks_by_shot_id.get(shot.id, [])
+                comp_or_cleanup_task = None
+                for task_name in ["Comp", "Cleanup"]:
+                    for child_task in child_tasks:
+                        if child_task.name == task_name:
+                            comp_or_cleanup_task = child_task
+                            break
+                    if comp_or_cleanup_task:
+                        break
+
                 if not comp_or_cleanup_task:
                     # no comp or cleanup task, something wrong
                     print("No Comp or CleanUp task in: %s" % shot.name)
                     continue
 
                 vfx_final_version = ""
-                if (
-                    comp_or_cleanup_task
-                    and comp_or_cleanup_task.status
-                    and comp_or_cleanup_task.status.code == "CMPL"
-                ):
-                    version = Version.query.filter(
-                        Version.task == comp_or_cleanup_task
-                    ).first()
-                    if version:
-                        latest_version = version.latest_version
-                        vfx_final_version = "v%03i" % latest_version.version_number
+                if comp_or_cleanup_task.status_code == "CMPL":
+                    latest_version_number = report_data.latest_version_numbers.get(
+                        comp_or_cleanup_task.id
+                    )
+                    if latest_version_number is not None:
+                        vfx_final_version = "v%03i" % latest_version_number
 
                 # {shot_cost};{currency};{report_date};{report_note}
                 total_bid_seconds = 0
-                for child in shot.children:
+                for child in child_tasks:
                     if child.schedule_model == "duration":
                         # skip ``duration`` based tasks
                         continue
 
-                    total_bid_seconds += shot.to_seconds(
-                        child.bid_timing, child.bid_unit, child.schedule_model
+                    total_bid_seconds += (
+                        Task.to_seconds(
+                            child.bid_timing, child.bid_unit, child.schedule_model
+                        )
+                        or 0
                     )
 
-                shot.update_schedule_info()
-                rendered_data = self.csv_format.format(
+                if comp_or_cleanup_task.status_code != "PREV":
+                    status_code = shot_status_codes[shot.id]
+                else:
+                    status_code = "PREV"
+
+                yield self.csv_format.format(
                     episode_number=ep.name[2:],
                     episode=ep,
                     scene=scene,
                     scene_number=scene.name[4:],
                     shot=shot,
                     task=comp_or_cleanup_task,
-                    status=self.map_status_code(
-                        self.get_shot_status(shot).code
-                        if comp_or_cleanup_task.status.code != "PREV"
-                        else "PREV"
-                    ),
+                    status=self.map_status_code(status_code),
                     shot_methodologies=", ".join(
-                        self.generate_shot_methodologies(shot)
+                        self.generate_shot_methodologies_from_data(child_tasks)
                     ),
                     scope_of_work=shot.description,
                     vendors=", ".join(vendors),
                     vfx_turnover_to_vendor_date=vfx_turnover_to_vendor_date.strftime(
                         self.date_time_format
                     ),
-                    vfx_next_studio_review_date=vfx_next_studio_review_date.strftime(
-                        self.date_time_format
-                    )
-                    if comp_or_cleanup_task.status.code in ["CMPL", "PREV"]
-                    else "",
+                    vfx_next_studio_review_date=(
+                        vfx_next_studio_review_date.strftime(self.date_time_format)
+                        if comp_or_cleanup_task.status_code in ["CMPL", "PREV"]
+                        else ""
+                    ),
                     vfx_final_delivery_date=shot.end.strftime(self.date_time_format),
                     vfx_final_version=vfx_final_version,
                     shot_cost="%0.2f" % (total_bid_seconds / 3600 * hourly_cost),
                     currency=currency,
-                    report_date=utc_now.strftime(self.date_time_format),
+                    report_date=report_date.strftime(self.date_time_format),
                     report_note="",
                 )
 
-                data.append(rendered_data)
 
-        # we may have updated the schedule info
-        DBSession.commit()
+SceneData = namedtuple("SceneData", ["id", "name"])
+ShotData = namedtuple("ShotData", ["id", "code", "name", "description", "end"])
+ChildTaskData = namedtuple(
+    "ChildTaskData",
+    [
+        "id",
+        "name",
+        "type_name",
+        "status_code",
+        "schedule_model",
+        "bid_timing",
+        "bid_unit",
+        "depends",
+    ],
+)
+DependencyData = namedtuple("DependencyData", ["id", "type_name", "parent_type_name"])
+
+
+class NetflixReportData(object):
+    """Holds all the data needed by the :class:`.NetflixReporter` in plain Python
+    structures.
+
+    Use :meth:`.load` to fill it with a fixed number of queries regardless of the
+    number of shots in the episode.
+    """
 
-        # make dirs
-        os.makedirs(os.path.dirname(csv_output_path), exist_ok=True)
+    def __init__(self, episode=None):
+        self.episode = episode
+        self.scenes = []
+        self.shots_by_scene_id = {}
+        self.child_tasks_by_shot_id = {}
+        self.latest_version_numbers = {}
 
-        with open(csv_output_path, "w") as f:
-            f.write("\n".join(data))
+    @classmethod
+    def load(cls, episode):
+        """Loads the report data of the given episode
+
+        :param episode: A Stalker Task (or Sequence) instance which has the scene
+          tasks as children.
+        :return: A :class:`.NetflixReportData` instance.
+        """
+        from sqlalchemy import func
+        from sqlalchemy.orm import aliased
+        from stalker import Shot, Status, Task, Type, Version
+        from stalker.models.task import TaskDependency
+        from stalker.db.session import DBSession
+
+        data = cls(episode)
+
+        # scenes
+        data.scenes = [
+            SceneData(*row)
+            for row in DBSession.query(Task.id, Task.name)
+            .select_from(Task)
+            .join(Type, Task.type_id == Type.id)
+            .filter(Type.name == "Scene")
+            .filter(Task.parent_id == episode.id)
+            .order_by(Task.name)
+            .all()
+        ]
+        if not data.scenes:
+            return data
+
+        # "Shots" tasks, the first one per scene
+        shots_task_ids = dict(
+            DBSession.query(func.min(Task.id), Task.parent_id)
+            .filter(Task.parent_id.in_([scene.id for scene in data.scenes]))
+            .filter(Task.name == "Shots")
+            .group_by(Task.parent_id)
+            .all()
+        )
+        if not shots_task_ids:
+            return data
+
+        # shots
+        shots_by_id = {}
+        for row in (
+            DBSession.query(
+                Shot.id,
+                Shot.code,
+                Shot.name,
+                Shot.description,
+                Shot.end,
+                Shot.parent_id,
+            )
+            .filter(Shot.parent_id.in_(list(shots_task_ids)))
+            .order_by(Shot.code)
+            .all()
+        ):
+            shot = ShotData(*row[:-1])
+            shots_by_id[shot.id] = shot
+            data.shots_by_scene_id.setdefault(shots_task_ids[row[-1]], []).append(shot)
+        if not shots_by_id:
+            return data
+
+        # child tasks
+        child_task_rows = (
+            DBSession.query(
+                Task.id,
+                Task.name,
+                Type.name,
+                Status.code,
+                Task.schedule_model,
+                Task.bid_timing,
+                Task.bid_unit,
+                Task.parent_id,
+            )
+            .select_from(Task)
+            .outerjoin(Type, Task.type_id == Type.id)
+            .join(Status, Task.status_id == Status.id)
+            .filter(Task.parent_id.in_(list(shots_by_id)))
+            .order_by(Task.id)
+            .all()
+        )
+
+        # dependencies of the child tasks
+        dep_task = aliased(Task)
+        dep_type = aliased(Type)
+        dep_parent = aliased(Task)
+        dep_parent_type = aliased(Type)
+        depends_by_task_id = {}
+        for task_id, dep_id, type_name, parent_type_name in (
+            DBSession.query(
+                TaskDependency.task_id,
+                dep_task.id,
+                dep_type.name,
+                dep_parent_type.name,
+            )
+            .select_from(TaskDependency)
+            .join(dep_task, TaskDependency.depends_to_id == dep_task.id)
+            .outerjoin(dep_type, dep_task.type_id == dep_type.id)
+            .outerjoin(dep_parent, dep_task.parent_id == dep_parent.id)
+            .outerjoin(dep_parent_type, dep_parent.type_id == dep_parent_type.id)
+            .filter(TaskDependency.task_id.in_([row[0] for row in child_task_rows]))
+            .all()
+        ):
+            depends_by_task_id.setdefault(task_id, []).append(
+                DependencyData(dep_id, type_name, parent_type_name)
+            )
+
+        for row in child_task_rows:
+            child_task = ChildTaskData(
+                *row[:-1], depends=depends_by_task_id.get(row[0], [])
+            )
+            data.child_tasks_by_shot_id.setdefault(row[-1], []).append(child_task)
+
+        # latest version number of the first take of the completed Comp and
+        # Cleanup tasks
+        final_task_ids = [
+            row[0]
+            for row in child_task_rows
+            if row[1] in ["Comp", "Cleanup"] and row[3] == "CMPL"
+        ]
+        if final_task_ids:
+            # use the take of the first created version of each task
+            takes_by_task_id = {}
+            for task_id, first_version_id, max_version_number in (
+                DBSession.query(
+                    Version.task_id,
+                    func.min(Version.id),
+                    func.max(Version.version_number),
+                )
+                .filter(Version.task_id.in_(final_task_ids))
+                .group_by(Version.task_id, Version.take_name)
+                .all()
+            ):
+                takes_by_task_id.setdefault(task_id, []).append(
+                    (first_version_id, max_version_number)
+                )
+            for task_id, takes in takes_by_task_id.items():
+                data.latest_version_numbers[task_id] = min(takes)[1]
+
+        return data
 
 
 class NetflixReview(object):
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""Resolve and lay out the outputs of shot tasks for review timelines.
+
+This is the DCC independent part of the Blender reviewer
+(:mod:`anima.dcc.blender.reviewer`). The latest version with outputs of every
+shot task is resolved with a single query, and the placement of the strips is
+planned up front for the whole edit::
+
+  from anima.utils.review import get_scene_shots, plan_strip_layout
+
+  shots = get_scene_shots(scene)
+  for strip in plan_strip_layout(shots, ["Previs", "Animation", "Lighting"]):
+      print(strip.full_path, strip.frame_start, strip.channel)
+"""
+
+import collections
+
+from sqlalchemy import func
+from stalker import Link, Shot, Task, Version
+from stalker.db.session import DBSession
+from stalker.models.version import Version_Outputs
+
+StripPlan = collections.namedtuple(
+    "StripPlan",
+    ["parent_id", "task_name", "full_path", "frame_start", "frame_end", "channel"],
+)
+
+
+def latest_outputs_query(parent_ids, task_names):
+    """Return a query of the outputs of the latest version with outputs of the
+    child tasks with the given names.
+
+    Args:
+        parent_ids (List[int]): The ids of the parent tasks (generally Shots).
+        task_names (List[str]): The names of the child tasks to consider (e.g.
+            "Previs", "Animation").
+
+    Returns:
+        sqlalchemy.orm.Query: A query returning (parent_id, task_name, full_path)
+            rows ordered by parent id, task name and output id.
+    """
+    # use the table of the Versions, so it is not joined with the SimpleEntities
+    # table a second time
+    versions = Version.__table__
+    row_number = (
+        func.row_number()
+        .over(
+            partition_by=versions.c.task_id,
+            order_by=(versions.c.version_number.desc(), versions.c.id.desc()),
+        )
+        .label("row_number")
+    )
+    versions_with_outputs = (
+        DBSession.query(
+            Task.parent_id.label("parent_id"),
+            Task.name.label("task_name"),
+            versions.c.id.label("version_id"),
+            row_number,
+        )
+        .join(versions, versions.c.task_id == Task.id)
+        .filter(Task.parent_id.in_(parent_ids))
+        .filter(Task.name.in_(task_names))
+        .filter(
+            DBSession.query(Version_Outputs.c.version_id)
+            .filter(Version_Outputs.c.version_id == versions.c.id)
+            .exists()
+        )
+        .subquery()
+    )
+    return (
+        DBSession.query(
+            versions_with_outputs.c.parent_id,
+            versions_with_outputs.c.task_name,
+            Link.full_path,
+        )
+        .join(
+            Version_Outputs,
+            Version_Outputs.c.version_id == versions_with_outputs.c.version_id,
+        )
+        .join(Link, Link.id == Version_Outputs.c.link_id)
+        .filter(versions_with_outputs.c.row_number == 1)
+        .order_by(
+            versions_with_outputs.c.parent_id,
+            versions_with_outputs.c.task_name,
+            Link.id,
+        )
+    )
+
+
+def resolve_latest_outputs(parents, task_names):
+    """Resolve the outputs of the latest version with outputs of the child tasks
+    with the given names of all the given parents.
+
+    Args:
+        parents (List[Union[stalker.Task, int]]): The parent tasks or their ids.
+        task_names (List[str]): The names of the child tasks.
+
+    Returns:
+        dict: A dictionary of (parent_id, task_name) keys and output full path
+            lists as values. Tasks that don't exist or don't have any version with
+            outputs are not included.
+    """
+    parent_ids = [getattr(parent, "id", parent) for parent in parents]
+    outputs = {}
+    if not parent_ids or not task_names:
+        return outputs
+
+    for parent_id, task_name, full_path in latest_outputs_query(parent_ids, task_names):
+        outputs.setdefault((parent_id, task_name), []).append(full_path)
+    return outputs
+
+
+def get_scene_shots(scene, shots_task_name="Shots"):
+    """Return the shots under the "Shots" task of the given scene.
+
+    Args:
+        scene (Union[stalker.Task, int]): The scene task or its id.
+        shots_task_name (str): The name of the task holding the shots.
+
+    Returns:
+        List[stalker.Shot]: The shots ordered by their codes.
+    """
+    shots_task_ids = (
+        DBSession.query(Task.id)
+        .filter(Task.parent_id == getattr(scene, "id", scene))
+        .filter(Task.name == shots_task_name)
+    )
+    return (
+        Shot.query.filter(Shot.parent_id.in_(shots_task_ids.scalar_subquery()))
+        .order_by(Shot.code)
+        .all()
+    )
+
+
+def plan_strip_layout(
+    shots,
+    task_names,
+    outputs=None,
+    start_frame=1,
+    start_channel=1,
+    default_duration=25,
+):
+    """Plan the frame ranges and channels of the strips of the given shots.
+
+    The shots are placed one after the other in the given order, every shot
+    takes as many frames as its cut duration (or the ``default_duration`` if it
+    doesn't have one) so the timing of the edit is kept even if a shot doesn't
+    have any output yet. Every task name gets its own channel in the given order.
+
+    Args:
+        shots (List[stalker.Shot]): The shots in edit order.
+        task_names (List[str]): The names of the tasks to add the outputs of.
+        outputs (dict): The result of :func:`resolve_latest_outputs`. It is
+            resolved for the given shots and task names if skipped.
+        start_frame (int): The frame of the first shot.
+        start_channel (int): The channel of the first task name.
+        default_duration (int): The duration of the shots without a cut duration.
+
+    Returns:
+        List[StripPlan]: The strips in edit order, only the first output of every
+            task is used.
+    """
+    if outputs is None:
+        outputs = resolve_latest_outputs(shots, task_names)
+
+    strips = []
+    frame_start = start_frame
+    for shot in shots:
+        duration = default_duration
+        cut_in = getattr(shot, "cut_in", None)
+        cut_out = getattr(shot, "cut_out", None)
+        if cut_in is not None and cut_out is not None and cut_out >= cut_in:
+            duration = cut_out - cut_in + 1
+
+        for i, task_name in enumerate(task_names):
+            full_paths = outputs.get((shot.id, task_name))
+            if not full_paths:
+                continue
+            strips.append(
+                StripPlan(
+                    parent_id=shot.id,
+                    task_name=task_name,
+                    full_path=full_paths[0],
+                    frame_start=frame_start,
+                    frame_end=frame_start + duration - 1,
+                    channel=start_channel + i,
+                )
+            )
+        frame_start += duration
+    return strips
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""Database engine and session life cycle management.
+
+The engine is created with a connection pool configured through
+:class:`anima.config.Config`::
+
+  database_pool_class = "QueuePool"  # "NullPool" disables pooling
+  database_pool_size = 5
+  database_max_overflow = 10
+  database_pool_timeout = 30
+  database_pool_recycle = 3600
+  database_pool_pre_ping = True
+  database_statement_timeout = 0  # in milliseconds, PostgreSQL only
+  database_read_only_url = ""  # a read-only replica for the heavy queries
+
+:func:`anima.utils.do_db_setup` uses the shared :class:`SessionManager` returned
+by :func:`get_session_manager`. Background workers should use
+:meth:`SessionManager.session_scope` so their connections are returned to the
+pool when they are done::
+
+  from anima.utils.session_manager import get_session_manager
+
+  session_manager = get_session_manager()
+  with session_manager.session_scope() as session:
+      session.add(...)
+
+  with session_manager.read_only_session() as session:
+      session.query(...)
+
+  print(session_manager.stats())
+"""
+
+import contextlib
+import threading
+import time
+import weakref
+
+from sqlalchemy import engine_from_config, event, pool
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from stalker import db
+from stalker.db.session import DBSession
+
+from anima import defaults, logger
+from anima.perf import add_statement_callback
+
+
+class SessionManager(object):
+    """Creates the database engines and keeps connection and query metrics.
+
+    Args:
+        settings (dict): The "sqlalchemy." prefixed engine settings. By default
+            ``anima.defaults.database_engine_settings`` is used.
+        config (anima.config.Config): The config to read the pool settings from.
+            By default ``anima.defaults`` is used.
+    """
+
+    def __init__(self, settings=None, config=None):
+        self.settings = settings
+        self.config = config if config is not None else defaults
+        self.engine = None
+        self.read_only_engine = None
+        self.ReadOnlySession = scoped_session(sessionmaker())
+        self._instrumented_engines = weakref.WeakSet()
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+        self.reset_stats()
+
+    def engine_settings(self, url=None):
+        """Return the engine settings with the pool settings of the config.
+
+        Args:
+            url (str): Override the database url.
+
+        Returns:
+            dict: The "sqlalchemy." prefixed engine settings.
+        """
+        settings = dict(
+            self.settings
+            if self.settings is not None
+            else self.config.database_engine_settings
+        )
+        if url:
+            settings["sqlalchemy.url"] = url
+
+        backend_name = make_url(settings["sqlalchemy.url"]).get_backend_name()
+        if backend_name == "sqlite":
+            # SQLite has its own pool classes that work with its threading model
+            return settings
+
+        pool_class = getattr(pool, self.config.database_pool_class)
+        settings.setdefault("sqlalchemy.poolclass", pool_class)
+        if settings["sqlalchemy.poolclass"] is not pool.NullPool:
+            settings.setdefault(
+                "sqlalchemy.pool_pre_ping", self.config.database_pool_pre_ping
+            )
+            settings.setdefault(
+                "sqlalchemy.pool_recycle", self.config.database_pool_recycle
+            )
+        if issubclass(settings["sqlalchemy.poolclass"], pool.QueuePool):
+            settings.setdefault("sqlalchemy.pool_size", self.config.database_pool_size)
+            settings.setdefault(
+                "sqlalchemy.max_overflow", self.config.database_max_overflow
+            )
+            settings.setdefault(
+                "sqlalchemy.pool_timeout", self.config.database_pool_timeout
+            )
+
+        statement_timeout = self.config.database_statement_timeout
+        if statement_timeout and backend_name == "postgresql":
+            connect_args = dict(settings.get("sqlalchemy.connect_args", {}))
+            connect_args["options"] = "{} -c statement_timeout={:d}".format(
+                connect_args.get("options", ""), statement_timeout
+            ).strip()
+            settings["sqlalchemy.connect_args"] = connect_args
+        return settings
+
+    def setup(self):
+        """Set up the database and the read-only session."""
+        settings = self.engine_settings()
+        logger.debug(
+            "setting up the database with {}".format(
+                settings.get("sqlalchemy.poolclass", "the default pool")
+            )
+        )
+        db.setup(settings)
+        self.engine = DBSession.get_bind()
+        self.instrument(self.engine)
+
+        if self.config.database_read_only_url:
+            self.read_only_engine = engine_from_config(
+                self.engine_settings(url=self.config.database_read_only_url),
+                "sqlalchemy.",
+            )
+            self.instrument(self.read_only_engine)
+        else:
+            self.read_only_engine = self.engine
+        self.ReadOnlySession.remove()
+        self.ReadOnlySession.configure(bind=self.read_only_engine)
+
+    def instrument(self, engine):
+        """Collect the connection and query metrics of the given engine.
+
+        Args:
+            engine (sqlalchemy.engine.Engine): The engine to collect the metrics
+                of.
+        """
+        if engine in self._instrumented_engines:
+            return
+        self._instrumented_engines.add(engine)
+
+        @event.listens_for(engine, "do_connect")
+        def do_connect(dialect, connection_record, cargs, cparams):
+            connection_record.info["connect_start"] = time.time()
+
+        @event.listens_for(engine, "connect")
+        def connect(dbapi_connection, connection_record):
+            start = connection_record.info.pop("connect_start", None)
+            if start is not None:
+                self._add_stats(connections=1, connection_time=time.time() - start)
+
+        @event.listens_for(engine, "checkout")
+        def checkout(dbapi_connection, connection_record, connection_proxy):
+            self._add_stats(checkouts=1)
+
+        # the statements are timed by the listeners of anima.perf
+        def statement_executed(statement, duration):
+            self._add_stats(queries=1, query_time=duration)
+
+        add_statement_callback(engine, statement_executed)
+
+    def _add_stats(self, **kwargs):
+        """Add the given values to the metrics."""
+        with self._stats_lock:
+            for key, value in kwargs.items():
+                self._stats[key] += value
+
+    def reset_stats(self):
+        """Reset the connection and query metrics."""
+        with self._stats_lock:
+            self._stats = {
+                "connections": 0,
+                "connection_time": 0.0,
+                "checkouts": 0,
+                "queries": 0,
+                "query_time": 0.0,
+            }
+
+    def stats(self):
+        """Return the connection and query metrics.
+
+        Returns:
+            dict: The number of new connections ("connections") and the total time
+                spent opening them ("connection_time"), the number of pool
+                checkouts ("checkouts"), the number of queries ("queries") and the
+                total time spent running them ("query_time") in seconds, and the
+                status of the pool ("pool").
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["pool"] = self.engine.pool.status() if self.engine else ""
+        return stats
+
+    @contextlib.contextmanager
+    def session_scope(self):
+        """Run a unit of work with the session of the current thread.
+
+        The session is committed if the block succeeds and rolled back
+        otherwise. The session is removed at the end so its connection is
+        returned to the pool, so this should be used in the background worker
+        threads and not in the main thread which still holds the loaded objects.
+
+        Yields:
+            sqlalchemy.orm.Session: The session of the current thread.
+        """
+        session = DBSession()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            DBSession.remove()
+
+    @contextlib.contextmanager
+    def read_only_session(self):
+        """Run read-only queries on the replica if there is one.
+
+        Yields:
+            sqlalchemy.orm.Session: A session bound to the read-only replica, or to
+                the primary database if no replica is configured.
+        """
+        session = self.ReadOnlySession()
+        try:
+            yield session
+        finally:
+            session.rollback()
+            self.ReadOnlySession.remove()
+
+
+_session_manager = None
+_session_manager_lock = threading.Lock()
+
+
+def get_session_manager():
+    """Return the shared session manager.
+
+    Returns:
+        SessionManager: The session manager used by
+            :func:`anima.utils.do_db_setup`.
+    """
+    global _session_manager
+    with _session_manager_lock:
+        if _session_manager is None:
+            _session_manager = SessionManager()
+    return _session_manager
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""Batch parent status rollup from child task statuses.
+
+Every child status is represented by a single bit::
+
+      +--------- WFD
+      |+-------- RTS
+      ||+------- WIP
+      |||+------ PREV
+      ||||+----- HREV
+      |||||+---- DREV
+      ||||||+--- OH
+      |||||||+-- STOP
+      ||||||||+- CMPL
+      |||||||||
+    0b000000000
+
+The statuses of all the children of a parent are OR'ed together and the
+resulting mask is mapped to one of the parent statuses ("WFD", "RTS", "WIP" or
+"CMPL") with a single lookup. The child statuses of any number of parents can
+be gathered with one query, so dashboards can summarize thousands of shots
+without touching the ORM objects.
+"""
+
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from sqlalchemy import func
+
+from stalker import Status, Task, Type
+from stalker.db.session import DBSession
+
+BINARY_STATUS_CODES = {
+    "WFD": 256,
+    "RTS": 128,
+    "WIP": 64,
+    "PREV": 32,
+    "HREV": 16,
+    "DREV": 8,
+    "OH": 4,
+    "STOP": 2,
+    "CMPL": 1,
+}
+
+PARENT_STATUS_CODES = ["WFD", "RTS", "WIP", "CMPL"]
+
+# children that are not started yet, and stopped children that count as done
+_NOT_STARTED_MASK = (
+    BINARY_STATUS_CODES["WFD"]
+    | BINARY_STATUS_CODES["RTS"]
+    | BINARY_STATUS_CODES["STOP"]
+)
+_DONE_MASK = BINARY_STATUS_CODES["CMPL"] | BINARY_STATUS_CODES["STOP"]
+
+
+def status_mask(status_codes):
+    """Return the binary status mask of the given status codes.
+
+    Args:
+        status_codes (Iterable[str]): The status codes of the child tasks.
+
+    Returns:
+        int: The OR'ed binary status value, between 0 and 511.
+    """
+    return reduce(or_, (BINARY_STATUS_CODES[code] for code in status_codes), 0)
+
+
+def mask_to_parent_status_code(mask):
+    """Return the parent status code of the given binary status mask.
+
+    The rules are:
+
+    * No children or only WFD, RTS and STOP children: RTS if any child is RTS,
+      WFD if any child is WFD, CMPL if all children are stopped.
+    * Only CMPL and STOP children: CMPL.
+    * Anything else: WIP.
+
+    Args:
+        mask (int): A binary status mask as returned by :func:`.status_mask`.
+
+    Returns:
+        str: One of "WFD", "RTS", "WIP" or "CMPL".
+    """
+    if mask & ~_NOT_STARTED_MASK == 0:
+        if mask & BINARY_STATUS_CODES["RTS"]:
+            return "RTS"
+        if mask & BINARY_STATUS_CODES["WFD"] or not mask:
+            return "WFD"
+        return "CMPL"
+    if mask & ~_DONE_MASK == 0:
+        return "CMPL"
+    return "WIP"
+
+
+# every possible mask mapped to its parent status code
+PARENT_STATUS_LUT = tuple(
+    mask_to_parent_status_code(mask)
+    for mask in range(sum(BINARY_STATUS_CODES.values()) + 1)
+)
+
+
+def get_parent_status_code(child_status_codes):
+    """Return the parent status code from the status codes of the child tasks.
+
+    Args:
+        child_status_codes (Iterable[str]): The status codes of the child tasks.
+
+    Returns:
+        str: One of "WFD", "RTS", "WIP" or "CMPL".
+    """
+    return PARENT_STATUS_LUT[status_mask(child_status_codes)]
+
+
+def rollup_status_codes(child_status_codes_by_parent_id):
+    """Return the parent status codes of many parents at once.
+
+    Args:
+        child_status_codes_by_parent_id (dict): A dictionary of parent ids to the
+            status codes of their children. The values can be any iterable of
+            status codes, including the dictionaries returned by
+            :func:`.query_child_status_counts`.
+
+    Returns:
+        dict: A dictionary of parent ids to parent status codes.
+    """
+    lut = PARENT_STATUS_LUT
+    bits = BINARY_STATUS_CODES
+    return dict(
+        (parent_id, lut[reduce(or_, (bits[code] for code in status_codes), 0)])
+        for parent_id, status_codes in child_status_codes_by_parent_id.items()
+    )
+
+
+def query_child_status_counts(parent_ids, exclude_type_names=None):
+    """Return the number of child tasks per status of the given parents.
+
+    The counts are aggregated by the database in a single query.
+
+    Args:
+        parent_ids (Union[list, sqlalchemy.orm.Query]): The ids of the parent
+            tasks or a query returning them.
+        exclude_type_names (list): The type names of the children to skip, i.e.
+            ``["Plate"]``.
+
+    Returns:
+        dict: A dictionary of parent ids to dictionaries of status codes to child
+            counts. Parents without any children are not included.
+    """
+    query = (
+        DBSession.query(Task.parent_id, Status.code, func.count(Task.id))
+        .select_from(Task)
+        .join(Status, Task.status_id == Status.id)
+        .filter(Task.parent_id.in_(parent_ids))
+    )
+    if exclude_type_names:
+        excluded_type_ids = DBSession.query(Type.id).filter(
+            Type.name.in_(exclude_type_names)
+        )
+        query = query.filter(
+            (Task.type_id == None) | ~Task.type_id.in_(excluded_type_ids)  # noqa: E711
+        )
+
+    child_status_counts = defaultdict(dict)
+    for parent_id, status_code, count in query.group_by(Task.parent_id, Status.code):
+        child_status_counts[parent_id][status_code] = count
+    return dict(child_status_counts)
+
+
+def query_parent_status_codes(parent_ids, exclude_type_names=None):
+    """Return the rolled up status codes of the given parents with one query.
+
+    Args:
+        parent_ids (Union[list, sqlalchemy.orm.Query]): The ids of the parent
+            tasks or a query returning them.
+        exclude_type_names (list): The type names of the children to skip.
+
+    Returns:
+        dict: A dictionary of parent ids to parent status codes. Parents without
+            any children (after the exclusion) are not included.
+    """
+    return rollup_status_codes(
+        query_child_status_counts(parent_ids, exclude_type_names=exclude_type_names)
+    )
@@ -16,125 +16,107 @@ data = json.dumps(t, cls=task_hierarchy_io.StalkerEntityEncoder, check_circular=
 project = Project.query.filter(Project.code == 'TD').first()
 decoder = task_hierarchy_io.StalkerEntityDecoder(project=project)
 entity = decoder.loads(data)
+
+#
+# LARGE HIERARCHIES
+#
+# Stream one JSON record per line, the hierarchy is read level by level and
+# imported in batches inside a single transaction.
+with open("hierarchy.jsonl", "w") as f:
+    task_hierarchy_io.dump_jsonl(t, f)
+
+with open("hierarchy.jsonl") as f:
+    entities = task_hierarchy_io.load_jsonl(f, project=project)
 """
 
 import json
+import os
+
+TASK_FIELDS = [
+    "name",
+    "description",
+    "schedule_constraint",
+    "schedule_model",
+    "schedule_timing",
+    "schedule_unit",
+]
+
+# The attributes that are exported per entity type, all the other attributes
+# are either derived (path, computed_* etc.) or relate to other entities.
+ENTITY_FIELDS = {
+    "Task": TASK_FIELDS,
+    "Asset": TASK_FIELDS + ["code"],
+    "Sequence": TASK_FIELDS + ["code"],
+    "Shot": TASK_FIELDS + ["code", "cut_in", "cut_out", "fps"],
+    "Type": ["name", "code", "description", "target_entity_type"],
+    "Version": [
+        "take_name",
+        "version_number",
+        "description",
+        "created_with",
+        "full_path",
+        "original_filename",
+        "is_published",
+    ],
+}
+
+
+def entity_to_dict(entity, entity_fields=None):
+    """Convert the given Stalker entity to a JSON serializable dictionary.
+
+    Only the whitelisted attributes are read, so no unrelated relation is
+    lazy loaded. The ``type`` of the entity is converted to a dictionary too.
+
+    Args:
+        entity (stalker.SimpleEntity): A Stalker entity.
+        entity_fields (dict): The attribute names to export per entity type,
+            defaults to :data:`.ENTITY_FIELDS`. Column attributes are exported for
+            entity types that are not in the dictionary.
+
+    Returns:
+        dict: The entity data.
+    """
+    if entity_fields is None:
+        entity_fields = ENTITY_FIELDS
+
+    entity_type = entity.entity_type
+    fields = entity_fields.get(entity_type)
+    if fields is None:
+        from sqlalchemy import inspect
+
+        fields = [
+            attr.key
+            for attr in inspect(entity).mapper.column_attrs
+            if not attr.key.startswith("_")
+            and attr.key != "id"
+            and not attr.key.endswith("_id")
+        ]
+
+    data = {"entity_type": entity_type}
+    for field in fields:
+        data[field] = getattr(entity, field, None)
+
+    if entity_type != "Type":
+        type_ = getattr(entity, "type", None)
+        data["type"] = (
+            entity_to_dict(type_, entity_fields) if type_ is not None else None
+        )
+
+    return data
 
 
 class StalkerEntityEncoder(json.JSONEncoder):
     """JSON Encoder for Stalker Classes"""
 
-    ignore_fields = [
-        # Generic
-        "defaults",
-        # SimpleEntity
-        "id",
-        "entity_id",
-        "nice_name",
-        # Task
-        "absolute_path",
-        "allocation_strategy",
-        "alternative_resources",
-        "bid_timing",
-        "bid_unit",
-        "children",
-        "computed_duration",
-        "computed_end",
-        "computed_resources",
-        "computed_start",
-        "computed_total_seconds",
-        "create_time_log",
-        "created_by",
-        "created_by_id",
-        "date_created",
-        "date_updated",
-        "dependent_of",
-        "depends",
-        "duration",
-        "end",
-        "entity_groups",
-        "generic_data",
-        "generic_text",
-        "good",
-        "good_id",
-        "hold",
-        "html_class",
-        "html_style",
-        "is_container",
-        "is_leaf",
-        "is_milestone",
-        "is_root",
-        "is_scheduled",
-        "least_meaningful_time_unit",
-        "level",
-        "notes",
-        "open_tickets",
-        "parent",
-        "parent_id",
-        "parents",
-        "percent_complete",
-        "persistent_allocation",
-        "plural_class_name",
-        "priority",
-        "project",
-        "project_id",
-        "query",
-        "references",
-        "remaining_seconds",
-        "resources",
-        "responsible",
-        "review_number",
-        "reviews",
-        "schedule_seconds",
-        "start",
-        "status",
-        "status_id",
-        "status_list",
-        "status_list_id",
-        "tags",
-        "task_dependent_of",
-        "task_depends_to",
-        "thumbnail",
-        "thumbnail_id",
-        "tickets",
-        "time_logs",
-        "tjp_abs_id",
-        "tjp_id",
-        "to_tjp",
-        "total_logged_seconds",
-        "total_seconds",
-        "updated_by",
-        "updated_by_id",
-        "walk_dependencies",
-        "walk_hierarchy",
-        "walk_inputs",
-        "watchers",
-        # Shot
-        "image_format",
-        "image_format_id",
-        "source_in",
-        "source_out",
-        "sequences",
-        # Version
-        "absolute_full_path",
-        "inputs",
-        "latest_published_version",
-        "latest_version",
-        "link_id",
-        "max_version_number",
-        "naming_parents",
-        "task",
-        "task_id",
-        "outputs",
-        "version_id",
-    ]
+    entity_fields = ENTITY_FIELDS
 
     def __init__(self, *args, **kwargs):
         super(StalkerEntityEncoder, self).__init__(*args, **kwargs)
-        self._visited_obj_ids = []
+        self._visited_obj_ids = set()
 
     def default(self, obj):
         from sqlalchemy.ext.declarative import DeclarativeMeta
+        from stalker import Task
 
         if isinstance(obj.__class__, DeclarativeMeta):
             # don't re-visit self
@@ -143,28 +125,14 @@ class StalkerEntityEncoder(json.JSONEncoder):
 
             # do not append if this is a type instance
             if obj.entity_type != "Type":
-                self._visited_obj_ids.append(obj.id)
-
-            # an SQLAlchemy class
-            fields = {}
-            for field in [
-                x for x in dir(obj) if not x.startswith("_") and x != "metadata"
-            ]:
-                # skip ignore fields
-                if field in self.ignore_fields:
-                    continue
-
-                # skip callables
-                if callable(obj.__getattribute__(field)):
-                    continue
-
-                try:
-                    fields[field] = obj.__getattribute__(field)
-                except (AttributeError, TypeError, NotImplementedError, RuntimeError):
-                    pass
+                self._visited_obj_ids.add(obj.id)
 
             # a json-encodable dict
-            return fields
+            data = entity_to_dict(obj, self.entity_fields)
+            if isinstance(obj, Task):
+                data["tasks"] = obj.children
+                data["versions"] = obj.versions
+            return data
 
         try:
             # return json.JSONEncoder.default(self, obj)
@@ -173,13 +141,154 @@ class StalkerEntityEncoder(json.JSONEncoder):
             return None
 
 
+def iter_entity_records(entity, batch_size=500, entity_fields=None):
+    """Generate flat records of the given task and all of its descendants.
+
+    The hierarchy is read level by level, with a fixed number of queries per
+    ``batch_size`` tasks, and parents are always generated before their
+    children. Every record has the ``id`` of the task, the ``parent_id`` of the
+    task (``None`` for the given task) and its ``versions``.
+
+    Args:
+        entity (stalker.Task): The root of the hierarchy.
+        batch_size (int): The number of parent tasks to query the children of at
+            once.
+        entity_fields (dict): The attribute names to export per entity type,
+            defaults to :data:`.ENTITY_FIELDS`.
+
+    Returns:
+        generator: A generator of dictionaries.
+    """
+    from sqlalchemy.orm import joinedload, with_polymorphic
+    from stalker import Task, Version
+    from stalker.db.session import DBSession
+
+    def versions_by_task_id(task_ids):
+        versions = {}
+        query = (
+            Version.query.options(joinedload(Version.type))
+            .filter(Version.task_id.in_(task_ids))
+            .order_by(Version.task_id, Version.version_number, Version.id)
+        )
+        for version in query:
+            versions.setdefault(version.task_id, []).append(
+                entity_to_dict(version, entity_fields)
+            )
+        return versions
+
+    def record(task, parent_id, versions):
+        data = entity_to_dict(task, entity_fields)
+        data["id"] = task.id
+        data["parent_id"] = parent_id
+        data["versions"] = versions.get(task.id, [])
+        return data
+
+    yield record(entity, None, versions_by_task_id([entity.id]))
+
+    task_class = with_polymorphic(Task, "*")
+    parent_ids = [entity.id]
+    while parent_ids:
+        child_ids = []
+        for i in range(0, len(parent_ids), batch_size):
+            children = (
+                DBSession.query(task_class)
+                .options(joinedload(task_class.type))
+                .filter(task_class.parent_id.in_(parent_ids[i : i + batch_size]))
+                .order_by(task_class.parent_id, task_class.id)
+                .all()
+            )
+            versions = versions_by_task_id([child.id for child in children])
+            for child in children:
+                yield record(child, child.parent_id, versions)
+                child_ids.append(child.id)
+        parent_ids = child_ids
+
+
+def iter_nested_records(data):
+    """Generate flat records from the nested data of the
+    :class:`.StalkerEntityEncoder`.
+
+    The records are generated in the same format with :func:`.iter_entity_records`,
+    the records that don't have an ``id`` are given one.
+
+    Args:
+        data (dict): The nested entity data, where the children are stored under
+            the ``tasks`` key.
+
+    Returns:
+        generator: A generator of dictionaries.
+    """
+    ids = set()
+    next_id = [0]
+
+    def get_id(record):
+        json_id = record.get("id")
+        if json_id is None or json_id in ids:
+            next_id[0] -= 1
+            json_id = next_id[0]
+        ids.add(json_id)
+        return json_id
+
+    stack = [(data, None)]
+    while stack:
+        data, parent_id = stack.pop()
+        if "entity_type" not in data:
+            continue
+        record = dict(data)
+        children = record.pop("tasks", None) or []
+        record["id"] = get_id(record)
+        record["parent_id"] = parent_id
+        yield record
+        for child in reversed(children):
+            stack.append((child, record["id"]))
+
+
+def dump_jsonl(entity, f, batch_size=500, entity_fields=None):
+    """Write the given task hierarchy to the given file as JSON lines.
+
+    Args:
+        entity (stalker.Task): The root of the hierarchy.
+        f (file): A file like object opened in text mode.
+        batch_size (int): See :func:`.iter_entity_records`.
+        entity_fields (dict): See :func:`.iter_entity_records`.
+
+    Returns:
+        int: The number of records written.
+    """
+    count = 0
+    for record in iter_entity_records(
+        entity, batch_size=batch_size, entity_fields=entity_fields
+    ):
+        f.write(json.dumps(record, sort_keys=True))
+        f.write("\n")
+        count += 1
+    return count
+
+
+def load_jsonl(f, project, parent=None, batch_size=500):
+    """Import the task hierarchy from the given JSON lines file.
+
+    Args:
+        f (file): A file like object opened in text mode.
+        project (stalker.Project): The project to import the tasks to.
+        parent (stalker.Task): The task to attach the root records to.
+        batch_size (int): See :meth:`.StalkerEntityDecoder.load_records`.
+
+    Returns:
+        list: The root entities.
+    """
+    decoder = StalkerEntityDecoder(project=project, parent=parent)
+    return decoder.load_records(
+        (json.loads(line) for line in f if line.strip()), batch_size=batch_size
+    )
+
+
 class StalkerEntityDecoder(object):
     """Decoder for Stalker classes"""
 
     def __init__(self, project, parent=None):
         self.project = project
         self.parent = parent
-        self._created_obj = {}
 
     def loads(self, data, parent=None):
         """Decodes Stalker data
@@ -188,115 +297,342 @@ class StalkerEntityDecoder(object):
         :param parent: The parent node to attach the newly created data to.
         :return:
         """
-        from stalker.db.session import DBSession
-        from stalker import Asset, Task, Shot, Sequence, Version, Type
-
         if isinstance(data, str):
             data = json.loads(data)
 
-        json_id = None
-        if "id" in data:
-            json_id = data.pop("id")
-
-        if json_id is not None and json_id in self._created_obj:
-            return self._created_obj[json_id]
-
-        # get the entity_type
-        try:
-            entity_type = data["entity_type"]
-        except KeyError:
+        entities = self.load_records(iter_nested_records(data), parent=parent)
+        if not entities:
             return None
+        return entities[0]
+
+    def load_records(self, records, parent=None, batch_size=500):
+        """Creates the entities of the given flat records.
+
+        The records should be in the format generated by
+        :func:`.iter_entity_records`, with parents before their children. Entities
+        and versions that already exist under the same parent are not re-created.
+        The children of an existing parent are queried only once and the children
+        of a newly created parent are not queried at all. All the tasks are
+        inserted with a single flush, then the versions are inserted in bulk, and
+        everything is committed in a single transaction.
+
+        :param records: An iterable of dictionaries.
+        :param parent: The parent node to attach the root records to, defaults to
+          the ``parent`` of the decoder.
+        :param int batch_size: The number of tasks to query the existing versions
+          of at once.
+        :return: A list of the root entities.
+        """
+        from stalker.db.session import DBSession
+        from stalker import Type
 
-        # set default entity class to Task
-        entity_class = Task
-        # entity_type_dict = {
-        #     'Asset': Asset,
-        #     'Shot': Shot,
-        #     'Sequence': Sequence
-        # }
-        if entity_type == "Asset":
-            entity_class = Asset
-        elif entity_type == "Shot":
-            entity_class = Shot
-            # TODO: this is a bug
-            data["sequences"] = []
-        elif entity_type == "Sequence":
-            entity_class = Sequence
-
-        # TODO: We shouldn't need the following code for Type anymore
-        # get the type
-        if "type" in data:
-            type_data = data["type"]
-            if type_data and not isinstance(type_data, Type):
-                type_name = type_data["name"]
-                type_ = Type.query.filter(Type.name == type_name).first()
-                if not type_:
-                    # create a Type
-                    type_ = Type(**type_data)
-                data["type"] = type_
-
-        # store version data
-        version_data = sorted(data["versions"], key=lambda x: x["version_number"])
-        data["versions"] = []
-
-        data["project"] = self.project
+        if parent is None:
+            parent = self.parent
 
-        # check if the data exists before creating it
-        entity = (
-            entity_class.query.filter(entity_class.project == self.project)
-            .filter(entity_class.parent == parent)
-            .filter(entity_class.name == data["name"])
-            .first()
-        )
+        self._types = dict((t.name, t) for t in Type.query.all())
+        self._status_lists = {}
+        self._existing_children = {}
 
-        if not entity:
-            # then create it
-            entity = entity_class(**data)
-            DBSession.add(entity)
+        # the entities and the ids of the newly created entities by record id
+        entities = {}
+        created_ids = set()
+        roots = []
+        version_data_by_entity = []
+        try:
+            with DBSession.no_autoflush:
+                for record in records:
+                    record = dict(record)
+                    json_id = record.pop("id", None)
+                    json_parent_id = record.pop("parent_id", None)
+                    version_data = record.pop("versions", None)
+
+                    if json_parent_id is None:
+                        entity_parent = parent
+                        is_parent_new = False
+                    else:
+                        try:
+                            entity_parent = entities[json_parent_id]
+                        except KeyError:
+                            raise ValueError(
+                                "The parent of record {} should come before "
+                                "it: {}".format(json_id, json_parent_id)
+                            )
+                        is_parent_new = json_parent_id in created_ids
+
+                    entity, created = self._get_or_create_entity(
+                        record, entity_parent, is_parent_new
+                    )
+                    entities[json_id] = entity
+                    if created:
+                        created_ids.add(json_id)
+                    if json_parent_id is None:
+                        roots.append(entity)
+
+                    if version_data:
+                        version_data_by_entity.append((entity, version_data, created))
+
+            # the versions are inserted with the ids of the tasks
+            DBSession.flush()
+            self._create_versions(version_data_by_entity, batch_size=batch_size)
             DBSession.commit()
+        except Exception:
+            DBSession.rollback()
+            raise
+        finally:
+            self._types = None
+            self._status_lists = None
+            self._existing_children = None
+
+        return roots
+
+    def _get_type(self, type_data):
+        """Returns the Type instance of the given type data, creates a new one
+        if it doesn't exist
+
+        :param dict type_data: The type data.
+        :return: stalker.Type
+        """
+        from stalker import Type
+        from stalker.db.session import DBSession
 
-        if json_id:
-            self._created_obj[json_id] = entity
+        if not type_data:
+            return None
 
-        # create Versions
-        if version_data:
-            for v_data in version_data:
+        if isinstance(type_data, Type):
+            return type_data
+
+        type_name = type_data["name"]
+        type_ = self._types.get(type_name)
+        if type_ is None:
+            type_ = Type(
+                **dict(
+                    (key, value)
+                    for key, value in type_data.items()
+                    if key in ENTITY_FIELDS["Type"]
+                )
+            )
+            DBSession.add(type_)
+            self._types[type_name] = type_
+        return type_
 
-                v_json_id = None
-                if "id" in v_data:
-                    v_json_id = v_data.pop("id")
+    def _get_status_list(self, entity_class):
+        """Returns the StatusList of the given class, the StatusLists are queried
+        only once instead of once per entity
 
-                # check version number and take name
-                # if there is a version with the same version_number
-                # don't create it
-                take_name = v_data["take_name"]
-                version_number = v_data["version_number"]
+        :param entity_class: The Stalker class.
+        :return: stalker.StatusList or None
+        """
+        from stalker import StatusList
+
+        target_entity_type = entity_class.__name__
+        if target_entity_type not in self._status_lists:
+            self._status_lists[target_entity_type] = StatusList.query.filter_by(
+                target_entity_type=target_entity_type
+            ).first()
+        return self._status_lists[target_entity_type]
+
+    def _get_existing_child(self, entity_class, parent, name):
+        """Returns the existing child with the given class and name of the given
+        parent, the children of a parent are queried only once
+
+        :param entity_class: The Stalker class.
+        :param parent: The parent Task or None for root tasks.
+        :param str name: The name of the child.
+        :return:
+        """
+        from sqlalchemy.orm import with_polymorphic
+        from stalker import Task
+        from stalker.db.session import DBSession
 
-                v = (
-                    Version.query.filter(Version.task == entity)
-                    .filter(Version.take_name == take_name)
-                    .filter(Version.version_number == version_number)
-                    .first()
-                )
+        parent_id = parent.id if parent is not None else None
+        if parent is not None and parent_id is None:
+            # not in the database yet
+            return None
 
-                if not v:
-                    # then create it
-                    # get Version info
-                    v_data["task"] = entity
-                    v = Version(**v_data)
-                    # update version_number
-                    v.version_number = v_data["version_number"]
-                    v.is_published = v_data["is_published"]
+        if parent_id not in self._existing_children:
+            task_class = with_polymorphic(Task, "*")
+            children = {}
+            query = (
+                DBSession.query(task_class)
+                .filter(task_class.project_id == self.project.id)
+                .filter(task_class.parent_id == parent_id)
+                .order_by(task_class.id)
+            )
+            for child in query:
+                children.setdefault(child.name, []).append(child)
+            self._existing_children[parent_id] = children
+
+        for child in self._existing_children[parent_id].get(name, []):
+            if isinstance(child, entity_class):
+                return child
+
+    def _get_or_create_entity(self, data, parent, is_parent_new):
+        """Returns the existing entity or creates a new one
+
+        :param dict data: The entity record without the ``id``, ``parent_id`` and
+          ``versions`` keys.
+        :param parent: The parent Task or None.
+        :param bool is_parent_new: If the parent is created by this decoder, in
+          which case there can not be any existing children.
+        :return: (entity, created) tuple
+        """
+        from stalker.db.session import DBSession
+        from stalker import Asset, Task, Shot, Sequence
 
-                self._created_obj[v_json_id] = v
+        entity_type = data.get("entity_type", "Task")
+        entity_class = {"Asset": Asset, "Shot": Shot, "Sequence": Sequence}.get(
+            entity_type, Task
+        )
 
-            DBSession.commit()
+        # check if the data exists before creating it
+        if not is_parent_new:
+            entity = self._get_existing_child(entity_class, parent, data["name"])
+            if entity is not None:
+                return entity, False
+
+        kwargs = dict(
+            (key, value)
+            for key, value in data.items()
+            if key in ENTITY_FIELDS.get(entity_type, TASK_FIELDS)
+        )
+        kwargs["type"] = self._get_type(data.get("type"))
+        kwargs["project"] = self.project
+        kwargs["parent"] = parent
+        kwargs["status_list"] = self._get_status_list(entity_class)
+
+        entity = entity_class(**kwargs)
+        DBSession.add(entity)
+        return entity, True
+
+    def _create_versions(self, version_data_by_entity, batch_size=500):
+        """Creates the Versions of the given entities
+
+        The Versions are inserted with a single ``executemany`` per table instead
+        of creating Version instances, which query the latest version of the task
+        twice per instance while validating the ``version_number``. A
+        ``version_number`` that is not greater than the latest version of the
+        same take is bumped as :class:`stalker.Version` does.
+
+        :param list version_data_by_entity: A list of (entity, version_data,
+          is_entity_new) tuples, where the ``version_data`` is a list of version
+          records. There can not be any existing versions of new entities.
+        :param int batch_size: The number of tasks to query the existing versions
+          of at once.
+        """
+        import datetime
+        import uuid
+
+        import pytz
+        import stalker
+        from sqlalchemy import select
+        from stalker.db.session import DBSession
+        from stalker import Entity, Link, SimpleEntity, Version
+
+        existing_task_ids = [
+            entity.id
+            for entity, _, is_entity_new in version_data_by_entity
+            if not is_entity_new
+        ]
+        existing_versions = set()
+        for i in range(0, len(existing_task_ids), batch_size):
+            existing_versions.update(
+                DBSession.query(
+                    Version.task_id, Version.take_name, Version.version_number
+                ).filter(Version.task_id.in_(existing_task_ids[i : i + batch_size]))
+            )
+        max_version_numbers = {}
+        for task_id, take_name, version_number in existing_versions:
+            key = (task_id, take_name)
+            max_version_numbers[key] = max(
+                max_version_numbers.get(key, 0), version_number
+            )
+
+        now = datetime.datetime.now(pytz.utc)
+        simple_entity_rows = []
+        link_rows = []
+        version_rows = []
+        for entity, version_data, _ in version_data_by_entity:
+            for v_data in sorted(version_data, key=lambda x: x["version_number"]):
+                take_name = Version._format_take_name(
+                    v_data.get("take_name") or stalker.defaults.version_take_name
+                )
+                # if there is a version with the same version_number and take
+                # name don't create it
+                key = (entity.id, take_name, v_data["version_number"])
+                if key in existing_versions:
+                    continue
+                existing_versions.add(key)
 
-        # for each child task call a new StalkerEntityDecoder
-        for t in data["tasks"]:
-            self.loads(t, parent=entity)
+                version_number = v_data["version_number"]
+                max_version_number = max_version_numbers.get(key[:2], 0)
+                if version_number is None or version_number <= max_version_number:
+                    version_number = max_version_number + 1
+                max_version_numbers[key[:2]] = version_number
+
+                type_ = self._get_type(v_data.get("type"))
+                full_path = Link._format_path(v_data.get("full_path") or "")
+                name = "Version_{}".format(uuid.uuid4())
+                simple_entity_rows.append(
+                    {
+                        "entity_type": "Version",
+                        "name": name,
+                        "description": v_data.get("description") or "",
+                        "date_created": now,
+                        "date_updated": now,
+                        "type": type_,
+                        "generic_text": "",
+                        "html_style": "",
+                        "html_class": "",
+                        "stalker_version": stalker.__version__,
+                    }
+                )
+                link_rows.append(
+                    {
+                        "full_path": full_path,
+                        "original_filename": v_data.get("original_filename")
+                        or os.path.basename(full_path),
+                    }
+                )
+                version_rows.append(
+                    {
+                        "task_id": entity.id,
+                        "take_name": take_name,
+                        "version_number": version_number,
+                        "is_published": bool(v_data.get("is_published", False)),
+                        "created_with": v_data.get("created_with"),
+                    }
+                )
 
-        if parent:
-            entity.parent = parent
+        if not version_rows:
+            return
+
+        # the new Types should have ids
+        DBSession.flush()
+        for row in simple_entity_rows:
+            type_ = row.pop("type")
+            row["type_id"] = type_.id if type_ is not None else None
+
+        simple_entities = SimpleEntity.__table__
+        DBSession.execute(simple_entities.insert(), simple_entity_rows)
+
+        # executemany doesn't return the primary keys, query them with the unique
+        # names
+        names = [row["name"] for row in simple_entity_rows]
+        ids = {}
+        for i in range(0, len(names), batch_size):
+            ids.update(
+                (name, id_)
+                for id_, name in DBSession.execute(
+                    select(simple_entities.c.id, simple_entities.c.name).where(
+                        simple_entities.c.name.in_(names[i : i + batch_size])
+                    )
+                )
+            )
+        for name, link_row, version_row in zip(names, link_rows, version_rows):
+            link_row["id"] = version_row["id"] = ids[name]
 
-        return entity
+        DBSession.execute(
+            Entity.__table__.insert(), [{"id": row["id"]} for row in link_rows]
+        )
+        DBSession.execute(Link.__table__.insert(), link_rows)
+        DBSession.execute(Version.__table__.insert(), version_rows)
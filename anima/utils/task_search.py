@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""Search the task names of a project from memory.
+
+This is the Qt independent part of the
+:class:`anima.ui.models.task.TaskNameCompleter`. The ids, names and parent paths
+of all the tasks of a project are loaded with a single query, and an in-memory
+index answers the substring searches without touching the database::
+
+  from anima.utils.task_search import TaskNameIndex
+
+  index = TaskNameIndex.from_project(project)
+  for row in index.search("anim", limit=10):
+      print(row.id, row.name, row.path)
+
+The search is case insensitive. The names starting with the search text are
+listed first and the names containing it are listed after them, both in
+alphabetical order. Search texts shorter than 3 characters only match the start
+of the names.
+"""
+
+import bisect
+import collections
+
+from sqlalchemy import select
+from stalker import SimpleEntity, Task
+from stalker.db.session import DBSession
+
+TaskSearchRow = collections.namedtuple("TaskSearchRow", ["id", "name", "path"])
+
+
+def load_task_search_rows(project):
+    """Return the ids, names and parent paths of all the tasks of the project.
+
+    Args:
+        project (stalker.Project): A stalker.Project instance.
+
+    Returns:
+        List[TaskSearchRow]: The tasks, the paths are "{project_code} | parent |
+            parent" like strings.
+    """
+    # use the tables, so the Entities table is not joined and the rows are not
+    # processed by the ORM
+    tasks = Task.__table__
+    simple_entities = SimpleEntity.__table__
+    rows = DBSession.execute(
+        select(tasks.c.id, simple_entities.c.name, tasks.c.parent_id)
+        .join_from(tasks, simple_entities, tasks.c.id == simple_entities.c.id)
+        .where(tasks.c.project_id == project.id)
+    ).all()
+    # all the parents are in the same project, so the paths can be built
+    # without querying the parents
+    parents = dict((task_id, (name, parent_id)) for task_id, name, parent_id in rows)
+    paths = {None: project.code}
+
+    def get_path(task_id):
+        names = []
+        while task_id not in paths:
+            name, parent_id = parents[task_id]
+            names.append((task_id, name))
+            task_id = parent_id
+        path = paths[task_id]
+        for parent_task_id, name in reversed(names):
+            path = "{} | {}".format(path, name)
+            paths[parent_task_id] = path
+        return path
+
+    return [
+        TaskSearchRow(task_id, name, get_path(parent_id))
+        for task_id, name, parent_id in rows
+    ]
+
+
+class TaskNameIndex(object):
+    """An in-memory trigram index of task names.
+
+    The tasks with the same name share the same entry, so the size of the index
+    depends on the number of unique names.
+
+    Args:
+        rows (List[TaskSearchRow]): The tasks to index.
+    """
+
+    def __init__(self, rows):
+        rows_by_name = collections.defaultdict(list)
+        for row in rows:
+            rows_by_name[row.name.lower()].append(row)
+
+        # the unique lower case names in alphabetical order, the trigrams store
+        # the positions in this list, so the matches are in alphabetical order too
+        self.names = sorted(rows_by_name)
+        self.rows = [
+            sorted(rows_by_name[name], key=lambda row: (row.path, row.id))
+            for name in self.names
+        ]
+        self.trigrams = collections.defaultdict(list)
+        for i, name in enumerate(self.names):
+            for trigram in set(name[j : j + 3] for j in range(len(name) - 2)):
+                self.trigrams[trigram].append(i)
+
+    @classmethod
+    def from_project(cls, project):
+        """Create an index of all the tasks of the given project.
+
+        Args:
+            project (stalker.Project): A stalker.Project instance.
+
+        Returns:
+            TaskNameIndex: The index.
+        """
+        return cls(load_task_search_rows(project))
+
+    def __len__(self):
+        return sum(len(rows) for rows in self.rows)
+
+    def _iter_prefix_matches(self, text):
+        """Yield the positions of the names starting with the given text."""
+        for i in range(bisect.bisect_left(self.names, text), len(self.names)):
+            if not self.names[i].startswith(text):
+                break
+            yield i
+
+    def _iter_substring_matches(self, text):
+        """Yield the positions of the names containing the given text but not
+        starting with it.
+        """
+        if len(text) < 3:
+            return
+
+        # walk the shortest posting list and check the names, which is a lot
+        # cheaper than intersecting the lists in Python
+        trigrams = set(text[j : j + 3] for j in range(len(text) - 2))
+        positions = min(
+            (self.trigrams.get(trigram, []) for trigram in trigrams), key=len
+        )
+        names = self.names
+        for i in positions:
+            name = names[i]
+            if text in name and not name.startswith(text):
+                yield i
+
+    def search(self, text, limit=50):
+        """Search the tasks with names containing the given text.
+
+        Args:
+            text (str): The text to search.
+            limit (int): The maximum number of results.
+
+        Returns:
+            List[TaskSearchRow]: The matching tasks, the names starting with the
+                text come first.
+        """
+        text = text.strip().lower()
+        results = []
+        if not text or limit <= 0:
+            return results
+
+        for matches in [
+            self._iter_prefix_matches(text),
+            self._iter_substring_matches(text),
+        ]:
+            for i in matches:
+                results.extend(self.rows[i][: limit - len(results)])
+                if len(results) >= limit:
+                    return results
+        return results
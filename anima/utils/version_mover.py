@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""Copy the latest versions of tasks to other tasks.
+
+This is the headless part of the :class:`anima.ui.dialogs.version_mover.VersionMover`
+dialog and can be used without a UI::
+
+  from anima.utils.version_mover import move_versions
+
+  new_versions = move_versions([(from_task1, to_task1), (from_task2, to_task2)])
+
+The latest versions of all the source tasks are resolved with a single query, the
+new versions are created in a single transaction and the files are copied
+concurrently. The versions of the failed copies are deleted after all the copies
+are finished and a :class:`anima.exc.VersionCopyError` listing them is raised.
+"""
+
+import os
+import shutil
+
+from sqlalchemy import func
+from stalker import Version
+from stalker.db.session import DBSession
+
+from anima.utils.migrate import resolve_tasks
+
+
+def latest_versions_query(task_ids, include_reprs=False):
+    """Return a query of the latest version per task and take.
+
+    Args:
+        task_ids (List[int]): The ids of the tasks to consider.
+        include_reprs (bool): Include representation takes (takes with "@" in their
+            name). By default this is False.
+
+    Returns:
+        sqlalchemy.orm.Query: A query returning (task_id, take_name, version_id)
+            rows ordered by task id and take name.
+    """
+    row_number = (
+        func.row_number()
+        .over(
+            partition_by=(Version.task_id, Version.take_name),
+            order_by=Version.version_number.desc(),
+        )
+        .label("row_number")
+    )
+    query = DBSession.query(
+        Version.task_id.label("task_id"),
+        Version.take_name.label("take_name"),
+        Version.id.label("version_id"),
+        row_number,
+    ).filter(Version.task_id.in_(task_ids))
+    if not include_reprs:
+        from anima.representation import Representation
+
+        query = query.filter(~Version.take_name.contains(Representation.repr_separator))
+
+    subquery = query.subquery()
+    return (
+        DBSession.query(subquery.c.task_id, subquery.c.take_name, subquery.c.version_id)
+        .filter(subquery.c.row_number == 1)
+        .order_by(subquery.c.task_id, subquery.c.take_name)
+    )
+
+
+def copy_file(source, destination, chunk_size=64 * 1024 * 1024):
+    """Copy the content of the given file.
+
+    Uses ``os.copy_file_range`` where it is available, so the copy is done in the
+    kernel, and is done on the server side or as a reflink on the file systems
+    that support it (NFS 4.2, SMB3, Btrfs, XFS). Falls back to
+    ``shutil.copyfile`` otherwise.
+
+    Args:
+        source (str): The source file path.
+        destination (str): The destination file path, the parent folders are
+            created if they don't exist.
+        chunk_size (int): The maximum number of bytes to copy in one call.
+
+    Returns:
+        str: The destination path.
+    """
+    dir_path = os.path.dirname(destination)
+    if dir_path and not os.path.exists(dir_path):
+        try:
+            os.makedirs(dir_path)
+        except OSError:
+            # created by another thread
+            pass
+
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is not None:
+        with open(source, "rb") as source_file:
+            with open(destination, "wb") as destination_file:
+                try:
+                    size = os.fstat(source_file.fileno()).st_size
+                    offset = 0
+                    while offset < size:
+                        copied = copy_file_range(
+                            source_file.fileno(),
+                            destination_file.fileno(),
+                            min(chunk_size, size - offset),
+                            offset,
+                            offset,
+                        )
+                        if not copied:
+                            break
+                        offset += copied
+                    if offset == size:
+                        return destination
+                except OSError:
+                    # not supported between these file systems
+                    pass
+
+    shutil.copyfile(source, destination)
+    return destination
+
+
+def move_versions(
+    task_pairs,
+    created_by=None,
+    include_reprs=False,
+    max_workers=4,
+    progress_caller=None,
+):
+    """Copy the latest version of every take of the source tasks to the target tasks.
+
+    Args:
+        task_pairs (List[tuple]): A list of (from_task, to_task) tuples. The tasks can
+            be given as stalker.Task instances or ids.
+        created_by (stalker.User): The user to set as the creator of the new
+            versions.
+        include_reprs (bool): Also copy the representation takes. By default this is
+            False.
+        max_workers (int): The maximum number of concurrent file copies.
+        progress_caller (anima.utils.progress.ProgressCaller): An optional progress
+            caller to step for every copied file. It is stepped in the calling
+            thread.
+
+    Raises:
+        ValueError: If a task is copied to itself or a task doesn't exist.
+        anima.exc.VersionCopyError: If some of the files couldn't be copied. The
+            other files are still copied. The versions of the failed copies are
+            deleted, the successfully copied versions are stored in the
+            ``versions`` attribute of the error.
+
+    Returns:
+        List[stalker.Version]: The created versions.
+    """
+    task_id_pairs = [
+        tuple(getattr(task, "id", task) for task in task_pair)
+        for task_pair in task_pairs
+    ]
+    for from_task_id, to_task_id in task_id_pairs:
+        if from_task_id == to_task_id:
+            raise ValueError(
+                "Can not copy the versions of task (id={}) to itself".format(
+                    from_task_id
+                )
+            )
+
+    tasks = resolve_tasks(
+        [task_id for task_id_pair in task_id_pairs for task_id in task_id_pair]
+    )
+    missing_task_ids = sorted(
+        set(task_id for task_id_pair in task_id_pairs for task_id in task_id_pair)
+        - set(tasks)
+    )
+    if missing_task_ids:
+        raise ValueError("Tasks not found: {}".format(missing_task_ids))
+
+    from_task_ids = sorted(set(from_task_id for from_task_id, _ in task_id_pairs))
+    latest_version_ids = {}
+    for task_id, take_name, version_id in latest_versions_query(
+        from_task_ids, include_reprs=include_reprs
+    ):
+        latest_version_ids.setdefault(task_id, []).append(version_id)
+    versions = dict(
+        (version.id, version)
+        for version in Version.query.filter(
+            Version.id.in_(
+                [v_id for v_ids in latest_version_ids.values() for v_id in v_ids]
+            )
+        )
+    )
+
+    # create all the versions in a single transaction
+    copies = []
+    try:
+        for from_task_id, to_task_id in task_id_pairs:
+            for version_id in latest_version_ids.get(from_task_id, []):
+                latest_version = versions[version_id]
+                new_version = Version(
+                    task=tasks[to_task_id], take_name=latest_version.take_name
+                )
+                new_version.created_by = created_by
+                new_version.description = (
+                    "Moved from another task (id={}) with Version Mover".format(
+                        from_task_id
+                    )
+                )
+                new_version.created_with = latest_version.created_with
+                DBSession.add(new_version)
+                # flush so the next version of the same take gets a new number
+                DBSession.flush()
+                # update_paths resets the extension, so set it afterwards
+                new_version.update_paths()
+                new_version.extension = latest_version.extension
+                copies.append((latest_version, new_version))
+        DBSession.commit()
+    except Exception:
+        DBSession.rollback()
+        raise
+
+    if not copies:
+        return []
+
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    # the errors of the failed copies by their index in copies
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = dict(
+            (
+                executor.submit(
+                    copy_file,
+                    latest_version.absolute_full_path,
+                    new_version.absolute_full_path,
+                ),
+                i,
+            )
+            for i, (latest_version, new_version) in enumerate(copies)
+        )
+        for future in as_completed(futures):
+            try:
+                destination = future.result()
+            except Exception as e:
+                errors[futures[future]] = e
+                message = "Failed to copy {}".format(
+                    copies[futures[future]][1].absolute_full_path
+                )
+            else:
+                message = "Copied {}".format(destination)
+            if progress_caller is not None:
+                progress_caller.step(message=message)
+
+    if not errors:
+        return [new_version for _, new_version in copies]
+
+    # don't leave versions without files behind
+    failures = []
+    try:
+        for i in sorted(errors):
+            latest_version, new_version = copies[i]
+            destination = new_version.absolute_full_path
+            failures.append((latest_version, destination, errors[i]))
+            if os.path.exists(destination):
+                os.remove(destination)
+            DBSession.delete(new_version)
+        DBSession.commit()
+    except Exception:
+        DBSession.rollback()
+        raise
+
+    from anima.exc import VersionCopyError
+
+    raise VersionCopyError(
+        "Could not copy {} of {} versions:\n{}".format(
+            len(failures),
+            len(copies),
+            "\n".join(
+                "{} -> {}: {}".format(latest_version.absolute_full_path, destination, e)
+                for latest_version, destination, e in failures
+            ),
+        ),
+        versions=[
+            new_version for i, (_, new_version) in enumerate(copies) if i not in errors
+        ],
+        failures=failures,
+    )
@@ -551,3 +551,82 @@ def test_trim_repo_path_with_multiple_repositories(create_test_db):
         '/Volumes/S/TP2/Test_Task_1/Test_Task_1_Main_v001'
     )
     assert trimmed_path == expected_value2
+
+
+def test_get_version_from_recent_files_resolves_all_paths_at_once(
+    create_test_db, create_empty_project, prepare_recent_file_cache_path
+):
+    """testing if get_version_from_recent_files will return the version of the
+    first recent file that is matching a version
+    """
+    from anima.dcc.base import RecentFilesProvider
+    from anima.recent import RecentFileManager
+
+    project = create_empty_project
+    task = Task(name='Test Task 1', project=project)
+    DBSession.add(task)
+    DBSession.commit()
+    versions = []
+    for i in range(2):
+        version = Version(task=task)
+        DBSession.add(version)
+        DBSession.commit()
+        version.update_paths()
+        DBSession.commit()
+        versions.append(version)
+
+    dcc = DCCBase(name="TestDCC")
+    assert dcc.get_version_from_recent_files() is None
+
+    rfm = RecentFileManager()
+    rfm.add(dcc.name, versions[0].absolute_full_path)
+    rfm.add(dcc.name, "T:/TP/Test_Task_1/%s" % versions[1].filename)
+    rfm.add(dcc.name, "/not/a/version.ma")
+    assert dcc.get_version_from_recent_files() == versions[1]
+
+    assert RecentFilesProvider.get_versions_from_full_paths(
+        dcc.get_recent_file_list() + ["", None]
+    ) == {
+        "T:/TP/Test_Task_1/%s" % versions[1].filename: versions[1],
+        versions[0].absolute_full_path: versions[0],
+    }
+
+
+def test_recent_files_provider_read_history_caches_the_parsed_data(tmp_path):
+    """testing if RecentFilesProvider.read_history will parse the history file
+    again only if it is changed
+    """
+    import os
+    from anima.dcc.base import RecentFilesProvider
+
+    calls = []
+
+    def parser(lines):
+        calls.append(lines)
+        return [line.strip() for line in lines]
+
+    history_path = str(tmp_path / "file.history")
+    assert RecentFilesProvider.read_history(history_path, parser) is None
+
+    with open(history_path, "w") as f:
+        f.write("path1\npath2\n")
+    assert RecentFilesProvider.read_history(history_path, parser) == [
+        "path1",
+        "path2",
+    ]
+    assert RecentFilesProvider.read_history(history_path, parser) == [
+        "path1",
+        "path2",
+    ]
+    assert len(calls) == 1
+
+    with open(history_path, "a") as f:
+        f.write("path3\n")
+    stat = os.stat(history_path)
+    os.utime(history_path, (stat.st_atime, stat.st_mtime + 10))
+    assert RecentFilesProvider.read_history(history_path, parser) == [
+        "path1",
+        "path2",
+        "path3",
+    ]
+    assert len(calls) == 2
@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+import os
+import socket
+import struct
+import threading
+import time
+
+import pytest
+
+from anima.mocap import xsens
+from anima.mocap.xsens import (
+    Euler,
+    Frame,
+    Header,
+    Quaternion,
+    TimeCode,
+    XSensGenerator,
+    XSensListener,
+    XSensRecording,
+    XSensRingBuffer,
+    XSensStore,
+    decode_datagram,
+    encode_packet,
+)
+
+
+def generate_frames(**kwargs):
+    """Return the frames of a random XSensGenerator sequence."""
+    generator = XSensGenerator(seed=0, **kwargs)
+    return [
+        frame for frames in generator._random_sequence_generator() for frame in frames
+    ]
+
+
+def test_decode_datagram_is_working_properly():
+    """testing if decode_datagram will decode all the packets in a datagram"""
+    euler_frame, quaternion_frame = generate_frames(frame_count=1, segment_count=2)
+    header = euler_frame.header
+    datagram = b"".join(
+        [
+            encode_packet(*euler_frame),
+            encode_packet(*quaternion_frame),
+            encode_packet("25", header, ("00:00:01.250",)),
+            encode_packet("12", header),
+        ]
+    )
+
+    frames = decode_datagram(bytearray(datagram) + bytearray(100), len(datagram))
+    assert frames == [
+        euler_frame,
+        quaternion_frame,
+        Frame("25", header, ("00:00:01.250",)),
+        Frame("12", header, ()),
+    ]
+    assert isinstance(frames[0].header, Header)
+    assert frames[0].header.num_items == 2
+    assert frames[0].segments == [
+        Euler(*euler_frame.data[:7]),
+        Euler(*euler_frame.data[7:]),
+    ]
+    assert frames[1].segments[1] == Quaternion(*quaternion_frame.data[8:])
+    assert frames[2].segments == [TimeCode("00:00:01.250")]
+    assert frames[3].segments == []
+
+
+def test_decode_datagram_with_truncated_data():
+    """testing if decode_datagram will skip the missing segments"""
+    (frame,) = generate_frames(
+        frame_count=1, segment_count=3, generate_quaternion=False
+    )
+    datagram = encode_packet(*frame)[:-30]
+    (decoded,) = decode_datagram(datagram)
+    assert decoded.data == frame.data[:7]
+    assert decode_datagram(datagram[:20]) == []
+
+
+def test_ring_buffer_is_working_properly():
+    """testing if XSensRingBuffer will keep the last frames and report the
+    dropped ones
+    """
+    ring_buffer = XSensRingBuffer(capacity=4)
+    assert ring_buffer.latest() is None
+    ring_buffer.extend([1, 2, 3])
+    assert ring_buffer.read(0) == ([1, 2, 3], 3, 0)
+    assert ring_buffer.read(3) == ([], 3, 0)
+
+    ring_buffer.extend([4, 5, 6])
+    assert len(ring_buffer) == 4
+    assert ring_buffer.count == 6
+    assert ring_buffer.latest() == 6
+    # 1 frame is overwritten before it is read
+    assert ring_buffer.read(1) == ([3, 4, 5, 6], 6, 1)
+
+
+def test_ring_buffer_read_waits_for_new_frames():
+    """testing if XSensRingBuffer.read will wait for the new frames"""
+    ring_buffer = XSensRingBuffer()
+    timer = threading.Timer(0.05, ring_buffer.extend, [[1]])
+    timer.start()
+    assert ring_buffer.read(0, timeout=5) == ([1], 1, 0)
+    timer.join()
+
+
+def test_listener_over_loopback():
+    """testing if XSensListener will receive 240 fps data of 4 characters
+    without any drops
+    """
+    generator = XSensGenerator(fps=240, character_count=4, frame_count=240, seed=0)
+    expected = [
+        frame for frames in generator._random_sequence_generator() for frame in frames
+    ]
+
+    listener = XSensListener()
+    listener.start(host="127.0.0.1", port=0)
+    try:
+        sender = threading.Thread(target=generator.send, args=listener.address)
+        sender.start()
+
+        frames = []
+        index = 0
+        dropped = 0
+        deadline = time.time() + 10
+        while len(frames) < len(expected) and time.time() < deadline:
+            new_frames, index, new_dropped = listener.ring_buffer.read(
+                index, timeout=0.5
+            )
+            frames.extend(new_frames)
+            dropped += new_dropped
+        sender.join()
+    finally:
+        listener.stop()
+
+    assert dropped == 0
+    assert listener.datagram_count == len(expected)
+    assert frames == expected
+
+
+def test_listen_stops_after_the_timeout():
+    """testing if XSensListener.listen will yield the frames and stop if no
+    data is received
+    """
+    # find a free port
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.bind(("127.0.0.1", 0))
+    address = s.getsockname()
+    s.close()
+
+    expected = generate_frames(frame_count=3)
+
+    def send():
+        time.sleep(0.2)
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        for frame in expected:
+            s.sendto(encode_packet(*frame), address)
+        s.close()
+
+    sender = threading.Thread(target=send)
+    sender.start()
+    listener = XSensListener()
+    assert list(listener.listen(*address, timeout=1)) == expected
+    sender.join()
+    assert listener.socket is None
+
+
+def _decode_datagram_per_segment(datagram):
+    """Decodes the datagram the way XSensListener.listen used to, by splitting
+    it on the ID string and unpacking every segment on its own.
+    """
+    segment_types = {
+        b"01": (xsens.euler_data_format, Euler),
+        b"02": (xsens.quaternion_data_format, Quaternion),
+    }
+    header_size = struct.calcsize(xsens.header_data_format)
+    frames = []
+    for package in datagram.split(b"MXTP"):
+        packet_type = package[:2]
+        raw_data = package[2:]
+        header = raw_data[:header_size]
+        if len(header) < header_size:
+            continue
+        header_data = Header._make(struct.unpack(xsens.header_data_format, header))
+        pose_data = []
+        if packet_type in segment_types:
+            data_format, container = segment_types[packet_type]
+            segment_size = struct.calcsize(data_format)
+            raw_pose_data = raw_data[header_size:]
+            for i in range(0, len(raw_pose_data) - segment_size + 1, segment_size):
+                pose_data.append(
+                    container._make(
+                        struct.unpack(
+                            data_format, raw_pose_data[i : i + segment_size]
+                        )
+                    )
+                )
+        frames.append([header_data, pose_data])
+    return frames
+
+
+def _time_decoding(decode, datagrams):
+    """Returns the best of three timings and the number of decoded frames."""
+    durations = []
+    for _ in range(3):
+        start = time.perf_counter()
+        frame_count = 0
+        for datagram in datagrams:
+            frame_count += len(decode(datagram))
+        durations.append(time.perf_counter() - start)
+    return min(durations), frame_count
+
+
+def test_decode_performance():
+    """benchmarks decoding 10 seconds of 240 fps data of 4 characters against
+    unpacking the segments one by one
+    """
+    datagrams = [
+        encode_packet(*frame)
+        for frame in generate_frames(character_count=4, frame_count=240)
+    ] * 10
+    duration, frame_count = _time_decoding(decode_datagram, datagrams)
+    reference_duration, reference_frame_count = _time_decoding(
+        _decode_datagram_per_segment, datagrams
+    )
+
+    assert frame_count == reference_frame_count == 2400 * 4 * 2
+    # the reference is measured in the same process, so the ratio does not
+    # depend on the speed or the load of the machine
+    assert reference_duration / duration > 2
+
+
+def test_store_and_read_back(tmp_path):
+    """testing if XSensStore will store the generated frames and
+    XSensRecording will read them back
+    """
+    path = str(tmp_path / "take1.xsens")
+    generator = XSensGenerator(character_count=2, frame_count=150, seed=0)
+    expected = generate_frames(character_count=2, frame_count=150)
+    timecode_frame = Frame("25", expected[0].header, ("00:00:01.250",))
+
+    store = XSensStore(path, fps=120, chunk_size=64)
+    assert store.store([timecode_frame] + list(generator.generate())) == 600
+    assert store.dropped_frames == 0
+
+    with XSensRecording(path) as recording:
+        assert len(recording) == 600
+        assert recording.fps == 120
+        assert recording.chunk_size == 64
+        # the timecode packets are not stored
+        assert recording[0] == expected[0]
+        assert recording[137] == expected[137]
+        assert recording[-1] == expected[-1]
+        assert isinstance(recording[1].header, Header)
+        assert isinstance(recording[1].segments[0], Quaternion)
+        assert list(recording) == expected
+        assert list(recording.frames(190, 200)) == expected[190:200]
+        assert recording.get_values(3).tobytes() == struct.pack(
+            "<%if" % len(expected[3].data), *expected[3].data
+        )
+        with pytest.raises(IndexError):
+            recording[600]
+
+
+def test_recording_ignores_the_incomplete_chunk(tmp_path):
+    """testing if XSensRecording will ignore the incomplete chunk at the end of
+    a crashed recording
+    """
+    path = str(tmp_path / "take1.xsens")
+    expected = generate_frames(frame_count=100)
+    XSensStore(path, chunk_size=64).store(expected)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 10)
+
+    with XSensRecording(path) as recording:
+        assert len(recording) == 192
+        assert list(recording) == expected[:192]
+
+
+def test_recording_with_other_files(tmp_path, monkeypatch):
+    """testing if XSensRecording will raise a ValueError for other files and
+    close them
+    """
+    files = []
+
+    def open_(*args, **kwargs):
+        f = open(*args, **kwargs)
+        files.append(f)
+        return f
+
+    monkeypatch.setattr(xsens, "open", open_, raising=False)
+    path = tmp_path / "take1.xsens"
+    header = xsens.recording_header_struct.pack(b"AXSN", 99, 0, 240, 240)
+    for data, message in [
+        (b"\x00" * 100, "{} is not an XSens recording"),
+        (b"AXSN", "{} is not an XSens recording"),
+        (b"", "{} is not an XSens recording"),
+        (header, "{} is written with a newer version (99) of XSensStore"),
+    ]:
+        path.write_bytes(data)
+        with pytest.raises(ValueError) as cm:
+            XSensRecording(str(path))
+        assert str(cm.value) == message.format(path)
+
+    assert len(files) == 4
+    assert all(f.closed for f in files)
+
+
+def test_store_does_not_block_on_disk(tmp_path, monkeypatch):
+    """testing if XSensStore.write will drop the chunks instead of waiting for
+    a slow disk
+    """
+    release = threading.Event()
+    encode_chunk = xsens.encode_chunk
+
+    def slow_encode_chunk(frames):
+        release.wait(5)
+        return encode_chunk(frames)
+
+    monkeypatch.setattr(xsens, "encode_chunk", slow_encode_chunk)
+    path = str(tmp_path / "take1.xsens")
+    frames = generate_frames(frame_count=50, generate_quaternion=False)
+
+    store = XSensStore(path, chunk_size=10, queue_size=1)
+    store.open()
+    start = time.time()
+    store.write(frames[:10])
+    # wait for the writer to take the first chunk
+    while store._queue.qsize():
+        time.sleep(0.01)
+    store.write(frames[10:])
+    assert time.time() - start < 1
+    release.set()
+    store.close()
+
+    # 1 chunk is written, 1 is in the queue and the rest are dropped
+    assert store.frame_count == 20
+    assert store.dropped_frames == 30
+    with XSensRecording(path) as recording:
+        assert list(recording) == frames[:20]
+
+
+def test_store_with_a_failing_writer(tmp_path, monkeypatch):
+    """testing if XSensStore.close will not block and will raise the error of
+    the writer thread if writing the file fails
+    """
+
+    def failing_encode_chunk(frames):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(xsens, "encode_chunk", failing_encode_chunk)
+    path = str(tmp_path / "take1.xsens")
+    frames = generate_frames(frame_count=15, generate_quaternion=False)
+
+    store = XSensStore(path, chunk_size=5, queue_size=2)
+    store.open()
+    store.write(frames)
+
+    errors = []
+
+    def close():
+        try:
+            store.close()
+        except OSError as e:
+            errors.append(e)
+
+    # close in another thread, so a blocked close doesn't block the tests
+    closer = threading.Thread(target=close)
+    closer.daemon = True
+    closer.start()
+    closer.join(3)
+    assert not closer.is_alive()
+
+    (error,) = errors
+    assert str(error) == "No space left on device"
+    assert store.error is error
+    assert store.frame_count == 0
+    assert store.dropped_frames == 15
+    with XSensRecording(path) as recording:
+        assert len(recording) == 0
+
+
+def test_recording_to_numpy(tmp_path):
+    """testing if XSensRecording.to_numpy will export the values of a range"""
+    np = pytest.importorskip("numpy")
+    path = str(tmp_path / "take1.xsens")
+    expected = generate_frames(character_count=2, frame_count=100)
+    XSensStore(path, chunk_size=64).store(expected)
+
+    with XSensRecording(path) as recording:
+        data = recording.to_numpy(100, 300, packet_type="02", character_id=1)
+        assert data.shape == (50, 23 * 8)
+        assert data.dtype == np.float32
+        assert data[0].tolist() == list(expected[103].data)
+
+        with pytest.raises(ValueError):
+            recording.to_numpy(0, 10)
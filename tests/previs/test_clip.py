@@ -142,6 +142,48 @@ class ClipTestCase(unittest.TestCase):
         self.assertEqual('shot', f.name)
         self.assertEqual(pathurl, f.pathurl)
 
+    def test_from_xml_method_will_share_the_referenced_files(self):
+        """testing if the from_xml method will use the same File instance for
+        the file references when a files dictionary is given
+        """
+        from xml.etree import ElementTree
+        xml_data = """<track>
+  <clipitem id="shot">
+    <end>30</end>
+    <name>shot</name>
+    <enabled>True</enabled>
+    <start>0</start>
+    <in>0</in>
+    <duration>30</duration>
+    <out>30</out>
+    <file id="shot.mov">
+      <duration>30</duration>
+      <name>shot</name>
+      <pathurl>file://localhost/data/shot.mov</pathurl>
+    </file>
+  </clipitem>
+  <clipitem id="shot 2">
+    <end>60</end>
+    <name>shot</name>
+    <enabled>True</enabled>
+    <start>30</start>
+    <in>0</in>
+    <duration>30</duration>
+    <out>30</out>
+    <file id="shot.mov"/>
+  </clipitem>
+</track>"""
+        clip_nodes = ElementTree.fromstring(xml_data).findall('clipitem')
+        files = {}
+        c1 = Clip()
+        c1.from_xml(clip_nodes[0], files=files)
+        c2 = Clip()
+        c2.from_xml(clip_nodes[1], files=files)
+
+        self.assertEqual({'shot.mov': c1.file}, files)
+        self.assertIs(c1.file, c2.file)
+        self.assertEqual('file://localhost/data/shot.mov', c2.file.pathurl)
+
     def test_from_xml_method_is_working_properly_with_no_file(self):
         """testing if the from_xml method will fill object attributes from the
         given xml node even there is no file node inside
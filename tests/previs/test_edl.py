@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+
+import os
+import unittest
+
+from anima.edit import (
+    Clip,
+    File,
+    Media,
+    Rate,
+    Sequence,
+    Track,
+    Video,
+    frame_to_timecode,
+    parse_edl,
+    timecode_to_frame,
+)
+
+test_data_path = os.path.join(os.path.dirname(__file__), "test_data")
+
+
+class TimecodeTestCase(unittest.TestCase):
+    """tests the anima.edit.timecode_to_frame and anima.edit.frame_to_timecode
+    functions
+    """
+
+    fps_list = ["12", "23.976", "23.98", "24", "25", "29.97", "30", "50", "59.94", "60"]
+
+    @classmethod
+    def _get_frames(cls):
+        """returns a list of frame numbers to test"""
+        import random
+
+        rng = random.Random(0)
+        frames = list(range(2000))
+        frames += [rng.randrange(0, 60 * 60 * 60 * 30) for _ in range(2000)]
+        return frames
+
+    def test_frame_to_timecode_is_matching_the_timecode_library(self):
+        """testing if frame_to_timecode will give the same result with the
+        timecode library
+        """
+        from timecode import Timecode
+
+        for fps in self.fps_list:
+            for frame in self._get_frames():
+                self.assertEqual(
+                    str(Timecode(fps, frames=frame + 1)), frame_to_timecode(frame, fps)
+                )
+
+    def test_timecode_to_frame_is_matching_the_timecode_library(self):
+        """testing if timecode_to_frame will give the same result with the
+        timecode library
+        """
+        from timecode import Timecode
+
+        for fps in self.fps_list:
+            timecodes = ["23:59:59:%s" % fps, "00:10:00;00", "1:2:3:4"]
+            for frame in self._get_frames():
+                timecode = str(Timecode(fps, frames=frame + 1))
+                timecodes.append(timecode)
+                # with the other delimiter
+                timecodes.append(
+                    timecode.replace(";", ":")
+                    if ";" in timecode
+                    else "%s;%s" % (timecode[:8], timecode[9:])
+                )
+
+            for timecode in timecodes:
+                self.assertEqual(
+                    Timecode(fps, timecode).frame_number,
+                    timecode_to_frame(timecode, fps),
+                )
+
+    def test_frame_to_timecode_with_drop_frame_rates(self):
+        """testing if frame_to_timecode will skip the dropped frames"""
+        self.assertEqual("00:00:59;29", frame_to_timecode(1799, "29.97"))
+        self.assertEqual("00:01:00;02", frame_to_timecode(1800, "29.97"))
+        self.assertEqual("00:10:00;00", frame_to_timecode(17982, "29.97"))
+        self.assertEqual(1800, timecode_to_frame("00:01:00;02", "29.97"))
+
+    def test_frame_to_timecode_rolls_over_after_24_hours(self):
+        """testing if frame_to_timecode will roll over after 24 hours"""
+        self.assertEqual("00:00:00:01", frame_to_timecode(24 * 60 * 60 * 24 + 1, "24"))
+
+    def test_frame_to_timecode_with_negative_frames(self):
+        """testing if a ValueError will be raised for negative frame numbers"""
+        with self.assertRaises(ValueError) as cm:
+            frame_to_timecode(-1, "24")
+
+        self.assertEqual(
+            "frame should be a positive integer or zero, not -1", str(cm.exception)
+        )
+
+
+class ParseEDLTestCase(unittest.TestCase):
+    """tests the anima.edit.parse_edl function"""
+
+    @classmethod
+    def _parse_edl_with_timecodes(cls, input_, fps):
+        """parses the given EDL with the matchers of edl.Parser, which creates
+        timecode.Timecode instances for the event timecodes
+        """
+        import edl
+
+        stack = edl.List(fps)
+        for line in input_.splitlines(True):
+            for matcher in edl.Parser(fps).get_matchers():
+                matcher.apply(stack, line)
+        return stack
+
+    def test_parse_edl_is_matching_the_edl_parser(self):
+        """testing if parse_edl will give the same result with edl.Parser"""
+        for file_name in ["test_v001.edl", "test_v002.edl", "test_v003.edl"]:
+            with open(os.path.join(test_data_path, file_name)) as f:
+                data = f.read()
+
+            expected = self._parse_edl_with_timecodes(data, "24")
+            result = parse_edl(data, "24")
+
+            self.assertEqual(expected.title, result.title)
+            self.assertEqual(len(expected), len(result))
+            self.assertEqual(expected.to_string(), result.to_string())
+            for expected_event, event in zip(expected, result):
+                for attr in [
+                    "src_start_tc",
+                    "src_end_tc",
+                    "rec_start_tc",
+                    "rec_end_tc",
+                ]:
+                    self.assertEqual(
+                        getattr(expected_event, attr).frame_number,
+                        timecode_to_frame(getattr(event, attr), "24"),
+                    )
+                for attr in ["num", "reel", "track", "tr_code", "aux", "clip_name"]:
+                    self.assertEqual(
+                        getattr(expected_event, attr), getattr(event, attr)
+                    )
+                self.assertEqual(expected_event.source_file, event.source_file)
+                self.assertEqual(expected_event.comments, event.comments)
+                self.assertEqual(expected_event.has_timewarp(), event.has_timewarp())
+
+    def test_parse_edl_accepts_files(self):
+        """testing if parse_edl will read the lines of the given file"""
+        with open(os.path.join(test_data_path, "test_v001.edl")) as f:
+            edl_list = parse_edl(f, "24")
+
+        self.assertEqual("SEQ001_HSNI_003", edl_list.title)
+        self.assertEqual(3, len(edl_list))
+        self.assertEqual("00:00:00:10", edl_list[0].src_start_tc)
+        self.assertEqual("/tmp/SEQ001_HSNI_003_0010_v001.mov", edl_list[0].source_file)
+
+    def test_from_edl_with_parse_edl(self):
+        """testing if Sequence.from_edl will give the same result with the
+        events of parse_edl and edl.Parser
+        """
+        for file_name in ["test_v001.edl", "test_v003.edl"]:
+            with open(os.path.join(test_data_path, file_name)) as f:
+                data = f.read()
+
+            expected = Sequence(rate=Rate(timebase="24"))
+            expected.from_edl(self._parse_edl_with_timecodes(data, "24"))
+
+            s = Sequence(rate=Rate(timebase="24"))
+            s.from_edl(parse_edl(data, "24"))
+
+            self.assertEqual(expected.duration, s.duration)
+            self.assertEqual(expected.to_xml(), s.to_xml())
+
+    @classmethod
+    def _create_sequence(cls, count):
+        """creates a Sequence with the given number of clips"""
+        s = Sequence(rate=Rate(timebase="24"))
+        s.name = "SEQ001"
+        s.media = Media()
+        s.media.video = Video()
+        track = Track()
+        s.media.video.tracks.append(track)
+        start = 0
+        for i in range(count):
+            f = File()
+            f.name = "SEQ001_%05i" % i
+            f.pathurl = "file://localhost/tmp/%s.mov" % f.name
+            c = Clip()
+            c.id = c.name = f.name
+            c.type = "Video"
+            c.in_ = 10 + i % 3
+            c.out = c.in_ + 20 + i % 7
+            c.start = start
+            c.end = start + c.out - c.in_
+            c.file = f
+            start = c.end
+            track.clips.append(c)
+        return s
+
+    def test_to_edl_is_matching_the_timecode_library(self):
+        """testing if Sequence.to_edl will give the same timecodes with the
+        timecode library
+        """
+        from timecode import Timecode
+
+        s = self._create_sequence(100)
+        edl_list = s.to_edl()
+        for clip, event in zip(s.media.video.tracks[0].clips, edl_list):
+            self.assertEqual(
+                str(Timecode("24", frames=clip.in_ + 1)), event.src_start_tc
+            )
+            self.assertEqual(str(Timecode("24", frames=clip.out + 1)), event.src_end_tc)
+            self.assertEqual(
+                str(Timecode("24", frames=clip.start + 1)), event.rec_start_tc
+            )
+            self.assertEqual(str(Timecode("24", frames=clip.end + 1)), event.rec_end_tc)
+
+    @classmethod
+    def _to_edl_with_timecodes(cls, sequence):
+        """converts the given Sequence to an EDL with timecode.Timecode
+        instances like Sequence.to_edl used to
+        """
+        import edl
+        from timecode import Timecode
+
+        fps = sequence.rate.timebase
+        edl_list = edl.List(fps)
+        edl_list.title = sequence.name
+        for i, clip in enumerate(sequence.media.video.tracks[0].clips):
+            e = edl.Event({})
+            e.num = "%06i" % (i + 1)
+            e.clip_name = clip.id
+            e.reel = clip.name
+            e.track = "V"
+            e.tr_code = "C"
+            e.src_start_tc = str(Timecode(fps, frames=clip.in_ + 1))
+            e.src_end_tc = str(Timecode(fps, frames=clip.out + 1))
+            e.rec_start_tc = str(Timecode(fps, frames=clip.start + 1))
+            e.rec_end_tc = str(Timecode(fps, frames=clip.end + 1))
+            e.source_file = clip.file.pathurl.replace("file://localhost", "")
+            e.comments.extend(
+                [
+                    "* FROM CLIP NAME: {}".format(clip.name),
+                    "* SOURCE FILE: {}".format(e.source_file),
+                ]
+            )
+            edl_list.append(e)
+        return edl_list
+
+    @classmethod
+    def _time_round_trip(cls, sequence, to_edl, parse):
+        """returns the best duration of 3 round trips of the given Sequence
+        and the resulting Sequence
+        """
+        import time
+
+        durations = []
+        for i in range(3):
+            start = time.perf_counter()
+            data = to_edl(sequence).to_string()
+            result = Sequence(rate=Rate(timebase="24"))
+            result.from_edl(parse(data, "24"))
+            durations.append(time.perf_counter() - start)
+        return min(durations), result
+
+    def test_edl_round_trip_performance(self):
+        """benchmarks converting a Sequence with 2k clips to an EDL and back
+        against the same round trip with timecode.Timecode and edl.Parser
+        """
+        s = self._create_sequence(2000)
+        duration, s2 = self._time_round_trip(s, Sequence.to_edl, parse_edl)
+        reference_duration, s3 = self._time_round_trip(
+            s, self._to_edl_with_timecodes, self._parse_edl_with_timecodes
+        )
+
+        clips = s.media.video.tracks[0].clips
+        for result in [s2, s3]:
+            self.assertEqual(
+                [(c.in_, c.out, c.start, c.end) for c in clips],
+                [
+                    (c.in_, c.out, c.start, c.end)
+                    for c in result.media.video.tracks[0].clips
+                ],
+            )
+        self.assertGreater(reference_duration / duration, 3)
@@ -109,6 +109,27 @@ class FileTestCase(unittest.TestCase):
             f.to_xml(indentation=2, pre_indent=2)
         )
 
+    def test_to_xml_method_will_escape_the_name_and_pathurl(self):
+        """testing if the to xml method will escape the special characters in
+        the id, name and pathurl
+        """
+        f = File()
+        f.duration = 34
+        f.name = 'shot <2> & "3"'
+        f.pathurl = 'file://localhost/data/shot&"2".mov'
+
+        expected_xml = \
+            """<file id="shot&amp;&quot;2&quot;.mov">
+  <duration>34</duration>
+  <name>shot &lt;2&gt; &amp; "3"</name>
+  <pathurl>file://localhost/data/shot&amp;"2".mov</pathurl>
+</file>"""
+
+        self.assertEqual(
+            expected_xml,
+            f.to_xml()
+        )
+
     def test_from_xml_method_is_working_properly(self):
         """testing if the from_xml method will fill object attributes from the
         given xml node
@@ -177,6 +177,94 @@ class SequenceTestCase(unittest.TestCase):
             s.to_xml()
         )
 
+    def test_write_xml_method_is_matching_to_xml(self):
+        """testing if the write_xml method will stream the same xml with the
+        previous string based to_xml method, which is stored in the
+        test_v00X_to_xml.xml files
+        """
+        import io
+        from xml.etree import ElementTree
+
+        here = os.path.dirname(__file__)
+        for name in ['test_v001', 'test_v002', 'test_v003']:
+            xml_path = os.path.join(here, 'test_data', '%s.xml' % name)
+            expected_path = os.path.join(here, 'test_data', '%s_to_xml.xml' % name)
+            with open(expected_path, newline='') as f:
+                expected = f.read()
+
+            s1 = Sequence()
+            s1.from_xml(ElementTree.parse(xml_path).getroot().find('sequence'))
+            output = io.StringIO()
+            s1.write_xml(output)
+            self.assertEqual(expected, output.getvalue())
+
+            # the files are written once per export, so use another sequence
+            s2 = Sequence()
+            s2.from_xml(ElementTree.parse(xml_path).getroot().find('sequence'))
+            self.assertEqual(expected, s2.to_xml())
+
+    def test_read_xml_method_is_matching_from_xml(self):
+        """testing if the read_xml method will create the same sequence with
+        the from_xml method
+        """
+        from xml.etree import ElementTree
+
+        here = os.path.dirname(__file__)
+        for file_name in ['test_v001.xml', 'test_v002.xml', 'test_v003.xml']:
+            xml_path = os.path.join(here, 'test_data', file_name)
+            s1 = Sequence()
+            s1.from_xml(ElementTree.parse(xml_path).getroot().find('sequence'))
+            s2 = Sequence()
+            s2.read_xml(xml_path)
+            self.assertEqual(s1.to_xml(), s2.to_xml())
+
+    def test_read_xml_method_with_a_large_file(self):
+        """testing if the read_xml method will share the referenced files and
+        will not keep the whole document in memory
+        """
+        import tempfile
+        import tracemalloc
+
+        clip_count = 50000
+        s = Sequence(name='big', duration=clip_count * 10)
+        s.media = Media()
+        s.media.video = Video()
+        track = Track()
+        s.media.video.tracks.append(track)
+        files = [
+            File(duration=100, name='f%s' % i,
+                 pathurl='file://localhost/data/f%s.mov' % i)
+            for i in range(100)
+        ]
+        for i in range(clip_count):
+            c = Clip(id='clip%s' % i, name='clip%s' % i, start=i * 10,
+                     end=i * 10 + 10, duration=10, in_=0, out=10)
+            c.file = files[i % 100]
+            track.clips.append(c)
+
+        fd, xml_path = tempfile.mkstemp(suffix='.xml')
+        self.addCleanup(os.remove, xml_path)
+        with os.fdopen(fd, 'w') as f:
+            s.write_xml(f)
+        del s, track, files
+
+        tracemalloc.start()
+        try:
+            s = Sequence()
+            s.read_xml(xml_path)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        clips = s.media.video.tracks[0].clips
+        self.assertEqual(clip_count, len(clips))
+        self.assertEqual('clip49999', clips[-1].id)
+        self.assertEqual(100, len(set(id(c.file) for c in clips)))
+        self.assertIs(clips[0].file, clips[100].file)
+        # the peak is close to the size of the resulting objects, parsing the
+        # whole document takes ~10 times more
+        self.assertLess(peak, current * 1.5)
+
     def test_from_xml_method_is_working_properly(self):
         """testing if the from_xml method will fill object attributes from the
         given xml node
@@ -474,3 +474,115 @@ class TrackTestCase(unittest.TestCase):
             expected_xml,
             t.to_xml()
         )
+
+    @classmethod
+    def _optimize_clips_quadratic(cls, clips):
+        """the previous O(n^2) implementation of Track.optimize_clips, to
+        compare the results with
+        """
+        for i in range(len(clips)):
+            clip = clips[i]
+            for j in range(i + 1, len(clips)):
+                compare_clip = clips[j]
+                if clip.file.pathurl == compare_clip.file.pathurl:
+                    compare_clip.file = clip.file
+
+                if clip.id == compare_clip.id:
+                    random_part = clip.id.split(" ")[-1]
+                    if random_part != clip.id:
+                        random_id = int(random_part) + 1
+                        compare_clip.id = "{} {}".format(
+                            clip.id.split(" ")[0], random_id
+                        )
+                    else:
+                        random_id = 2
+                        compare_clip.id = "{} {}".format(clip.id, random_id)
+
+    @classmethod
+    def _create_clips(cls, count, ids, paths, seed=0):
+        """creates clips with random ids and file paths"""
+        import random
+
+        rng = random.Random(seed)
+        clips = []
+        for i in range(count):
+            f = File()
+            f.pathurl = "file://localhost/data/{}.mov".format(rng.choice(paths))
+            c = Clip()
+            c.id = rng.choice(ids)
+            c.file = f
+            clips.append(c)
+        return clips
+
+    def test_optimize_clips_is_matching_the_previous_implementation(self):
+        """testing if the optimize_clips method will give the same result with
+        the previous implementation
+        """
+        for seed in range(20):
+            clips = self._create_clips(
+                12, ["shot1", "shot2", "shot3"], ["a", "b", "c", "d"], seed=seed
+            )
+            expected_clips = self._create_clips(
+                12, ["shot1", "shot2", "shot3"], ["a", "b", "c", "d"], seed=seed
+            )
+            t = Track()
+            t.clips = clips
+            t.optimize_clips()
+            self._optimize_clips_quadratic(expected_clips)
+
+            self.assertEqual(
+                [c.id for c in expected_clips], [c.id for c in t.clips]
+            )
+            for i in range(len(clips)):
+                for j in range(len(clips)):
+                    self.assertEqual(
+                        expected_clips[i].file is expected_clips[j].file,
+                        clips[i].file is clips[j].file,
+                    )
+
+    def test_optimize_clips_ids_are_unique(self):
+        """testing if the optimize_clips method will generate unique ids even
+        if the ids already have number suffixes
+        """
+        t = Track()
+        t.clips = self._create_clips(5, ["shot"], ["a"])
+        for clip, id_ in zip(t.clips, ["shot 2", "shot", "shot", "shot 2", "shot"]):
+            clip.id = id_
+        t.optimize_clips()
+        self.assertEqual(
+            ["shot 2", "shot", "shot 3", "shot 4", "shot 5"],
+            [c.id for c in t.clips],
+        )
+
+    def test_optimize_clips_performance(self):
+        """benchmarks the optimize_clips method against the previous
+        implementation with 1k clips and checks the result with 20k clips
+        """
+        import time
+
+        def create_clips(count):
+            return self._create_clips(
+                count,
+                ["shot{}".format(i) for i in range(100)],
+                ["file{}".format(i) for i in range(500)],
+            )
+
+        durations = []
+        for i in range(3):
+            t = Track()
+            t.clips = create_clips(1000)
+            start = time.perf_counter()
+            t.optimize_clips()
+            durations.append(time.perf_counter() - start)
+
+        clips = create_clips(1000)
+        start = time.perf_counter()
+        self._optimize_clips_quadratic(clips)
+        reference_duration = time.perf_counter() - start
+        self.assertGreater(reference_duration / min(durations), 10)
+
+        t = Track()
+        t.clips = create_clips(20000)
+        t.optimize_clips()
+        self.assertEqual(20000, len(set(c.id for c in t.clips)))
+        self.assertEqual(500, len(set(id(c.file) for c in t.clips)))
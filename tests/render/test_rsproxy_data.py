@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import struct
+
+import pytest
+
+from anima.render import rsproxy_data
+from anima.render.rsproxy_data import RSProxyDataReader, RSProxyDataWriter
+
+
+@pytest.fixture(scope="function")
+def rsproxy_test_data():
+    """Generate RSProxy instance point data in the legacy JSON layout."""
+    point_count = 1000
+    data = {
+        "pos": [(float(i), i * 0.5, -float(i)) for i in range(point_count)],
+        "rot": [(0.0, float(i % 360), 0.0) for i in range(point_count)],
+        "sca": [1.0 + (i % 4) * 0.25 for i in range(point_count)],
+        "instance_file": [
+            "/mnt/T/TP/Assets/Tree{}.rs".format(i % 3) for i in range(point_count)
+        ],
+        "node_name": ["tree{:04d}".format(i) for i in range(point_count)],
+        "parent_name": ["|forest|group{}".format(i % 2) for i in range(point_count)],
+    }
+    yield data
+
+
+def write_test_data(path, data, **kwargs):
+    """Write the given data with a RSProxyDataWriter."""
+    with RSProxyDataWriter(path, **kwargs) as writer:
+        writer.write(
+            data["pos"],
+            data["rot"],
+            data["sca"],
+            data["instance_file"],
+            data["node_name"],
+            data["parent_name"],
+        )
+
+
+@pytest.mark.parametrize("compress", [False, True])
+@pytest.mark.parametrize("chunk_size", [1, 64, 65536])
+def test_round_trip(tmp_path, rsproxy_test_data, compress, chunk_size):
+    """testing if the data written by RSProxyDataWriter is read back correctly"""
+    path = str(tmp_path / "rsproxy_info.arsp")
+    write_test_data(path, rsproxy_test_data, compress=compress, chunk_size=chunk_size)
+    with RSProxyDataReader(path) as reader:
+        assert len(reader) == 1000
+        assert reader.compressed is compress
+        assert reader.chunk_count == -(-1000 // chunk_size)
+        assert reader.to_dict() == rsproxy_test_data
+
+
+def test_string_tables_are_unique(tmp_path, rsproxy_test_data):
+    """testing if the string attributes are stored only once per unique value"""
+    path = str(tmp_path / "rsproxy_info.arsp")
+    write_test_data(path, rsproxy_test_data)
+    with RSProxyDataReader(path) as reader:
+        assert reader.instance_files == [
+            "/mnt/T/TP/Assets/Tree0.rs",
+            "/mnt/T/TP/Assets/Tree1.rs",
+            "/mnt/T/TP/Assets/Tree2.rs",
+        ]
+        assert reader.parent_names == ["|forest|group0", "|forest|group1"]
+        assert len(reader.node_names) == 1000
+
+
+def test_write_accepts_raw_float32_data_and_multiple_calls(tmp_path, rsproxy_test_data):
+    """testing if the writer accepts raw float32 bytes and appends the points of
+    consecutive write calls
+    """
+    path = str(tmp_path / "rsproxy_info.arsp")
+    data = rsproxy_test_data
+    flat_pos = [c for p in data["pos"] for c in p]
+    flat_rot = [c for r in data["rot"] for c in r]
+    with RSProxyDataWriter(path, chunk_size=300) as writer:
+        for start, end in [(0, 500), (500, 1000)]:
+            writer.write(
+                struct.pack(
+                    "<{}f".format((end - start) * 3), *flat_pos[start * 3 : end * 3]
+                ),
+                struct.pack(
+                    "<{}f".format((end - start) * 3), *flat_rot[start * 3 : end * 3]
+                ),
+                struct.pack("<{}f".format(end - start), *data["sca"][start:end]),
+                data["instance_file"][start:end],
+                data["node_name"][start:end],
+                data["parent_name"][start:end],
+            )
+    with RSProxyDataReader(path) as reader:
+        assert reader.chunk_count == 4
+        assert reader.to_dict() == data
+
+
+def test_chunks_are_memory_mapped(tmp_path, rsproxy_test_data):
+    """testing if the chunk data of an uncompressed file are memoryviews"""
+    path = str(tmp_path / "rsproxy_info.arsp")
+    write_test_data(path, rsproxy_test_data)
+    reader = RSProxyDataReader(path)
+    chunk = reader.read_chunk(0)
+    assert isinstance(chunk.pos, memoryview)
+    assert chunk.pos[3:6].tolist() == [1.0, 0.5, -1.0]
+    assert chunk.node_name[10] == 10
+    del chunk
+    reader.close()
+
+
+def test_compression_reduces_the_file_size(tmp_path, rsproxy_test_data):
+    """testing if the compressed file is smaller than the uncompressed one"""
+    path1 = str(tmp_path / "uncompressed.arsp")
+    path2 = str(tmp_path / "compressed.arsp")
+    write_test_data(path1, rsproxy_test_data)
+    write_test_data(path2, rsproxy_test_data, compress=True)
+    assert os.path.getsize(path2) < os.path.getsize(path1)
+
+
+def test_write_raises_value_error_for_mismatching_lengths(tmp_path, rsproxy_test_data):
+    """testing if a ValueError will be raised if the attributes have different
+    number of points
+    """
+    path = str(tmp_path / "rsproxy_info.arsp")
+    with pytest.raises(ValueError) as cm:
+        with RSProxyDataWriter(path) as writer:
+            writer.write(
+                rsproxy_test_data["pos"],
+                rsproxy_test_data["rot"],
+                rsproxy_test_data["sca"],
+                rsproxy_test_data["instance_file"][:10],
+                rsproxy_test_data["node_name"],
+                rsproxy_test_data["parent_name"],
+            )
+    assert str(cm.value) == "All attributes should have the same number of points"
+
+
+def test_is_rsproxy_data_file(tmp_path, rsproxy_test_data):
+    """testing if is_rsproxy_data_file distinguishes binary and JSON files"""
+    binary_path = str(tmp_path / "rsproxy_info.arsp")
+    json_path = str(tmp_path / "rsproxy_info.json")
+    write_test_data(binary_path, rsproxy_test_data)
+    with open(json_path, "w") as f:
+        json.dump(rsproxy_test_data, f)
+
+    assert rsproxy_data.is_rsproxy_data_file(binary_path) is True
+    assert rsproxy_data.is_rsproxy_data_file(json_path) is False
+    assert rsproxy_data.is_rsproxy_data_file(str(tmp_path / "missing")) is False
+
+
+def test_reader_raises_value_error_for_non_rsproxy_data_files(tmp_path):
+    """testing if a ValueError will be raised for non RSProxy data files"""
+    path = str(tmp_path / "rsproxy_info.json")
+    with open(path, "w") as f:
+        f.write("{}")
+    with pytest.raises(ValueError) as cm:
+        RSProxyDataReader(path)
+    assert str(cm.value) == "Not an RSProxy data file: {}".format(path)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+
+# The import time budget of anima.ui in microseconds and the number of modules
+# it can import. Importing Stalker alone takes more than the time budget.
+IMPORT_TIME_BUDGET = 250000
+MODULE_COUNT_BUDGET = 80
+
+
+def get_imported_modules(code):
+    """Return the cumulative import times of the modules imported by the given
+    code in a fresh interpreter.
+
+    Args:
+        code (str): The Python code to run.
+
+    Returns:
+        dict: The module names as the keys and the cumulative import times in
+            microseconds as the values.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.dirname(here)] + env.get("PYTHONPATH", "").split(os.pathsep)
+    )
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stderr
+
+    # import time: self [us] | cumulative | imported package
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_time, cumulative, name = line[len("import time:") :].split("|")
+        if not self_time.strip().isdigit():
+            continue
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def test_anima_ui_import_time():
+    """testing if importing anima.ui is within the import time budget"""
+    interpreter_modules = get_imported_modules("pass")
+    modules = get_imported_modules("import anima.ui")
+
+    # the heavy libraries are imported when they are used
+    for name in ["stalker", "sqlalchemy", "qtawesome", "anima.config"]:
+        assert name not in modules
+
+    assert len(set(modules) - set(interpreter_modules)) <= MODULE_COUNT_BUDGET
+    assert modules["anima.ui"] <= IMPORT_TIME_BUDGET
+
+
+def test_stalker_is_patched_on_import():
+    """testing if the Stalker classes are patched when Stalker is imported after
+    anima
+    """
+    modules = get_imported_modules(
+        "import anima\n"
+        "from stalker import Project, SimpleEntity\n"
+        "assert isinstance(Project.is_managed, property)\n"
+        "assert isinstance(Project.cache_format, property)\n"
+        "assert SimpleEntity.get_generic_text_attr is anima.get_generic_text_attr\n"
+        "assert SimpleEntity.set_generic_text_attr is anima.set_generic_text_attr\n"
+        "from anima import defaults\n"
+        "assert anima.defaults is defaults\n"
+    )
+    assert "stalker" in modules
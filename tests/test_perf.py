@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+
+import pytest
+
+from stalker import Asset, Task
+
+from anima import perf
+from anima.perf import QueryScope, dump_query_report, fingerprint_statement
+
+
+@pytest.fixture(scope="function")
+def clean_query_scopes():
+    """Clear the merged query scopes."""
+    perf.query_scopes.clear()
+    yield
+    perf.query_scopes.clear()
+
+
+def test_fingerprint_statement_is_working_properly():
+    """testing if fingerprint_statement will collapse the literals and the
+    parameter lists
+    """
+    assert (
+        fingerprint_statement(
+            "SELECT a FROM t\n  WHERE id = ? AND x IN (?, ?, ?) "
+            "AND n = 'it''s' AND y = %(y_1)s LIMIT 10"
+        )
+        == "SELECT a FROM t WHERE id = ? AND x IN (?) AND n = ? AND y = ? LIMIT ?"
+    )
+
+
+def test_query_scope_is_working_properly(
+    create_test_db, create_project, clean_query_scopes
+):
+    """testing if QueryScope will count the statements and flag the repeated
+    ones
+    """
+    task_ids = [task_id for task_id, in Task.query.with_entities(Task.id)]
+    with QueryScope("outer") as outer:
+        with QueryScope("n+1", n_plus_one_threshold=3) as scope:
+            for task_id in task_ids:
+                Task.query.get(task_id).name
+        Asset.query.all()
+
+    assert scope.statement_count > 0
+    assert scope.db_time > 0
+    assert outer.statement_count == scope.statement_count + 1
+    assert scope.n_plus_one() != []
+    fingerprint, count = scope.n_plus_one()[0]
+    assert count >= 3
+    assert fingerprint.startswith("SELECT")
+    assert outer.fingerprints[fingerprint] == count
+
+    # the statements outside of the scopes are not recorded
+    Asset.query.all()
+    assert outer.statement_count == scope.statement_count + 1
+
+
+def test_query_scope_budget(create_test_db, create_project, clean_query_scopes):
+    """testing if QueryScope will raise an AssertionError if the budget is
+    exceeded
+    """
+    with QueryScope("in budget", max_statements=1):
+        Task.query.all()
+
+    with pytest.raises(AssertionError) as cm:
+        with QueryScope("over budget", max_statements=1):
+            Task.query.all()
+            Asset.query.all()
+    assert str(cm.value).startswith("over budget executed 2 statements, the budget")
+
+
+def test_query_scope_as_decorator(
+    create_test_db, create_project, clean_query_scopes, tmp_path
+):
+    """testing if QueryScope can be used as a decorator and the statistics are
+    merged by name in the report
+    """
+
+    @QueryScope()
+    def get_tasks():
+        return Task.query.all()
+
+    get_tasks()
+    get_tasks()
+    assert perf.query_scopes["get_tasks"].statement_count == 2
+
+    report_path = tmp_path / "report.json"
+    report = json.loads(dump_query_report(str(report_path)))
+    assert report == json.loads(report_path.read_text())
+    assert report[0]["name"] == "get_tasks"
+    assert report[0]["statement_count"] == 2
+    assert report[0]["statements"][0]["count"] == 2
+    assert report[0]["n_plus_one"] == []
+
+
+def test_query_scopes_are_merged_from_many_threads(clean_query_scopes):
+    """testing if the statistics of the scopes with the same name exiting in
+    many threads at the same time are not lost
+    """
+
+    def work():
+        for i in range(1000):
+            with QueryScope("worker") as scope:
+                scope.record("SELECT ?", 0.001)
+
+    threads = [threading.Thread(target=work) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert perf.query_scopes["worker"].statement_count == 8000
+    assert perf.query_scopes["worker"].fingerprints["SELECT ?"] == 8000
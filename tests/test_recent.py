@@ -130,3 +130,68 @@ def test_remove_method_removes_files_from_given_env(prepare_recent_file_cache_pa
 
     rfm1.remove("Env2", "Path5")
     assert rfm1["Env2"] == ["Path6", "Path4"]
+
+
+def test_RecentFileManager_is_a_singleton(prepare_recent_file_cache_path):
+    """testing if the same RecentFileManager instance is returned for the same
+    cache file
+    """
+    rfm1 = RecentFileManager()
+    rfm1.add("Env1", "Path1")
+    rfm2 = RecentFileManager()
+    assert rfm1 is rfm2
+    assert rfm2["Env1"] == ["Path1"]
+
+
+def test_add_method_appends_to_a_log_and_flush_compacts_it(
+    prepare_recent_file_cache_path,
+):
+    """testing if the add method will append the changes to a per DCC log file
+    and the flush method will compact them in to the cache file
+    """
+    import json
+
+    rfm = RecentFileManager()
+    # the cache file is created right away if there is none
+    rfm.add("Env1", "Path1")
+    cache_file_path = RecentFileManager.cache_file_full_path()
+    with open(cache_file_path) as f:
+        assert json.load(f)["Env1"] == ["Path1"]
+
+    rfm.add("Env1", "Path2")
+    rfm.add("Env 2", "Path3")
+    with open(cache_file_path) as f:
+        assert json.load(f)["Env1"] == ["Path1"]
+    assert os.path.exists("{}.Env1.log".format(cache_file_path))
+    assert os.path.exists("{}.Env_2.log".format(cache_file_path))
+
+    rfm.flush()
+    with open(cache_file_path) as f:
+        data = json.load(f)
+    assert data["Env1"] == ["Path2", "Path1"]
+    assert data["Env 2"] == ["Path3"]
+    assert not os.path.exists("{}.Env1.log".format(cache_file_path))
+
+
+def test_changes_from_other_processes_are_merged(prepare_recent_file_cache_path):
+    """testing if the changes made by other processes are not overwritten"""
+    rfm1 = RecentFileManager()
+    rfm1.add("Env1", "Path1")
+
+    # simulate another process by dropping the in process instance
+    RecentFileManager._instances.clear()
+    rfm2 = RecentFileManager()
+    assert rfm2 is not rfm1
+    rfm2.add("Env1", "Path2")
+    rfm2.add("Env2", "Path3")
+
+    rfm1.add("Env1", "Path4")
+    assert rfm1["Env1"] == ["Path4", "Path2", "Path1"]
+
+    rfm2.save()
+    rfm1.remove("Env2", "Path3")
+    rfm1.save()
+
+    RecentFileManager._instances.clear()
+    rfm3 = RecentFileManager()
+    assert rfm3.recent_files == {"Env1": ["Path4", "Path2", "Path1"], "Env2": []}
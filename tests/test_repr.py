@@ -7,7 +7,8 @@ import os
 
 import pytest
 
-from anima.representation import Representation
+from anima.perf import QueryScope
+from anima.representation import Representation, RepresentationIndex
 
 
 temp_repo_path = tempfile.mkdtemp()
@@ -195,3 +196,76 @@ def test_repr_property_is_working_properly(repr_test_setup):
 
     rep = Representation(repr_test_setup["version4"])
     assert rep.repr == 'BBox'
+
+
+def test_representation_index_is_working_properly(repr_test_setup):
+    """testing if RepresentationIndex will answer the Representation queries of
+    a group of tasks with a single query
+    """
+    from stalker import Version
+    from stalker.db.session import DBSession
+
+    version20 = Version(task=repr_test_setup["task2"], take_name="Main")
+    version21 = Version(task=repr_test_setup["task2"], take_name="Main@GPU")
+    version21.is_published = True
+    DBSession.add_all([version20, version21])
+    DBSession.commit()
+
+    versions = [repr_test_setup["version%s" % i] for i in range(1, 20)]
+    versions += [version20, version21]
+    # load the expired attributes before counting the statements
+    task_ids = [v.task_id for v in versions]
+    for v in versions:
+        assert v.take_name
+
+    def check_all(index=None):
+        # compare the ids, Version.__eq__ lazy loads the related tasks
+        return [
+            (rep.list_all(), getattr(rep.find("BBox"), "id", None), rep.has_repr("GPU"))
+            for rep in [Representation(v, index=index) for v in versions]
+        ]
+
+    with QueryScope("Representation") as scope:
+        expected = check_all()
+    # without an index every call queries the database
+    assert scope.statement_count >= len(versions) * 3
+
+    with QueryScope("RepresentationIndex", max_statements=1):
+        index = RepresentationIndex(task_ids)
+        assert check_all(index) == expected
+
+    version1 = repr_test_setup["version1"]
+    with QueryScope("RepresentationIndex.find", max_statements=0):
+        assert index.find(version1, "BBox") is repr_test_setup["version5"]
+        assert index.find(version1, "ASS") is repr_test_setup["version7"]
+        assert index.find(version1, "GPU") is None
+        assert index.find(version1, "Base") is None
+        assert index.find(repr_test_setup["version10"], "Lores") is (
+            repr_test_setup["version17"]
+        )
+        assert index.find(version20, "GPU") is version21
+        assert index.list_all(version20) == ["Base", "GPU"]
+        assert index.list_all(repr_test_setup["version12"]) == [
+            "Base",
+            "Hires",
+            "Lores",
+            "Midres",
+        ]
+        assert index.has_repr(version1, "ASS") is True
+        assert index.has_repr(version1, "GPU") is False
+        assert index.is_repr(repr_test_setup["version4"], "BBox") is True
+        assert index.is_repr(version1, "BBox") is False
+
+
+def test_representation_index_loads_the_missing_tasks(repr_test_setup):
+    """testing if RepresentationIndex will load the tasks that are not in the
+    index on first use, only once
+    """
+    version1 = repr_test_setup["version1"]
+    version5 = repr_test_setup["version5"]
+    index = RepresentationIndex()
+    assert version1.task_id
+    with QueryScope("RepresentationIndex", max_statements=1):
+        assert index.find(version1, "BBox") is version5
+        assert index.has_repr(version1, "ASS") is True
+        assert index.has_repr(version1, "GPU") is False
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import io
+
+from anima.utils.archive import (
+    get_reference_path_regex,
+    rewrite_references,
+    scan_references,
+)
+
+MAYA_SCENE = b"""//Maya ASCII 2020 scene
+//Name: Asset2_Model_Main_v001.ma
+file -rdi 1 -ns "Asset1" -rfn "Asset1RN" -typ "mayaAscii" "$REPO1/TP/Assets/Asset1/Model/Asset1_Model_Main_v003.ma";
+file -r -ns "Asset1" -dr 1 -rfn "Asset1RN" -typ "mayaAscii" "$REPO1/TP/Assets/Asset1/Model/Asset1_Model_Main_v003.ma";
+requires maya "2020";
+createNode file -n "file1";
+\tsetAttr ".ftn" -type "string" "/mnt/repo/TP/Assets/Asset1/Texture/diffuse.<udim>.exr";
+createNode file -n "file2";
+\tsetAttr ".ftn" -type "string" "$REPO1/TP/Assets/Asset1/Texture/Ka\xc3\xa7\xc3\xbck.1001.tif";
+createNode RedshiftProxyMesh -n "proxy1";
+\tsetAttr ".fp" -type "string" "$REPO1/TP/Assets/Asset1/Proxy/Asset1.rs";
+createNode file -n "file3";
+\tsetAttr ".ftn" -type "string" "sourceimages/local.exr";
+\tsetAttr ".nt" -type "string" "not utf-8 \xfe\xdd";
+// End of Asset2_Model_Main_v001.ma
+"""
+
+
+def test_get_reference_path_regex_combines_all_repositories():
+    """testing if get_reference_path_regex will match the $REPO variables and
+    the values of the REPO environment variables with a single pattern
+    """
+    regex = get_reference_path_regex(
+        {
+            "REPO1": "/mnt/repo",
+            "REPO2": "/mnt/repo/sub+project",
+            "REPOX": "",
+            "HOME": "/",
+        }
+    )
+    assert regex.findall('"$REPO1/A/a.ma" "/mnt/repo/B/b.ma" "/home/c.ma"') == [
+        "$REPO1/A/a.ma",
+        "/mnt/repo/B/b.ma",
+    ]
+    # longer repository paths are matched first and values are escaped
+    assert regex.findall('"/mnt/repo/sub+project/C/c.ma"') == [
+        "/mnt/repo/sub+project/C/c.ma"
+    ]
+
+
+def test_scan_references_is_working_properly():
+    """testing if scan_references will return the unique reference paths in the
+    order they are found
+    """
+    regex = get_reference_path_regex({"REPO1": "/mnt/repo"})
+    ref_paths = scan_references(io.BytesIO(MAYA_SCENE), regex=regex)
+    assert ref_paths == [
+        "$REPO1/TP/Assets/Asset1/Model/Asset1_Model_Main_v003.ma",
+        "/mnt/repo/TP/Assets/Asset1/Texture/diffuse.<udim>.exr",
+        "$REPO1/TP/Assets/Asset1/Texture/Kaçük.1001.tif",
+        "$REPO1/TP/Assets/Asset1/Proxy/Asset1.rs",
+    ]
+
+
+def test_scan_references_with_exclude_mask():
+    """testing if scan_references will skip the excluded file extensions"""
+    regex = get_reference_path_regex({})
+    ref_paths = scan_references(
+        io.BytesIO(MAYA_SCENE), exclude_mask=[".rs", ".tif"], regex=regex
+    )
+    assert ref_paths == ["$REPO1/TP/Assets/Asset1/Model/Asset1_Model_Main_v003.ma"]
+
+
+def test_rewrite_references_is_working_properly():
+    """testing if rewrite_references will replace the reference paths and keep
+    the rest of the file intact
+    """
+    regex = get_reference_path_regex({"REPO1": "/mnt/repo"})
+    calls = []
+
+    def replace(ref_path):
+        calls.append(ref_path)
+        if ref_path.endswith(".ma"):
+            return "scenes/refs/Asset1_Model_Main_v003.ma"
+        if ref_path.endswith(".exr"):
+            return "sourceimages/diffuse.<udim>.exr"
+
+    output = io.BytesIO()
+    ref_paths = rewrite_references(
+        io.BytesIO(MAYA_SCENE), output, replace, exclude_mask=[".rs"], regex=regex
+    )
+
+    assert (
+        ref_paths
+        == calls
+        == [
+            "$REPO1/TP/Assets/Asset1/Model/Asset1_Model_Main_v003.ma",
+            "/mnt/repo/TP/Assets/Asset1/Texture/diffuse.<udim>.exr",
+            "$REPO1/TP/Assets/Asset1/Texture/Kaçük.1001.tif",
+        ]
+    )
+    assert output.getvalue() == (
+        MAYA_SCENE.replace(
+            b"$REPO1/TP/Assets/Asset1/Model/Asset1_Model_Main_v003.ma",
+            b"scenes/refs/Asset1_Model_Main_v003.ma",
+        ).replace(
+            b"/mnt/repo/TP/Assets/Asset1/Texture/diffuse.<udim>.exr",
+            b"sourceimages/diffuse.<udim>.exr",
+        )
+    )
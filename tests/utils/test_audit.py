@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from stalker import Task, Type, Version
+from stalker.db.session import DBSession
+
+from anima.utils import audit
+
+
+@pytest.fixture(scope="function")
+def orphan_rig_test_data(create_test_db, create_project):
+    """Publish some rig and LookDev versions on the test project."""
+    project = create_project
+    rig_type = Type.query.filter(Type.name == "Rig").first()
+    look_dev_type = Type.query.filter(Type.name == "Look Development").first()
+
+    char1_rig, char2_rig = (
+        Task.query.filter(Task.type == rig_type).order_by(Task.id).all()
+    )
+    char1_look_dev = (
+        Task.query.filter(Task.parent_id == char1_rig.parent_id)
+        .filter(Task.type == look_dev_type)
+        .first()
+    )
+    char2_look_dev = (
+        Task.query.filter(Task.parent_id == char2_rig.parent_id)
+        .filter(Task.type == look_dev_type)
+        .first()
+    )
+
+    def publish(task, take_name):
+        version = Version(task=task, take_name=take_name)
+        version.is_published = True
+        DBSession.add(version)
+        return version
+
+    # char1: Main has LookDev, Alt has an unpublished LookDev, Extra has no LookDev
+    # and Test has no published rig
+    char1_rig_main = publish(char1_rig, "Main")
+    publish(char1_rig, "Alt")
+    publish(char1_rig, "Extra")
+    publish(char1_rig, "Main@GPU")
+    DBSession.add(Version(task=char1_rig, take_name="Test"))
+    publish(char1_look_dev, "Main")
+    DBSession.add(Version(task=char1_look_dev, take_name="Alt"))
+
+    # char2: the LookDev task is removed
+    publish(char2_rig, "Main")
+    DBSession.delete(char2_look_dev)
+    DBSession.commit()
+
+    yield project, char1_rig, char2_rig, char1_rig_main
+
+
+def test_find_orphan_rigs_is_working_properly(orphan_rig_test_data):
+    """testing if find_orphan_rigs finds the orphan rig takes"""
+    project, char1_rig, char2_rig, _ = orphan_rig_test_data
+    result = audit.find_orphan_rigs(project)
+    assert result == {
+        str(char1_rig.id): {
+            "Alt": {
+                None: "no look dev published with same take",
+                "look_dev_task_id": None,
+                "look_dev_take_name": "Main",
+                "no_render": [],
+            },
+            "Extra": {
+                None: "no look dev published with same take",
+                "look_dev_task_id": None,
+                "look_dev_take_name": "Main",
+                "no_render": [],
+            },
+        },
+        str(char2_rig.id): {
+            "Main": {
+                None: "no look dev task",
+                "look_dev_task_id": None,
+                "look_dev_take_name": "Main",
+                "no_render": [],
+            },
+        },
+    }
+
+
+def test_find_orphan_rigs_accepts_project_id(orphan_rig_test_data):
+    """testing if find_orphan_rigs accepts project ids"""
+    project, char1_rig, char2_rig, _ = orphan_rig_test_data
+    assert audit.find_orphan_rigs(project.id) == audit.find_orphan_rigs(project)
+
+
+def test_latest_published_versions_query(orphan_rig_test_data):
+    """testing if latest_published_versions_query returns the latest published
+    version per task and take
+    """
+    project, char1_rig, char2_rig, char1_rig_main = orphan_rig_test_data
+    # a newer but not published version
+    DBSession.add(Version(task=char1_rig, take_name="Main"))
+    DBSession.commit()
+
+    task_ids_query = DBSession.query(Task.id).filter(Task.id == char1_rig.id)
+    result = sorted(
+        (row.take_name, row.version_id)
+        for row in audit.latest_published_versions_query(task_ids_query).all()
+    )
+    assert [take_name for take_name, _ in result] == ["Alt", "Extra", "Main"]
+    assert result[2][1] == char1_rig_main.id
+
+
+def test_main_prints_the_orphan_rigs(orphan_rig_test_data, capsys):
+    """testing if the command line interface prints the orphan rigs as JSON"""
+    import json
+
+    project, char1_rig, char2_rig, _ = orphan_rig_test_data
+    assert audit.main(["orphan_rigs", project.code]) == 0
+    assert json.loads(capsys.readouterr().out) == {
+        str(char1_rig.id): {
+            "Alt": "no look dev published with same take",
+            "Extra": "no look dev published with same take",
+        },
+        str(char2_rig.id): {"Main": "no look dev task"},
+    }
+
+
+def test_main_returns_1_for_unknown_projects(orphan_rig_test_data, capsys):
+    """testing if the command line interface returns 1 for unknown projects"""
+    assert audit.main(["orphan_rigs", "NOPROJECT"]) == 1
+    assert capsys.readouterr().err == "No such project: NOPROJECT\n"
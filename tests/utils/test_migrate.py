@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from stalker import Asset, Version
+from stalker.db.session import DBSession
+
+from anima.utils import migrate
+from anima.utils.migrate import (
+    FileCopier,
+    MigrationJournal,
+    get_version_input_ids,
+    order_by_dependencies,
+    resolve_tasks,
+    resolve_versions,
+)
+
+
+def test_resolve_versions_is_working_properly(create_test_db, create_project):
+    """testing if resolve_versions will resolve the version keys in bulk and
+    skip the missing ones
+    """
+    char2 = Asset.query.filter(Asset.name == "Char2").first()
+    model = [t for t in char2.children if t.name == "Model"][0]
+    for i in range(3):
+        DBSession.add(Version(task=model, take_name="Main"))
+        DBSession.commit()
+
+    versions = resolve_versions(
+        [
+            (model.id, "Main", 1),
+            (model.id, "Main", 3),
+            (model.id, "Main", 3),
+            (model.id, "Main", 10),
+            (model.id, "Other", 1),
+        ],
+        batch_size=1,
+    )
+    assert sorted(versions.keys()) == [(model.id, "Main", 1), (model.id, "Main", 3)]
+    assert versions[(model.id, "Main", 3)].version_number == 3
+    assert versions[(model.id, "Main", 3)].task == model
+
+
+def test_resolve_tasks_is_working_properly(create_test_db, create_project):
+    """testing if resolve_tasks will return the tasks with their own classes"""
+    char1 = Asset.query.filter(Asset.name == "Char1").first()
+    model = [t for t in char1.children if t.name == "Model"][0]
+    tasks = resolve_tasks([char1.id, model.id, -1])
+    assert tasks == {char1.id: char1, model.id: model}
+    assert isinstance(tasks[char1.id], Asset)
+
+
+def test_get_version_input_ids_is_working_properly(create_test_db, create_project):
+    """testing if get_version_input_ids will return the input ids of the given
+    versions
+    """
+    char1 = Asset.query.filter(Asset.name == "Char1").first()
+    look_dev = [t for t in char1.children if t.name == "LookDev"][0]
+    versions = Version.query.filter(Version.task_id == look_dev.id).all()
+    inputs = get_version_input_ids([v.id for v in versions])
+    assert inputs == dict((v.id, set(i.id for i in v.inputs)) for v in versions)
+    assert all(len(ids) == 1 for ids in inputs.values())
+
+
+def test_order_by_dependencies_is_working_properly():
+    """testing if order_by_dependencies will move the dependencies first and
+    keep the original order otherwise
+    """
+    items = ["rig", "look_dev", "model", "char", "other"]
+    dependencies = {
+        "rig": ["model", "char"],
+        "look_dev": ["model", "texture"],
+        "model": ["char"],
+        "char": [None],
+    }
+    assert order_by_dependencies(items, dependencies) == [
+        "char",
+        "model",
+        "rig",
+        "look_dev",
+        "other",
+    ]
+
+
+def test_order_by_dependencies_with_circular_dependencies():
+    """testing if a ValueError will be raised for circular dependencies"""
+    with pytest.raises(ValueError) as cm:
+        order_by_dependencies(["a", "b", "c"], {"a": ["b"], "b": ["a"]})
+    assert str(cm.value) == "Circular dependency between: ['a', 'b']"
+
+
+def test_file_copier_is_working_properly(tmp_path):
+    """testing if FileCopier will copy the files and call the callbacks after
+    the copies are verified
+    """
+    copied = []
+    with FileCopier(max_workers=3) as file_copier:
+        for i in range(10):
+            source = tmp_path / "source" / "file{}.bin".format(i)
+            source.parent.mkdir(exist_ok=True)
+            source.write_bytes(b"data" * i)
+            file_copier.copy(
+                str(source),
+                str(tmp_path / "target" / "sub" / source.name),
+                callback=lambda i=i: copied.append(i),
+            )
+        file_copier.wait()
+
+    assert copied == list(range(10))
+    for i in range(10):
+        target = tmp_path / "target" / "sub" / "file{}.bin".format(i)
+        assert target.read_bytes() == b"data" * i
+
+
+def test_file_copier_checksum_mismatch(tmp_path, monkeypatch):
+    """testing if FileCopier.wait will raise an IOError if a copy is corrupt and
+    the callbacks of the failed copies will not be called
+    """
+    checksums = iter(["a", "a", "b", "c"])
+    monkeypatch.setattr(migrate, "file_checksum", lambda path: next(checksums))
+    source = tmp_path / "file.bin"
+    source.write_bytes(b"data")
+
+    copied = []
+    with FileCopier(max_workers=1) as file_copier:
+        file_copier.copy(
+            str(source), str(tmp_path / "ok.bin"), lambda: copied.append(1)
+        )
+        file_copier.copy(
+            str(source), str(tmp_path / "bad.bin"), lambda: copied.append(2)
+        )
+        with pytest.raises(IOError) as cm:
+            file_copier.wait()
+
+    assert str(cm.value).startswith("Checksum mismatch after copying")
+    assert copied == [1]
+
+
+def test_migration_journal_resume(tmp_path):
+    """testing if MigrationJournal will load the entries of an interrupted
+    migration
+    """
+    path = str(tmp_path / "migration.journal")
+    with MigrationJournal(path) as journal:
+        journal.record_task(1, 101)
+        journal.record_task(2, 102)
+        journal.record_version(10, 110, completed=False)
+        journal.record_version(11, 111)
+        journal.record_version(10, 110)
+        journal.record_version(12, 112, completed=False)
+
+    # simulate an interrupted write
+    with open(path, "a") as f:
+        f.write('{"type": "ta')
+
+    with MigrationJournal(path) as journal:
+        assert journal.tasks == {1: 101, 2: 102}
+        assert journal.versions == {10: 110, 11: 111, 12: 112}
+        assert journal.completed_version_ids == {10, 11}
+        journal.record_task(3, 103)
+
+    # the partial line is replaced by the entry of the resumed migration
+    with MigrationJournal(path) as journal:
+        assert journal.tasks == {1: 101, 2: 102, 3: 103}
+        assert journal.versions == {10: 110, 11: 111, 12: 112}
+
+    # simulate an interrupted write before the line break
+    with open(path, "a") as f:
+        f.write('{"new_id": 104, "source_id": 4, "type": "task"}')
+
+    with MigrationJournal(path) as journal:
+        assert journal.tasks == {1: 101, 2: 102, 3: 103, 4: 104}
+        journal.record_task(5, 105)
+
+    with MigrationJournal(path) as journal:
+        assert journal.tasks == {1: 101, 2: 102, 3: 103, 4: 104, 5: 105}
+
+
+def test_migration_journal_without_path():
+    """testing if MigrationJournal will keep the entries in memory only if the
+    path is None
+    """
+    with MigrationJournal() as journal:
+        journal.record_task(1, 101)
+        assert journal.tasks == {1: 101}
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from anima.utils.progress import ProgressDialogBase, ProgressManager
+
+
+class CountingDialog(ProgressDialogBase):
+    """A ProgressDialog that counts the redraws."""
+
+    instances = []
+
+    def __init__(self):
+        super(CountingDialog, self).__init__()
+        self.steps = []
+        self.titles = []
+        self.threads = set()
+        self.closed = False
+        self.instances.append(self)
+
+    def set_current_step(self, step):
+        super(CountingDialog, self).set_current_step(step)
+        self.steps.append(step)
+        self.threads.add(threading.current_thread())
+
+    def set_title(self, title):
+        super(CountingDialog, self).set_title(title)
+        self.titles.append(title)
+
+    def close(self):
+        self.closed = True
+
+
+class MainThreadCountingDialog(CountingDialog):
+    """A CountingDialog that can only be used from the main thread."""
+
+    thread_safe = False
+
+
+def test_step_redraws_are_throttled():
+    """benchmarks stepping 1M times and checks if the number of redraws is
+    bounded and the last step is drawn
+    """
+    pm = ProgressManager(dialog_class=CountingDialog)
+    caller = pm.register(1000000, "test")
+    dialog = pm.dialog
+
+    start = time.time()
+    for i in range(1000000):
+        caller.step(message="step")
+    duration = time.time() - start
+
+    # 1 redraw per percent, 10 redraws per second and the register and the last
+    # step redraws
+    assert len(dialog.steps) <= 100 + duration * 10 + 2
+    assert dialog.steps[-1] == 1000000
+    assert dialog.titles[-1] == "test : step"
+    assert dialog.closed is True
+    assert pm.callers == []
+    assert pm.in_progress is False
+
+
+def test_step_redraws_every_step_of_short_progresses():
+    """testing if every step is drawn if every step is more than the
+    redraw_percent
+    """
+    pm = ProgressManager(dialog_class=CountingDialog)
+    caller1 = pm.register(5, "title 1")
+    caller2 = pm.register(5, "title 2")
+    dialog = pm.dialog
+    caller1.step(message="a")
+    assert dialog.steps[-1] == 1
+    assert dialog.titles[-1] == "title 1 : a"
+    caller2.step(2, message="b")
+    assert dialog.steps[-1] == 3
+    assert dialog.titles[-1] == "title 2 : b"
+    assert dialog.max_range == 10
+
+    # end the first caller early
+    pm.end_progress(caller1)
+    caller2.step(message="c")
+    assert dialog.steps[-1] == 4
+    assert dialog.max_range == 6
+
+
+def test_step_from_worker_threads():
+    """testing if the callers can be stepped from the worker threads"""
+    pm = ProgressManager(dialog_class=CountingDialog)
+    callers = [pm.register(10000, "worker %s" % i) for i in range(8)]
+    dialog = pm.dialog
+
+    def work(caller):
+        for i in range(caller.max_steps):
+            caller.step()
+
+    threads = [threading.Thread(target=work, args=[caller]) for caller in callers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert dialog.steps[-1] == 80000
+    assert dialog.steps == sorted(dialog.steps)
+    assert dialog.closed is True
+    assert pm.callers == []
+    assert pm.current_step == 0
+    assert pm.max_steps == 0
+
+
+def test_not_thread_safe_dialogs_are_only_updated_from_the_main_thread():
+    """testing if the dialogs that are not thread safe are only created,
+    updated and closed in the main thread
+    """
+    MainThreadCountingDialog.instances = []
+    pm = ProgressManager(dialog_class=MainThreadCountingDialog)
+    pm.redraw_interval = 0
+    started = threading.Event()
+    release = threading.Event()
+
+    def work():
+        caller = pm.register(100, "worker")
+        for i in range(50):
+            caller.step()
+        started.set()
+        release.wait(5)
+        for i in range(50):
+            caller.step()
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    started.wait(5)
+    assert MainThreadCountingDialog.instances == []
+
+    pm.update_dialog()
+    (dialog,) = MainThreadCountingDialog.instances
+    assert dialog.steps == [50]
+    assert dialog.titles[-1] == "worker : "
+
+    release.set()
+    thread.join()
+    assert dialog.closed is False
+
+    # the main thread closes the dialog
+    pm.update_dialog()
+    assert dialog.closed is True
+    assert pm.in_progress is False
+    assert dialog.threads == {threading.main_thread()}
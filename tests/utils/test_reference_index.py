@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from anima.utils.reference_index import ReferenceIndex, main
+
+
+@pytest.fixture(scope="function")
+def scene_repo(tmp_path, monkeypatch):
+    """Create a repository with scenes referencing each other."""
+    monkeypatch.setenv("REPOTEST", str(tmp_path))
+    files = {
+        "Assets/Char1/Model/Char1_Model_Main_v001.ma": "",
+        "Assets/Char1/Rig/Char1_Rig_Main_v001.ma": (
+            'file -r -typ "mayaAscii" '
+            '"$REPOTEST/Assets/Char1/Model/Char1_Model_Main_v001.ma";\n'
+            'setAttr ".ftn" -type "string" "$REPOTEST/Assets/Char1/Tex/skin.exr";\n'
+        ),
+        "Shots/SH010/Anim/SH010_Anim_Main_v001.ma": (
+            'file -r -typ "mayaAscii" '
+            '"$REPOTEST/Assets/Char1/Rig/Char1_Rig_Main_v001.ma";\n'
+        ),
+        "Shots/SH010/Comp/SH010_Comp_Main_v001.nk": (
+            "Read {\n file %s/Shots/SH010/Render/beauty.mov\n}\n"
+            % str(tmp_path).replace("\\", "/")
+        ),
+        "Shots/SH010/Comp/notes.txt": (
+            "$REPOTEST/Assets/Char1/Model/Char1_Model_Main_v001.ma"
+        ),
+    }
+    for rel_path, content in files.items():
+        path = tmp_path / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    yield tmp_path
+
+
+def repo_path(root, rel_path):
+    return os.path.normpath(str(root / rel_path)).replace("\\", "/")
+
+
+def test_update_indexes_the_references(scene_repo):
+    """testing if update will store the forward and reverse references"""
+    root = scene_repo
+    with ReferenceIndex(":memory:") as index:
+        stats = index.update([str(root)], processes=0)
+        assert stats == {"scanned": 4, "unchanged": 0, "removed": 0}
+
+        model = repo_path(root, "Assets/Char1/Model/Char1_Model_Main_v001.ma")
+        rig = repo_path(root, "Assets/Char1/Rig/Char1_Rig_Main_v001.ma")
+        anim = repo_path(root, "Shots/SH010/Anim/SH010_Anim_Main_v001.ma")
+        comp = repo_path(root, "Shots/SH010/Comp/SH010_Comp_Main_v001.nk")
+
+        assert index.get_references(rig) == [
+            model,
+            repo_path(root, "Assets/Char1/Tex/skin.exr"),
+        ]
+        assert index.get_references(comp) == [
+            repo_path(root, "Shots/SH010/Render/beauty.mov")
+        ]
+        # the txt file is not a scene
+        assert index.get_dependents(model) == [rig]
+        assert index.get_dependents(model, recursive=True) == [rig, anim]
+        # the $REPO form of the path can be used too
+        assert index.get_dependents(
+            "$REPOTEST/Assets/Char1/Rig/Char1_Rig_Main_v001.ma"
+        ) == [anim]
+        assert index.is_up_to_date(rig) is True
+
+
+def test_update_only_scans_changed_files(scene_repo):
+    """testing if update will only scan the new and changed files and remove
+    the deleted ones
+    """
+    root = scene_repo
+    with ReferenceIndex(str(root / "index" / "refs.db")) as index:
+        index.update([str(root)], processes=0)
+        assert index.update([str(root)], processes=0) == {
+            "scanned": 0,
+            "unchanged": 4,
+            "removed": 0,
+        }
+
+        rig = root / "Assets/Char1/Rig/Char1_Rig_Main_v001.ma"
+        model = repo_path(root, "Assets/Char1/Model/Char1_Model_Main_v001.ma")
+        rig.write_text("// no references\n")
+        stat = os.stat(str(rig))
+        os.utime(str(rig), (stat.st_atime, stat.st_mtime + 10))
+        assert index.is_up_to_date(str(rig)) is False
+        os.remove(str(root / "Shots/SH010/Comp/SH010_Comp_Main_v001.nk"))
+
+        assert index.update([str(root)], processes=0) == {
+            "scanned": 1,
+            "unchanged": 2,
+            "removed": 1,
+        }
+        assert index.get_dependents(model) == []
+        assert (
+            index.get_references(
+                repo_path(root, "Shots/SH010/Comp/SH010_Comp_Main_v001.nk")
+            )
+            == []
+        )
+
+
+def test_update_with_a_process_pool(scene_repo, capsys):
+    """testing if the files are scanned properly with worker processes and the
+    command line interface is working properly
+    """
+    root = scene_repo
+    db_path = str(root / "refs.db")
+    assert main(["--db", db_path, "update", str(root), "--processes", "2"]) == 0
+    assert "scanned: 4, unchanged: 0, removed: 0" in capsys.readouterr().out
+
+    model = repo_path(root, "Assets/Char1/Model/Char1_Model_Main_v001.ma")
+    assert main(["--db", db_path, "dependents", "-r", model]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        repo_path(root, "Assets/Char1/Rig/Char1_Rig_Main_v001.ma"),
+        repo_path(root, "Shots/SH010/Anim/SH010_Anim_Main_v001.ma"),
+    ]
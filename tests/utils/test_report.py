@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+import pytest
+
+from stalker import Asset, Shot, Status, Task, Type, Version
+from stalker.db.session import DBSession
+
+from anima.utils.report import NetflixReportData, NetflixReporter
+
+
+@pytest.fixture(scope="function")
+def netflix_report_test_data(create_test_db, create_project):
+    """Create an episode with scenes, shots and shot tasks."""
+    project = create_project
+    DBSession.add_all(
+        [
+            Type(name="Scene", code="Scene", target_entity_type="Task"),
+            Type(name="Cleanup", code="Cleanup", target_entity_type="Task"),
+        ]
+    )
+    DBSession.commit()
+
+    types = dict((t.name, t) for t in Type.query.all())
+    statuses = dict((s.code, s) for s in Status.query.all())
+
+    char1 = Asset.query.filter(Asset.name == "Char1").first()
+    char1_rig = (
+        Task.query.filter(Task.parent == char1).filter(Task.name == "Rig").first()
+    )
+    env1 = Asset.query.filter(Asset.name == "Env1").first()
+    env1_layout = (
+        Task.query.filter(Task.parent == env1).filter(Task.name == "Layout").first()
+    )
+
+    episode = Task(name="EP101", project=project)
+    shots = {}
+    for scene_number in [2, 1]:
+        scene = Task(
+            name="SCN_{:03d}".format(scene_number), type=types["Scene"], parent=episode
+        )
+        shots_task = Task(name="Shots", parent=scene)
+        for shot_number in [20, 10]:
+            code = "EP101_{:03d}_{:04d}".format(scene_number, shot_number)
+            shots[code] = Shot(
+                code=code,
+                name=code,
+                description="Scope of {}".format(code),
+                parent=shots_task,
+            )
+
+    # EP101_001_0010: completed comp, animation depends on a character rig
+    shot = shots["EP101_001_0010"]
+    anim = Task(
+        name="Anim", type=types["Animation"], parent=shot, bid_timing=1, bid_unit="h"
+    )
+    comp1 = Task(
+        name="Comp", type=types["Comp"], parent=shot, bid_timing=10, bid_unit="h"
+    )
+    plate = Task(
+        name="Plate", type=types["Plate"], parent=shot, bid_timing=1, bid_unit="h"
+    )
+
+    # EP101_001_0020: lighting depends on a layout, comp in review
+    shot = shots["EP101_001_0020"]
+    lighting = Task(
+        name="Lighting",
+        type=types["Lighting"],
+        parent=shot,
+        bid_timing=1,
+        bid_unit="h",
+    )
+    comp2 = Task(
+        name="Comp", type=types["Comp"], parent=shot, bid_timing=2, bid_unit="d"
+    )
+
+    # EP101_002_0010: cleanup only
+    shot = shots["EP101_002_0010"]
+    Task(
+        name="Cleanup",
+        type=types["Cleanup"],
+        parent=shot,
+        bid_timing=30,
+        bid_unit="min",
+    )
+    Task(
+        name="FX",
+        type=types["FX"],
+        parent=shot,
+        schedule_model="duration",
+        bid_timing=1,
+        bid_unit="w",
+    )
+
+    # EP101_002_0020: no comp or cleanup task
+    Task(name="FX", type=types["FX"], parent=shots["EP101_002_0020"])
+
+    DBSession.add(episode)
+    DBSession.commit()
+
+    anim.depends = [char1_rig]
+    lighting.depends = [env1_layout]
+    DBSession.commit()
+
+    for take_name in ["Main", "Main", "Other"]:
+        DBSession.add(Version(task=comp1, take_name=take_name))
+        DBSession.commit()
+
+    anim.status = statuses["CMPL"]
+    comp1.status = statuses["CMPL"]
+    plate.status = statuses["WIP"]
+    comp2.status = statuses["PREV"]
+    DBSession.commit()
+
+    yield episode
+
+
+def report_args(tmp_path):
+    """Return the NetflixReporter.report arguments for the tests."""
+    return dict(
+        csv_output_path=str(tmp_path / "report" / "EP101.csv"),
+        vfx_turnover_to_vendor_date=datetime.datetime(2022, 1, 10),
+        vfx_next_studio_review_date=datetime.datetime(2022, 2, 10),
+        vendors=["Anima"],
+        hourly_cost=10,
+        currency="USD",
+    )
+
+
+def test_report_is_working_properly(netflix_report_test_data, tmp_path, capsys):
+    """testing if the report method renders the CSV properly"""
+    episode = netflix_report_test_data
+    args = report_args(tmp_path)
+    NetflixReporter().report(episode, **args)
+
+    with open(args["csv_output_path"]) as f:
+        rows = f.read().split("\n")
+
+    end_dates = dict(
+        (shot.code, shot.end.strftime("%Y-%m-%d")) for shot in Shot.query.all()
+    )
+    today = datetime.datetime.utcnow().strftime("%Y-%m-%d")
+    assert rows == [
+        NetflixReporter.csv_header,
+        "101;EP101_001_0010;Approved;2D Comp, 3D Animated Object, 3D Character;"
+        "Scope of EP101_001_0010;Anima;2022-01-10;2022-02-10;{};v002;120.00;USD;{};".format(
+            end_dates["EP101_001_0010"], today
+        ),
+        "101;EP101_001_0020;Pending Netflix Review;2D Comp, 3D Set Extension;"
+        "Scope of EP101_001_0020;Anima;2022-01-10;2022-02-10;{};;{:0.2f};USD;{};".format(
+            end_dates["EP101_001_0020"],
+            (Task.to_seconds(2, "d", "effort") + 3600) / 3600 * 10,
+            today,
+        ),
+        "101;EP101_002_0010;Waiting To Start;2D Paint, Dynamic Sim;"
+        "Scope of EP101_002_0010;Anima;2022-01-10;;{};;5.00;USD;{};".format(
+            end_dates["EP101_002_0010"], today
+        ),
+    ]
+    assert capsys.readouterr().out == "No Comp or CleanUp task in: EP101_002_0020\n"
+
+
+def test_report_data_load_uses_a_fixed_number_of_queries(netflix_report_test_data):
+    """testing if NetflixReportData.load doesn't issue per shot queries"""
+    from sqlalchemy import event
+
+    episode = netflix_report_test_data
+    # load the episode before counting
+    assert episode.id is not None
+    statements = []
+
+    def count_statements(*args):
+        statements.append(args[2])
+
+    engine = DBSession.connection().engine
+    event.listen(engine, "before_cursor_execute", count_statements)
+    try:
+        data = NetflixReportData.load(episode)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statements)
+
+    assert len(statements) == 6
+    assert [scene.name for scene in data.scenes] == ["SCN_001", "SCN_002"]
+    assert sum(len(shots) for shots in data.shots_by_scene_id.values()) == 4
+
+
+def test_get_shot_status_is_matching_get_shot_status_code(netflix_report_test_data):
+    """testing if get_shot_status uses the statuses of the child tasks"""
+    shot = Shot.query.filter(Shot.code == "EP101_001_0010").first()
+    assert NetflixReporter.get_shot_status(shot).code == "CMPL"
+    shot = Shot.query.filter(Shot.code == "EP101_002_0010").first()
+    assert NetflixReporter.get_shot_status(shot).code == "RTS"
+
+
+def test_generate_shot_methodologies_is_working_properly(netflix_report_test_data):
+    """testing if generate_shot_methodologies works with Stalker Shot instances"""
+    shot = Shot.query.filter(Shot.code == "EP101_001_0010").first()
+    assert NetflixReporter.generate_shot_methodologies(shot) == [
+        "2D Comp",
+        "3D Animated Object",
+        "3D Character",
+    ]
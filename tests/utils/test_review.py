@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from stalker import Link, Shot, Task, Version
+from stalker.db.session import DBSession
+
+from anima.perf import QueryScope
+from anima.utils.review import (
+    StripPlan,
+    get_scene_shots,
+    plan_strip_layout,
+    resolve_latest_outputs,
+)
+
+
+@pytest.fixture(scope="function")
+def review_test_data(create_test_db, create_empty_project):
+    """Create a scene with shots, shot tasks and versions with outputs."""
+    project = create_empty_project
+    scene = Task(name="SC001", project=project)
+    shots_task = Task(name="Shots", parent=scene)
+    shots = [
+        Shot(code="SH010", parent=shots_task, project=project, cut_in=1, cut_out=10),
+        Shot(code="SH030", parent=shots_task, project=project),
+        Shot(code="SH020", parent=shots_task, project=project, cut_in=5, cut_out=24),
+    ]
+    DBSession.add(scene)
+    tasks = {}
+    for shot in shots:
+        for task_name in ["Previs", "Animation"]:
+            tasks[(shot.code, task_name)] = Task(name=task_name, parent=shot)
+    DBSession.add_all(tasks.values())
+    DBSession.commit()
+
+    def add_version(task, *output_paths):
+        version = Version(task=task)
+        version.outputs = [Link(full_path=path) for path in output_paths]
+        DBSession.add(version)
+        DBSession.commit()
+        return version
+
+    # SH010/Previs: the latest version with outputs is v2
+    add_version(tasks[("SH010", "Previs")], "/previs/SH010_v1.mov")
+    add_version(
+        tasks[("SH010", "Previs")], "/previs/SH010_v2.mov", "/previs/SH010_v2.jpg"
+    )
+    add_version(tasks[("SH010", "Previs")])
+    # SH010/Animation: no outputs
+    add_version(tasks[("SH010", "Animation")])
+    # SH020
+    add_version(tasks[("SH020", "Previs")], "/previs/SH020_v1.mov")
+    add_version(tasks[("SH020", "Animation")], "/anim/SH020_v1.mov")
+    add_version(tasks[("SH020", "Animation")], "/anim/SH020_v2.mov")
+    # SH030: nothing
+
+    yield scene, dict((shot.code, shot) for shot in shots)
+
+
+def test_resolve_latest_outputs_is_working_properly(review_test_data):
+    """testing if resolve_latest_outputs will return the outputs of the latest
+    version with outputs of every shot task
+    """
+    scene, shots = review_test_data
+    sh010, sh020, sh030 = shots["SH010"], shots["SH020"], shots["SH030"]
+    with QueryScope("resolve_latest_outputs", max_statements=1):
+        outputs = resolve_latest_outputs(
+            [sh010, sh020.id, sh030], ["Previs", "Animation", "Lighting"]
+        )
+    assert outputs == {
+        (sh010.id, "Previs"): ["/previs/SH010_v2.mov", "/previs/SH010_v2.jpg"],
+        (sh020.id, "Previs"): ["/previs/SH020_v1.mov"],
+        (sh020.id, "Animation"): ["/anim/SH020_v2.mov"],
+    }
+    assert resolve_latest_outputs([], ["Previs"]) == {}
+
+
+def test_get_scene_shots_is_working_properly(review_test_data):
+    """testing if get_scene_shots will return the shots of the scene in order"""
+    scene, shots = review_test_data
+    assert get_scene_shots(scene) == [shots["SH010"], shots["SH020"], shots["SH030"]]
+    assert get_scene_shots(scene.id, shots_task_name="Other") == []
+
+
+def test_plan_strip_layout_is_working_properly(review_test_data):
+    """testing if plan_strip_layout will place the shots one after the other and
+    every task on its own channel
+    """
+    scene, shots = review_test_data
+    sh010, sh020, sh030 = shots["SH010"], shots["SH020"], shots["SH030"]
+    strips = plan_strip_layout(
+        [sh030, sh010, sh020],
+        ["Animation", "Previs"],
+        start_frame=1001,
+        start_channel=2,
+    )
+    # SH030 has the default cut range of Stalker (1 frame)
+    assert strips == [
+        StripPlan(sh010.id, "Previs", "/previs/SH010_v2.mov", 1002, 1011, 3),
+        StripPlan(sh020.id, "Animation", "/anim/SH020_v2.mov", 1012, 1031, 2),
+        StripPlan(sh020.id, "Previs", "/previs/SH020_v1.mov", 1012, 1031, 3),
+    ]
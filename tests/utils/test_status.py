@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from stalker import Asset, Shot, Status, Task, Type
+from stalker.db.session import DBSession
+
+from anima.utils.status import (
+    BINARY_STATUS_CODES,
+    PARENT_STATUS_LUT,
+    get_parent_status_code,
+    query_child_status_counts,
+    query_parent_status_codes,
+    rollup_status_codes,
+    status_mask,
+)
+
+
+@pytest.mark.parametrize(
+    "child_status_codes,expected",
+    [
+        ([], "WFD"),
+        (["WFD"], "WFD"),
+        (["WFD", "STOP"], "WFD"),
+        (["RTS"], "RTS"),
+        (["WFD", "RTS"], "RTS"),
+        (["WFD", "RTS", "STOP"], "RTS"),
+        (["STOP"], "CMPL"),
+        (["CMPL"], "CMPL"),
+        (["CMPL", "STOP", "CMPL"], "CMPL"),
+        (["CMPL", "WFD"], "WIP"),
+        (["RTS", "OH"], "WIP"),
+        (["PREV"], "WIP"),
+        (["HREV", "DREV", "CMPL"], "WIP"),
+    ],
+)
+def test_get_parent_status_code_is_working_properly(child_status_codes, expected):
+    """testing if get_parent_status_code rolls up the child statuses properly"""
+    assert get_parent_status_code(child_status_codes) == expected
+
+
+def test_parent_status_lut_covers_all_masks():
+    """testing if the PARENT_STATUS_LUT has an entry for every possible mask"""
+    assert len(PARENT_STATUS_LUT) == status_mask(BINARY_STATUS_CODES) + 1 == 512
+
+
+def test_rollup_status_codes_is_working_properly():
+    """testing if rollup_status_codes rolls up the statuses of many parents"""
+    assert rollup_status_codes(
+        {
+            1: ["CMPL", "STOP"],
+            2: {"RTS": 3, "WFD": 1},
+            3: ["WIP", "CMPL"],
+            4: [],
+        }
+    ) == {1: "CMPL", 2: "RTS", 3: "WIP", 4: "WFD"}
+
+
+def test_query_child_status_counts_is_working_properly(create_test_db, create_project):
+    """testing if query_child_status_counts returns the child status counts of
+    the given parents with a single query and skips the excluded types
+    """
+    project = create_project
+    types = dict((t.name, t) for t in Type.query.all())
+    statuses = dict((s.code, s) for s in Status.query.all())
+
+    shot = Shot(code="SH010", project=project)
+    plate = Task(name="Plate", type=types["Plate"], parent=shot)
+    comp = Task(name="Comp", type=types["Comp"], parent=shot)
+    Task(name="Notes", parent=shot)
+    DBSession.add(shot)
+    DBSession.commit()
+
+    plate.status = statuses["WIP"]
+    comp.status = statuses["CMPL"]
+    DBSession.commit()
+
+    char1 = Asset.query.filter(Asset.name == "Char1").first()
+    expected_char1_counts = {}
+    for child in char1.children:
+        code = child.status.code
+        expected_char1_counts[code] = expected_char1_counts.get(code, 0) + 1
+
+    parent_ids = [shot.id, char1.id]
+    assert query_child_status_counts(parent_ids) == {
+        shot.id: {"WIP": 1, "CMPL": 1, "RTS": 1},
+        char1.id: expected_char1_counts,
+    }
+    assert query_child_status_counts(parent_ids, exclude_type_names=["Plate"])[
+        shot.id
+    ] == {"CMPL": 1, "RTS": 1}
+    assert query_parent_status_codes(
+        DBSession.query(Task.id).filter(Task.id == shot.id),
+        exclude_type_names=["Plate"],
+    ) == {shot.id: "WIP"}
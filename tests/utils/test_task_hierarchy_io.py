@@ -546,3 +546,171 @@ def test_stalker_entity_decoder_will_not_recreate_versions_2(create_test_db, cre
 
     assert len(kutu_look_dev.versions) == 9
     assert kutu_look_dev.versions[-1].version_number == 8
+
+
+def test_dump_jsonl_writes_one_record_per_line(create_test_db, create_project):
+    """testing if dump_jsonl will write the parents before their children
+    """
+    from stalker import Task
+    project = create_project
+    assets_task = Task.query\
+        .filter(Task.project==project).filter(Task.name=='Assets').first()
+
+    import io
+    import json
+    from anima.utils import task_hierarchy_io
+    f = io.StringIO()
+    count = task_hierarchy_io.dump_jsonl(assets_task, f)
+
+    records = [json.loads(line) for line in f.getvalue().splitlines()]
+    assert len(records) == count
+    assert records[0]["id"] == assets_task.id
+    assert records[0]["parent_id"] is None
+
+    seen_ids = set()
+    for record in records:
+        if record["parent_id"] is not None:
+            assert record["parent_id"] in seen_ids
+        seen_ids.add(record["id"])
+
+    assert seen_ids == set(
+        [assets_task.id] + [t.id for t in assets_task.walk_hierarchy()]
+    )
+
+
+def test_load_jsonl_will_import_the_hierarchy(create_test_db, create_project, create_empty_project):
+    """testing if load_jsonl will import the exported hierarchy along with the
+    versions and will not recreate the existing data when imported again
+    """
+    from stalker import Asset, Task, Version
+    from stalker.db.session import DBSession
+    project = create_project
+    char1_model = Task.query\
+        .filter(Task.parent==Asset.query.filter(Asset.name=='Char1').first())\
+        .filter(Task.name=='Model')\
+        .first()
+    for take_name in ['Main', 'Main', 'Other']:
+        DBSession.add(Version(task=char1_model, take_name=take_name))
+        DBSession.commit()
+
+    assets_task = Task.query\
+        .filter(Task.project==project).filter(Task.name=='Assets').first()
+
+    import io
+    from anima.utils import task_hierarchy_io
+    f = io.StringIO()
+    count = task_hierarchy_io.dump_jsonl(assets_task, f)
+
+    new_project = create_empty_project
+    f.seek(0)
+    roots = task_hierarchy_io.load_jsonl(f, project=new_project, batch_size=2)
+    assert len(roots) == 1
+    assert roots[0].name == 'Assets'
+    assert roots[0].project == new_project
+    assert len(Task.query.filter(Task.project==new_project).all()) == count
+
+    new_char1 = Asset.query\
+        .filter(Asset.project==new_project)\
+        .filter(Asset.name=='Char1')\
+        .first()
+    assert new_char1.code == 'Char1'
+    assert new_char1.type.name == 'Character'
+    new_char1_model = Task.query\
+        .filter(Task.parent==new_char1)\
+        .filter(Task.name=='Model')\
+        .first()
+    assert new_char1_model.type.name == 'Model'
+    # versions with the same take name and version number are created once
+    expected_versions = sorted(set(
+        (v.take_name, v.version_number) for v in char1_model.versions
+    ))
+    assert ('Other', 1) in expected_versions
+    assert sorted(
+        (v.take_name, v.version_number) for v in new_char1_model.versions
+    ) == expected_versions
+
+    # import it again
+    f.seek(0)
+    task_hierarchy_io.load_jsonl(f, project=new_project)
+    assert len(Task.query.filter(Task.project==new_project).all()) == count
+    assert len(new_char1_model.versions) == len(expected_versions)
+
+
+def test_stalker_entity_decoder_query_count(create_test_db, create_empty_project):
+    """testing if the number of queries to import tasks with versions doesn't
+    depend on the number of versions
+    """
+    from stalker import Task, Version
+    from anima.perf import QueryScope
+    from anima.utils import task_hierarchy_io
+    project = create_empty_project
+    data = {
+        "name": "Shots",
+        "entity_type": "Task",
+        "tasks": [
+            {
+                "name": "SH%03i" % i,
+                "entity_type": "Task",
+                "type": {
+                    "name": "Animation",
+                    "code": "Anim",
+                    "target_entity_type": "Task",
+                },
+                "versions": [
+                    {
+                        "take_name": take_name,
+                        "version_number": version_number,
+                        "full_path": "Shots/SH%03i/v%03i.ma" % (i, version_number),
+                        "created_with": "Maya2019",
+                        "is_published": version_number == 2,
+                        "type": {
+                            "name": "Maya",
+                            "code": "MA",
+                            "target_entity_type": "Version",
+                        },
+                    }
+                    for take_name, version_number in [
+                        ("Main", 1), ("Main", 2), ("Other Take", 1)
+                    ]
+                ],
+            }
+            for i in range(40)
+        ],
+    }
+
+    # load the expired project before counting the statements
+    assert project.id
+    decoder = task_hierarchy_io.StalkerEntityDecoder(project=project)
+    with QueryScope("StalkerEntityDecoder.loads", max_statements=80) as scope:
+        root = decoder.loads(data)
+    statement_count = scope.statement_count
+
+    tasks = Task.query.filter(Task.parent == root).order_by(Task.name).all()
+    assert len(tasks) == 40
+    assert tasks[0].status_list.target_entity_type == "Task"
+    versions = Version.query.filter(Version.task == tasks[39]).all()
+    assert sorted(
+        (v.take_name, v.version_number, v.is_published, v.full_path, v.type.name)
+        for v in versions
+    ) == [
+        ("Main", 1, False, "Shots/SH039/v001.ma", "Maya"),
+        ("Main", 2, True, "Shots/SH039/v002.ma", "Maya"),
+        ("Other_Take", 1, False, "Shots/SH039/v001.ma", "Maya"),
+    ]
+    assert versions[0].original_filename == "v001.ma"
+    assert versions[0].created_with == "Maya2019"
+    assert versions[0].latest_version.version_number == 2
+    assert len(Version.query.all()) == 120
+
+    # the versions are inserted in bulk, so twice the versions don't need more
+    # statements
+    data["name"] = "Shots 2"
+    for task_data in data["tasks"]:
+        task_data["versions"] += [
+            dict(v_data, version_number=v_data["version_number"] + 2)
+            for v_data in task_data["versions"]
+        ]
+    with QueryScope("StalkerEntityDecoder.loads", max_statements=80) as scope:
+        decoder.loads(data)
+    assert scope.statement_count <= statement_count
+    assert len(Version.query.all()) == 360
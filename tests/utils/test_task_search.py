@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from stalker import Task
+from stalker.db.session import DBSession
+
+from anima.perf import QueryScope
+from anima.utils.task_search import TaskNameIndex, TaskSearchRow, load_task_search_rows
+
+
+@pytest.fixture(scope="function")
+def task_search_test_data(create_test_db, create_empty_project):
+    """Create a small task hierarchy."""
+    project = create_empty_project
+    assets = Task(name="Assets", project=project)
+    characters = Task(name="Characters", parent=assets)
+    hero = Task(name="Hero", parent=characters)
+    tasks = {
+        "assets": assets,
+        "characters": characters,
+        "hero": hero,
+        "hero_model": Task(name="Model", parent=hero),
+        "hero_rig": Task(name="Rig", parent=hero),
+        "villain": Task(name="Villain", parent=characters),
+        "sequences": Task(name="Sequences", project=project),
+    }
+    tasks["villain_model"] = Task(name="model", parent=tasks["villain"])
+    tasks["sequence_rig"] = Task(name="Rigging Test", parent=tasks["sequences"])
+    DBSession.add_all(tasks.values())
+    DBSession.commit()
+    yield project, tasks
+
+
+@pytest.fixture(scope="function")
+def large_project(create_test_db, create_empty_project):
+    """Create a project with 200k tasks, 1000 sequences with 200 tasks each."""
+    project = create_empty_project
+    template_task = Task(name="Template", project=project)
+    DBSession.add(template_task)
+    DBSession.commit()
+    status_id = template_task.status_id
+    status_list_id = template_task.status_list_id
+
+    # insert the rows with the DBAPI cursor, as inserting 200k tasks through the
+    # ORM or even SQLAlchemy Core takes too long
+    names = ["Layout", "Animation", "Lighting", "Comp", "FX"]
+    entity_id = template_task.id + 1
+    simple_entities = []
+    tasks = []
+    for i in range(1000):
+        sequence_id = entity_id
+        entity_id += 1
+        simple_entities.append((sequence_id, "SEQ%03i" % i))
+        tasks.append((sequence_id, None))
+        for j in range(199):
+            name = "SEQ%03i_SH%04i_%s" % (i, j * 10, names[j % 5])
+            simple_entities.append((entity_id, name))
+            tasks.append((entity_id, sequence_id))
+            entity_id += 1
+
+    cursor = DBSession.connection().connection.cursor()
+    cursor.executemany(
+        'INSERT INTO "SimpleEntities" (id, entity_type, name) VALUES (?, "Task", ?)',
+        simple_entities,
+    )
+    cursor.executemany(
+        'INSERT INTO "Entities" (id) VALUES (?)', [(row[0],) for row in tasks]
+    )
+    cursor.executemany(
+        'INSERT INTO "Tasks" (id, parent_id, project_id, status_id, status_list_id, '
+        "allocation_strategy, persistent_allocation, schedule_model, "
+        "schedule_constraint) "
+        'VALUES (?, ?, ?, ?, ?, "minallocated", 1, "effort", 0)',
+        [
+            (task_id, parent_id, project.id, status_id, status_list_id)
+            for task_id, parent_id in tasks
+        ],
+    )
+    DBSession.commit()
+    yield project
+
+
+def test_load_task_search_rows_is_working_properly(task_search_test_data):
+    """testing if load_task_search_rows will return the ids, names and paths of
+    all the tasks of the project with a single query
+    """
+    project, tasks = task_search_test_data
+    # load the expired project before counting the statements
+    code = project.code
+    with QueryScope("load_task_search_rows", max_statements=1):
+        rows = load_task_search_rows(project)
+
+    assert sorted(rows) == sorted(
+        [
+            TaskSearchRow(tasks["assets"].id, "Assets", code),
+            TaskSearchRow(tasks["characters"].id, "Characters", code + " | Assets"),
+            TaskSearchRow(tasks["hero"].id, "Hero", code + " | Assets | Characters"),
+            TaskSearchRow(
+                tasks["hero_model"].id, "Model", code + " | Assets | Characters | Hero"
+            ),
+            TaskSearchRow(
+                tasks["hero_rig"].id, "Rig", code + " | Assets | Characters | Hero"
+            ),
+            TaskSearchRow(
+                tasks["villain"].id, "Villain", code + " | Assets | Characters"
+            ),
+            TaskSearchRow(
+                tasks["villain_model"].id,
+                "model",
+                code + " | Assets | Characters | Villain",
+            ),
+            TaskSearchRow(tasks["sequences"].id, "Sequences", code),
+            TaskSearchRow(
+                tasks["sequence_rig"].id, "Rigging Test", code + " | Sequences"
+            ),
+        ]
+    )
+
+
+def test_search_is_working_properly(task_search_test_data):
+    """testing if TaskNameIndex.search will list the names starting with the
+    text first and the names containing it after
+    """
+    project, tasks = task_search_test_data
+    index = TaskNameIndex.from_project(project)
+    assert len(index) == 9
+
+    def search(text, limit=50):
+        return [row.id for row in index.search(text, limit=limit)]
+
+    assert search("RIG") == [tasks["hero_rig"].id, tasks["sequence_rig"].id]
+    assert search("model") == [tasks["hero_model"].id, tasks["villain_model"].id]
+    assert search("ers") == [tasks["characters"].id]
+    assert search("ence") == [tasks["sequences"].id]
+    assert search("s") == [tasks["sequences"].id]
+    # short texts only match the start of the names
+    assert search("es") == []
+    assert search("e") == []
+    assert search("") == []
+    assert search("  ") == []
+    assert search("unknown") == []
+    assert search("r", limit=1) == [tasks["hero_rig"].id]
+    assert search("e", limit=0) == []
+
+
+def test_search_latency(large_project):
+    """benchmarks searching the 200k tasks of a project as the user types"""
+    # load the expired project before counting the statements
+    assert large_project.code
+    start = time.time()
+    with QueryScope("TaskNameIndex.from_project", max_statements=1):
+        index = TaskNameIndex.from_project(large_project)
+    load_duration = time.time() - start
+    assert len(index) == 200001
+    assert load_duration < 10
+
+    # every prefix of the texts is searched as if the user typed them
+    texts = ["SEQ512_SH1210_Animation", "animation", "sh0970_l", "ion", "q9", "xyz"]
+    durations = []
+    for text in texts:
+        for i in range(1, len(text) + 1):
+            start = time.time()
+            results = index.search(text[:i], limit=50)
+            durations.append(time.time() - start)
+            assert len(results) <= 50
+
+    durations.sort()
+    # the median and the worst latencies
+    assert durations[len(durations) // 2] < 0.001
+    assert durations[-1] < 0.05
+
+    results = index.search("SEQ512_SH1210_Animation")
+    assert [(row.name, row.path) for row in results] == [
+        ("SEQ512_SH1210_Animation", "{} | SEQ512".format(large_project.code))
+    ]
+    results = index.search("Lighting", limit=3)
+    assert [row.name for row in results] == [
+        "SEQ000_SH0020_Lighting",
+        "SEQ000_SH0070_Lighting",
+        "SEQ000_SH0120_Lighting",
+    ]
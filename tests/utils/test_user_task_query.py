@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+from stalker import Asset, Status, Task, User
+from stalker.db.session import DBSession
+
+from anima.perf import QueryScope
+from anima.utils import get_task_paths, user_task_query
+
+
+def test_user_task_query_is_working_properly(create_test_db, create_project):
+    """testing if user_task_query will return the tasks of the user in the given
+    project as lightweight rows with their paths
+    """
+    project = create_project
+    user = User(
+        name="Test User", login="tuser", email="tuser@test.com", password="1234"
+    )
+    other_user = User(
+        name="Other User", login="ouser", email="ouser@test.com", password="1234"
+    )
+    char1 = Asset.query.filter(Asset.name == "Char1").first()
+    children = dict((child.name, child) for child in char1.children)
+    model, look_dev, rig = children["Model"], children["LookDev"], children["Rig"]
+    model.resources = [user, other_user]
+    rig.resources = [user]
+    look_dev.resources = [other_user]
+    wip = Status.query.filter(Status.code == "WIP").first()
+    model.status = wip
+    DBSession.add_all([user, other_user])
+    DBSession.commit()
+
+    # refresh the expired objects before measuring, then one query for the tasks
+    # and one per hierarchy level for the paths
+    assert user.id and project.id
+    with QueryScope("user_task_query", max_statements=4):
+        rows = user_task_query(user, project)
+    assert [row.id for row in rows] == [model.id, rig.id]
+    rows = dict((row.id, row) for row in rows)
+    model_row = rows[model.id]
+    assert model_row.name == model.name
+    assert model_row.entity_type == "Task"
+    assert model_row.status_id == wip.id
+    assert model_row.status_code == "WIP"
+    assert not model_row.has_children
+    assert isinstance(model_row.start, datetime.datetime)
+    assert model_row.end == model.end
+    assert model_row.schedule_timing == model.schedule_timing
+    assert model_row.schedule_unit == model.schedule_unit
+    assert model_row.path == "{} | {}".format(
+        project.code, " | ".join(parent.name for parent in model.parents)
+    )
+    assert rows[rig.id].status_code == rig.status.code
+    assert [row.id for row in user_task_query(other_user, project)] == [
+        look_dev.id,
+        model.id,
+    ]
+
+
+def test_get_task_paths_is_working_properly(create_test_db, create_project):
+    """testing if get_task_paths will return the parent names of the tasks"""
+    project = create_project
+    char1 = Asset.query.filter(Asset.name == "Char1").first()
+    tasks = [char1] + char1.children
+    root_tasks = Task.query.filter(Task.parent_id == None).all()  # noqa: E711
+    paths = get_task_paths(tasks + root_tasks, project.code)
+    for task in tasks + root_tasks:
+        assert paths[task.id] == " | ".join(
+            [project.code] + [parent.name for parent in task.parents]
+        )
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from stalker import Task, Version
+from stalker.db.session import DBSession
+
+from anima.exc import VersionCopyError
+from anima.utils.version_mover import copy_file, latest_versions_query, move_versions
+
+
+@pytest.fixture(scope="function")
+def version_mover_test_data(create_test_db, create_empty_project, tmp_path):
+    """Create tasks with versions and files in a temp repository."""
+    project = create_empty_project
+    repo = project.repositories[0]
+    repo.linux_path = str(tmp_path)
+    repo.osx_path = str(tmp_path)
+    repo.windows_path = str(tmp_path)
+    os.environ[repo.env_var] = repo.path
+    DBSession.commit()
+
+    tasks = {}
+    for name in ["Model", "Rig", "LookDev", "Layout"]:
+        tasks[name] = Task(name=name, project=project)
+    DBSession.add_all(tasks.values())
+    DBSession.commit()
+
+    versions = []
+    for task_name, take_name, count in [
+        ("Model", "Main", 3),
+        ("Model", "Hires", 2),
+        ("Model", "Main@GPU", 2),
+        ("Rig", "Main", 2),
+    ]:
+        for i in range(count):
+            v = Version(task=tasks[task_name], take_name=take_name)
+            v.created_with = "Maya2022"
+            DBSession.add(v)
+            DBSession.commit()
+            v.update_paths()
+            v.extension = ".ma"
+            DBSession.commit()
+            os.makedirs(v.absolute_path, exist_ok=True)
+            with open(v.absolute_full_path, "w") as f:
+                f.write(v.filename)
+            versions.append(v)
+
+    yield tasks, versions
+
+
+def test_latest_versions_query_is_working_properly(version_mover_test_data):
+    """testing if latest_versions_query will return the latest version of every
+    take with a single query
+    """
+    tasks, versions = version_mover_test_data
+    model, rig = tasks["Model"], tasks["Rig"]
+    assert latest_versions_query([model.id, rig.id]).all() == [
+        (model.id, "Hires", versions[4].id),
+        (model.id, "Main", versions[2].id),
+        (rig.id, "Main", versions[8].id),
+    ]
+    assert len(latest_versions_query([model.id], include_reprs=True).all()) == 3
+
+
+def test_move_versions_is_working_properly(version_mover_test_data):
+    """testing if move_versions will copy the latest versions of many task pairs"""
+    tasks, versions = version_mover_test_data
+
+    class ProgressCaller(object):
+        messages = []
+
+        def step(self, message=""):
+            self.messages.append(message)
+
+    progress_caller = ProgressCaller()
+    new_versions = move_versions(
+        [
+            (tasks["Model"], tasks["LookDev"]),
+            (tasks["Rig"].id, tasks["Layout"].id),
+            (tasks["Model"], tasks["Layout"]),
+        ],
+        max_workers=2,
+        progress_caller=progress_caller,
+    )
+
+    assert [(v.task.name, v.take_name, v.version_number) for v in new_versions] == [
+        ("LookDev", "Hires", 1),
+        ("LookDev", "Main", 1),
+        ("Layout", "Main", 1),
+        ("Layout", "Hires", 1),
+        ("Layout", "Main", 2),
+    ]
+    sources = [versions[4], versions[2], versions[8], versions[4], versions[2]]
+    for source, new_version in zip(sources, new_versions):
+        assert new_version.id is not None
+        assert new_version.extension == ".ma"
+        assert new_version.created_with == "Maya2022"
+        with open(new_version.absolute_full_path) as f:
+            assert f.read() == source.filename
+    assert sorted(progress_caller.messages) == sorted(
+        "Copied {}".format(v.absolute_full_path) for v in new_versions
+    )
+
+
+def test_move_versions_to_the_same_task(version_mover_test_data):
+    """testing if a ValueError will be raised if the versions are moved to the
+    same task and nothing will be created
+    """
+    tasks, versions = version_mover_test_data
+    version_count = Version.query.count()
+    with pytest.raises(ValueError) as cm:
+        move_versions(
+            [(tasks["Model"], tasks["LookDev"]), (tasks["Rig"], tasks["Rig"])]
+        )
+    assert str(
+        cm.value
+    ) == "Can not copy the versions of task (id={}) to itself".format(tasks["Rig"].id)
+    assert Version.query.count() == version_count
+
+
+def test_move_versions_with_failed_copies(version_mover_test_data):
+    """testing if move_versions will copy the other files, delete the versions
+    of the failed copies and raise a VersionCopyError listing them
+    """
+    tasks, versions = version_mover_test_data
+    missing_source = versions[4].absolute_full_path
+    os.remove(missing_source)
+    version_count = Version.query.count()
+
+    with pytest.raises(VersionCopyError) as cm:
+        move_versions(
+            [
+                (tasks["Model"], tasks["LookDev"]),
+                (tasks["Rig"], tasks["Layout"]),
+                (tasks["Model"], tasks["Layout"]),
+            ],
+            max_workers=2,
+        )
+
+    error = cm.value
+    assert [
+        (source, os.path.exists(destination))
+        for source, destination, _ in error.failures
+    ] == [(versions[4], False), (versions[4], False)]
+    assert all(isinstance(e, IOError) for _, _, e in error.failures)
+    assert str(error).startswith(
+        "Could not copy 2 of 5 versions:\n{} -> ".format(missing_source)
+    )
+
+    # the successfully copied versions are kept
+    assert [(v.task.name, v.take_name, v.version_number) for v in error.versions] == [
+        ("LookDev", "Main", 1),
+        ("Layout", "Main", 1),
+        ("Layout", "Main", 2),
+    ]
+    for new_version in error.versions:
+        assert os.path.exists(new_version.absolute_full_path)
+    assert Version.query.count() == version_count + 3
+    assert Version.query.filter(Version.take_name == "Hires").count() == 2
+
+
+def test_copy_file_is_working_properly(tmp_path):
+    """testing if copy_file will copy the file content to a new folder"""
+    source = tmp_path / "source.bin"
+    source.write_bytes(os.urandom(1024 * 1024 + 3))
+    destination = tmp_path / "sub" / "folder" / "destination.bin"
+    assert copy_file(str(source), str(destination), chunk_size=1000) == str(destination)
+    assert destination.read_bytes() == source.read_bytes()